@@ -0,0 +1,32 @@
+-- Create background_jobs table (Postgres-backed job queue for the AI service)
+-- Workers lease jobs with FOR UPDATE SKIP LOCKED so any replica can claim work
+
+CREATE TYPE "public"."job_status" AS ENUM('pending', 'running', 'completed', 'failed');--> statement-breakpoint
+CREATE TABLE "background_jobs" (
+	"id" uuid PRIMARY KEY DEFAULT gen_random_uuid() NOT NULL,
+	"queue" varchar(50) NOT NULL,
+	"user_id" uuid,
+	"payload" jsonb DEFAULT '{}'::jsonb NOT NULL,
+	"dedupe_key" varchar(255),
+	"status" "job_status" DEFAULT 'pending' NOT NULL,
+	"attempts" integer DEFAULT 0 NOT NULL,
+	"max_attempts" integer DEFAULT 3 NOT NULL,
+	"run_at" timestamp with time zone DEFAULT now() NOT NULL,
+	"locked_by" varchar(255),
+	"locked_until" timestamp with time zone,
+	"heartbeat_at" timestamp with time zone,
+	"result" jsonb,
+	"last_error" text,
+	"started_at" timestamp with time zone,
+	"finished_at" timestamp with time zone,
+	"created_at" timestamp with time zone DEFAULT now() NOT NULL,
+	"updated_at" timestamp with time zone DEFAULT now() NOT NULL
+);
+--> statement-breakpoint
+ALTER TABLE "background_jobs" ADD CONSTRAINT "background_jobs_user_id_users_id_fk" FOREIGN KEY ("user_id") REFERENCES "public"."users"("id") ON DELETE cascade ON UPDATE no action;
+--> statement-breakpoint
+CREATE INDEX "background_jobs_claim_idx" ON "background_jobs" USING btree ("queue","status","run_at");
+--> statement-breakpoint
+CREATE INDEX "background_jobs_user_id_idx" ON "background_jobs" USING btree ("user_id");
+--> statement-breakpoint
+CREATE UNIQUE INDEX "background_jobs_dedupe_key_unique" ON "background_jobs" USING btree ("dedupe_key");
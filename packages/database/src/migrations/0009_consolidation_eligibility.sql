@@ -0,0 +1,11 @@
+-- Consolidation eligibility: find users with new messages in one set-based query
+-- and let workers claim the largest backlogs first
+
+-- Supports per-user "messages since last_consolidated_at" range scans
+CREATE INDEX "messages_conversation_id_created_at_idx" ON "messages" USING btree ("conversation_id","created_at");
+--> statement-breakpoint
+
+-- Job priority: higher runs first among due jobs
+ALTER TABLE "background_jobs" ADD COLUMN "priority" integer DEFAULT 0 NOT NULL;--> statement-breakpoint
+DROP INDEX IF EXISTS "background_jobs_claim_idx";--> statement-breakpoint
+CREATE INDEX "background_jobs_claim_idx" ON "background_jobs" USING btree ("queue","status","priority" DESC,"run_at");
@@ -0,0 +1,14 @@
+-- Event-driven incremental consolidation: per-user pending-volume counters
+-- bumped on every chat turn; a threshold crossing schedules one debounced job
+
+CREATE TABLE "consolidation_triggers" (
+	"user_id" uuid PRIMARY KEY NOT NULL,
+	"pending_messages" integer DEFAULT 0 NOT NULL,
+	"pending_tokens" integer DEFAULT 0 NOT NULL,
+	"scheduled_job_id" uuid,
+	"updated_at" timestamp with time zone DEFAULT now() NOT NULL
+);
+--> statement-breakpoint
+ALTER TABLE "consolidation_triggers" ADD CONSTRAINT "consolidation_triggers_user_id_users_id_fk" FOREIGN KEY ("user_id") REFERENCES "public"."users"("id") ON DELETE cascade ON UPDATE no action;
+--> statement-breakpoint
+ALTER TABLE "consolidation_triggers" ADD CONSTRAINT "consolidation_triggers_scheduled_job_id_background_jobs_id_fk" FOREIGN KEY ("scheduled_job_id") REFERENCES "public"."background_jobs"("id") ON DELETE set null ON UPDATE no action;
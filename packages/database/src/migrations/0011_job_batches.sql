@@ -0,0 +1,7 @@
+-- Asynchronous job API: batch jobs fan out into child jobs, and any job can be
+-- cancelled by an operator
+
+ALTER TYPE "public"."job_status" ADD VALUE 'cancelled';--> statement-breakpoint
+ALTER TABLE "background_jobs" ADD COLUMN "parent_id" uuid;--> statement-breakpoint
+ALTER TABLE "background_jobs" ADD CONSTRAINT "background_jobs_parent_id_background_jobs_id_fk" FOREIGN KEY ("parent_id") REFERENCES "public"."background_jobs"("id") ON DELETE cascade ON UPDATE no action;--> statement-breakpoint
+CREATE INDEX "background_jobs_parent_id_idx" ON "background_jobs" USING btree ("parent_id");
@@ -0,0 +1,15 @@
+-- Incrementally maintained monthly finance totals (one row per user per month)
+
+CREATE TABLE "finance_monthly_rollups" (
+	"id" uuid PRIMARY KEY DEFAULT gen_random_uuid() NOT NULL,
+	"user_id" uuid NOT NULL,
+	"month_year" varchar(7) NOT NULL,
+	"totals" jsonb DEFAULT '{}'::jsonb NOT NULL,
+	"reconciled_at" timestamp with time zone,
+	"created_at" timestamp with time zone DEFAULT now() NOT NULL,
+	"updated_at" timestamp with time zone DEFAULT now() NOT NULL
+);
+--> statement-breakpoint
+ALTER TABLE "finance_monthly_rollups" ADD CONSTRAINT "finance_monthly_rollups_user_id_users_id_fk" FOREIGN KEY ("user_id") REFERENCES "public"."users"("id") ON DELETE cascade ON UPDATE no action;
+--> statement-breakpoint
+CREATE UNIQUE INDEX "finance_monthly_rollups_user_month_unique" ON "finance_monthly_rollups" USING btree ("user_id","month_year");
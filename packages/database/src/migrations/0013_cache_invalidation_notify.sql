@@ -0,0 +1,44 @@
+-- Cross-replica cache invalidation: every write to a table the AI service caches
+-- publishes {"user_id", "domain"} on the cache_invalidation channel (delivered on commit)
+
+CREATE OR REPLACE FUNCTION notify_cache_invalidation()
+RETURNS TRIGGER AS $$
+DECLARE
+    row_user_id uuid;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        row_user_id := OLD.user_id;
+    ELSE
+        row_user_id := NEW.user_id;
+    END IF;
+    PERFORM pg_notify(
+        'cache_invalidation',
+        json_build_object('user_id', row_user_id, 'domain', TG_ARGV[0])::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+--> statement-breakpoint
+CREATE TRIGGER notify_cache_invalidation_tracking_entries AFTER INSERT OR UPDATE OR DELETE ON tracking_entries FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('tracking');
+--> statement-breakpoint
+CREATE TRIGGER notify_cache_invalidation_habits AFTER INSERT OR UPDATE OR DELETE ON habits FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('habits');
+--> statement-breakpoint
+CREATE TRIGGER notify_cache_invalidation_habit_freezes AFTER INSERT OR UPDATE OR DELETE ON habit_freezes FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('habits');
+--> statement-breakpoint
+CREATE TRIGGER notify_cache_invalidation_incomes AFTER INSERT OR UPDATE OR DELETE ON incomes FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('finance');
+--> statement-breakpoint
+CREATE TRIGGER notify_cache_invalidation_bills AFTER INSERT OR UPDATE OR DELETE ON bills FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('finance');
+--> statement-breakpoint
+CREATE TRIGGER notify_cache_invalidation_variable_expenses AFTER INSERT OR UPDATE OR DELETE ON variable_expenses FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('finance');
+--> statement-breakpoint
+CREATE TRIGGER notify_cache_invalidation_debts AFTER INSERT OR UPDATE OR DELETE ON debts FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('finance');
+--> statement-breakpoint
+CREATE TRIGGER notify_cache_invalidation_debt_payments AFTER INSERT OR UPDATE OR DELETE ON debt_payments FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('finance');
+--> statement-breakpoint
+CREATE TRIGGER notify_cache_invalidation_investments AFTER INSERT OR UPDATE OR DELETE ON investments FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('finance');
+--> statement-breakpoint
+CREATE TRIGGER notify_cache_invalidation_user_memories AFTER INSERT OR UPDATE OR DELETE ON user_memories FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('memory');
+--> statement-breakpoint
+CREATE TRIGGER notify_cache_invalidation_knowledge_items AFTER INSERT OR UPDATE OR DELETE ON knowledge_items FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('memory');
+--> statement-breakpoint
+CREATE TRIGGER notify_cache_invalidation_habit_completions AFTER INSERT OR UPDATE OR DELETE ON habit_completions FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation('habits');
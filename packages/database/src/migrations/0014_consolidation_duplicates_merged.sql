@@ -0,0 +1,3 @@
+-- Knowledge items merged into a lexical near-duplicate during consolidation
+
+ALTER TABLE "memory_consolidations" ADD COLUMN "duplicates_merged" integer DEFAULT 0 NOT NULL;
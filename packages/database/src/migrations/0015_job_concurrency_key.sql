@@ -0,0 +1,6 @@
+-- Per-entity concurrency key for background jobs: at most one pending or
+-- running job per key (e.g. one consolidation per user), unlike dedupe_key
+-- which is unique forever
+
+ALTER TABLE "background_jobs" ADD COLUMN "concurrency_key" varchar(255);--> statement-breakpoint
+CREATE UNIQUE INDEX "background_jobs_concurrency_key_active_unique" ON "background_jobs" USING btree ("concurrency_key") WHERE "background_jobs"."status" IN ('pending', 'running');
@@ -0,0 +1,32 @@
+-- Drop a (user, month) finance rollup when a transaction writes that month's
+-- source rows without applying deltas to it (e.g. the web app), so readers fall
+-- back to live totals until the reconcile job rebuilds it. The AI service delta
+-- path lists the rollups it maintains in app.finance_rollup_months; the check
+-- is deferred to commit because the deltas are applied after the source write.
+
+CREATE OR REPLACE FUNCTION invalidate_finance_rollup()
+RETURNS TRIGGER AS $$
+DECLARE
+    maintained text[] := string_to_array(
+        coalesce(current_setting('app.finance_rollup_months', true), ''), ','
+    );
+BEGIN
+    IF TG_OP <> 'INSERT' AND NOT (OLD.user_id::text || ':' || OLD.month_year) = ANY (maintained) THEN
+        DELETE FROM finance_monthly_rollups
+        WHERE user_id = OLD.user_id AND month_year = OLD.month_year;
+    END IF;
+    IF TG_OP <> 'DELETE' AND NOT (NEW.user_id::text || ':' || NEW.month_year) = ANY (maintained) THEN
+        DELETE FROM finance_monthly_rollups
+        WHERE user_id = NEW.user_id AND month_year = NEW.month_year;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+--> statement-breakpoint
+CREATE CONSTRAINT TRIGGER invalidate_finance_rollup_bills AFTER INSERT OR UPDATE OR DELETE ON bills DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION invalidate_finance_rollup();
+--> statement-breakpoint
+CREATE CONSTRAINT TRIGGER invalidate_finance_rollup_variable_expenses AFTER INSERT OR UPDATE OR DELETE ON variable_expenses DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION invalidate_finance_rollup();
+--> statement-breakpoint
+CREATE CONSTRAINT TRIGGER invalidate_finance_rollup_incomes AFTER INSERT OR UPDATE OR DELETE ON incomes DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION invalidate_finance_rollup();
+--> statement-breakpoint
+CREATE CONSTRAINT TRIGGER invalidate_finance_rollup_debt_payments AFTER INSERT OR UPDATE OR DELETE ON debt_payments DEFERRABLE INITIALLY DEFERRED FOR EACH ROW EXECUTE FUNCTION invalidate_finance_rollup();
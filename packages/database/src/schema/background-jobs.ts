@@ -0,0 +1,89 @@
+// packages/database/src/schema/background-jobs.ts
+// Postgres-backed job queue consumed by the Python AI service workers
+
+import { sql } from 'drizzle-orm';
+import {
+  pgTable,
+  uuid,
+  varchar,
+  timestamp,
+  jsonb,
+  integer,
+  text,
+  index,
+  uniqueIndex,
+  type AnyPgColumn,
+} from 'drizzle-orm/pg-core';
+import { users } from './users';
+import { jobStatusEnum } from './enums';
+
+/**
+ * Background jobs table - leased with FOR UPDATE SKIP LOCKED so any replica
+ * can claim work without double execution.
+ *
+ * A running job holds a lease until `lockedUntil`; workers extend it with
+ * heartbeats. Expired leases become claimable again (visibility timeout).
+ */
+export const backgroundJobs = pgTable(
+  'background_jobs',
+  {
+    id: uuid('id').primaryKey().defaultRandom(),
+    queue: varchar('queue', { length: 50 }).notNull(),
+    userId: uuid('user_id').references(() => users.id, { onDelete: 'cascade' }),
+    payload: jsonb('payload').$type<Record<string, unknown>>().notNull().default({}),
+    // Batch jobs fan out into child jobs; progress is aggregated over children
+    parentId: uuid('parent_id').references((): AnyPgColumn => backgroundJobs.id, {
+      onDelete: 'cascade',
+    }),
+
+    // Idempotency: the same logical job is enqueued once (e.g. per user per day)
+    dedupeKey: varchar('dedupe_key', { length: 255 }),
+    // At most one pending or running job per key (e.g. one consolidation per user)
+    concurrencyKey: varchar('concurrency_key', { length: 255 }),
+
+    // State
+    status: jobStatusEnum('status').notNull().default('pending'),
+    attempts: integer('attempts').notNull().default(0),
+    maxAttempts: integer('max_attempts').notNull().default(3),
+    // Higher runs first among due jobs (e.g. consolidation backlog size)
+    priority: integer('priority').notNull().default(0),
+    runAt: timestamp('run_at', { withTimezone: true }).notNull().defaultNow(),
+
+    // Lease
+    lockedBy: varchar('locked_by', { length: 255 }),
+    lockedUntil: timestamp('locked_until', { withTimezone: true }),
+    heartbeatAt: timestamp('heartbeat_at', { withTimezone: true }),
+
+    // Outcome
+    result: jsonb('result'),
+    lastError: text('last_error'),
+
+    // Timestamps
+    startedAt: timestamp('started_at', { withTimezone: true }),
+    finishedAt: timestamp('finished_at', { withTimezone: true }),
+    createdAt: timestamp('created_at', { withTimezone: true })
+      .notNull()
+      .defaultNow(),
+    updatedAt: timestamp('updated_at', { withTimezone: true })
+      .notNull()
+      .defaultNow(),
+  },
+  (table) => [
+    index('background_jobs_claim_idx').on(
+      table.queue,
+      table.status,
+      table.priority.desc(),
+      table.runAt
+    ),
+    index('background_jobs_user_id_idx').on(table.userId),
+    index('background_jobs_parent_id_idx').on(table.parentId),
+    uniqueIndex('background_jobs_dedupe_key_unique').on(table.dedupeKey),
+    uniqueIndex('background_jobs_concurrency_key_active_unique')
+      .on(table.concurrencyKey)
+      .where(sql`${table.status} IN ('pending', 'running')`),
+  ]
+);
+
+// Types
+export type BackgroundJob = typeof backgroundJobs.$inferSelect;
+export type NewBackgroundJob = typeof backgroundJobs.$inferInsert;
@@ -0,0 +1,33 @@
+// packages/database/src/schema/consolidation-triggers.ts
+// Per-user pending-volume counters for event-driven incremental consolidation
+
+import { pgTable, uuid, integer, timestamp } from 'drizzle-orm/pg-core';
+import { users } from './users';
+import { backgroundJobs } from './background-jobs';
+
+/**
+ * Consolidation triggers table - messages and estimated tokens persisted
+ * since the user's last consolidation started.
+ *
+ * The AI service bumps the counters on every chat turn and schedules a
+ * low-priority consolidation job once a threshold is crossed. While
+ * `scheduledJobId` is set, further turns only postpone that job (debounce)
+ * instead of enqueueing another one (coalescing).
+ */
+export const consolidationTriggers = pgTable('consolidation_triggers', {
+  userId: uuid('user_id')
+    .primaryKey()
+    .references(() => users.id, { onDelete: 'cascade' }),
+  pendingMessages: integer('pending_messages').notNull().default(0),
+  pendingTokens: integer('pending_tokens').notNull().default(0),
+  scheduledJobId: uuid('scheduled_job_id').references(() => backgroundJobs.id, {
+    onDelete: 'set null',
+  }),
+  updatedAt: timestamp('updated_at', { withTimezone: true })
+    .notNull()
+    .defaultNow(),
+});
+
+// Types
+export type ConsolidationTrigger = typeof consolidationTriggers.$inferSelect;
+export type NewConsolidationTrigger = typeof consolidationTriggers.$inferInsert;
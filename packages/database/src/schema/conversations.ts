@@ -69,6 +69,11 @@ export const messages = pgTable(
   (table) => [
     index('messages_conversation_id_idx').on(table.conversationId),
     index('messages_created_at_idx').on(table.createdAt),
+    // Per-user "messages since watermark" scans (consolidation eligibility)
+    index('messages_conversation_id_created_at_idx').on(
+      table.conversationId,
+      table.createdAt
+    ),
   ]
 );
 
@@ -290,6 +290,18 @@ export const consolidationStatusEnum = pgEnum('consolidation_status', [
   'partial',
 ]);
 
+// ============================================================================
+// Background Jobs (Python AI service job queue)
+// ============================================================================
+
+export const jobStatusEnum = pgEnum('job_status', [
+  'pending',
+  'running',
+  'completed',
+  'failed',
+  'cancelled',
+]);
+
 // ============================================================================
 // Exports (LGPD)
 // ============================================================================
@@ -341,3 +353,4 @@ export type ExportType = (typeof exportTypeEnum.enumValues)[number];
 export type KnowledgeItemType = (typeof knowledgeItemTypeEnum.enumValues)[number];
 export type KnowledgeItemSource = (typeof knowledgeItemSourceEnum.enumValues)[number];
 export type ConsolidationStatus = (typeof consolidationStatusEnum.enumValues)[number];
+export type JobStatus = (typeof jobStatusEnum.enumValues)[number];
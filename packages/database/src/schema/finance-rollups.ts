@@ -0,0 +1,69 @@
+// packages/database/src/schema/finance-rollups.ts
+// Per-user monthly finance totals maintained incrementally by the AI service
+
+import {
+  pgTable,
+  uuid,
+  varchar,
+  jsonb,
+  timestamp,
+  uniqueIndex,
+} from 'drizzle-orm/pg-core';
+import { users } from './users';
+
+/**
+ * Totals of one rollup bucket: sums of expected/actual amounts and the
+ * number of source rows.
+ */
+export interface FinanceRollupBucket {
+  expected: number;
+  actual: number;
+  count: number;
+}
+
+/**
+ * Finance monthly rollups table - one row per user per month with totals
+ * of bills, variable expenses, incomes and debt payments.
+ *
+ * `totals` maps `"<source>:<category>:<status>"` (e.g. `"bill:utilities:paid"`,
+ * `"expense:food:active"`, `"income:salary:active"`, `"debt_payment::paid"`)
+ * to a bucket. The AI service write tools apply deltas as they write; any
+ * other write to a month's source rows deletes its rollup at commit (trigger
+ * in migration 0016) so readers use live totals. A periodic reconcile job
+ * recomputes rows from the source tables and stamps `reconciledAt`.
+ */
+export const financeMonthlyRollups = pgTable(
+  'finance_monthly_rollups',
+  {
+    id: uuid('id').primaryKey().defaultRandom(),
+    userId: uuid('user_id')
+      .notNull()
+      .references(() => users.id, { onDelete: 'cascade' }),
+    monthYear: varchar('month_year', { length: 7 }).notNull(),
+    totals: jsonb('totals')
+      .$type<Record<string, FinanceRollupBucket>>()
+      .notNull()
+      .default({}),
+
+    // Last time the row was recomputed from the source tables
+    reconciledAt: timestamp('reconciled_at', { withTimezone: true }),
+
+    // Timestamps
+    createdAt: timestamp('created_at', { withTimezone: true })
+      .notNull()
+      .defaultNow(),
+    updatedAt: timestamp('updated_at', { withTimezone: true })
+      .notNull()
+      .defaultNow(),
+  },
+  (table) => [
+    uniqueIndex('finance_monthly_rollups_user_month_unique').on(
+      table.userId,
+      table.monthYear
+    ),
+  ]
+);
+
+// Types
+export type FinanceMonthlyRollup = typeof financeMonthlyRollups.$inferSelect;
+export type NewFinanceMonthlyRollup = typeof financeMonthlyRollups.$inferInsert;
@@ -28,6 +28,7 @@ export * from './bills';
 export * from './variable-expenses';
 export * from './debts';
 export * from './debt-payments';
+export * from './finance-rollups';
 export * from './investments';
 export * from './exports';
 export * from './audit';
@@ -37,5 +38,9 @@ export * from './user-memories';
 export * from './knowledge-items';
 export * from './memory-consolidations';
 
+// Background Jobs (Python AI service job queue)
+export * from './background-jobs';
+export * from './consolidation-triggers';
+
 // Custom Metrics (M2.1)
 export * from './custom-metrics';
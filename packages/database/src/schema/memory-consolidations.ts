@@ -51,6 +51,8 @@ export const memoryConsolidations = pgTable(
     factsCreated: integer('facts_created').notNull().default(0),
     factsUpdated: integer('facts_updated').notNull().default(0),
     inferencesCreated: integer('inferences_created').notNull().default(0),
+    // New items merged into a lexical near-duplicate instead of created
+    duplicatesMerged: integer('duplicates_merged').notNull().default(0),
 
     // Results
     memoryUpdates: jsonb('memory_updates').$type<MemoryUpdates>(),
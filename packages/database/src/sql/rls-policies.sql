@@ -191,6 +191,20 @@ CREATE POLICY "Users can only access own debt_payments" ON debt_payments
 CREATE POLICY "Users can only access own investments" ON investments
   FOR ALL USING (user_id = (SELECT auth.uid()));
 
+ALTER TABLE finance_monthly_rollups ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can only access own finance_monthly_rollups" ON finance_monthly_rollups
+  FOR ALL USING (user_id = (SELECT auth.uid()));
+
+-- ============================================================================
+-- Background Jobs (Python AI service job queue)
+-- ============================================================================
+-- No user policies: only service_role (which bypasses RLS) enqueues, claims
+-- and reads jobs, and maintains the incremental consolidation counters.
+
+ALTER TABLE background_jobs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE consolidation_triggers ENABLE ROW LEVEL SECURITY;
+
 -- ============================================================================
 -- AUTH TRIGGER: Sync email changes from auth.users to public.users
 -- ============================================================================
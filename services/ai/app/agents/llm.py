@@ -2,7 +2,9 @@
 
 from langchain_core.language_models.chat_models import BaseChatModel
 
+from app.agents.llm_scheduler import scheduled_model
 from app.config import Settings
+from app.db.connection_guard import llm_callbacks
 
 
 def create_llm(settings: Settings, *, temperature: float = 0.7) -> BaseChatModel:
@@ -11,6 +13,8 @@ def create_llm(settings: Settings, *, temperature: float = 0.7) -> BaseChatModel
     Supported providers:
     - ``gemini`` (default) → ``ChatGoogleGenerativeAI``
     - ``anthropic`` → ``ChatAnthropic``
+
+    Calls go through the provider's ``LLMScheduler`` (app/agents/llm_scheduler.py).
     """
     provider = settings.LLM_PROVIDER.lower()
     model = settings.LLM_MODEL
@@ -18,19 +22,21 @@ def create_llm(settings: Settings, *, temperature: float = 0.7) -> BaseChatModel
     if provider == "gemini":
         from langchain_google_genai import ChatGoogleGenerativeAI
 
-        return ChatGoogleGenerativeAI(
+        return scheduled_model(ChatGoogleGenerativeAI, provider)(
             model=model,
             google_api_key=settings.GEMINI_API_KEY,
             temperature=temperature,
+            callbacks=llm_callbacks(settings),
         )
 
     if provider == "anthropic":
         from langchain_anthropic import ChatAnthropic
 
-        return ChatAnthropic(
+        return scheduled_model(ChatAnthropic, provider)(
             model=model,
             anthropic_api_key=settings.ANTHROPIC_API_KEY,
             temperature=temperature,
+            callbacks=llm_callbacks(settings),
         )
 
     msg = f"Unsupported LLM provider: {provider}. Use 'gemini' or 'anthropic'."
@@ -46,8 +52,9 @@ def create_triage_llm(settings: Settings) -> BaseChatModel:
     """
     from langchain_google_genai import ChatGoogleGenerativeAI
 
-    return ChatGoogleGenerativeAI(
+    return scheduled_model(ChatGoogleGenerativeAI, "gemini")(
         model=settings.TRIAGE_LLM_MODEL,
         google_api_key=settings.GEMINI_API_KEY,
         temperature=0,
+        callbacks=llm_callbacks(settings),
     )
@@ -0,0 +1,280 @@
+"""Batch LLM clients — submit prompts now, collect completions later.
+
+Provider batch APIs process requests asynchronously (usually within hours)
+at a fraction of the synchronous price, and outside the rate limits shared
+with interactive traffic. Every client takes the same ``BatchRequest`` list,
+returns an opaque batch id, reports when the batch has finished and then
+yields one ``BatchResult`` per request that came back. A request missing from
+the results (expired, cancelled batch) failed as well.
+
+Supported providers (``LLM_BATCH_PROVIDER``, default ``LLM_PROVIDER``):
+- ``anthropic`` → Message Batches API
+- ``gemini`` → Batch API, with requests uploaded as a JSONL file
+- ``local`` → file-based stand-in (``LLM_BATCH_LOCAL_DIR``) that answers
+  through the synchronous model; used in development and tests
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import logging
+import uuid as _uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Protocol
+
+from app.agents.llm import create_llm
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable, Sequence
+
+    from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+# Anthropic requires an explicit output cap per request
+_ANTHROPIC_MAX_TOKENS = 8192
+
+_GEMINI_DONE_STATES = frozenset(
+    {
+        "JOB_STATE_SUCCEEDED",
+        "JOB_STATE_PARTIALLY_SUCCEEDED",
+        "JOB_STATE_FAILED",
+        "JOB_STATE_CANCELLED",
+        "JOB_STATE_EXPIRED",
+    }
+)
+
+
+@dataclass(frozen=True, slots=True)
+class BatchRequest:
+    # Unique within the batch; letters, digits, "_" and "-" only (max 64)
+    custom_id: str
+    prompt: str
+
+
+@dataclass(frozen=True, slots=True)
+class BatchResult:
+    custom_id: str
+    output: str | None = None
+    error: str | None = None
+
+
+class LLMBatchClient(Protocol):
+    async def submit(self, requests: Sequence[BatchRequest]) -> str:
+        """Submit *requests* as one batch; returns the batch id."""
+        ...
+
+    async def poll(self, batch_id: str) -> bool:
+        """True once the batch has finished processing (results are final)."""
+        ...
+
+    async def results(self, batch_id: str) -> list[BatchResult]:
+        """Results of a finished batch, one per request that came back."""
+        ...
+
+
+def create_batch_client(settings: Settings, *, temperature: float = 0.7) -> LLMBatchClient:
+    """Create the batch client for ``LLM_BATCH_PROVIDER`` (default ``LLM_PROVIDER``)."""
+    provider = (settings.LLM_BATCH_PROVIDER or settings.LLM_PROVIDER).lower()
+
+    if provider == "anthropic":
+        return AnthropicBatchClient(settings, temperature=temperature)
+
+    if provider == "gemini":
+        return GeminiBatchClient(settings, temperature=temperature)
+
+    if provider == "local":
+        llm = create_llm(settings, temperature=temperature)
+
+        async def _respond(prompt: str) -> str:
+            return (await llm.ainvoke(prompt)).text
+
+        return LocalBatchClient(settings.LLM_BATCH_LOCAL_DIR, responder=_respond)
+
+    msg = f"Unsupported LLM batch provider: {provider}. Use 'gemini', 'anthropic' or 'local'."
+    raise ValueError(msg)
+
+
+class AnthropicBatchClient:
+    """Anthropic Message Batches API."""
+
+    def __init__(self, settings: Settings, *, temperature: float) -> None:
+        from anthropic import AsyncAnthropic
+
+        self._client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
+        self._model = settings.LLM_MODEL
+        self._temperature = temperature
+
+    async def submit(self, requests: Sequence[BatchRequest]) -> str:
+        batch = await self._client.messages.batches.create(
+            requests=[
+                {
+                    "custom_id": request.custom_id,
+                    "params": {
+                        "model": self._model,
+                        "max_tokens": _ANTHROPIC_MAX_TOKENS,
+                        "temperature": self._temperature,
+                        "messages": [{"role": "user", "content": request.prompt}],
+                    },
+                }
+                for request in requests
+            ]
+        )
+        return batch.id
+
+    async def poll(self, batch_id: str) -> bool:
+        batch = await self._client.messages.batches.retrieve(batch_id)
+        return batch.processing_status == "ended"
+
+    async def results(self, batch_id: str) -> list[BatchResult]:
+        results: list[BatchResult] = []
+        async for entry in await self._client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                text = "".join(
+                    block.text for block in entry.result.message.content if block.type == "text"
+                )
+                results.append(BatchResult(entry.custom_id, output=text))
+            elif entry.result.type == "errored":
+                error = entry.result.error.error
+                results.append(BatchResult(entry.custom_id, error=f"{error.type}: {error.message}"))
+            else:
+                results.append(BatchResult(entry.custom_id, error=entry.result.type))
+        return results
+
+
+class GeminiBatchClient:
+    """Gemini Batch API; requests are uploaded as a JSONL file and results come back as one."""
+
+    def __init__(self, settings: Settings, *, temperature: float) -> None:
+        from google import genai
+
+        self._client = genai.Client(api_key=settings.GEMINI_API_KEY)
+        self._model = settings.LLM_MODEL
+        self._temperature = temperature
+
+    async def submit(self, requests: Sequence[BatchRequest]) -> str:
+        lines = [
+            json.dumps(
+                {
+                    "key": request.custom_id,
+                    "request": {
+                        "contents": [{"role": "user", "parts": [{"text": request.prompt}]}],
+                        "generation_config": {"temperature": self._temperature},
+                    },
+                },
+                ensure_ascii=False,
+            )
+            for request in requests
+        ]
+        uploaded = await self._client.aio.files.upload(
+            file=io.BytesIO("\n".join(lines).encode()),
+            config={"mime_type": "jsonl", "display_name": f"batch-{_uuid.uuid4().hex[:12]}"},
+        )
+        if uploaded.name is None:
+            msg = "Gemini file upload returned no file name"
+            raise RuntimeError(msg)
+        job = await self._client.aio.batches.create(model=self._model, src=uploaded.name)
+        if job.name is None:
+            msg = "Gemini batch creation returned no job name"
+            raise RuntimeError(msg)
+        return job.name
+
+    async def poll(self, batch_id: str) -> bool:
+        job = await self._client.aio.batches.get(name=batch_id)
+        return job.state is not None and job.state.name in _GEMINI_DONE_STATES
+
+    async def results(self, batch_id: str) -> list[BatchResult]:
+        job = await self._client.aio.batches.get(name=batch_id)
+        if job.dest is None or job.dest.file_name is None:
+            logger.warning("Gemini batch %s ended without results (%s)", batch_id, job.state)
+            return []
+        content = await self._client.aio.files.download(file=job.dest.file_name)
+        results: list[BatchResult] = []
+        for line in content.decode().splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            key = str(entry.get("key", ""))
+            if "response" not in entry:
+                results.append(BatchResult(key, error=json.dumps(entry.get("error") or entry)))
+                continue
+            parts = [
+                part.get("text", "")
+                for candidate in entry["response"].get("candidates", [])[:1]
+                for part in candidate.get("content", {}).get("parts", [])
+            ]
+            results.append(BatchResult(key, output="".join(parts)))
+        return results
+
+
+class LocalBatchClient:
+    """File-based stand-in for a provider batch API.
+
+    ``submit`` writes ``<directory>/<batch_id>/requests.jsonl``. The batch has
+    finished once ``results.jsonl`` exists next to it: written by whoever
+    plays the provider (tests), or, with a *responder*, on the first ``poll``
+    by answering every request through it. A responder error fails only its
+    request.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        *,
+        responder: Callable[[str], Awaitable[str]] | None = None,
+    ) -> None:
+        self._directory = Path(directory)
+        self._responder = responder
+
+    def requests_path(self, batch_id: str) -> Path:
+        return self._directory / batch_id / "requests.jsonl"
+
+    def results_path(self, batch_id: str) -> Path:
+        return self._directory / batch_id / "results.jsonl"
+
+    async def submit(self, requests: Sequence[BatchRequest]) -> str:
+        batch_id = _uuid.uuid4().hex
+        lines = [{"custom_id": request.custom_id, "prompt": request.prompt} for request in requests]
+        await asyncio.to_thread(_write_jsonl, self.requests_path(batch_id), lines)
+        return batch_id
+
+    async def poll(self, batch_id: str) -> bool:
+        results_path = self.results_path(batch_id)
+        if results_path.exists():
+            return True
+        if self._responder is None:
+            return False
+        lines: list[dict[str, Any]] = []
+        for request in await asyncio.to_thread(_read_jsonl, self.requests_path(batch_id)):
+            try:
+                output = await self._responder(request["prompt"])
+            except Exception as exc:
+                lines.append({"custom_id": request["custom_id"], "error": repr(exc)})
+            else:
+                lines.append({"custom_id": request["custom_id"], "output": output})
+        await asyncio.to_thread(_write_jsonl, results_path, lines)
+        return True
+
+    async def results(self, batch_id: str) -> list[BatchResult]:
+        lines = await asyncio.to_thread(_read_jsonl, self.results_path(batch_id))
+        return [
+            BatchResult(line["custom_id"], output=line.get("output"), error=line.get("error"))
+            for line in lines
+        ]
+
+
+def _write_jsonl(path: Path, lines: list[dict[str, Any]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(
+        "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines), encoding="utf-8"
+    )
+    tmp.replace(path)
+
+
+def _read_jsonl(path: Path) -> list[dict[str, Any]]:
+    text = path.read_text(encoding="utf-8")
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
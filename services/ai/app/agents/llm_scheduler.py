@@ -0,0 +1,415 @@
+"""Priority-aware admission for outbound LLM calls, shared by chat and workers.
+
+Every chat model built by app/agents/llm.py is a ``ScheduledChatModel``: its
+async generate/stream waits until the provider's ``LLMScheduler`` admits the
+call and frees the slot when the call returns, fails or is cancelled. Calls to
+one provider share these limits:
+
+- ``LLM_MAX_CONCURRENCY`` calls in flight.
+- ``LLM_TOKENS_PER_MINUTE`` estimated tokens, as a token bucket. The estimate
+  is corrected with the reported usage once the call ends.
+
+Calls carry a priority class, taken from ``llm_priority`` (a ContextVar, so
+tasks inherit it). Chat requests are ``interactive`` by default; the job
+worker runs handlers as ``background``. Background calls yield to interactive
+ones in three ways:
+
+- They are admitted only while no interactive call is waiting.
+- They never take the last ``LLM_INTERACTIVE_RESERVED_CONCURRENCY`` slots, so
+  their share shrinks as interactive load rises.
+- They never drain the last quarter of the token bucket.
+
+Within a class, waiting calls are served round-robin across users, so one
+user's burst does not queue everyone else behind it. Queue times are kept per
+class and reported by ``llm_scheduler_stats`` (see /health).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, ClassVar, cast
+
+from langchain_core.language_models.chat_models import BaseChatModel
+
+from app.api.middleware.request_id import user_id_var
+from app.config import get_settings
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator, Callable, Iterator
+
+    from langchain_core.callbacks import AsyncCallbackManagerForLLMRun
+    from langchain_core.messages import BaseMessage
+    from langchain_core.outputs import ChatGenerationChunk, ChatResult
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+_PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+_CHARS_PER_TOKEN = 4
+# Output tokens assumed per call until the provider reports real usage
+_OUTPUT_TOKEN_ESTIMATE = 512
+# Share of the token bucket background calls leave for interactive ones
+_INTERACTIVE_TOKEN_RESERVE = 0.25
+# Queue times kept per priority class for the percentiles in stats()
+_WAIT_SAMPLES = 512
+# Waits at least this long are logged
+_SLOW_WAIT_SECONDS = 1.0
+
+_priority: ContextVar[str] = ContextVar("llm_priority", default=INTERACTIVE)
+_fair_key: ContextVar[str | None] = ContextVar("llm_fair_key", default=None)
+# Set while a scheduled call holds its slot
+_admitted: ContextVar[bool] = ContextVar("llm_admitted", default=False)
+
+
+@contextmanager
+def llm_priority(priority: str, *, key: str | None = None) -> Iterator[None]:
+    """Run LLM calls made in this context (and tasks spawned in it) as *priority*.
+
+    *key* identifies whose work it is for fair queuing; it defaults to the
+    request's user id.
+    """
+    if priority not in _PRIORITIES:
+        msg = f"Unknown LLM priority: {priority!r}"
+        raise ValueError(msg)
+    priority_token = _priority.set(priority)
+    key_token = _fair_key.set(key)
+    try:
+        yield
+    finally:
+        _fair_key.reset(key_token)
+        _priority.reset(priority_token)
+
+
+def current_llm_priority() -> str:
+    return _priority.get()
+
+
+@dataclass(frozen=True, slots=True)
+class LLMLease:
+    priority: str
+    tokens: int
+
+
+@dataclass(slots=True)
+class _Waiter:
+    priority: str
+    key: str
+    tokens: int
+    enqueued_at: float
+    future: asyncio.Future[LLMLease]
+
+
+@dataclass(slots=True)
+class _ClassStats:
+    in_flight: int = 0
+    admitted: int = 0
+    waits: deque[float] = field(default_factory=lambda: deque(maxlen=_WAIT_SAMPLES))
+
+
+class LLMScheduler:
+    """Admission control for one provider (see module docstring)."""
+
+    def __init__(
+        self,
+        provider: str,
+        *,
+        max_concurrency: int,
+        background_max_concurrency: int,
+        interactive_reserved_concurrency: int,
+        tokens_per_minute: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.provider = provider
+        self._max_concurrency = max(max_concurrency, 1)
+        self._background_max = max(background_max_concurrency, 1)
+        # Background calls always get at least one slot
+        self._reserved = min(max(interactive_reserved_concurrency, 0), self._max_concurrency - 1)
+        self._capacity = float(tokens_per_minute)
+        self._tokens = self._capacity
+        self._clock = clock
+        self._refilled_at = clock()
+        self._queues: dict[str, OrderedDict[str, deque[_Waiter]]] = {
+            p: OrderedDict() for p in _PRIORITIES
+        }
+        self._stats = {p: _ClassStats() for p in _PRIORITIES}
+        self._refill_timer: asyncio.TimerHandle | None = None
+
+    async def acquire(self, priority: str, key: str, tokens: int) -> LLMLease:
+        """Wait until a call of *priority* estimated at *tokens* may start."""
+        waiter = _Waiter(
+            priority, key, tokens, self._clock(), asyncio.get_running_loop().create_future()
+        )
+        self._queues[priority].setdefault(key, deque()).append(waiter)
+        self._pump()
+        try:
+            return await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(waiter.future.result())  # Admitted as we were cancelled
+            else:
+                self._discard(waiter)
+            raise
+
+    def release(self, lease: LLMLease, *, used_tokens: int | None = None) -> None:
+        """Free *lease*'s slot; *used_tokens* replaces its estimate in the bucket."""
+        self._stats[lease.priority].in_flight -= 1
+        if self._capacity and used_tokens is not None:
+            self._refill()
+            self._tokens = min(self._tokens + lease.tokens - used_tokens, self._capacity)
+        self._pump()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "inFlight": sum(s.in_flight for s in self._stats.values()),
+            "tokensAvailable": round(self._tokens) if self._capacity else None,
+            "classes": {
+                priority: {
+                    "waiting": sum(len(q) for q in self._queues[priority].values()),
+                    "inFlight": s.in_flight,
+                    "admitted": s.admitted,
+                    "waitP50Ms": _percentile_ms(s.waits, 0.5),
+                    "waitP95Ms": _percentile_ms(s.waits, 0.95),
+                    "waitMaxMs": _percentile_ms(s.waits, 1.0),
+                }
+                for priority, s in self._stats.items()
+            },
+        }
+
+    def _pump(self) -> None:
+        """Admit waiting calls, interactive first, until a limit is hit."""
+        while True:
+            priority = self._next_class()
+            if priority is None:
+                return
+            queue = self._queues[priority]
+            key, waiters = next(iter(queue.items()))
+            waiter = waiters[0]
+            # Cancelled while queued; acquire() has not discarded it yet
+            skip = waiter.future.done()
+            if not skip and not self._take_tokens(waiter):
+                return
+            waiters.popleft()
+            # Round-robin: this user goes behind the others waiting in its class
+            if waiters:
+                queue.move_to_end(key)
+            else:
+                del queue[key]
+            if not skip:
+                self._admit(waiter)
+
+    def _next_class(self) -> str | None:
+        in_flight = sum(s.in_flight for s in self._stats.values())
+        if in_flight >= self._max_concurrency:
+            return None
+        if self._queues[INTERACTIVE]:
+            return INTERACTIVE
+        if (
+            self._queues[BACKGROUND]
+            and self._stats[BACKGROUND].in_flight < self._background_max
+            and in_flight < self._max_concurrency - self._reserved
+        ):
+            return BACKGROUND
+        return None
+
+    def _take_tokens(self, waiter: _Waiter) -> bool:
+        if not self._capacity:
+            return True
+        self._refill()
+        # A call larger than the whole bucket waits for a full one, not forever
+        needed = min(float(waiter.tokens), self._capacity)
+        if waiter.priority == BACKGROUND:
+            needed = min(needed + self._capacity * _INTERACTIVE_TOKEN_RESERVE, self._capacity)
+        if self._tokens >= needed:
+            self._tokens -= waiter.tokens
+            return True
+        self._schedule_refill((needed - self._tokens) / (self._capacity / 60.0))
+        return False
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(
+            self._tokens + (now - self._refilled_at) * self._capacity / 60.0, self._capacity
+        )
+        self._refilled_at = now
+
+    def _schedule_refill(self, delay: float) -> None:
+        if self._refill_timer is not None:
+            self._refill_timer.cancel()
+        self._refill_timer = asyncio.get_running_loop().call_later(delay, self._on_refill)
+
+    def _on_refill(self) -> None:
+        self._refill_timer = None
+        self._pump()
+
+    def _admit(self, waiter: _Waiter) -> None:
+        wait = self._clock() - waiter.enqueued_at
+        stats = self._stats[waiter.priority]
+        stats.in_flight += 1
+        stats.admitted += 1
+        stats.waits.append(wait)
+        if wait >= _SLOW_WAIT_SECONDS:
+            logger.info(
+                "%s LLM call queued %.1fs for %s (user %s)",
+                waiter.priority,
+                wait,
+                self.provider,
+                waiter.key or "-",
+            )
+        waiter.future.set_result(LLMLease(waiter.priority, waiter.tokens))
+
+    def _discard(self, waiter: _Waiter) -> None:
+        queue = self._queues[waiter.priority]
+        waiters = queue.get(waiter.key)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        if not waiters:
+            del queue[waiter.key]
+        # The cancelled call may have been the one blocking the head of the queue
+        self._pump()
+
+
+def _percentile_ms(samples: deque[float], q: float) -> float | None:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000, 1)
+
+
+_schedulers: dict[str, LLMScheduler] = {}
+
+
+def get_llm_scheduler(provider: str) -> LLMScheduler | None:
+    """Process-wide scheduler for *provider*, or None when ``LLM_SCHEDULER_ENABLED`` is off."""
+    settings = get_settings()
+    if not settings.LLM_SCHEDULER_ENABLED:
+        return None
+    provider = provider.lower()
+    scheduler = _schedulers.get(provider)
+    if scheduler is None:
+        scheduler = _schedulers[provider] = LLMScheduler(
+            provider,
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            background_max_concurrency=settings.LLM_BACKGROUND_MAX_CONCURRENCY,
+            interactive_reserved_concurrency=settings.LLM_INTERACTIVE_RESERVED_CONCURRENCY,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+        )
+    return scheduler
+
+
+def llm_scheduler_stats() -> dict[str, Any]:
+    """Stats of every scheduler created so far, by provider."""
+    return {provider: scheduler.stats() for provider, scheduler in _schedulers.items()}
+
+
+def clear_llm_schedulers() -> None:
+    _schedulers.clear()
+
+
+class ScheduledChatModel(BaseChatModel):
+    """Chat model whose async calls are admitted by its provider's ``LLMScheduler``.
+
+    Not instantiated directly: ``scheduled_model`` mixes it in front of a
+    provider class, so ``super()`` reaches the provider's implementation and
+    ``bind_tools`` / ``with_structured_output`` stay the provider's own. The
+    slot is held in ``try``/``finally`` around the provider call, so it is
+    freed on errors and on cancellation (timeouts, client disconnects) alike.
+    Sync calls (``invoke``) are not scheduled; the app only uses the async API.
+    """
+
+    llm_provider: ClassVar[str] = ""
+    # Whether the provider class streams; this class always overrides _astream
+    provider_streams: ClassVar[bool] = False
+
+    def _should_stream(self, *, async_api: bool, **kwargs: Any) -> bool:
+        return self.provider_streams and super()._should_stream(async_api=async_api, **kwargs)
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        # Providers may generate by consuming their own _astream: admit once
+        if _admitted.get():
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+        async with _admission(self.llm_provider, messages) as outputs:
+            token = _admitted.set(True)
+            try:
+                result = await super()._agenerate(messages, stop, run_manager, **kwargs)
+            finally:
+                _admitted.reset(token)
+            outputs.extend(generation.message for generation in result.generations)
+            return result
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if _admitted.get():
+            async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+                yield chunk
+            return
+        async with _admission(self.llm_provider, messages) as outputs:
+            async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+                outputs.append(chunk.message)
+                yield chunk
+
+
+_scheduled_classes: dict[tuple[type[BaseChatModel], str], type[BaseChatModel]] = {}
+
+
+def scheduled_model[M: BaseChatModel](cls: type[M], provider: str) -> type[M]:
+    """*cls* with its async calls admitted by *provider*'s scheduler.
+
+    The subclass keeps *cls*'s name, so logs and traces read as before.
+    """
+    provider = provider.lower()
+    scheduled = _scheduled_classes.get((cls, provider))
+    if scheduled is None:
+        subclass: type[ScheduledChatModel] = type(cls.__name__, (ScheduledChatModel, cls), {})
+        subclass.llm_provider = provider
+        subclass.provider_streams = (
+            cls._astream is not BaseChatModel._astream or cls._stream is not BaseChatModel._stream
+        )
+        scheduled = _scheduled_classes[(cls, provider)] = subclass
+    return cast("type[M]", scheduled)
+
+
+@asynccontextmanager
+async def _admission(
+    provider: str, messages: list[BaseMessage]
+) -> AsyncIterator[list[BaseMessage]]:
+    """Hold a scheduler slot for the block; yields a list for the call's output messages."""
+    outputs: list[BaseMessage] = []
+    scheduler = get_llm_scheduler(provider)
+    if scheduler is None:
+        yield outputs
+        return
+    key = _fair_key.get() or user_id_var.get() or ""
+    chars = sum(len(str(m.content)) for m in messages)
+    lease = await scheduler.acquire(
+        _priority.get(), key, chars // _CHARS_PER_TOKEN + _OUTPUT_TOKEN_ESTIMATE
+    )
+    try:
+        yield outputs
+    finally:
+        scheduler.release(lease, used_tokens=_usage_tokens(outputs))
+
+
+def _usage_tokens(messages: list[BaseMessage]) -> int | None:
+    """Total tokens the provider reported for *messages*, if any."""
+    usages = [u for m in messages if (u := getattr(m, "usage_metadata", None))]
+    return sum(u.get("total_tokens", 0) for u in usages) if usages else None
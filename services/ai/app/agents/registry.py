@@ -36,6 +36,42 @@ class DomainConfig:
     prompt_extension: str
 
 
+# Data each tool reads (READ tools) or changes (WRITE tools). A WRITE tool
+# invalidates the user's cached results of every READ tool sharing one of its
+# data domains (see app/tools/common/tool_cache.py); tools missing here are
+# never cached.
+TOOL_DATA_DOMAINS: dict[str, frozenset[str]] = {
+    # Tracking — metrics
+    "record_metric": frozenset({"tracking"}),
+    "record_metrics": frozenset({"tracking"}),
+    "update_metric": frozenset({"tracking"}),
+    "delete_metric": frozenset({"tracking"}),
+    "delete_metrics": frozenset({"tracking"}),
+    "get_history": frozenset({"tracking"}),
+    "get_tracking_insights": frozenset({"tracking"}),
+    "get_metric_correlations": frozenset({"tracking"}),
+    # Tracking — habits
+    "record_habit": frozenset({"habits"}),
+    "get_habits": frozenset({"habits"}),
+    # Finance
+    "mark_bill_paid": frozenset({"finance"}),
+    "create_expense": frozenset({"finance"}),
+    "get_finance_summary": frozenset({"finance"}),
+    "get_pending_bills": frozenset({"finance"}),
+    "get_bills": frozenset({"finance"}),
+    "get_expenses": frozenset({"finance"}),
+    "get_incomes": frozenset({"finance"}),
+    "get_investments": frozenset({"finance"}),
+    "get_debt_progress": frozenset({"finance"}),
+    "get_debt_payment_history": frozenset({"finance"}),
+    "get_upcoming_installments": frozenset({"finance"}),
+    # Memory
+    "add_knowledge": frozenset({"memory"}),
+    "search_knowledge": frozenset({"memory"}),
+    "analyze_context": frozenset({"memory"}),
+}
+
+
 def build_domain_registry() -> dict[str, DomainConfig]:
     """Build the mapping of domain name → DomainConfig.
 
@@ -43,7 +79,7 @@ def build_domain_registry() -> dict[str, DomainConfig]:
     Each domain includes shared memory READ tools (search_knowledge, analyze_context).
 
     Tool counts:
-    - tracking: 6 + 2 shared = 8 (4 WRITE)
+    - tracking: 10 + 2 shared = 12 (6 WRITE)
     - finance:  11 + 2 shared = 13 (2 WRITE)
     - memory:   3 (already includes READ tools) (1 WRITE)
     - wellbeing: 0 + 2 shared = 2 (0 WRITE)
@@ -6,13 +6,16 @@ import logging
 import uuid
 from typing import TYPE_CHECKING
 
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, HumanMessage
 
 from app.config import get_settings
 from app.db.repositories.chat import ChatRepository
 from app.db.session import get_user_session
+from app.workers.consolidation import schedule_incremental_consolidation
+from app.workers.consolidation_prompt import estimate_text_tokens
 
 if TYPE_CHECKING:
+    from langchain_core.messages import BaseMessage
     from langchain_core.runnables import RunnableConfig
 
     from app.agents.state import AgentState
@@ -27,6 +30,9 @@ async def save_response(state: AgentState, config: RunnableConfig) -> dict[str,
     Accesses ``session_factory`` from ``config["configurable"]`` and creates
     an RLS-scoped session for the user.
 
+    Also counts the turn (user + assistant message) towards the user's
+    incremental consolidation threshold.
+
     Returns an empty dict — no new messages are added to the graph state.
     """
     # Find the last AI message
@@ -53,17 +59,7 @@ async def save_response(state: AgentState, config: RunnableConfig) -> dict[str,
     settings = get_settings()
 
     async with get_user_session(session_factory, user_id) as session:
-        # Gemini returns content as a list of blocks:
-        # [{"type": "text", "text": "..."}] — extract plain text.
-        raw = last_ai_message.content
-        if isinstance(raw, str):
-            content = raw
-        elif isinstance(raw, list):
-            content = "".join(
-                block.get("text", "") if isinstance(block, dict) else str(block) for block in raw
-            )
-        else:
-            content = str(raw)
+        content = _message_text(last_ai_message)
         await ChatRepository.create_message(
             session,
             {
@@ -80,4 +76,38 @@ async def save_response(state: AgentState, config: RunnableConfig) -> dict[str,
         )
 
     logger.info("Saved assistant message for conversation %s", conversation_id)
+
+    if settings.CONSOLIDATION_INCREMENTAL_ENABLED:
+        # The user message is persisted by the API; count it here with the reply
+        last_human_message = next(
+            (m for m in reversed(state["messages"]) if isinstance(m, HumanMessage)), None
+        )
+        user_text = _message_text(last_human_message) if last_human_message else ""
+        try:
+            await schedule_incremental_consolidation(
+                session_factory,
+                uuid.UUID(user_id),
+                messages=2 if last_human_message else 1,
+                tokens=estimate_text_tokens(user_text) + estimate_text_tokens(content),
+            )
+        except Exception:
+            # Best effort: the nightly run still picks these messages up
+            logger.exception("Failed to record consolidation volume for user %s", user_id)
+
     return {}
+
+
+def _message_text(message: BaseMessage) -> str:
+    """Plain text of a message.
+
+    Gemini returns content as a list of blocks:
+    [{"type": "text", "text": "..."}] — extract plain text.
+    """
+    raw = message.content
+    if isinstance(raw, str):
+        return raw
+    if isinstance(raw, list):
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block) for block in raw
+        )
+    return str(raw)
@@ -5,15 +5,23 @@ from typing import TYPE_CHECKING, Any
 from fastapi import APIRouter, Request
 from sqlalchemy import text
 
+from app.agents.llm_scheduler import llm_scheduler_stats
+from app.tools.common.tool_cache import get_tool_cache
+
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncEngine
 
+    from app.workers.leader import LeaderElector
+
 router = APIRouter()
 
 
 @router.get("/health")
 async def health_check(request: Request) -> dict[str, Any]:
-    """Health check endpoint. Returns service status and database connectivity."""
+    """Health check endpoint.
+
+    Returns service status, DB, scheduler leadership, tool cache and LLM queue stats.
+    """
     db_status = "not_configured"
 
     engine: AsyncEngine | None = getattr(request.app.state, "db_engine", None)
@@ -25,10 +33,20 @@ async def health_check(request: Request) -> dict[str, Any]:
         except Exception:
             db_status = "error"
 
+    elector: LeaderElector | None = getattr(request.app.state, "scheduler_elector", None)
+    if elector is None:
+        scheduler_status = "disabled"
+    else:
+        scheduler_status = "leader" if elector.is_leader else "follower"
+
     version: str = getattr(request.app.state, "app_version", "unknown")
+    tool_cache = get_tool_cache()
 
     return {
         "status": "ok",
         "version": version,
         "database": db_status,
+        "scheduler": scheduler_status,
+        "toolCache": tool_cache.stats() if tool_cache is not None else None,
+        "llmScheduler": llm_scheduler_stats(),
     }
@@ -1,48 +1,219 @@
-"""Admin endpoints for triggering worker jobs."""
+"""Admin endpoints for triggering and monitoring worker jobs.
+
+Triggers only enqueue work on the Postgres job queue and return a job id;
+the jobs run on whichever replica's worker claims them. Progress is read
+back from the job table, so any replica can serve the status endpoints.
+"""
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
-from typing import Any
+import uuid
+from typing import TYPE_CHECKING, Any
+
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, Field
+from sse_starlette.sse import EventSourceResponse
+
+from app.config import get_settings
+from app.db.models.enums import JobStatus
+from app.db.repositories.job import JobRepository
+from app.db.session import get_service_session
+from app.workers.consolidation import enqueue_consolidation_batch
 
-from fastapi import APIRouter, Request
-from pydantic import BaseModel
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
 
-from app.workers.consolidation import (
-    ConsolidationResult,
-    run_consolidation,
-    run_consolidation_for_user,
-)
+    from app.db.engine import AsyncSessionFactory
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/workers", tags=["workers"])
 
+_TERMINAL = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+# Upper bound on users per batch trigger (larger backfills: split or use timezone)
+_MAX_BATCH_USERS = 10000
+
+
+# ---------------------------------------------------------------------------
+# Models
+# ---------------------------------------------------------------------------
+
 
 class TriggerRequest(BaseModel):
     user_id: str | None = None
+    user_ids: list[str] | None = Field(default=None, max_length=_MAX_BATCH_USERS)
     timezone: str | None = None
 
 
-@router.post("/consolidation/trigger", response_model=ConsolidationResult)
-async def trigger_consolidation(request: Request, body: TriggerRequest) -> Any:
-    """Manually trigger memory consolidation.
+class JobAccepted(BaseModel):
+    job_id: str
+    status: JobStatus
 
-    - If ``user_id`` is provided, run for that single user.
-    - If ``timezone`` is provided, run for all users in that timezone.
-    - If neither, return an error.
 
-    Auth is handled by ServiceAuthMiddleware (requires SERVICE_SECRET).
-    """
-    if body.user_id:
-        logger.info("Manual consolidation trigger for user %s", body.user_id)
-        return await run_consolidation_for_user(body.user_id)
+class JobProgress(BaseModel):
+    """Child job counts by status (batch jobs only)."""
 
-    if body.timezone:
-        logger.info("Manual consolidation trigger for timezone %s", body.timezone)
-        return await run_consolidation(body.timezone)
+    total: int = 0
+    pending: int = 0
+    running: int = 0
+    completed: int = 0
+    failed: int = 0
+    cancelled: int = 0
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    queue: str
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    last_error: str | None = None
+    result: dict[str, Any] | None = None
+    created_at: str | None = None
+    started_at: str | None = None
+    finished_at: str | None = None
+    progress: JobProgress
+    # Numeric result fields summed over finished children (e.g. users_consolidated)
+    counters: dict[str, float]
+    done: bool
 
-    return ConsolidationResult(
-        errors=1,
-        completed_at="",
+
+class JobCancelled(BaseModel):
+    job_id: str
+    cancelled: int
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+async def _load_job_status(
+    session_factory: AsyncSessionFactory, job_id: uuid.UUID
+) -> JobStatusResponse | None:
+    async with get_service_session(session_factory) as session:
+        job = await JobRepository.get_by_id(session, job_id)
+        if job is None:
+            return None
+        by_status = await JobRepository.count_children_by_status(session, job_id)
+        counters = await JobRepository.sum_children_results(session, job_id)
+
+    progress = JobProgress(
+        total=sum(by_status.values()),
+        **{status.value: count for status, count in by_status.items()},
     )
+    return JobStatusResponse(
+        job_id=str(job.id),
+        queue=job.queue,
+        status=job.status,
+        attempts=job.attempts,
+        max_attempts=job.max_attempts,
+        last_error=job.last_error,
+        result=job.result,
+        created_at=job.created_at.isoformat() if job.created_at else None,
+        started_at=job.started_at.isoformat() if job.started_at else None,
+        finished_at=job.finished_at.isoformat() if job.finished_at else None,
+        progress=progress,
+        counters=counters,
+        done=job.status in _TERMINAL and progress.pending + progress.running == 0,
+    )
+
+
+async def _get_job_status_or_404(request: Request, job_id: uuid.UUID) -> JobStatusResponse:
+    status = await _load_job_status(request.app.state.session_factory, job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return status
+
+
+def _parse_user_ids(raw: list[str]) -> list[uuid.UUID]:
+    try:
+        return [uuid.UUID(u) for u in raw]
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=f"Invalid user id: {exc}") from exc
+
+
+# ---------------------------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------------------------
+
+
+@router.post("/consolidation/trigger", status_code=202, response_model=JobAccepted)
+async def trigger_consolidation(body: TriggerRequest) -> Any:
+    """Enqueue memory consolidation and return the batch job id immediately.
+
+    - ``user_id`` or ``user_ids``: consolidate exactly those users.
+    - ``timezone``: consolidate every user in that timezone with new messages.
+
+    Follow progress with ``GET /workers/jobs/{job_id}`` or its ``/events``
+    SSE stream. Auth is handled by ServiceAuthMiddleware (requires SERVICE_SECRET).
+    """
+    raw_ids = body.user_ids or ([body.user_id] if body.user_id else [])
+    if raw_ids:
+        user_ids = _parse_user_ids(raw_ids)
+        logger.info("Manual consolidation trigger for %d user(s)", len(user_ids))
+        job_id = await enqueue_consolidation_batch(user_ids=user_ids)
+    elif body.timezone:
+        logger.info("Manual consolidation trigger for timezone %s", body.timezone)
+        job_id = await enqueue_consolidation_batch(timezone=body.timezone)
+    else:
+        raise HTTPException(status_code=422, detail="Provide user_id, user_ids or timezone")
+
+    return JobAccepted(job_id=str(job_id), status=JobStatus.PENDING)
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job(request: Request, job_id: uuid.UUID) -> Any:
+    """Job status plus progress and summed counters over its child jobs."""
+    return await _get_job_status_or_404(request, job_id)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(request: Request, job_id: uuid.UUID) -> EventSourceResponse:
+    """SSE stream of job progress: a ``progress`` event whenever the status
+    changes and a final ``done`` event once the job and its children finish.
+    """
+    status = await _get_job_status_or_404(request, job_id)
+    return EventSourceResponse(_job_events(request, job_id, status))
+
+
+async def _job_events(
+    request: Request, job_id: uuid.UUID, status: JobStatusResponse | None
+) -> AsyncIterator[dict[str, str]]:
+    poll_seconds = get_settings().JOB_PROGRESS_POLL_SECONDS
+    last_sent: str | None = None
+    while True:
+        if status is None:
+            yield {"event": "error", "data": json.dumps({"detail": f"Job {job_id} not found"})}
+            return
+        data = status.model_dump_json()
+        if status.done:
+            yield {"event": "done", "data": data}
+            return
+        if data != last_sent:
+            yield {"event": "progress", "data": data}
+            last_sent = data
+        if await request.is_disconnected():
+            return
+        await asyncio.sleep(poll_seconds)
+        status = await _load_job_status(request.app.state.session_factory, job_id)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobCancelled)
+async def cancel_job(request: Request, job_id: uuid.UUID) -> Any:
+    """Cancel a job and its unfinished children.
+
+    Pending jobs never start; running ones stop at their next heartbeat.
+    """
+    async with get_service_session(request.app.state.session_factory) as session:
+        job = await JobRepository.get_by_id(session, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+        cancelled = await JobRepository.cancel(session, job_id)
+
+    logger.info("Cancelled job %s (%d job(s) affected)", job_id, cancelled)
+    return JobCancelled(job_id=str(job_id), cancelled=cancelled)
@@ -23,6 +23,19 @@ class Settings(BaseSettings):
     TRIAGE_LLM_MODEL: str = "gemini-flash-latest"
     GEMINI_API_KEY: str = ""
     ANTHROPIC_API_KEY: str = ""
+    # Batch API provider (app/agents/llm_batch.py): empty for LLM_PROVIDER, or
+    # "local" for the file-based stand-in under LLM_BATCH_LOCAL_DIR
+    LLM_BATCH_PROVIDER: str = ""
+    LLM_BATCH_LOCAL_DIR: str = "/tmp/life-assistant-llm-batches"
+    # Outbound LLM admission per provider (app/agents/llm_scheduler.py). Chat
+    # calls are interactive; job handlers run as background, which waits while
+    # interactive calls queue and never takes the reserved slots
+    LLM_SCHEDULER_ENABLED: bool = True
+    LLM_MAX_CONCURRENCY: int = 16
+    LLM_BACKGROUND_MAX_CONCURRENCY: int = 8
+    LLM_INTERACTIVE_RESERVED_CONCURRENCY: int = 4
+    # Estimated prompt + output tokens per minute; 0 disables the token budget
+    LLM_TOKENS_PER_MINUTE: int = 0
 
     # Observability
     SENTRY_DSN: str = ""
@@ -31,11 +44,88 @@ class Settings(BaseSettings):
     # App
     APP_VERSION: str = "0.1.0"
     LOG_LEVEL: str = Field(default="info")
+    # Debug: warn (with stack) on LLM calls made while a DB session is open
+    DEBUG_HELD_CONNECTIONS: bool = False
 
     # Consolidation (APScheduler)
     CONSOLIDATION_ENABLED: bool = True
     CONSOLIDATION_CRON_HOUR: int = 3
     CONSOLIDATION_CRON_MINUTE: int = 0
+    # Scheduler leader election: followers retry the advisory lock this often,
+    # which bounds failover time when the leader dies
+    LEADER_CHECK_INTERVAL_SECONDS: float = 15.0
+    # Max estimated tokens of conversation text per consolidation prompt (map chunk)
+    CONSOLIDATION_CHUNK_TOKEN_BUDGET: int = 24000
+    # Rows fetched per round trip from the message cursor
+    CONSOLIDATION_FETCH_BATCH_SIZE: int = 200
+    # Existing knowledge items shown per chunk prompt: the most relevant to the
+    # chunk's messages, then the most recently touched, within both caps
+    CONSOLIDATION_KNOWLEDGE_MAX_ITEMS: int = 100
+    CONSOLIDATION_KNOWLEDGE_TOKEN_BUDGET: int = 3000
+    # Nightly consolidation LLM calls: "sync" (chat completions, like interactive
+    # traffic) or "batch" (one provider batch per timezone, polled until done)
+    CONSOLIDATION_LLM_MODE: str = "sync"
+    CONSOLIDATION_BATCH_POLL_INTERVAL_SECONDS: float = 300.0
+    # A batch still running after this many polls (24h at the default interval)
+    # is abandoned and its users are consolidated by regular (sync) jobs
+    CONSOLIDATION_BATCH_MAX_POLLS: int = 288
+    # Users with failed batch requests are resubmitted this many times, then
+    # consolidated by a regular (sync) job
+    CONSOLIDATION_BATCH_MAX_RESUBMITS: int = 2
+    # Incremental consolidation: every chat turn adds to a per-user pending-volume
+    # counter, and crossing either threshold schedules a low-priority run
+    CONSOLIDATION_INCREMENTAL_ENABLED: bool = True
+    CONSOLIDATION_INCREMENTAL_MESSAGE_THRESHOLD: int = 40
+    CONSOLIDATION_INCREMENTAL_TOKEN_THRESHOLD: int = 12000
+    # Debounce: each turn pushes the scheduled run back this far, capped at the
+    # max delay after it was first scheduled
+    CONSOLIDATION_INCREMENTAL_DEBOUNCE_SECONDS: float = 600.0
+    CONSOLIDATION_INCREMENTAL_MAX_DELAY_SECONDS: float = 3600.0
+
+    # Finance monthly rollups: a nightly job (UTC, scheduler leader) recomputes
+    # the current month and the previous ones from the source tables
+    FINANCE_ROLLUP_RECONCILE_ENABLED: bool = True
+    FINANCE_ROLLUP_RECONCILE_CRON_HOUR: int = 4
+    FINANCE_ROLLUP_RECONCILE_CRON_MINUTE: int = 30
+    FINANCE_ROLLUP_RECONCILE_MONTHS: int = 13
+
+    # Habit completion histories (streak calendars) cached per user
+    HABIT_CALENDAR_CACHE_TTL_SECONDS: float = 900.0
+
+    # Debt schedules (visibility, balances, projections) cached per (user, month)
+    DEBT_SCHEDULE_CACHE_TTL_SECONDS: float = 120.0
+
+    # READ tool results cached per (user, tool, args, local date); WRITE tools
+    # invalidate their data domains
+    TOOL_CACHE_ENABLED: bool = True
+    TOOL_CACHE_TTL_SECONDS: float = 120.0
+    TOOL_CACHE_MAX_ENTRIES: int = 5000
+
+    # Per-user BM25 indexes over knowledge items, evicted LRU beyond a total
+    # number of (term, item) postings
+    KNOWLEDGE_INDEX_TTL_SECONDS: float = 600.0
+    KNOWLEDGE_INDEX_MAX_POSTINGS: int = 500_000
+    # New knowledge whose content is a lexical near-duplicate (estimated Jaccard
+    # similarity of character shingles) of an active item of the same type and
+    # area merges into that item instead of creating a row
+    KNOWLEDGE_DEDUP_THRESHOLD: float = 0.7
+
+    # In-process caches are invalidated by Postgres NOTIFY events (row triggers on
+    # the cached tables); the listening connection is checked/reconnected this often
+    CACHE_INVALIDATION_ENABLED: bool = True
+    CACHE_INVALIDATION_CHECK_INTERVAL_SECONDS: float = 5.0
+
+    # Background job queue (Postgres, shared by all replicas)
+    JOB_WORKER_ENABLED: bool = True
+    JOB_WORKER_CONCURRENCY: int = 2
+    JOB_POLL_INTERVAL_SECONDS: float = 5.0
+    # Lease (visibility timeout) granted per claim; extended by heartbeats
+    JOB_LEASE_SECONDS: float = 300.0
+    JOB_HEARTBEAT_INTERVAL_SECONDS: float = 60.0
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_DELAY_SECONDS: float = 60.0
+    # How often the job progress SSE stream re-reads job state
+    JOB_PROGRESS_POLL_SECONDS: float = 2.0
 
 
 @lru_cache
@@ -0,0 +1,85 @@
+"""Debug detector for slow awaits made while a DB connection is checked out.
+
+``get_user_session`` / ``get_service_session`` hold a pooled connection (and
+an open transaction) for their whole ``async with`` block. An LLM call made
+inside one keeps that connection for seconds, and a few concurrent ones
+exhaust the pool (pool_size=5, max_overflow=10). Open sessions are counted
+in a ContextVar, so tasks spawned inside a session inherit it; with
+``DEBUG_HELD_CONNECTIONS`` on, the LLM factories attach
+``HeldConnectionDetector``, which logs a warning with the caller's stack for
+every LLM call started while the count is non-zero. Other network clients
+can call ``warn_if_connection_held`` before their requests.
+"""
+
+from __future__ import annotations
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from langchain_core.callbacks import BaseCallbackHandler
+    from langchain_core.messages import BaseMessage
+
+    from app.config import Settings
+
+logger = logging.getLogger(__name__)
+
+_open_sessions: ContextVar[int] = ContextVar("db_open_sessions", default=0)
+
+
+@contextmanager
+def holding_connection() -> Iterator[None]:
+    """Mark the current context as holding a DB connection."""
+    token = _open_sessions.set(_open_sessions.get() + 1)
+    try:
+        yield
+    finally:
+        _open_sessions.reset(token)
+
+
+def connection_held() -> bool:
+    return _open_sessions.get() > 0
+
+
+def warn_if_connection_held(what: str) -> bool:
+    """Log a warning (with stack) when *what* is awaited inside a DB session."""
+    if not connection_held():
+        return False
+    logger.warning(
+        "%s awaited while holding a DB connection; release the session first",
+        what,
+        stack_info=True,
+    )
+    return True
+
+
+class HeldConnectionDetector(AsyncCallbackHandler):
+    """Warns when an LLM call starts while a DB session is open."""
+
+    async def on_chat_model_start(
+        self, serialized: dict[str, Any], messages: list[list[BaseMessage]], **kwargs: Any
+    ) -> None:
+        warn_if_connection_held(f"LLM call ({_model_name(serialized)})")
+
+    async def on_llm_start(
+        self, serialized: dict[str, Any], prompts: list[str], **kwargs: Any
+    ) -> None:
+        warn_if_connection_held(f"LLM call ({_model_name(serialized)})")
+
+
+def _model_name(serialized: dict[str, Any] | None) -> str:
+    if not serialized:
+        return "unknown model"
+    name = serialized.get("name") or (serialized.get("id") or ["unknown model"])[-1]
+    return str(name)
+
+
+def llm_callbacks(settings: Settings) -> list[BaseCallbackHandler] | None:
+    """Callbacks for chat models built by app/agents/llm.py."""
+    return [HeldConnectionDetector()] if settings.DEBUG_HELD_CONNECTIONS else None
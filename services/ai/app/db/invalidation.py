@@ -0,0 +1,155 @@
+"""Cross-replica cache invalidation over PostgreSQL LISTEN/NOTIFY.
+
+Row triggers on the cached tables (tracking, habits, finance, memory; see
+migration 0013_cache_invalidation_notify) publish ``{"user_id", "domain"}``
+on the ``cache_invalidation`` channel, whoever the writer is: this service,
+another replica, the NestJS API or a worker. NOTIFY is transactional, so
+events arrive after commit, and identical events of one transaction are
+delivered once.
+
+Each process keeps one dedicated connection LISTENing and hands every event
+to the registered subscribers (``subscribe``), which evict the user's
+entries of that domain. Events sent while the connection is down are lost,
+so after every (re)connect subscribers are told to drop everything
+(``user_id`` and ``domain`` None) before caching resumes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import text
+
+from app.config import get_settings
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidation"
+
+# (user_id, domain) → None; None means every user / every domain
+type Invalidator = Callable[[str | None, str | None], None]
+
+_subscribers: list[Invalidator] = []
+
+
+def subscribe(invalidator: Invalidator) -> None:
+    """Register *invalidator* for every invalidation event (idempotent)."""
+    if invalidator not in _subscribers:
+        _subscribers.append(invalidator)
+
+
+def dispatch(user_id: str | None, domain: str | None) -> None:
+    """Hand one event to every subscriber; a failing subscriber does not stop the others."""
+    for invalidator in _subscribers:
+        try:
+            invalidator(user_id, domain)
+        except Exception:
+            logger.exception("Cache invalidator %r failed", invalidator)
+
+
+def parse_event(payload: str) -> tuple[str | None, str | None] | None:
+    """``(user_id, domain)`` of a NOTIFY payload, or None when malformed."""
+    try:
+        event = json.loads(payload)
+    except ValueError:
+        return None
+    if not isinstance(event, dict):
+        return None
+    user_id, domain = event.get("user_id"), event.get("domain")
+    if not isinstance(user_id, str | None) or not isinstance(domain, str | None):
+        return None
+    return user_id, domain
+
+
+class InvalidationListener:
+    """Keeps a dedicated connection LISTENing on ``CHANNEL``, reconnecting when it drops."""
+
+    def __init__(self, engine: AsyncEngine) -> None:
+        self._engine = engine
+        self._interval = get_settings().CACHE_INVALIDATION_CHECK_INTERVAL_SECONDS
+        self._conn: AsyncConnection | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def is_listening(self) -> bool:
+        return self._conn is not None
+
+    async def start(self) -> None:
+        """Connect now (failures are retried in the background), then keep checking."""
+        try:
+            await self.check()
+        except Exception:
+            logger.exception("Cache invalidation listener failed to connect")
+        self._task = asyncio.create_task(self._run_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._conn is not None:
+            await self._disconnect()
+
+    async def _run_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Cache invalidation listener check failed")
+
+    async def check(self) -> None:
+        """Connect when disconnected, or verify the listening connection is alive."""
+        if self._conn is None:
+            await self._connect()
+            return
+        try:
+            await self._conn.execute(text("SELECT 1"))
+        except Exception:
+            logger.warning("Lost cache invalidation connection, reconnecting", exc_info=True)
+            await self._disconnect()
+            await self._connect()
+
+    async def _connect(self) -> None:
+        conn = await self._engine.connect()
+        try:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            raw = await conn.get_raw_connection()
+            driver_conn: Any = raw.driver_connection  # asyncpg.Connection
+            await driver_conn.add_listener(CHANNEL, self._on_notify)
+        except Exception:
+            await self._discard(conn)
+            raise
+        self._conn = conn
+        # Anything cached before now may have missed events: resync from scratch
+        dispatch(None, None)
+        logger.info("Listening for cache invalidations on %s", CHANNEL)
+
+    async def _disconnect(self) -> None:
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            await self._discard(conn)
+
+    @staticmethod
+    async def _discard(conn: AsyncConnection) -> None:
+        # Never hand a LISTENing connection back to the pool
+        try:
+            await conn.invalidate()
+            await conn.close()
+        except Exception:
+            logger.debug("Error closing cache invalidation connection", exc_info=True)
+
+    def _on_notify(self, _driver_conn: Any, _pid: int, _channel: str, payload: str) -> None:
+        event = parse_event(payload)
+        if event is None:
+            logger.warning("Ignoring malformed cache invalidation payload: %r", payload)
+            return
+        dispatch(*event)
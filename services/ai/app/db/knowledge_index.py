@@ -0,0 +1,423 @@
+"""Per-user in-memory BM25 index over knowledge items.
+
+Users have a few hundred active (non-deleted, non-superseded) knowledge
+items, so each user's items are held in memory with an inverted index over
+title + content. Text is normalized for PT-BR: accents folded, stopwords
+dropped, plurals and final vowels stripped by a light stemmer, so "cafés"
+finds "Café" and "dividas" finds "Dívida".
+
+Indexes are built lazily by ``MemoryRepository.knowledge_index`` (one query)
+and kept LRU under ``KNOWLEDGE_INDEX_MAX_POSTINGS`` total postings, for
+``KNOWLEDGE_INDEX_TTL_SECONDS``. The repository's writes (create, update,
+supersede) queue index updates on the session, applied only when it commits.
+Writes made elsewhere arrive as "memory" invalidation events
+(app/db/invalidation.py) and drop the user's index; the event of a commit
+this process already applied is expected and skipped.
+
+Each item also carries a bottom-k MinHash sketch of its content's character
+shingles (over the normalized terms), so ``near_duplicate`` finds an item a
+new fact only rewords ("Gosta de café" / "gosta muito de cafés") without an
+LLM call.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import re
+import time
+import unicodedata
+import uuid as _uuid
+import zlib
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.db.models.memory import KnowledgeItem
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# BM25 parameters (standard values)
+_K1 = 1.2
+_B = 0.75
+
+_PENDING_KEY = "knowledge_index_pending"
+_EPOCH = datetime.min.replace(tzinfo=UTC)
+
+# Accent-folded (see ``fold``)
+_STOPWORDS = frozenset(
+    """
+    a ao aos aquela aquelas aquele aqueles aquilo as ate com como da das de dela delas
+    dele deles depois do dos e ela elas ele eles em entre era eram essa essas esse esses
+    esta estas este estes eu foi for foram ha isso isto ja la lhe lhes mais mas me mesmo
+    meu meus minha minhas muito na nas nao nem no nos nossa nossas nosso nossos num numa
+    o os ou para pela pelas pelo pelos por qual quando que quem se sem ser seu seus so
+    sua suas tambem te tem tinha to tu tua tuas um uma umas uns vai voce voces vos
+    """.split()  # noqa: SIM905
+)
+
+# Plural rules, first match wins: (suffix, replacement)
+_PLURALS = (
+    ("oes", "ao"),
+    ("aes", "ao"),
+    ("ais", "al"),
+    ("eis", "el"),
+    ("ois", "ol"),
+    ("ns", "m"),
+    ("res", "r"),
+    ("zes", "z"),
+    ("ses", "s"),
+    ("s", ""),
+)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Near-duplicate sketches: character shingles of the normalized terms, the
+# smallest _SKETCH_SIZE shingle hashes kept (exact for short texts)
+_SHINGLE_SIZE = 4
+_SKETCH_SIZE = 64
+
+
+def fold(text: str) -> str:
+    """Lowercase *text* and strip accents ("Ação" → "acao")."""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def stem(word: str) -> str:
+    """Light PT-BR stemmer: plural to singular, then the final vowel (a/e/o)."""
+    if len(word) > 3 and not word.endswith("ss"):
+        for suffix, replacement in _PLURALS:
+            if word.endswith(suffix):
+                word = word[: -len(suffix)] + replacement
+                break
+    if len(word) > 3 and word[-1] in "aeo":
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Index terms of *text*: folded, stopwords removed, stemmed."""
+    return [
+        stem(word)
+        for word in _TOKEN_RE.findall(fold(text))
+        if len(word) > 1 and word not in _STOPWORDS
+    ]
+
+
+def minhash(text: str) -> tuple[int, ...]:
+    """Bottom-k MinHash sketch of *text*: its smallest shingle hashes, ascending."""
+    normalized = " ".join(tokenize(text))
+    shingles = {
+        zlib.crc32(normalized[i : i + _SHINGLE_SIZE].encode())
+        for i in range(max(len(normalized) - _SHINGLE_SIZE + 1, 1))
+        if normalized
+    }
+    return tuple(heapq.nsmallest(_SKETCH_SIZE, shingles))
+
+
+def similarity(a: tuple[int, ...], b: tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two sketches."""
+    if not a or not b:
+        return 0.0
+    union = heapq.nsmallest(_SKETCH_SIZE, set(a) | set(b))
+    both = set(a) & set(b)
+    return sum(1 for h in union if h in both) / len(union)
+
+
+def _value(v: Any) -> Any:
+    return getattr(v, "value", v)
+
+
+def _snapshot(item: KnowledgeItem) -> KnowledgeItem:
+    """A transient copy of *item*'s loaded columns, safe to keep after its session ends.
+
+    Columns never loaded (not set on insert, no server default) are NULL.
+    """
+    loaded = inspect(item).dict
+    return KnowledgeItem(
+        **{attr.key: loaded.get(attr.key) for attr in inspect(KnowledgeItem).column_attrs}
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class SearchHit:
+    item: KnowledgeItem
+    score: float
+    # Distinct query terms found in the item
+    matched: int
+
+
+@dataclass(slots=True)
+class _Doc:
+    item: KnowledgeItem
+    terms: Counter[str]
+    length: int
+    text: str  # folded title + content, for substring fallback
+    sketch: tuple[int, ...]  # MinHash of the content, for near_duplicate
+
+
+class KnowledgeIndex:
+    """BM25 inverted index over one user's active knowledge items."""
+
+    def __init__(self, items: Iterable[KnowledgeItem] = ()) -> None:
+        self._docs: dict[_uuid.UUID, _Doc] = {}
+        self._postings: dict[str, dict[_uuid.UUID, int]] = {}
+        self._total_length = 0
+        for item in items:
+            self.add(item)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, item_id: object) -> bool:
+        return item_id in self._docs
+
+    def get(self, item_id: _uuid.UUID) -> KnowledgeItem | None:
+        doc = self._docs.get(item_id)
+        return doc.item if doc is not None else None
+
+    @property
+    def postings(self) -> int:
+        """(term, item) pairs held; the unit of the memory cap."""
+        return sum(len(doc.terms) for doc in self._docs.values())
+
+    def add(self, item: KnowledgeItem) -> None:
+        """Index *item* (replacing a previous version); inactive items are removed."""
+        self.remove(item.id)
+        if item.deleted_at is not None or item.superseded_by_id is not None:
+            return
+        text = f"{item.title or ''} {item.content or ''}"
+        terms = Counter(tokenize(text))
+        length = sum(terms.values())
+        self._docs[item.id] = _Doc(item, terms, length, fold(text), minhash(item.content or ""))
+        self._total_length += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[item.id] = tf
+
+    def remove(self, item_id: _uuid.UUID) -> bool:
+        doc = self._docs.pop(item_id, None)
+        if doc is None:
+            return False
+        self._total_length -= doc.length
+        for term in doc.terms:
+            posting = self._postings[term]
+            del posting[item_id]
+            if not posting:
+                del self._postings[term]
+        return True
+
+    def rank(
+        self,
+        query: str,
+        *,
+        item_type: str | None = None,
+        area: str | None = None,
+        sub_area: str | None = None,
+        limit: int = 10,
+    ) -> list[SearchHit]:
+        """Items matching any term of *query*, best BM25 score first (newest on ties)."""
+        if not self._docs:
+            return []
+        n = len(self._docs)
+        avg_length = self._total_length / n or 1.0
+        scores: dict[_uuid.UUID, float] = {}
+        matched: Counter[_uuid.UUID] = Counter()
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for item_id, tf in posting.items():
+                norm = _K1 * (1 - _B + _B * self._docs[item_id].length / avg_length)
+                scores[item_id] = scores.get(item_id, 0.0) + idf * tf * (_K1 + 1) / (tf + norm)
+                matched[item_id] += 1
+        hits = [
+            SearchHit(self._docs[item_id].item, score, matched[item_id])
+            for item_id, score in scores.items()
+            if self._accepts(self._docs[item_id].item, item_type, area, sub_area)
+        ]
+        hits.sort(key=lambda h: (h.score, h.item.created_at or _EPOCH), reverse=True)
+        return hits[:limit]
+
+    def search(
+        self,
+        query: str | None = None,
+        *,
+        item_type: str | None = None,
+        area: str | None = None,
+        sub_area: str | None = None,
+        limit: int = 50,
+    ) -> list[KnowledgeItem]:
+        """Relevance-ranked items for *query*, or the newest items without one.
+
+        A query no term matches (e.g. a partial word) falls back to a substring
+        match over title and content, newest first.
+        """
+        if query:
+            hits = self.rank(query, item_type=item_type, area=area, sub_area=sub_area, limit=limit)
+            if hits:
+                return [hit.item for hit in hits]
+            needle = fold(query).strip()
+            docs = [doc for doc in self._docs.values() if needle in doc.text]
+        else:
+            docs = list(self._docs.values())
+        items = [doc.item for doc in docs if self._accepts(doc.item, item_type, area, sub_area)]
+        return self._newest(items)[:limit]
+
+    def select(self, text: str, *, limit: int | None = None) -> list[KnowledgeItem]:
+        """Up to *limit* items (all without one): those relevant to *text*, best
+        first, then the others most recently touched (updated or created) first."""
+        limit = len(self._docs) if limit is None else limit
+        chosen = {hit.item.id: hit.item for hit in self.rank(text, limit=limit)}
+        others = sorted(
+            (doc.item for doc in self._docs.values() if doc.item.id not in chosen),
+            key=lambda i: i.updated_at or i.created_at or _EPOCH,
+            reverse=True,
+        )
+        return [*chosen.values(), *others][:limit]
+
+    def near_duplicate(
+        self, content: str, *, item_type: str, area: str | None, threshold: float
+    ) -> tuple[KnowledgeItem, float] | None:
+        """The item of *item_type* and *area* whose content is most similar to
+        *content*, with its similarity, if that reaches *threshold*."""
+        sketch = minhash(content)
+        best: tuple[KnowledgeItem, float] | None = None
+        for doc in self._docs.values():
+            if _value(doc.item.type) != item_type or _value(doc.item.area) != area:
+                continue
+            score = similarity(sketch, doc.sketch)
+            if score >= threshold and (best is None or score > best[1]):
+                best = (doc.item, score)
+        return best
+
+    @staticmethod
+    def _newest(items: Iterable[KnowledgeItem]) -> list[KnowledgeItem]:
+        return sorted(items, key=lambda i: i.created_at or _EPOCH, reverse=True)
+
+    @staticmethod
+    def _accepts(
+        item: KnowledgeItem, item_type: str | None, area: str | None, sub_area: str | None
+    ) -> bool:
+        return (
+            (item_type is None or _value(item.type) == item_type)
+            and (area is None or _value(item.area) == area)
+            and (sub_area is None or _value(item.sub_area) == sub_area)
+        )
+
+
+# --- Per-user registry ---
+
+
+@dataclass(slots=True)
+class _Entry:
+    expires_at: float
+    index: KnowledgeIndex
+    # Invalidation events of commits already applied here, to skip
+    expected_events: int = 0
+
+
+_indexes: OrderedDict[_uuid.UUID, _Entry] = OrderedDict()
+
+
+def cached_index(user_id: _uuid.UUID) -> KnowledgeIndex | None:
+    entry = _indexes.get(user_id)
+    if entry is None or entry.expires_at < time.monotonic():
+        _indexes.pop(user_id, None)
+        return None
+    _indexes.move_to_end(user_id)
+    return entry.index
+
+
+def store_index(
+    session: AsyncSession, user_id: _uuid.UUID, items: Iterable[KnowledgeItem]
+) -> KnowledgeIndex:
+    """Index *items* (loaded by *session*) as *user_id*'s index.
+
+    Not kept when the session has uncommitted knowledge writes: those rows may
+    still roll back.
+    """
+    index = KnowledgeIndex(_snapshot(item) for item in items)
+    if session.info.get(_PENDING_KEY):
+        return index
+    settings = get_settings()
+    _indexes[user_id] = _Entry(time.monotonic() + settings.KNOWLEDGE_INDEX_TTL_SECONDS, index)
+    _indexes.move_to_end(user_id)
+    total = sum(entry.index.postings for entry in _indexes.values())
+    while total > settings.KNOWLEDGE_INDEX_MAX_POSTINGS and len(_indexes) > 1:
+        _, evicted = _indexes.popitem(last=False)
+        total -= evicted.index.postings
+    return index
+
+
+def clear_knowledge_indexes() -> None:
+    _indexes.clear()
+
+
+def invalidate_knowledge_indexes(user_id: str | None, domain: str | None) -> None:
+    """Cache invalidation subscriber (see app/db/invalidation.py)."""
+    if domain not in (None, "memory"):
+        return
+    if user_id is None:
+        _indexes.clear()
+        return
+    uid = _uuid.UUID(user_id)
+    entry = _indexes.get(uid)
+    if entry is None:
+        return
+    if entry.expected_events > 0:
+        entry.expected_events -= 1
+    else:
+        del _indexes[uid]
+
+
+# --- Write hooks (applied on commit) ---
+
+
+def queue_upsert(session: AsyncSession, item: KnowledgeItem) -> None:
+    """Index *item* as it is now once *session* commits."""
+    session.info.setdefault(_PENDING_KEY, []).append(_snapshot(item))
+
+
+def queue_remove(session: AsyncSession, item_id: _uuid.UUID) -> None:
+    """Drop *item_id* from whichever index holds it once *session* commits."""
+    session.info.setdefault(_PENDING_KEY, []).append(item_id)
+
+
+def _apply(pending: list[KnowledgeItem | _uuid.UUID]) -> None:
+    touched: set[_uuid.UUID] = set()
+    for op in pending:
+        if isinstance(op, KnowledgeItem):
+            entry = _indexes.get(op.user_id)
+            if entry is not None:
+                entry.index.add(op)
+                touched.add(op.user_id)
+        else:
+            for user_id, entry in _indexes.items():
+                if entry.index.remove(op):
+                    touched.add(user_id)
+                    break
+    # NOTIFY delivers one "memory" event per user per committed transaction
+    for user_id in touched:
+        _indexes[user_id].expected_events += 1
+
+
+@event.listens_for(Session, "after_commit")
+def _on_commit(session: Session) -> None:
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        _apply(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _on_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
@@ -7,22 +7,27 @@ from app.db.models.finance import (
     Budget,
     Debt,
     DebtPayment,
+    FinanceMonthlyRollup,
     Income,
     Investment,
     VariableExpense,
 )
-from app.db.models.memory import KnowledgeItem, MemoryConsolidation
+from app.db.models.jobs import BackgroundJob
+from app.db.models.memory import ConsolidationTrigger, KnowledgeItem, MemoryConsolidation
 from app.db.models.tracking import CustomMetricDefinition, Habit, HabitCompletion, TrackingEntry
 from app.db.models.users import User, UserMemory
 
 __all__ = [
+    "BackgroundJob",
     "Base",
     "Bill",
     "Budget",
+    "ConsolidationTrigger",
     "Conversation",
     "CustomMetricDefinition",
     "Debt",
     "DebtPayment",
+    "FinanceMonthlyRollup",
     "Habit",
     "HabitCompletion",
     "Income",
@@ -199,6 +199,17 @@ class ConsolidationStatus(StrEnum):
     PARTIAL = "partial"
 
 
+# --- Background Jobs ---
+
+
+class JobStatus(StrEnum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
 # --- Goals & Habits ---
 
 
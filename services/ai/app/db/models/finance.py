@@ -2,13 +2,14 @@
 
 Passive mapping of Drizzle schemas — never generates migrations.
 Source: packages/database/src/schema/incomes.ts, bills.ts, variable-expenses.ts,
-       debts.ts, debt-payments.ts, investments.ts, budgets.ts
+       debts.ts, debt-payments.ts, investments.ts, budgets.ts, finance-rollups.ts
 """
 
 import uuid as _uuid
 from datetime import date, datetime
+from typing import Any
 
-from sqlalchemy import TIMESTAMP, Boolean, Date, Enum, Integer, Numeric, String, Text, func
+from sqlalchemy import JSON, TIMESTAMP, Boolean, Date, Enum, Integer, Numeric, String, Text, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -177,3 +178,15 @@ class Budget(Base, TimestampMixin):
         Numeric(precision=12, scale=2, asdecimal=False), server_default="0"
     )
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+
+class FinanceMonthlyRollup(Base, TimestampMixin):
+    """Monthly totals keyed ``"<source>:<category>:<status>"`` → {expected, actual, count}."""
+
+    __tablename__ = "finance_monthly_rollups"
+
+    id: Mapped[_uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    user_id: Mapped[_uuid.UUID] = mapped_column(UUID(as_uuid=True))
+    month_year: Mapped[str] = mapped_column(String(7))
+    totals: Mapped[dict[str, Any]] = mapped_column(JSON, server_default="{}")
+    reconciled_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
@@ -0,0 +1,45 @@
+"""SQLAlchemy model for the background job queue.
+
+Passive mapping of Drizzle schemas — never generates migrations.
+Source: packages/database/src/schema/background-jobs.ts
+"""
+
+import uuid as _uuid
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import JSON, TIMESTAMP, Enum, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.models.base import Base, TimestampMixin
+from app.db.models.enums import JobStatus
+
+_vc = lambda e: [m.value for m in e]  # noqa: E731  # values_callable shorthand
+
+
+class BackgroundJob(Base, TimestampMixin):
+    __tablename__ = "background_jobs"
+
+    id: Mapped[_uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    queue: Mapped[str] = mapped_column(String(50))
+    user_id: Mapped[_uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    payload: Mapped[dict[str, Any]] = mapped_column(JSON, server_default="{}")
+    parent_id: Mapped[_uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    dedupe_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    concurrency_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    status: Mapped[JobStatus] = mapped_column(
+        Enum(JobStatus, name="job_status", create_type=False, values_callable=_vc),
+        server_default="pending",
+    )
+    attempts: Mapped[int] = mapped_column(Integer, server_default="0")
+    max_attempts: Mapped[int] = mapped_column(Integer, server_default="3")
+    priority: Mapped[int] = mapped_column(Integer, server_default="0")
+    run_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), server_default=func.now())
+    locked_by: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    locked_until: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    result: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    started_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
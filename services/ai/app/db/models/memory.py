@@ -1,7 +1,8 @@
 """SQLAlchemy models for memory system tables.
 
 Passive mapping of Drizzle schemas — never generates migrations.
-Source: packages/database/src/schema/knowledge-items.ts, memory-consolidations.ts
+Source: packages/database/src/schema/knowledge-items.ts, memory-consolidations.ts,
+consolidation-triggers.ts
 """
 
 import uuid as _uuid
@@ -26,6 +27,9 @@ _vc = lambda e: [m.value for m in e]  # noqa: E731  # values_callable shorthand
 
 class KnowledgeItem(Base, TimestampMixin, SoftDeleteMixin):
     __tablename__ = "knowledge_items"
+    # Server defaults come back in the INSERT's RETURNING (the knowledge index snapshots
+    # new rows)
+    __mapper_args__ = {"eager_defaults": True}
 
     id: Mapped[_uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
     user_id: Mapped[_uuid.UUID] = mapped_column(UUID(as_uuid=True))
@@ -72,6 +76,7 @@ class MemoryConsolidation(Base):
     facts_created: Mapped[int] = mapped_column(Integer, server_default="0")
     facts_updated: Mapped[int] = mapped_column(Integer, server_default="0")
     inferences_created: Mapped[int] = mapped_column(Integer, server_default="0")
+    duplicates_merged: Mapped[int] = mapped_column(Integer, server_default="0")
     memory_updates: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
     raw_output: Mapped[dict[str, Any] | None] = mapped_column(JSON, nullable=True)
     status: Mapped[ConsolidationStatus] = mapped_column(
@@ -86,3 +91,17 @@ class MemoryConsolidation(Base):
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True), server_default=func.now()
     )
+
+
+class ConsolidationTrigger(Base):
+    """Pending message volume since the user's last consolidation started."""
+
+    __tablename__ = "consolidation_triggers"
+
+    user_id: Mapped[_uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    pending_messages: Mapped[int] = mapped_column(Integer, server_default="0")
+    pending_tokens: Mapped[int] = mapped_column(Integer, server_default="0")
+    scheduled_job_id: Mapped[_uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now()
+    )
@@ -2,6 +2,7 @@
 
 from app.db.repositories.chat import ChatRepository
 from app.db.repositories.finance import FinanceRepository
+from app.db.repositories.job import JobRepository
 from app.db.repositories.memory import MemoryRepository
 from app.db.repositories.tracking import TrackingRepository
 from app.db.repositories.user import UserRepository
@@ -9,6 +10,7 @@ from app.db.repositories.user import UserRepository
 __all__ = [
     "ChatRepository",
     "FinanceRepository",
+    "JobRepository",
     "MemoryRepository",
     "TrackingRepository",
     "UserRepository",
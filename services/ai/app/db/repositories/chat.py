@@ -1,10 +1,11 @@
 """Chat repository — conversations and messages."""
 
 import uuid as _uuid
+from collections.abc import AsyncGenerator
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.chat import Conversation, Message
@@ -65,3 +66,36 @@ class ChatRepository:
             .order_by(Message.created_at)
         )
         return list(result.scalars().all())
+
+    @staticmethod
+    async def stream_messages_since(
+        session: AsyncSession,
+        user_id: _uuid.UUID,
+        since: datetime,
+        *,
+        until: datetime | None = None,
+        after: tuple[datetime, _uuid.UUID] | None = None,
+        batch_size: int = 200,
+    ) -> AsyncGenerator[Message]:
+        """Stream a user's messages since ``since`` through a server-side cursor.
+
+        Rows are ordered by ``(created_at, id)`` and fetched ``batch_size`` at a
+        time, so callers can stop early without materializing the full window.
+        ``after`` is an exclusive keyset cursor used to resume a partial run.
+        """
+        stmt = (
+            select(Message)
+            .join(Conversation, Message.conversation_id == Conversation.id)
+            .where(Conversation.user_id == user_id, Message.created_at >= since)
+        )
+        if until is not None:
+            stmt = stmt.where(Message.created_at < until)
+        if after is not None:
+            stmt = stmt.where(tuple_(Message.created_at, Message.id) > tuple_(*after))
+        stmt = stmt.order_by(Message.created_at, Message.id).execution_options(yield_per=batch_size)
+        result = await session.stream_scalars(stmt)
+        try:
+            async for message in result:
+                yield message
+        finally:
+            await result.close()
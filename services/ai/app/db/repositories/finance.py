@@ -4,7 +4,8 @@ import uuid as _uuid
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import func, select, update
+from sqlalchemy import delete, func, select, union, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.finance import (
@@ -12,6 +13,7 @@ from app.db.models.finance import (
     Budget,
     Debt,
     DebtPayment,
+    FinanceMonthlyRollup,
     Income,
     Investment,
     VariableExpense,
@@ -176,3 +178,131 @@ class FinanceRepository:
             )
         )
         return list(result.scalars().all())
+
+    # --- Monthly rollups ---
+
+    @staticmethod
+    async def get_users_with_finance_rows(
+        session: AsyncSession, months: list[str]
+    ) -> list[_uuid.UUID]:
+        """Users with any bill, expense, income or debt payment in *months*."""
+        stmt = union(
+            *(
+                select(model.user_id).where(model.month_year.in_(months))
+                for model in (Bill, VariableExpense, Income, DebtPayment)
+            )
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def get_rollups(
+        session: AsyncSession, user_id: _uuid.UUID, months: list[str]
+    ) -> list[FinanceMonthlyRollup]:
+        if not months:
+            return []
+        result = await session.execute(
+            select(FinanceMonthlyRollup).where(
+                FinanceMonthlyRollup.user_id == user_id,
+                FinanceMonthlyRollup.month_year.in_(months),
+            )
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def lock_rollup(
+        session: AsyncSession, user_id: _uuid.UUID, month_year: str
+    ) -> FinanceMonthlyRollup | None:
+        """Fetch a month's rollup ``FOR UPDATE`` so concurrent deltas serialize."""
+        result = await session.execute(
+            select(FinanceMonthlyRollup)
+            .where(
+                FinanceMonthlyRollup.user_id == user_id,
+                FinanceMonthlyRollup.month_year == month_year,
+            )
+            .with_for_update()
+        )
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def lock_rollups(
+        session: AsyncSession, user_id: _uuid.UUID, months: list[str]
+    ) -> list[FinanceMonthlyRollup]:
+        """Fetch the months' rollups ``FOR UPDATE`` (in month order, so lockers don't deadlock)."""
+        if not months:
+            return []
+        result = await session.execute(
+            select(FinanceMonthlyRollup)
+            .where(
+                FinanceMonthlyRollup.user_id == user_id,
+                FinanceMonthlyRollup.month_year.in_(months),
+            )
+            .order_by(FinanceMonthlyRollup.month_year)
+            .with_for_update()
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def set_rollup_totals(
+        session: AsyncSession, rollup_id: _uuid.UUID, totals: dict[str, Any]
+    ) -> None:
+        await session.execute(
+            update(FinanceMonthlyRollup)
+            .where(FinanceMonthlyRollup.id == rollup_id)
+            .values(totals=totals, updated_at=func.now())
+        )
+
+    @staticmethod
+    async def mark_rollup_maintained(
+        session: AsyncSession, user_id: _uuid.UUID, month_year: str
+    ) -> None:
+        """Tell the invalidation trigger this transaction keeps the month's rollup current.
+
+        Without it the commit-time trigger (migration 0016) drops the rollup
+        of every month whose source rows the transaction wrote.
+        """
+        setting = "app.finance_rollup_months"
+        await session.execute(
+            select(
+                func.set_config(
+                    setting,
+                    func.concat_ws(
+                        ",", func.current_setting(setting, True), f"{user_id}:{month_year}"
+                    ),
+                    True,
+                )
+            )
+        )
+
+    @staticmethod
+    async def save_reconciled_rollups(
+        session: AsyncSession, user_id: _uuid.UUID, totals_by_month: dict[str, dict[str, Any]]
+    ) -> None:
+        """Upsert recomputed rollups and stamp them as reconciled."""
+        if not totals_by_month:
+            return
+        stmt = insert(FinanceMonthlyRollup).values(
+            [
+                {"id": _uuid.uuid4(), "user_id": user_id, "month_year": month, "totals": totals}
+                for month, totals in totals_by_month.items()
+            ]
+        )
+        now = func.now()
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[FinanceMonthlyRollup.user_id, FinanceMonthlyRollup.month_year],
+                set_={"totals": stmt.excluded.totals, "reconciled_at": now, "updated_at": now},
+            )
+        )
+
+    @staticmethod
+    async def delete_rollups(session: AsyncSession, user_id: _uuid.UUID, months: list[str]) -> None:
+        """Drop rollups whose months changed outside the delta path (rebuilt on reconcile)."""
+        if not months:
+            return
+        await session.execute(
+            delete(FinanceMonthlyRollup).where(
+                FinanceMonthlyRollup.user_id == user_id,
+                FinanceMonthlyRollup.month_year.in_(months),
+            )
+        )
@@ -0,0 +1,371 @@
+"""Job repository — Postgres-backed queue with SKIP LOCKED leasing.
+
+Workers on any replica claim due jobs with ``FOR UPDATE SKIP LOCKED`` so a
+job is never handed to two workers at once. A claimed job carries a lease
+(``locked_until``) that the owner extends with heartbeats; if the owner dies
+the lease expires and the job becomes claimable again (visibility timeout).
+"""
+
+import datetime as _dt
+import uuid as _uuid
+from typing import Any
+
+from sqlalchemy import (
+    Numeric,
+    and_,
+    case,
+    cast,
+    func,
+    literal,
+    or_,
+    select,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.enums import JobStatus
+from app.db.models.jobs import BackgroundJob
+
+
+class JobRepository:
+    @staticmethod
+    async def get_by_id(session: AsyncSession, job_id: _uuid.UUID) -> BackgroundJob | None:
+        result = await session.execute(select(BackgroundJob).where(BackgroundJob.id == job_id))
+        return result.scalar_one_or_none()
+
+    @staticmethod
+    async def lock_if_running(session: AsyncSession, job_id: _uuid.UUID) -> bool:
+        """Row-lock ``job_id`` until commit if it is still running.
+
+        Serializes a batch job's fan-out with ``cancel`` so children are never
+        enqueued under a parent that was cancelled meanwhile.
+        """
+        result = await session.execute(
+            select(BackgroundJob.id)
+            .where(BackgroundJob.id == job_id, BackgroundJob.status == JobStatus.RUNNING)
+            .with_for_update()
+        )
+        return result.scalar_one_or_none() is not None
+
+    @staticmethod
+    async def try_lock_user_queue(
+        session: AsyncSession,
+        queue: str,
+        user_id: _uuid.UUID,
+        *,
+        job: BackgroundJob | None = None,
+    ) -> bool:
+        """Check that no other job of ``queue`` is running for ``user_id``.
+
+        Only a running job with a live lease counts, and when ``job`` is given
+        only one created before it, so of two overlapping jobs the older one
+        proceeds. A transaction-scoped advisory lock on (queue, user) makes the
+        check atomic against concurrent callers; returns False if another
+        caller holds it.
+        """
+        locked = await session.execute(
+            select(func.pg_try_advisory_xact_lock(func.hashtext(f"{queue}:{user_id}")))
+        )
+        if not locked.scalar_one():
+            return False
+        others = select(BackgroundJob.id).where(
+            BackgroundJob.queue == queue,
+            BackgroundJob.user_id == user_id,
+            BackgroundJob.status == JobStatus.RUNNING,
+            BackgroundJob.locked_until > func.now(),
+        )
+        if job is not None:
+            others = others.where(
+                tuple_(BackgroundJob.created_at, BackgroundJob.id) < tuple_(job.created_at, job.id)
+            )
+        result = await session.execute(select(others.exists()))
+        return not result.scalar_one()
+
+    @staticmethod
+    async def count_children_by_status(
+        session: AsyncSession, parent_id: _uuid.UUID
+    ) -> dict[JobStatus, int]:
+        result = await session.execute(
+            select(BackgroundJob.status, func.count())
+            .where(BackgroundJob.parent_id == parent_id)
+            .group_by(BackgroundJob.status)
+        )
+        return {status: count for status, count in result.tuples().all()}
+
+    @staticmethod
+    async def sum_children_results(
+        session: AsyncSession, parent_id: _uuid.UUID
+    ) -> dict[str, float]:
+        """Sum every numeric top-level field of the children's ``result`` objects."""
+        fields = func.jsonb_each(BackgroundJob.result).table_valued("key", "value")
+        result = await session.execute(
+            select(fields.c.key, func.sum(cast(fields.c.value, Numeric)))
+            .select_from(BackgroundJob)
+            .join(fields, true())
+            .where(
+                BackgroundJob.parent_id == parent_id,
+                func.jsonb_typeof(fields.c.value) == "number",
+            )
+            .group_by(fields.c.key)
+        )
+        return {key: float(total) for key, total in result.tuples().all()}
+
+    @staticmethod
+    async def cancel(session: AsyncSession, job_id: _uuid.UUID) -> int:
+        """Cancel a job and its children that have not finished yet.
+
+        Pending jobs are never claimed again. A running job's next heartbeat
+        finds it no longer running, so its worker abandons it. Returns the
+        number of jobs cancelled.
+        """
+        now = func.now()
+        res = await session.execute(
+            update(BackgroundJob)
+            .where(
+                or_(BackgroundJob.id == job_id, BackgroundJob.parent_id == job_id),
+                BackgroundJob.status.in_([JobStatus.PENDING, JobStatus.RUNNING]),
+            )
+            .values(
+                status=JobStatus.CANCELLED,
+                locked_by=None,
+                locked_until=None,
+                finished_at=now,
+                updated_at=now,
+            )
+            .returning(BackgroundJob.id)
+        )
+        return len(res.scalars().all())
+
+    @staticmethod
+    async def enqueue_many(session: AsyncSession, jobs: list[dict[str, Any]]) -> list[_uuid.UUID]:
+        """Insert jobs in one statement, skipping any that would conflict.
+
+        A job conflicts when its ``dedupe_key`` already exists, or when a
+        pending or running job holds its ``concurrency_key``. Returns the ids
+        of the jobs actually inserted.
+        """
+        if not jobs:
+            return []
+        rows = [{"id": _uuid.uuid4(), **job} for job in jobs]
+        stmt = (
+            insert(BackgroundJob).values(rows).on_conflict_do_nothing().returning(BackgroundJob.id)
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def set_payload(
+        session: AsyncSession, job_id: _uuid.UUID, payload: dict[str, Any]
+    ) -> None:
+        """Replace a job's payload, e.g. to record work a retry must not redo."""
+        await session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id)
+            .values(payload=payload, updated_at=func.now())
+        )
+
+    @staticmethod
+    async def postpone(
+        session: AsyncSession,
+        job_id: _uuid.UUID,
+        *,
+        delay_seconds: float,
+        max_delay_seconds: float,
+    ) -> bool:
+        """Push a pending job's ``run_at`` to now + ``delay_seconds`` (debounce).
+
+        The new time is capped at ``max_delay_seconds`` after the job was
+        created so a steady stream of events cannot starve it. Returns False
+        if the job is no longer pending.
+        """
+        now = func.now()
+        res = await session.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id, BackgroundJob.status == JobStatus.PENDING)
+            .values(
+                run_at=func.least(
+                    now + _dt.timedelta(seconds=delay_seconds),
+                    BackgroundJob.created_at + _dt.timedelta(seconds=max_delay_seconds),
+                ),
+                updated_at=now,
+            )
+            .returning(BackgroundJob.id)
+        )
+        return res.scalar_one_or_none() is not None
+
+    @staticmethod
+    async def claim(
+        session: AsyncSession,
+        *,
+        queues: list[str],
+        worker_id: str,
+        limit: int,
+        lease_seconds: float,
+    ) -> list[BackgroundJob]:
+        """Lease up to ``limit`` due jobs for ``worker_id``.
+
+        Due means pending with ``run_at`` in the past, or running with an
+        expired lease and attempts left; higher ``priority`` is claimed first.
+        Rows locked by a concurrent claim are skipped rather than waited on.
+        """
+        now = func.now()
+        candidates = (
+            select(BackgroundJob.id)
+            .where(
+                BackgroundJob.queue.in_(queues),
+                or_(
+                    and_(
+                        BackgroundJob.status == JobStatus.PENDING,
+                        BackgroundJob.run_at <= now,
+                    ),
+                    and_(
+                        BackgroundJob.status == JobStatus.RUNNING,
+                        BackgroundJob.locked_until < now,
+                        BackgroundJob.attempts < BackgroundJob.max_attempts,
+                    ),
+                ),
+            )
+            .order_by(BackgroundJob.priority.desc(), BackgroundJob.run_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .cte("candidates")
+        )
+        stmt = (
+            update(BackgroundJob)
+            .where(BackgroundJob.id.in_(select(candidates.c.id)))
+            .values(
+                status=JobStatus.RUNNING,
+                attempts=BackgroundJob.attempts + 1,
+                locked_by=worker_id,
+                locked_until=now + _dt.timedelta(seconds=lease_seconds),
+                heartbeat_at=now,
+                started_at=now,
+                updated_at=now,
+            )
+            .returning(BackgroundJob)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        return list(result.scalars().all())
+
+    @staticmethod
+    async def heartbeat(
+        session: AsyncSession,
+        job_id: _uuid.UUID,
+        *,
+        worker_id: str,
+        lease_seconds: float,
+    ) -> bool:
+        """Extend the lease. Returns False if ``worker_id`` no longer owns the job."""
+        now = func.now()
+        result = await session.execute(
+            update(BackgroundJob)
+            .where(
+                BackgroundJob.id == job_id,
+                BackgroundJob.locked_by == worker_id,
+                BackgroundJob.status == JobStatus.RUNNING,
+            )
+            .values(
+                locked_until=now + _dt.timedelta(seconds=lease_seconds),
+                heartbeat_at=now,
+                updated_at=now,
+            )
+            .returning(BackgroundJob.id)
+        )
+        return result.scalar_one_or_none() is not None
+
+    @staticmethod
+    async def complete(
+        session: AsyncSession,
+        job_id: _uuid.UUID,
+        *,
+        worker_id: str,
+        result: dict[str, Any] | None = None,
+    ) -> bool:
+        now = func.now()
+        res = await session.execute(
+            update(BackgroundJob)
+            .where(
+                BackgroundJob.id == job_id,
+                BackgroundJob.locked_by == worker_id,
+                BackgroundJob.status == JobStatus.RUNNING,
+            )
+            .values(
+                status=JobStatus.COMPLETED,
+                result=result,
+                locked_by=None,
+                locked_until=None,
+                finished_at=now,
+                updated_at=now,
+            )
+            .returning(BackgroundJob.id)
+        )
+        return res.scalar_one_or_none() is not None
+
+    @staticmethod
+    async def fail(
+        session: AsyncSession,
+        job_id: _uuid.UUID,
+        *,
+        worker_id: str,
+        error: str,
+        retry_delay_seconds: float,
+    ) -> JobStatus | None:
+        """Record a failed attempt.
+
+        The job goes back to pending after ``retry_delay_seconds`` while it has
+        attempts left, otherwise it is marked failed. Returns the new status,
+        or None if ``worker_id`` no longer owns the job.
+        """
+        now = func.now()
+        exhausted = BackgroundJob.attempts >= BackgroundJob.max_attempts
+        status_type = BackgroundJob.__table__.c.status.type
+        res = await session.execute(
+            update(BackgroundJob)
+            .where(
+                BackgroundJob.id == job_id,
+                BackgroundJob.locked_by == worker_id,
+                BackgroundJob.status == JobStatus.RUNNING,
+            )
+            .values(
+                status=case(
+                    (exhausted, literal(JobStatus.FAILED, status_type)),
+                    else_=literal(JobStatus.PENDING, status_type),
+                ),
+                run_at=now + _dt.timedelta(seconds=retry_delay_seconds),
+                finished_at=case((exhausted, now), else_=None),
+                last_error=error,
+                locked_by=None,
+                locked_until=None,
+                updated_at=now,
+            )
+            .returning(BackgroundJob.status)
+        )
+        return res.scalar_one_or_none()
+
+    @staticmethod
+    async def fail_expired(session: AsyncSession, *, queues: list[str]) -> int:
+        """Mark jobs whose lease expired on their last attempt as failed."""
+        now = func.now()
+        res = await session.execute(
+            update(BackgroundJob)
+            .where(
+                BackgroundJob.queue.in_(queues),
+                BackgroundJob.status == JobStatus.RUNNING,
+                BackgroundJob.locked_until < now,
+                BackgroundJob.attempts >= BackgroundJob.max_attempts,
+            )
+            .values(
+                status=JobStatus.FAILED,
+                last_error="Lease expired on final attempt",
+                locked_by=None,
+                locked_until=None,
+                finished_at=now,
+                updated_at=now,
+            )
+            .returning(BackgroundJob.id)
+        )
+        return len(res.scalars().all())
@@ -1,19 +1,52 @@
-"""Memory repository — knowledge items, user memories, and consolidation logs."""
+"""Memory repository — knowledge items, user memories, consolidation logs and triggers."""
 
 import uuid as _uuid
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
 
-from sqlalchemy import or_, select, update
+from sqlalchemy import case, func, literal, select, update
+from sqlalchemy.dialects.postgresql import UUID, insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from app.db.models.memory import KnowledgeItem, MemoryConsolidation
+from app.db import knowledge_index
+from app.db.knowledge_index import KnowledgeIndex
+from app.db.models.enums import ConsolidationStatus
+from app.db.models.memory import ConsolidationTrigger, KnowledgeItem, MemoryConsolidation
 from app.db.models.users import UserMemory
 
+# Confidence added when a near-duplicate corroborates an existing item
+_CORROBORATION_BOOST = 0.05
+
+
+@dataclass(frozen=True, slots=True)
+class MemoryContext:
+    """Knowledge items of some areas plus the user's memories, as loaded by ``get_context``."""
+
+    # Most confident first
+    items: list[KnowledgeItem]
+    memories: UserMemory | None
+
 
 class MemoryRepository:
     # --- Knowledge Items ---
 
+    @staticmethod
+    async def knowledge_index(session: AsyncSession, user_id: _uuid.UUID) -> KnowledgeIndex:
+        """The user's in-memory BM25 index, loaded with one query on first use."""
+        index = knowledge_index.cached_index(user_id)
+        if index is not None:
+            return index
+        result = await session.execute(
+            select(KnowledgeItem).where(
+                KnowledgeItem.user_id == user_id,
+                KnowledgeItem.deleted_at.is_(None),
+                KnowledgeItem.superseded_by_id.is_(None),
+            )
+        )
+        return knowledge_index.store_index(session, user_id, result.scalars().all())
+
     @staticmethod
     async def search_knowledge(
         session: AsyncSession,
@@ -25,28 +58,94 @@ class MemoryRepository:
         sub_area: str | None = None,
         limit: int = 50,
     ) -> list[KnowledgeItem]:
-        stmt = select(KnowledgeItem).where(
-            KnowledgeItem.user_id == user_id,
-            KnowledgeItem.deleted_at.is_(None),
-            KnowledgeItem.superseded_by_id.is_(None),
-        )
-        if query is not None:
-            pattern = f"%{query}%"
-            stmt = stmt.where(
-                or_(
-                    KnowledgeItem.title.ilike(pattern),
-                    KnowledgeItem.content.ilike(pattern),
-                )
+        """Active items, ranked by relevance to *query* (newest first without one).
+
+        Served from the user's knowledge index; see app/db/knowledge_index.py.
+        """
+        index = await MemoryRepository.knowledge_index(session, user_id)
+        return index.search(query, item_type=item_type, area=area, sub_area=sub_area, limit=limit)
+
+    @staticmethod
+    async def select_knowledge(
+        session: AsyncSession, user_id: _uuid.UUID, text: str, *, limit: int | None = None
+    ) -> list[KnowledgeItem]:
+        """Up to *limit* active items (all without one): the most relevant to *text*
+        first, then the most recently touched."""
+        index = await MemoryRepository.knowledge_index(session, user_id)
+        return index.select(text, limit=limit)
+
+    @staticmethod
+    async def get_active_knowledge(
+        session: AsyncSession, user_id: _uuid.UUID, item_ids: list[_uuid.UUID]
+    ) -> list[KnowledgeItem]:
+        """Those of *item_ids* still active (neither deleted nor superseded)."""
+        index = await MemoryRepository.knowledge_index(session, user_id)
+        return [item for item_id in item_ids if (item := index.get(item_id)) is not None]
+
+    @staticmethod
+    async def find_near_duplicate(
+        session: AsyncSession,
+        user_id: _uuid.UUID,
+        content: str,
+        *,
+        item_type: str,
+        area: str | None,
+        threshold: float,
+    ) -> KnowledgeItem | None:
+        """The active item of the same type and area that *content* only rewords.
+
+        Lexical (MinHash over character shingles, no LLM); see
+        ``KnowledgeIndex.near_duplicate``.
+        """
+        index = await MemoryRepository.knowledge_index(session, user_id)
+        match = index.near_duplicate(content, item_type=item_type, area=area, threshold=threshold)
+        return match[0] if match else None
+
+    @staticmethod
+    async def get_context(
+        session: AsyncSession,
+        user_id: _uuid.UUID,
+        areas: list[str],
+        *,
+        per_area: int = 10,
+        limit: int = 15,
+    ) -> MemoryContext:
+        """The ``per_area`` newest items of each area, then the ``limit`` most confident of
+        those, with the user's memories, in one query.
+
+        A one-row anchor (the user id) is outer-joined to user_memories and to the
+        ranked items, so memories come back even when no item matches.
+        """
+        ranked = (
+            select(
+                KnowledgeItem,
+                func.row_number()
+                .over(partition_by=KnowledgeItem.area, order_by=KnowledgeItem.created_at.desc())
+                .label("area_rank"),
             )
-        if item_type is not None:
-            stmt = stmt.where(KnowledgeItem.type == item_type)
-        if area is not None:
-            stmt = stmt.where(KnowledgeItem.area == area)
-        if sub_area is not None:
-            stmt = stmt.where(KnowledgeItem.sub_area == sub_area)
-        stmt = stmt.order_by(KnowledgeItem.created_at.desc()).limit(limit)
-        result = await session.execute(stmt)
-        return list(result.scalars().all())
+            .where(
+                KnowledgeItem.user_id == user_id,
+                KnowledgeItem.deleted_at.is_(None),
+                KnowledgeItem.superseded_by_id.is_(None),
+                KnowledgeItem.area.in_(areas),
+            )
+            .subquery("ranked")
+        )
+        item = aliased(KnowledgeItem, ranked)
+        anchor = select(literal(user_id, UUID(as_uuid=True)).label("user_id")).subquery("anchor")
+        result = await session.execute(
+            select(UserMemory, item)
+            .select_from(anchor)
+            .outerjoin(UserMemory, UserMemory.user_id == anchor.c.user_id)
+            .outerjoin(item, ranked.c.area_rank <= per_area)
+            .order_by(item.confidence.desc(), item.created_at.desc())
+            .limit(limit)
+        )
+        rows = result.all()
+        return MemoryContext(
+            items=[row[1] for row in rows if row[1] is not None],
+            memories=rows[0][0] if rows else None,
+        )
 
     @staticmethod
     async def get_knowledge_by_id(
@@ -60,6 +159,7 @@ class MemoryRepository:
         obj = KnowledgeItem(**data)
         session.add(obj)
         await session.flush()
+        knowledge_index.queue_upsert(session, obj)
         return obj
 
     @staticmethod
@@ -69,7 +169,42 @@ class MemoryRepository:
         await session.execute(
             update(KnowledgeItem).where(KnowledgeItem.id == item_id).values(**data)
         )
-        return await MemoryRepository.get_knowledge_by_id(session, item_id)
+        item = await MemoryRepository.get_knowledge_by_id(session, item_id)
+        if item is not None:
+            knowledge_index.queue_upsert(session, item)
+        return item
+
+    @staticmethod
+    async def merge_duplicate_knowledge(
+        session: AsyncSession, item_id: _uuid.UUID, confidence: float
+    ) -> KnowledgeItem | None:
+        """Fold a re-learned near-duplicate into item *item_id*.
+
+        Confidence becomes the higher of both plus a small corroboration boost
+        (capped at 1.0) and ``updated_at`` is bumped. Returns None, changing
+        nothing, when the item is no longer active.
+        """
+        result = await session.execute(
+            update(KnowledgeItem)
+            .where(
+                KnowledgeItem.id == item_id,
+                KnowledgeItem.deleted_at.is_(None),
+                KnowledgeItem.superseded_by_id.is_(None),
+            )
+            .values(
+                confidence=func.least(
+                    func.greatest(KnowledgeItem.confidence, confidence) + _CORROBORATION_BOOST,
+                    1.0,
+                ),
+                updated_at=func.now(),
+            )
+            .returning(KnowledgeItem)
+            .execution_options(populate_existing=True)
+        )
+        item = result.scalar_one_or_none()
+        if item is not None:
+            knowledge_index.queue_upsert(session, item)
+        return item
 
     @staticmethod
     async def supersede_knowledge(
@@ -82,6 +217,7 @@ class MemoryRepository:
             .where(KnowledgeItem.id == old_id)
             .values(superseded_by_id=new_id, superseded_at=datetime.now())
         )
+        knowledge_index.queue_remove(session, old_id)
 
     # --- User Memories ---
 
@@ -121,3 +257,85 @@ class MemoryRepository:
             .limit(1)
         )
         return result.scalar_one_or_none()
+
+    @staticmethod
+    async def get_consolidation_checkpoint(
+        session: AsyncSession, user_id: _uuid.UUID, consolidated_from: datetime
+    ) -> MemoryConsolidation | None:
+        """Newest checkpoint (``partial`` row) of the window starting at ``consolidated_from``.
+
+        Rows written after it, such as a ``failed`` log of the crashed run, do
+        not hide it.
+        """
+        result = await session.execute(
+            select(MemoryConsolidation)
+            .where(
+                MemoryConsolidation.user_id == user_id,
+                MemoryConsolidation.consolidated_from == consolidated_from,
+                MemoryConsolidation.status == ConsolidationStatus.PARTIAL,
+            )
+            .order_by(MemoryConsolidation.created_at.desc())
+            .limit(1)
+        )
+        return result.scalar_one_or_none()
+
+    # --- Consolidation Triggers ---
+
+    @staticmethod
+    async def bump_consolidation_trigger(
+        session: AsyncSession, user_id: _uuid.UUID, *, messages: int, tokens: int
+    ) -> ConsolidationTrigger:
+        """Add pending volume for a user and return the updated counters.
+
+        The upsert keeps the row locked until commit, so concurrent turns for
+        the same user serialize and each sees the other's counts.
+        """
+        stmt = insert(ConsolidationTrigger).values(
+            user_id=user_id, pending_messages=messages, pending_tokens=tokens
+        )
+        upsert = stmt.on_conflict_do_update(
+            index_elements=[ConsolidationTrigger.user_id],
+            set_={
+                "pending_messages": ConsolidationTrigger.pending_messages
+                + stmt.excluded.pending_messages,
+                "pending_tokens": ConsolidationTrigger.pending_tokens
+                + stmt.excluded.pending_tokens,
+                "updated_at": func.now(),
+            },
+        ).returning(ConsolidationTrigger)
+        result = await session.execute(upsert, execution_options={"populate_existing": True})
+        trigger: ConsolidationTrigger = result.scalar_one()
+        return trigger
+
+    @staticmethod
+    async def set_consolidation_trigger_job(
+        session: AsyncSession, user_id: _uuid.UUID, job_id: _uuid.UUID
+    ) -> None:
+        await session.execute(
+            update(ConsolidationTrigger)
+            .where(ConsolidationTrigger.user_id == user_id)
+            .values(scheduled_job_id=job_id, updated_at=func.now())
+        )
+
+    @staticmethod
+    async def reset_consolidation_trigger(
+        session: AsyncSession, user_id: _uuid.UUID, *, job_id: _uuid.UUID
+    ) -> None:
+        """Zero the counters when a consolidation for the user starts.
+
+        The scheduled job reference is cleared only if ``job_id`` is that job,
+        so a nightly run does not orphan a still-pending incremental one.
+        """
+        await session.execute(
+            update(ConsolidationTrigger)
+            .where(ConsolidationTrigger.user_id == user_id)
+            .values(
+                pending_messages=0,
+                pending_tokens=0,
+                scheduled_job_id=case(
+                    (ConsolidationTrigger.scheduled_job_id == job_id, None),
+                    else_=ConsolidationTrigger.scheduled_job_id,
+                ),
+                updated_at=func.now(),
+            )
+        )
@@ -1,15 +1,28 @@
 """Tracking repository — CRUD for tracking entries, habits, and completions."""
 
 import uuid as _uuid
-from datetime import date, timedelta
+from dataclasses import dataclass
+from datetime import date
 from typing import Any
 
-from sqlalchemy import delete, select, update
+from sqlalchemy import Date, case, delete, exists, func, insert, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models.tracking import Habit, HabitCompletion, TrackingEntry
 
 
+@dataclass(frozen=True, slots=True)
+class HabitStatus:
+    """An active habit with its completion state, as loaded by ``get_habits_with_status``."""
+
+    habit: Habit
+    # Whether a completion exists on the requested date
+    completed: bool
+    # Most recent completion dates, newest first
+    recent_dates: list[date]
+
+
 class TrackingRepository:
     @staticmethod
     async def create(session: AsyncSession, entry: dict[str, Any]) -> TrackingEntry:
@@ -18,6 +31,14 @@ class TrackingRepository:
         await session.flush()
         return obj
 
+    @staticmethod
+    async def create_batch(session: AsyncSession, entries: list[dict[str, Any]]) -> int:
+        """Insert *entries* with a single multi-row INSERT (all dicts share the same keys)."""
+        if not entries:
+            return 0
+        await session.execute(insert(TrackingEntry).values(entries))
+        return len(entries)
+
     @staticmethod
     async def get_by_id(session: AsyncSession, entry_id: _uuid.UUID) -> TrackingEntry | None:
         result = await session.execute(select(TrackingEntry).where(TrackingEntry.id == entry_id))
@@ -53,6 +74,62 @@ class TrackingRepository:
         )
         return await TrackingRepository.get_by_id(session, entry_id)
 
+    @staticmethod
+    async def get_daily_values(
+        session: AsyncSession,
+        user_id: _uuid.UUID,
+        tracking_type: str,
+        date_from: date,
+        date_to: date,
+        *,
+        additive: bool = False,
+    ) -> list[tuple[date, float]]:
+        """One value per day with entries (summed if *additive*, else averaged), by date."""
+        value = func.sum(TrackingEntry.value) if additive else func.avg(TrackingEntry.value)
+        result = await session.execute(
+            select(TrackingEntry.entry_date, value)
+            .where(
+                TrackingEntry.user_id == user_id,
+                TrackingEntry.type == tracking_type,
+                TrackingEntry.entry_date >= date_from,
+                TrackingEntry.entry_date <= date_to,
+            )
+            .group_by(TrackingEntry.entry_date)
+            .order_by(TrackingEntry.entry_date)
+        )
+        return [(day, float(v)) for day, v in result.all()]
+
+    @staticmethod
+    async def get_daily_values_by_type(
+        session: AsyncSession,
+        user_id: _uuid.UUID,
+        tracking_types: list[str],
+        date_from: date,
+        date_to: date,
+        *,
+        additive_types: frozenset[str] = frozenset(),
+    ) -> dict[str, list[tuple[date, float]]]:
+        """``get_daily_values`` for several types in one query, keyed by type."""
+        value = case(
+            (TrackingEntry.type.in_(additive_types), func.sum(TrackingEntry.value)),
+            else_=func.avg(TrackingEntry.value),
+        )
+        result = await session.execute(
+            select(TrackingEntry.type, TrackingEntry.entry_date, value)
+            .where(
+                TrackingEntry.user_id == user_id,
+                TrackingEntry.type.in_(tracking_types),
+                TrackingEntry.entry_date >= date_from,
+                TrackingEntry.entry_date <= date_to,
+            )
+            .group_by(TrackingEntry.type, TrackingEntry.entry_date)
+            .order_by(TrackingEntry.entry_date)
+        )
+        by_type: dict[str, list[tuple[date, float]]] = {t: [] for t in tracking_types}
+        for tracking_type, day, v in result.all():
+            by_type[str(tracking_type)].append((day, float(v)))
+        return by_type
+
     @staticmethod
     async def delete(session: AsyncSession, entry_id: _uuid.UUID) -> None:
         await session.execute(delete(TrackingEntry).where(TrackingEntry.id == entry_id))
@@ -62,6 +139,24 @@ class TrackingRepository:
         result = await session.execute(delete(TrackingEntry).where(TrackingEntry.id.in_(entry_ids)))
         return result.rowcount  # type: ignore[attr-defined, no-any-return]
 
+    @staticmethod
+    async def delete_by_range(
+        session: AsyncSession,
+        user_id: _uuid.UUID,
+        tracking_type: str,
+        date_from: date,
+        date_to: date,
+    ) -> int:
+        result = await session.execute(
+            delete(TrackingEntry).where(
+                TrackingEntry.user_id == user_id,
+                TrackingEntry.type == tracking_type,
+                TrackingEntry.entry_date >= date_from,
+                TrackingEntry.entry_date <= date_to,
+            )
+        )
+        return result.rowcount  # type: ignore[attr-defined, no-any-return]
+
     @staticmethod
     async def get_habits(session: AsyncSession, user_id: _uuid.UUID) -> list[Habit]:
         result = await session.execute(
@@ -71,6 +166,38 @@ class TrackingRepository:
         )
         return list(result.scalars().all())
 
+    @staticmethod
+    async def get_habits_with_status(
+        session: AsyncSession,
+        user_id: _uuid.UUID,
+        on_date: date,
+        *,
+        limit: int = 60,
+    ) -> list[HabitStatus]:
+        """Active habits with their completed-on-date flag and recent dates, in one query."""
+        completed = exists().where(
+            HabitCompletion.habit_id == Habit.id,
+            HabitCompletion.user_id == user_id,
+            HabitCompletion.completion_date == on_date,
+        )
+        recent = (
+            select(HabitCompletion.completion_date)
+            .where(HabitCompletion.habit_id == Habit.id, HabitCompletion.user_id == user_id)
+            .order_by(HabitCompletion.completion_date.desc())
+            .limit(limit)
+            .correlate(Habit)
+            .scalar_subquery()
+        )
+        result = await session.execute(
+            select(Habit, completed.label("completed"), func.array(recent, type_=ARRAY(Date)))
+            .where(Habit.user_id == user_id, Habit.is_active.is_(True), Habit.deleted_at.is_(None))
+            .order_by(Habit.sort_order)
+        )
+        return [
+            HabitStatus(habit=habit, completed=bool(done), recent_dates=list(dates or []))
+            for habit, done, dates in result.all()
+        ]
+
     @staticmethod
     async def get_habit_by_id(session: AsyncSession, habit_id: _uuid.UUID) -> Habit | None:
         result = await session.execute(select(Habit).where(Habit.id == habit_id))
@@ -86,51 +213,13 @@ class TrackingRepository:
         return obj
 
     @staticmethod
-    async def get_completion_for_date(
-        session: AsyncSession,
-        habit_id: _uuid.UUID,
-        user_id: _uuid.UUID,
-        target_date: date,
-    ) -> HabitCompletion | None:
+    async def get_completion_dates(
+        session: AsyncSession, user_id: _uuid.UUID
+    ) -> dict[_uuid.UUID, list[date]]:
+        """Every completion date of every habit of the user, grouped by habit."""
         result = await session.execute(
-            select(HabitCompletion).where(
-                HabitCompletion.habit_id == habit_id,
-                HabitCompletion.user_id == user_id,
-                HabitCompletion.completion_date == target_date,
-            )
+            select(HabitCompletion.habit_id, func.array_agg(HabitCompletion.completion_date))
+            .where(HabitCompletion.user_id == user_id)
+            .group_by(HabitCompletion.habit_id)
         )
-        return result.scalar_one_or_none()
-
-    @staticmethod
-    async def get_recent_completions(
-        session: AsyncSession,
-        habit_id: _uuid.UUID,
-        user_id: _uuid.UUID,
-        limit: int = 60,
-    ) -> list[HabitCompletion]:
-        result = await session.execute(
-            select(HabitCompletion)
-            .where(
-                HabitCompletion.habit_id == habit_id,
-                HabitCompletion.user_id == user_id,
-            )
-            .order_by(HabitCompletion.completion_date.desc())
-            .limit(limit)
-        )
-        return list(result.scalars().all())
-
-    @staticmethod
-    def compute_streak(completions: list[HabitCompletion], from_date: date) -> int:
-        """Compute current streak counting backward from ``from_date``.
-
-        Completions must be pre-sorted by ``completion_date`` descending.
-        """
-        if not completions:
-            return 0
-        dates = {c.completion_date for c in completions}
-        streak = 0
-        day = from_date
-        while day in dates:
-            streak += 1
-            day -= timedelta(days=1)
-        return streak
+        return {habit_id: list(dates) for habit_id, dates in result.all()}
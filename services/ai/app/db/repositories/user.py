@@ -1,15 +1,26 @@
 """User repository — read user profiles and manage user memories."""
 
 import uuid as _uuid
+from dataclasses import dataclass
 from typing import Any
 
-from sqlalchemy import distinct, select, update
+from sqlalchemy import distinct, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.models.chat import Conversation, Message
 from app.db.models.enums import UserStatus
 from app.db.models.users import User, UserMemory
 
 
+@dataclass(frozen=True)
+class ConsolidationCandidate:
+    """A user with messages pending consolidation, plus the size of that backlog."""
+
+    user: User
+    message_count: int
+    message_bytes: int
+
+
 class UserRepository:
     @staticmethod
     async def get_by_id(session: AsyncSession, user_id: _uuid.UUID) -> User | None:
@@ -52,3 +63,38 @@ class UserRepository:
             )
         )
         return list(result.scalars().all())
+
+    @staticmethod
+    async def get_consolidation_candidates(
+        session: AsyncSession, timezone: str
+    ) -> list[ConsolidationCandidate]:
+        """Get active users in a timezone with messages since their consolidation watermark.
+
+        One set-based query: users without new messages (most of them on a
+        typical night) are never returned. The watermark matches the worker's:
+        ``last_consolidated_at``, or the memory's ``created_at`` if never run.
+        Largest backlog (in bytes) first.
+        """
+        watermark = func.coalesce(UserMemory.last_consolidated_at, UserMemory.created_at)
+        message_count = func.count(Message.id)
+        message_bytes = func.coalesce(func.sum(func.octet_length(Message.content)), 0)
+        result = await session.execute(
+            select(User, message_count, message_bytes)
+            .join(UserMemory, UserMemory.user_id == User.id)
+            .join(Conversation, Conversation.user_id == User.id)
+            .join(
+                Message,
+                (Message.conversation_id == Conversation.id) & (Message.created_at >= watermark),
+            )
+            .where(
+                User.timezone == timezone,
+                User.status == UserStatus.ACTIVE,
+                User.deleted_at.is_(None),
+            )
+            .group_by(User.id)
+            .order_by(message_bytes.desc(), User.id)
+        )
+        return [
+            ConsolidationCandidate(user=user, message_count=count, message_bytes=int(size))
+            for user, count, size in result.all()
+        ]
@@ -7,6 +7,7 @@ from contextlib import asynccontextmanager
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.connection_guard import holding_connection
 from app.db.engine import AsyncSessionFactory
 
 
@@ -28,7 +29,8 @@ async def get_user_session(
     safe_uid = str(_uuid.UUID(user_id))  # raises ValueError if malformed
     async with session_factory() as session, session.begin():
         await session.execute(text(f"SET LOCAL request.jwt.claim.sub = '{safe_uid}'"))
-        yield session
+        with holding_connection():
+            yield session
 
 
 @asynccontextmanager
@@ -41,4 +43,5 @@ async def get_service_session(
     """
     async with session_factory() as session, session.begin():
         await session.execute(text("SET LOCAL role = 'service_role'"))
-        yield session
+        with holding_connection():
+            yield session
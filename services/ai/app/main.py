@@ -14,8 +14,26 @@ from app.api.routes.health import router as health_router
 from app.api.routes.workers import router as workers_router
 from app.config import get_settings
 from app.db.engine import get_async_engine, get_session_factory
+from app.db.invalidation import InvalidationListener, subscribe
+from app.db.knowledge_index import invalidate_knowledge_indexes
 from app.observability import configure_logging, init_sentry
-from app.workers.consolidation import set_session_factory
+from app.tools.common.tool_cache import invalidate_tool_cache
+from app.tools.finance._debt_schedule import invalidate_debt_schedules
+from app.tools.finance._helpers import invalidate_materialized_months
+from app.tools.tracking._habit_calendar import invalidate_habit_calendars
+from app.workers.consolidation import (
+    CONSOLIDATION_BATCH_QUEUE,
+    CONSOLIDATION_LLM_BATCH_QUEUE,
+    CONSOLIDATION_QUEUE,
+    handle_consolidation_batch_job,
+    handle_consolidation_job,
+    handle_consolidation_llm_batch_job,
+    set_session_factory,
+)
+from app.workers.finance_rollups import FINANCE_ROLLUP_QUEUE, handle_finance_rollup_job
+from app.workers.finance_rollups import set_session_factory as set_rollup_session_factory
+from app.workers.job_queue import JobWorker, register_handler
+from app.workers.leader import LeaderElector
 from app.workers.scheduler import setup_scheduler
 
 # Initialize observability before anything else (matches NestJS: import './instrument')
@@ -36,6 +54,18 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
     app.state.db_engine = engine
     app.state.session_factory = get_session_factory(engine)
 
+    # In-process caches, evicted on writes from any process (DB triggers → NOTIFY)
+    subscribe(invalidate_tool_cache)
+    subscribe(invalidate_debt_schedules)
+    subscribe(invalidate_materialized_months)
+    subscribe(invalidate_habit_calendars)
+    subscribe(invalidate_knowledge_indexes)
+    invalidation_listener = None
+    if settings.CACHE_INVALIDATION_ENABLED:
+        invalidation_listener = InvalidationListener(engine)
+        await invalidation_listener.start()
+        app.state.invalidation_listener = invalidation_listener
+
     # LangGraph checkpoint persistence (context manager manages psycopg connection)
     async with AsyncPostgresSaver.from_conn_string(settings.DATABASE_URL) as checkpointer:
         await checkpointer.setup()
@@ -46,21 +76,52 @@ async def lifespan(app: FastAPI) -> AsyncIterator[None]:
         triage_llm = create_triage_llm(settings)
         app.state.graph = build_chat_graph(llm, triage_llm, checkpointer)
 
-        # APScheduler for consolidation jobs
+        # APScheduler for the consolidation and finance rollup crons (they enqueue
+        # onto the job queue). Only the advisory-lock leader runs it, so crons fire
+        # once across processes.
         set_session_factory(app.state.session_factory)
-        scheduler = None
-        if settings.CONSOLIDATION_ENABLED:
-            scheduler = await setup_scheduler(app.state.session_factory)
-            app.state.scheduler = scheduler
+        set_rollup_session_factory(app.state.session_factory)
+        app.state.scheduler = None
+
+        async def _start_scheduler() -> None:
+            app.state.scheduler = await setup_scheduler(app.state.session_factory)
+
+        async def _stop_scheduler() -> None:
+            if app.state.scheduler is not None:
+                app.state.scheduler.shutdown(wait=False)
+                app.state.scheduler = None
+                logger.info("APScheduler stopped")
+
+        scheduler_elector = None
+        if settings.CONSOLIDATION_ENABLED or settings.FINANCE_ROLLUP_RECONCILE_ENABLED:
+            scheduler_elector = LeaderElector(
+                engine, on_elected=_start_scheduler, on_demoted=_stop_scheduler
+            )
+            await scheduler_elector.start()
+            app.state.scheduler_elector = scheduler_elector
+
+        # Job queue worker (claims jobs enqueued by any replica)
+        register_handler(CONSOLIDATION_QUEUE, handle_consolidation_job)
+        register_handler(CONSOLIDATION_BATCH_QUEUE, handle_consolidation_batch_job)
+        register_handler(CONSOLIDATION_LLM_BATCH_QUEUE, handle_consolidation_llm_batch_job)
+        register_handler(FINANCE_ROLLUP_QUEUE, handle_finance_rollup_job)
+        job_worker = None
+        if settings.JOB_WORKER_ENABLED:
+            job_worker = JobWorker(app.state.session_factory)
+            job_worker.start()
+            app.state.job_worker = job_worker
 
         logger.info("AI service started (version=%s)", settings.APP_VERSION)
 
         yield
 
     # Shutdown
-    if scheduler is not None:
-        scheduler.shutdown()
-        logger.info("APScheduler stopped")
+    if scheduler_elector is not None:
+        await scheduler_elector.stop()
+    if job_worker is not None:
+        await job_worker.stop()
+    if invalidation_listener is not None:
+        await invalidation_listener.stop()
     await engine.dispose()
     logger.info("AI service stopped")
 
@@ -6,7 +6,7 @@ Full TS parity with context-builder.service.ts lines 76-287.
 M4.7: Monolithic BASE_SYSTEM_PROMPT split into composable parts:
 - CORE_SYSTEM_PROMPT: persona, rules, security, memory, context (with {domain_tools} placeholder)
 - SHARED_MEMORY_INSTRUCTIONS: search_knowledge + analyze_context (all domains)
-- TRACKING_PROMPT_EXTENSION: record_metric, get_history, update/delete, habits
+- TRACKING_PROMPT_EXTENSION: record_metric(s), get_history, insights, correlations, update/delete, habits
 - FINANCE_PROMPT_EXTENSION: all finance tool instructions
 - MEMORY_WRITE_EXTENSION: add_knowledge instructions
 - WELLBEING_PROMPT_EXTENSION: counselor mode (was COUNSELOR_EXTENSION)
@@ -58,9 +58,24 @@ Registrar métricas do usuário (peso, água, sono, exercício, humor, energia).
 - Usuário: "Voltei do médico, estou com 82kg"
 - IA: "Legal que foi ao médico! Quer que eu registre seu peso de 82kg?"
 
+### record_metrics
+Registrar VÁRIAS métricas de uma vez (ex: "bebi 2L de água, dormi 7h e meu humor está 8").
+Use UMA chamada com a lista `entries` em vez de várias chamadas de record_metric — o usuário confirma tudo em uma única pergunta.
+Se alguma métrica for inválida, nada é registrado: corrija e chame novamente.
+Mesmo fluxo de record_metric: oferecer, confirmar, executar.
+
 ### get_tracking_history
 Obter histórico de métricas do usuário. Use quando perguntarem sobre evolução, dados passados ou quiserem ver o histórico de peso, água, exercício, etc.
 
+### get_tracking_insights
+Analisar a evolução de uma métrica ao longo do tempo: tendência (regressão sobre todo o período), média móvel, valores atípicos e, com `target_value`, a data estimada para atingir a meta.
+Use para perguntas como "estou emagrecendo?", "quando chego em 75kg?", "meu sono está melhorando?". Não retorna IDs de registros — para corrigir/deletar use get_tracking_history.
+
+### get_metric_correlations
+Relacionar 2 a 4 métricas dia a dia (ex: "meu sono afeta meu humor?", "beber mais água melhora minha energia?").
+Use UMA chamada com todas as métricas em vez de buscar o histórico de cada uma e calcular. Com `max_lag_days` compara um dia com os seguintes (sono de hoje → humor de amanhã).
+Apresente como associação, nunca como causa comprovada.
+
 ### update_metric
 Corrigir um registro de métrica JÁ EXISTENTE.
 
@@ -107,20 +122,11 @@ Remover um registro de métrica. Use APENAS quando usuário pedir EXPLICITAMENTE
 3. `delete_metric({{ entryId: "<UUID-EXATO-DA-RESPOSTA>" }})`
 
 **FLUXO PARA MÚLTIPLOS REGISTROS (BATCH):**
-Quando o usuário pedir para deletar VÁRIOS registros (ex: "apaga todos", "deleta os 5 registros"):
-1. `get_tracking_history` para obter todos os registros
-2. Listar os registros que serão deletados e pedir confirmação UMA vez
-3. Fazer **CHAMADAS PARALELAS** de delete_metric - uma para CADA entry ID
-   Exemplo: Se precisa deletar 5 registros, fazer 5 chamadas delete_metric em paralelo:
-   ```
-   delete_metric({{ entryId: "uuid-1" }})
-   delete_metric({{ entryId: "uuid-2" }})
-   delete_metric({{ entryId: "uuid-3" }})
-   delete_metric({{ entryId: "uuid-4" }})
-   delete_metric({{ entryId: "uuid-5" }})
-   ```
-
-⚠️ **IMPORTANTE:** Para operações em lote, SEMPRE use chamadas paralelas. O sistema agrupa todas as confirmações em uma única pergunta ao usuário.
+Quando o usuário pedir para deletar VÁRIOS registros (ex: "apaga todos", "deleta os 5 registros"), use **delete_metrics** (uma única chamada):
+- Por IDs: `get_tracking_history` → listar os registros e pedir confirmação UMA vez → `delete_metrics({{ entry_ids: ["uuid-1", "uuid-2", "uuid-3"] }})`
+- Por período: `delete_metrics({{ metric_type: "water", date_from: "2026-01-20", date_to: "2026-01-26" }})` remove TODOS os registros desse tipo no período — confirme tipo e datas com o usuário antes
+
+⚠️ **IMPORTANTE:** Para operações em lote, prefira delete_metrics a várias chamadas de delete_metric.
 
 ### record_habit
 Registrar conclusão de hábito do usuário.
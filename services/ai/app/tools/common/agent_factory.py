@@ -20,6 +20,7 @@ from langgraph.graph import END, START, StateGraph
 from app.agents.save_response import save_response
 from app.agents.state import AgentState  # runtime: used as StateGraph schema
 from app.tools.common.confirmable_tool_node import ConfirmableToolNode
+from app.tools.common.tool_cache import get_tool_cache
 
 if TYPE_CHECKING:
     from collections.abc import Callable
@@ -172,7 +173,7 @@ def build_multi_agent_graph(
 
     # ConfirmableToolNode with ALL tools (deduped across domains)
     all_tools, all_write = _dedupe_tools(domain_registry)
-    tool_node = ConfirmableToolNode(all_tools, all_write)
+    tool_node = ConfirmableToolNode(all_tools, all_write, cache=get_tool_cache())
 
     async def agent_node(state: AgentState, config: RunnableConfig) -> dict[str, Any]:
         current = state.get("current_agent") or "general"
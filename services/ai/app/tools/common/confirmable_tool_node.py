@@ -10,6 +10,10 @@ Flow:
    ``interrupt()`` returns the resume value instantly, and WRITE tools
    execute (confirm), execute with edits (edit) or return cancellation
    messages (reject).
+
+With a ``ToolResultCache``, READ results are served from and stored in the
+cache, and every executed WRITE tool invalidates the user's cached results
+in its data domains.
 """
 
 from __future__ import annotations
@@ -26,12 +30,14 @@ from app.tools.common.confirmation import (
     generate_batch_message,
     generate_confirmation_message,
 )
+from app.tools.common.tool_cache import local_date
 
 if TYPE_CHECKING:
     from langchain_core.runnables import RunnableConfig
     from langchain_core.tools import BaseTool
 
     from app.agents.state import AgentState
+    from app.tools.common.tool_cache import ToolResultCache
 
 logger = logging.getLogger(__name__)
 
@@ -45,11 +51,20 @@ class ConfirmableToolNode:
         All tools the agent can call (both READ and WRITE).
     write_tools:
         Names of tools that require user confirmation before execution.
+    cache:
+        Optional READ result cache (see ``get_tool_cache``).
     """
 
-    def __init__(self, tools: list[BaseTool], write_tools: set[str]) -> None:
+    def __init__(
+        self,
+        tools: list[BaseTool],
+        write_tools: set[str],
+        *,
+        cache: ToolResultCache | None = None,
+    ) -> None:
         self.tools_by_name: dict[str, BaseTool] = {t.name: t for t in tools}
         self.write_tools = write_tools
+        self.cache = cache
 
     async def __call__(
         self, state: AgentState, config: RunnableConfig
@@ -64,7 +79,7 @@ class ConfirmableToolNode:
 
         # READ tools — execute immediately (idempotent; safe to re-run on resume)
         for tc in read_calls:
-            results.append(await self._execute_tool(tc, config))
+            results.append(await self._execute_read(tc, config))
 
         # WRITE tools — batch interrupt
         if write_calls:
@@ -83,14 +98,14 @@ class ConfirmableToolNode:
 
             if action == "confirm":
                 for tc in write_calls:
-                    results.append(await self._execute_tool(tc, config))
+                    results.append(await self._execute_write(tc, config))
 
             elif action == "edit":
                 edited: dict[str, dict[str, Any]] = response.get("args", {})
                 for tc in write_calls:
                     merged_args = {**tc["args"], **edited.get(tc["id"], {})}
                     tc_copy = {**tc, "args": merged_args}
-                    results.append(await self._execute_tool(tc_copy, config))
+                    results.append(await self._execute_write(tc_copy, config))
 
             else:  # reject
                 for tc in write_calls:
@@ -113,6 +128,32 @@ class ConfirmableToolNode:
     # Internal helpers
     # ------------------------------------------------------------------
 
+    async def _execute_read(self, tc: dict[str, Any], config: RunnableConfig) -> ToolMessage:
+        """Execute a READ tool call, through the result cache when it applies."""
+        user_id: str | None = config.get("configurable", {}).get("user_id")
+        if self.cache is None or user_id is None or not self.cache.cacheable(tc["name"]):
+            return await self._execute_tool(tc, config)
+
+        day = local_date(config["configurable"].get("user_timezone"))
+        cached = self.cache.get(user_id, tc["name"], tc["args"], day)
+        if cached is not None:
+            return ToolMessage(content=cached, tool_call_id=tc["id"], name=tc["name"])
+
+        message = await self._execute_tool(tc, config)
+        content = str(message.content)
+        if message.status != "error" and not _reports_failure(content):
+            self.cache.put(user_id, tc["name"], tc["args"], day, content)
+        return message
+
+    async def _execute_write(self, tc: dict[str, Any], config: RunnableConfig) -> ToolMessage:
+        """Execute a WRITE tool call and drop the cached READ results it may change."""
+        message = await self._execute_tool(tc, config)
+        user_id: str | None = config.get("configurable", {}).get("user_id")
+        if self.cache is not None and user_id is not None:
+            # Also after failures: a write may have been applied before the error
+            self.cache.invalidate_write(user_id, tc["name"])
+        return message
+
     async def _execute_tool(self, tc: dict[str, Any], config: RunnableConfig) -> ToolMessage:
         """Execute a single tool call and return a ``ToolMessage``.
 
@@ -136,4 +177,18 @@ class ConfirmableToolNode:
                 content=f"Erro ao executar {tc['name']}: {exc}",
                 tool_call_id=tc["id"],
                 name=tc["name"],
+                status="error",
             )
+
+
+def _reports_failure(content: str) -> bool:
+    """Whether a tool's JSON result reports a failure (``success: false`` or ``error``).
+
+    Tools return these instead of raising, e.g. for a transient lookup error,
+    so they must not be cached like real results.
+    """
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return False
+    return isinstance(data, dict) and (data.get("success") is False or "error" in data)
@@ -7,9 +7,12 @@ payload consumed by ``ConfirmableToolNode``.
 from __future__ import annotations
 
 from datetime import UTC, datetime, timedelta
-from typing import Any
+from typing import TYPE_CHECKING, Any
 from uuid import uuid4
 
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
 # ---------------------------------------------------------------------------
 # Per-tool confirmation messages (PT-BR)
 # Based on confirmation-state.service.ts (NestJS)
@@ -39,12 +42,49 @@ _OPTIONAL_DEFAULTS: dict[str, dict[str, str]] = {
 }
 
 
+def _record_metrics_message(args: dict[str, Any]) -> str:
+    """'Registrar 3 métricas: water 2000 ml, sleep 7 hours, mood 8?'"""
+    entries = args["entries"]
+    items = [
+        " ".join(
+            str(part)
+            for part in (e["metric_type"], e["value"], e.get("unit"), e.get("date"))
+            if part not in (None, "")
+        )
+        for e in entries
+    ]
+    return f"Registrar {len(entries)} métricas: {', '.join(items)}?"
+
+
+def _delete_metrics_message(args: dict[str, Any]) -> str:
+    """'Remover 3 registros?' or 'Remover todos os registros de water de X a Y?'"""
+    if args.get("entry_ids"):
+        return f"Remover {len(args['entry_ids'])} registros?"
+    date_from = args["date_from"]
+    date_to = args.get("date_to") or date_from
+    period = f"em {date_from}" if date_to == date_from else f"de {date_from} a {date_to}"
+    return f"Remover todos os registros de {args['metric_type']} {period}?"
+
+
+# Tools whose args (lists, alternative modes) don't fit a format template
+_MESSAGE_BUILDERS: dict[str, Callable[[dict[str, Any]], str]] = {
+    "record_metrics": _record_metrics_message,
+    "delete_metrics": _delete_metrics_message,
+}
+
+
 def generate_confirmation_message(tool_name: str, tool_args: dict[str, Any]) -> str:
     """Build a single-tool confirmation message in PT-BR.
 
     Falls back to a generic message when the tool has no specific template.
     Fills in defaults for optional args so templates don't fail on KeyError.
     """
+    builder = _MESSAGE_BUILDERS.get(tool_name)
+    if builder is not None:
+        try:
+            return builder(tool_args)
+        except (KeyError, TypeError, AttributeError):
+            return _FALLBACK_MESSAGE.format(tool_name=tool_name)
     template = _TOOL_MESSAGES.get(tool_name)
     if template is None:
         return _FALLBACK_MESSAGE.format(tool_name=tool_name)
@@ -0,0 +1,190 @@
+"""Per-user cache of READ tool results, invalidated by WRITE tools.
+
+The agent often repeats a READ tool call with identical arguments (follow-up
+questions, re-runs on confirmation resume). Results are cached by
+(user_id, tool, normalized args, user-local date) so date-relative tools
+("today", "this month") never cross midnight, with a TTL and an LRU bound.
+
+Each cacheable tool declares the data domains it depends on
+(``TOOL_DATA_DOMAINS`` in app/agents/registry.py). When a WRITE tool runs,
+``ConfirmableToolNode`` calls ``invalidate_write`` and every cached result of
+that user depending on one of the WRITE tool's domains is dropped. Writes
+made elsewhere (NestJS API, workers, other replicas) arrive as
+``invalidate_tool_cache`` events from app/db/invalidation.py.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any
+from zoneinfo import ZoneInfo
+
+from app.agents.registry import TOOL_DATA_DOMAINS
+from app.config import get_settings
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Mapping
+
+type CacheKey = tuple[str, str, str, str]
+
+
+@dataclass(slots=True)
+class _Entry:
+    expires_at: float
+    domains: frozenset[str]
+    content: str
+
+
+@dataclass(slots=True)
+class _ToolCounters:
+    hits: int = 0
+    misses: int = 0
+
+
+def _hit_rate(hits: int, misses: int) -> float | None:
+    total = hits + misses
+    return round(hits / total, 3) if total else None
+
+
+def local_date(timezone: str | None) -> str:
+    """Today in *timezone* as 'YYYY-MM-DD' (America/Sao_Paulo when unknown)."""
+    try:
+        tz = ZoneInfo(timezone or "America/Sao_Paulo")
+    except (KeyError, ValueError):
+        tz = ZoneInfo("America/Sao_Paulo")
+    return datetime.now(tz).date().isoformat()
+
+
+def normalize_args(args: Mapping[str, Any]) -> str:
+    """Canonical JSON of tool args; omitted and null args are the same call."""
+    return json.dumps(
+        {k: v for k, v in args.items() if v is not None},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+        ensure_ascii=False,
+    )
+
+
+class ToolResultCache:
+    """TTL + LRU cache of READ tool results with per-user domain invalidation."""
+
+    def __init__(
+        self,
+        tool_domains: Mapping[str, frozenset[str]],
+        *,
+        ttl_seconds: float,
+        max_entries: int,
+    ) -> None:
+        self._tool_domains = dict(tool_domains)
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: OrderedDict[CacheKey, _Entry] = OrderedDict()
+        self._keys_by_user: defaultdict[str, set[CacheKey]] = defaultdict(set)
+        self._counters: defaultdict[str, _ToolCounters] = defaultdict(_ToolCounters)
+        self._invalidations = 0
+        self._evictions = 0
+
+    def cacheable(self, tool_name: str) -> bool:
+        return tool_name in self._tool_domains
+
+    def get(self, user_id: str, tool_name: str, args: Mapping[str, Any], day: str) -> str | None:
+        key = (user_id, tool_name, normalize_args(args), day)
+        counters = self._counters[tool_name]
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at < time.monotonic():
+            if entry is not None:
+                self._drop(key)
+            counters.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        counters.hits += 1
+        return entry.content
+
+    def put(
+        self, user_id: str, tool_name: str, args: Mapping[str, Any], day: str, content: str
+    ) -> None:
+        domains = self._tool_domains.get(tool_name)
+        if domains is None:
+            return
+        key = (user_id, tool_name, normalize_args(args), day)
+        self._entries[key] = _Entry(time.monotonic() + self._ttl, domains, content)
+        self._entries.move_to_end(key)
+        self._keys_by_user[user_id].add(key)
+        while len(self._entries) > self._max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self._evictions += 1
+
+    def invalidate(self, user_id: str | None, domains: Iterable[str] | None = None) -> int:
+        """Drop results depending on any of *domains* (all when None) for *user_id*
+        (every user when None)."""
+        wanted = None if domains is None else frozenset(domains)
+        keys = self._entries.keys() if user_id is None else self._keys_by_user.get(user_id, ())
+        stale = [key for key in keys if wanted is None or self._entries[key].domains & wanted]
+        for key in stale:
+            self._drop(key)
+        self._invalidations += len(stale)
+        return len(stale)
+
+    def invalidate_write(self, user_id: str, write_tool: str) -> int:
+        """Drop the results a run of *write_tool* may have changed."""
+        domains = self._tool_domains.get(write_tool)
+        # Undeclared WRITE tools could touch anything
+        return self.invalidate(user_id, domains)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_user.clear()
+        self._counters.clear()
+        self._invalidations = 0
+        self._evictions = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Hit/miss counters (overall and per tool) since start or the last ``clear``."""
+        hits = sum(c.hits for c in self._counters.values())
+        misses = sum(c.misses for c in self._counters.values())
+        return {
+            "entries": len(self._entries),
+            "hits": hits,
+            "misses": misses,
+            "hitRate": _hit_rate(hits, misses),
+            "invalidations": self._invalidations,
+            "evictions": self._evictions,
+            "tools": {
+                name: {"hits": c.hits, "misses": c.misses, "hitRate": _hit_rate(c.hits, c.misses)}
+                for name, c in sorted(self._counters.items())
+            },
+        }
+
+    def _drop(self, key: CacheKey) -> None:
+        del self._entries[key]
+        user_keys = self._keys_by_user[key[0]]
+        user_keys.discard(key)
+        if not user_keys:
+            del self._keys_by_user[key[0]]
+
+
+@lru_cache
+def get_tool_cache() -> ToolResultCache | None:
+    """Process-wide tool result cache, or None when ``TOOL_CACHE_ENABLED`` is off."""
+    settings = get_settings()
+    if not settings.TOOL_CACHE_ENABLED:
+        return None
+    return ToolResultCache(
+        TOOL_DATA_DOMAINS,
+        ttl_seconds=settings.TOOL_CACHE_TTL_SECONDS,
+        max_entries=settings.TOOL_CACHE_MAX_ENTRIES,
+    )
+
+
+def invalidate_tool_cache(user_id: str | None, domain: str | None) -> None:
+    """Cache invalidation subscriber (see app/db/invalidation.py)."""
+    cache = get_tool_cache()
+    if cache is not None:
+        cache.invalidate(user_id, None if domain is None else (domain,))
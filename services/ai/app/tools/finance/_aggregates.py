@@ -0,0 +1,338 @@
+"""Finance aggregation engine — every summary KPI for one or more months in one query.
+
+Incomes, bills, variable expenses and debt payments are grouped by
+``month_year`` in their own CTEs and left-joined onto the requested months;
+debt and investment totals (not month-scoped) are single-row CTEs
+cross-joined onto every month row. Closed months can instead be read from
+their monthly rollup (see _rollups.py). Results come back as small frozen
+dataclasses shared by the finance tools.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import String, func, literal, select, true
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app.db.models.finance import Bill, Debt, DebtPayment, Income, Investment, VariableExpense
+from app.db.repositories.finance import FinanceRepository
+from app.tools.finance._rollups import (
+    SOURCE_BILL,
+    SOURCE_DEBT_PAYMENT,
+    SOURCE_EXPENSE,
+    SOURCE_INCOME,
+    RollupTotals,
+    parse_rollup_key,
+)
+
+if TYPE_CHECKING:
+    import uuid as _uuid
+
+    from sqlalchemy import RowMapping
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# Debts that no longer count towards the outstanding total
+_CLOSED_DEBT_STATUSES = ("paid_off", "settled")
+# Negotiated debts in these states contribute their installment every month
+_INSTALLMENT_DEBT_STATUSES = ("active", "overdue")
+
+
+@dataclass(frozen=True, slots=True)
+class MonthTotals:
+    """Month-scoped sums. Bill totals exclude canceled bills."""
+
+    month_year: str
+    income_expected: float = 0.0
+    income_actual: float = 0.0
+    bills_total: float = 0.0
+    bills_paid: float = 0.0
+    bills_pending_count: int = 0
+    bills_paid_count: int = 0
+    bills_overdue_count: int = 0
+    bills_canceled_count: int = 0
+    expenses_expected: float = 0.0
+    expenses_actual: float = 0.0
+    debt_payments: float = 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class DebtTotals:
+    count: int = 0
+    total_amount: float = 0.0
+    total_paid: float = 0.0
+    monthly_installment: float = 0.0
+    negotiated_count: int = 0
+    pending_negotiation_count: int = 0
+
+    @property
+    def total_remaining(self) -> float:
+        return self.total_amount - self.total_paid
+
+
+@dataclass(frozen=True, slots=True)
+class InvestmentTotals:
+    count: int = 0
+    total_current: float = 0.0
+    total_goal: float = 0.0
+    monthly_contribution: float = 0.0
+    average_progress: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class FinanceAggregate:
+    months: tuple[MonthTotals, ...]
+    debts: DebtTotals
+    investments: InvestmentTotals
+
+    @property
+    def totals(self) -> MonthTotals:
+        """All months summed; ``month_year`` is the first..last range."""
+        label = (
+            self.months[0].month_year
+            if len(self.months) == 1
+            else f"{self.months[0].month_year}..{self.months[-1].month_year}"
+        )
+        sums: dict[str, Any] = {
+            f.name: sum(getattr(m, f.name) for m in self.months)
+            for f in fields(MonthTotals)
+            if f.name != "month_year"
+        }
+        return MonthTotals(month_year=label, **sums)
+
+    def budgeted(self, month: MonthTotals) -> float:
+        """Bills + expected expenses + the current negotiated installments, for one month."""
+        return month.bills_total + month.expenses_expected + self.debts.monthly_installment
+
+    @staticmethod
+    def spent(month: MonthTotals) -> float:
+        return month.bills_paid + month.expenses_actual + month.debt_payments
+
+    @property
+    def total_budgeted(self) -> float:
+        return sum(self.budgeted(m) for m in self.months)
+
+    @property
+    def total_spent(self) -> float:
+        return sum(self.spent(m) for m in self.months)
+
+
+async def load_finance_aggregate(
+    session: AsyncSession,
+    user_id: _uuid.UUID,
+    months: list[str],
+    *,
+    rollup_before: str | None = None,
+) -> FinanceAggregate:
+    """Compute month totals for every month in *months* plus debt and investment totals.
+
+    Months earlier than *rollup_before* are read from their monthly rollup
+    when one exists; the rest are aggregated from the source tables. Months
+    without any rows come back zeroed; results are in month order.
+    """
+    rolled: dict[str, MonthTotals] = {}
+    if rollup_before is not None:
+        closed = [m for m in months if m < rollup_before]
+        rolled = {
+            r.month_year: month_totals_from_rollup(r.month_year, r.totals)
+            for r in await FinanceRepository.get_rollups(session, user_id, closed)
+        }
+    months = [m for m in months if m not in rolled]
+
+    month_list = select(func.unnest(literal(months, ARRAY(String))).label("month_year")).cte(
+        "month_list"
+    )
+
+    incomes = (
+        select(
+            Income.month_year,
+            func.sum(Income.expected_amount).label("income_expected"),
+            func.sum(Income.actual_amount).label("income_actual"),
+        )
+        .where(
+            Income.user_id == user_id,
+            Income.month_year.in_(months),
+            Income.status != "excluded",
+        )
+        .group_by(Income.month_year)
+        .cte("incomes_by_month")
+    )
+
+    not_canceled = Bill.status != "canceled"
+    bills = (
+        select(
+            Bill.month_year,
+            func.sum(Bill.amount).filter(not_canceled).label("bills_total"),
+            func.sum(Bill.amount).filter(Bill.status == "paid").label("bills_paid"),
+            func.count().filter(Bill.status == "pending").label("bills_pending_count"),
+            func.count().filter(Bill.status == "paid").label("bills_paid_count"),
+            func.count().filter(Bill.status == "overdue").label("bills_overdue_count"),
+            func.count().filter(Bill.status == "canceled").label("bills_canceled_count"),
+        )
+        .where(Bill.user_id == user_id, Bill.month_year.in_(months))
+        .group_by(Bill.month_year)
+        .cte("bills_by_month")
+    )
+
+    expenses = (
+        select(
+            VariableExpense.month_year,
+            func.sum(VariableExpense.expected_amount).label("expenses_expected"),
+            func.sum(VariableExpense.actual_amount).label("expenses_actual"),
+        )
+        .where(
+            VariableExpense.user_id == user_id,
+            VariableExpense.month_year.in_(months),
+            VariableExpense.status != "excluded",
+        )
+        .group_by(VariableExpense.month_year)
+        .cte("expenses_by_month")
+    )
+
+    payments = (
+        select(
+            DebtPayment.month_year,
+            func.sum(DebtPayment.amount).label("debt_payments"),
+        )
+        .where(DebtPayment.user_id == user_id, DebtPayment.month_year.in_(months))
+        .group_by(DebtPayment.month_year)
+        .cte("payments_by_month")
+    )
+
+    installment = func.coalesce(Debt.installment_amount, 0)
+    in_installments = Debt.is_negotiated.is_(True) & Debt.status.in_(_INSTALLMENT_DEBT_STATUSES)
+    debts = (
+        select(
+            func.count().label("debt_count"),
+            func.sum(Debt.total_amount)
+            .filter(Debt.status.not_in(_CLOSED_DEBT_STATUSES))
+            .label("debt_total_amount"),
+            func.sum(installment * (func.coalesce(Debt.current_installment, 1) - 1)).label(
+                "debt_total_paid"
+            ),
+            func.sum(installment).filter(in_installments).label("debt_monthly_installment"),
+            func.count().filter(in_installments).label("debt_negotiated_count"),
+            func.count()
+            .filter(Debt.is_negotiated.is_(False))
+            .label("debt_pending_negotiation_count"),
+        )
+        .where(Debt.user_id == user_id)
+        .cte("debt_totals")
+    )
+
+    with_goal = Investment.goal_amount > 0
+    investments = (
+        select(
+            func.count().label("inv_count"),
+            func.sum(func.coalesce(Investment.current_amount, 0)).label("inv_total_current"),
+            func.sum(Investment.goal_amount).filter(with_goal).label("inv_total_goal"),
+            func.sum(Investment.monthly_contribution).label("inv_monthly_contribution"),
+            func.avg(func.coalesce(Investment.current_amount, 0) / Investment.goal_amount * 100)
+            .filter(with_goal)
+            .label("inv_average_progress"),
+        )
+        .where(Investment.user_id == user_id)
+        .cte("investment_totals")
+    )
+
+    month = month_list.c.month_year
+    stmt = (
+        select(
+            month,
+            incomes.c.income_expected,
+            incomes.c.income_actual,
+            *(c for c in bills.c if c.key != "month_year"),
+            expenses.c.expenses_expected,
+            expenses.c.expenses_actual,
+            payments.c.debt_payments,
+            *debts.c,
+            *investments.c,
+        )
+        # Debt/investment totals always yield one row, even with no live months
+        .select_from(debts)
+        .join(investments, true())
+        .outerjoin(month_list, true())
+        .outerjoin(incomes, incomes.c.month_year == month)
+        .outerjoin(bills, bills.c.month_year == month)
+        .outerjoin(expenses, expenses.c.month_year == month)
+        .outerjoin(payments, payments.c.month_year == month)
+        .order_by(month)
+    )
+    rows = (await session.execute(stmt)).mappings().all()
+
+    if not rows:
+        return FinanceAggregate(
+            months=tuple(rolled[m] for m in sorted(rolled)),
+            debts=DebtTotals(),
+            investments=InvestmentTotals(),
+        )
+
+    live = {row["month_year"]: _month_totals(row) for row in rows if row["month_year"]}
+    month_totals = tuple(v for _, v in sorted({**live, **rolled}.items()))
+
+    first = rows[0]
+    average_progress = first["inv_average_progress"]
+    return FinanceAggregate(
+        months=month_totals,
+        debts=DebtTotals(
+            count=int(first["debt_count"]),
+            total_amount=_num(first["debt_total_amount"], float),
+            total_paid=_num(first["debt_total_paid"], float),
+            monthly_installment=_num(first["debt_monthly_installment"], float),
+            negotiated_count=int(first["debt_negotiated_count"]),
+            pending_negotiation_count=int(first["debt_pending_negotiation_count"]),
+        ),
+        investments=InvestmentTotals(
+            count=int(first["inv_count"]),
+            total_current=_num(first["inv_total_current"], float),
+            total_goal=_num(first["inv_total_goal"], float),
+            monthly_contribution=_num(first["inv_monthly_contribution"], float),
+            average_progress=(
+                round(float(average_progress), 1) if average_progress is not None else None
+            ),
+        ),
+    )
+
+
+def month_totals_from_rollup(month_year: str, totals: RollupTotals) -> MonthTotals:
+    """Fold a monthly rollup's buckets into the same totals the live query yields."""
+    sums: dict[str, Any] = {
+        f.name: 0 if f.name.endswith("_count") else 0.0
+        for f in fields(MonthTotals)
+        if f.name != "month_year"
+    }
+    for key, bucket in totals.items():
+        source, _category, status = parse_rollup_key(key)
+        expected = float(bucket.get("expected", 0))
+        actual = float(bucket.get("actual", 0))
+        if source == SOURCE_BILL:
+            if status != "canceled":
+                sums["bills_total"] += expected
+            if status == "paid":
+                sums["bills_paid"] += expected
+            if f"bills_{status}_count" in sums:
+                sums[f"bills_{status}_count"] += int(bucket.get("count", 0))
+        elif source == SOURCE_EXPENSE and status != "excluded":
+            sums["expenses_expected"] += expected
+            sums["expenses_actual"] += actual
+        elif source == SOURCE_INCOME and status != "excluded":
+            sums["income_expected"] += expected
+            sums["income_actual"] += actual
+        elif source == SOURCE_DEBT_PAYMENT:
+            sums["debt_payments"] += actual
+    return MonthTotals(month_year=month_year, **sums)
+
+
+def _month_totals(row: RowMapping) -> MonthTotals:
+    values: dict[str, Any] = {
+        f.name: _num(row[f.name], int if f.name.endswith("_count") else float)
+        for f in fields(MonthTotals)
+        if f.name != "month_year"
+    }
+    return MonthTotals(month_year=row["month_year"], **values)
+
+
+def _num[T: (int, float)](value: Any, kind: type[T]) -> T:
+    """NULL (no rows in a LEFT JOIN / FILTER) → 0."""
+    return kind(value) if value is not None else kind(0)
@@ -0,0 +1,333 @@
+"""Debt schedule engine — §3.6 visibility, balances, payoff projections and installments.
+
+A user's debts are held as parallel NumPy arrays (start month, installment
+count, current installment, amounts, status flags) and their payments as
+(debt row, installment number, paid month) arrays. Months are integer
+indexes (``year * 12 + month - 1``), so visibility and installment numbers
+for any range of months are one broadcast over a debts × months grid
+instead of "YYYY-MM" parsing debt by debt.
+
+Schedules are loaded with two queries and cached per (user, current month)
+for ``DEBT_SCHEDULE_CACHE_TTL_SECONDS``, or until a finance write event
+arrives (``invalidate_debt_schedules``); the month in the key makes every
+cached projection expire when the user's month turns.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from app.config import get_settings
+from app.db.repositories.finance import FinanceRepository
+
+if TYPE_CHECKING:
+    import uuid as _uuid
+
+    import numpy.typing as npt
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.db.models.finance import Debt, DebtPayment
+
+# Start month of debts without one
+_NO_MONTH = -1
+# Coefficient of variation of payments per month below which payments are "regular"
+_REGULAR_MAX_CV = 0.3
+# Floor of the payment velocity used to extrapolate the payoff
+_MIN_PAYMENTS_PER_MONTH = 0.01
+
+# Most (user, month) schedules kept in the cache
+_CACHE_MAX_ENTRIES = 1024
+
+
+def month_index(month_year: str) -> int:
+    """'YYYY-MM' → months since year 0 (raises ValueError when malformed)."""
+    year, month = int(month_year[:4]), int(month_year[5:])
+    if month_year[4:5] != "-" or not 1 <= month <= 12:
+        raise ValueError(f"invalid month_year: {month_year!r}")
+    return year * 12 + month - 1
+
+
+def month_label(index: int) -> str:
+    """Inverse of ``month_index``."""
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _status(debt: Debt) -> str:
+    return debt.status.value if hasattr(debt.status, "value") else str(debt.status)
+
+
+@dataclass(frozen=True, slots=True)
+class Projection:
+    """Estimated payoff of a negotiated debt at its current payment velocity."""
+
+    payoff_month: str
+    remaining_months: int
+    avg_payments_per_month: float
+    is_regular: bool
+
+
+@dataclass(frozen=True, slots=True)
+class Installment:
+    debt: Debt
+    month_year: str
+    number: int
+    payment: DebtPayment | None
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class DebtSchedule:
+    """All debts of one user (row *i* = ``debts[i]``) and their payments."""
+
+    debts: tuple[Debt, ...]
+    payments: tuple[DebtPayment, ...]
+    negotiated: npt.NDArray[np.bool_]
+    defaulted: npt.NDArray[np.bool_]
+    # paid_off / settled: visible up to their last installment only
+    closed: npt.NDArray[np.bool_]
+    paid_off: npt.NDArray[np.bool_]
+    start: npt.NDArray[np.int64]
+    installments: npt.NDArray[np.int64]
+    paid_installments: npt.NDArray[np.int64]
+    installment_amount: npt.NDArray[np.float64]
+    total_amount: npt.NDArray[np.float64]
+    pay_row: npt.NDArray[np.int64]
+    pay_number: npt.NDArray[np.int64]
+    pay_month: npt.NDArray[np.int64]
+
+    @classmethod
+    def from_debts(cls, debts: list[Debt], payments: list[DebtPayment]) -> DebtSchedule:
+        statuses = [_status(d) for d in debts]
+        rows = {d.id: i for i, d in enumerate(debts)}
+        payments = [p for p in payments if p.debt_id in rows]
+        return cls(
+            debts=tuple(debts),
+            payments=tuple(payments),
+            negotiated=np.array([bool(d.is_negotiated) for d in debts], dtype=np.bool_),
+            defaulted=np.array([s == "defaulted" for s in statuses], dtype=np.bool_),
+            closed=np.array([s in ("paid_off", "settled") for s in statuses], dtype=np.bool_),
+            paid_off=np.array([s == "paid_off" for s in statuses], dtype=np.bool_),
+            start=np.array(
+                [
+                    month_index(d.start_month_year) if d.start_month_year else _NO_MONTH
+                    for d in debts
+                ],
+                dtype=np.int64,
+            ),
+            installments=np.array([d.total_installments or 0 for d in debts], dtype=np.int64),
+            paid_installments=np.array(
+                [(d.current_installment or 1) - 1 for d in debts], dtype=np.int64
+            ),
+            installment_amount=np.array(
+                [d.installment_amount or 0.0 for d in debts], dtype=np.float64
+            ),
+            total_amount=np.array([d.total_amount or 0.0 for d in debts], dtype=np.float64),
+            pay_row=np.array([rows[p.debt_id] for p in payments], dtype=np.int64),
+            pay_number=np.array([p.installment_number for p in payments], dtype=np.int64),
+            pay_month=np.array(
+                [
+                    p.paid_at.year * 12 + p.paid_at.month - 1 if p.paid_at else _NO_MONTH
+                    for p in payments
+                ],
+                dtype=np.int64,
+            ),
+        )
+
+    def __len__(self) -> int:
+        return len(self.debts)
+
+    def row_of(self, debt_id: _uuid.UUID) -> int | None:
+        return next((i for i, d in enumerate(self.debts) if d.id == debt_id), None)
+
+    # -- Balances -----------------------------------------------------------
+
+    @property
+    def paid_amount(self) -> npt.NDArray[np.float64]:
+        return self.installment_amount * self.paid_installments
+
+    @property
+    def remaining_amount(self) -> npt.NDArray[np.float64]:
+        return np.maximum(self.total_amount - self.paid_amount, 0.0)
+
+    @property
+    def percent_complete(self) -> npt.NDArray[np.float64]:
+        total = self.total_amount
+        safe_total = np.where(total > 0, total, 1.0)
+        return np.where(total > 0, np.round(self.paid_amount / safe_total * 100, 1), 0.0)
+
+    # -- Visibility ---------------------------------------------------------
+
+    @property
+    def _scheduled(self) -> npt.NDArray[np.bool_]:
+        """Negotiated debts with a start month and an installment count."""
+        scheduled: npt.NDArray[np.bool_] = (
+            self.negotiated & (self.start != _NO_MONTH) & (self.installments > 0)
+        )
+        return scheduled
+
+    def visibility(self, first_month: str, last_month: str) -> npt.NDArray[np.bool_]:
+        """debts × months matrix of the §3.6 rules over first_month..last_month.
+
+        Non-negotiated, defaulted and unscheduled debts are always visible;
+        paid-off/settled ones up to their last installment month; the others
+        from their start month to their last installment month.
+        """
+        months = np.arange(month_index(first_month), month_index(last_month) + 1)[None, :]
+        start = self.start[:, None]
+        end = start + self.installments[:, None] - 1
+        in_schedule = (months <= end) & (self.closed[:, None] | (months >= start))
+        always = ~self._scheduled | self.defaulted
+        return always[:, None] | in_schedule
+
+    def visible_rows(self, month_year: str) -> npt.NDArray[np.intp]:
+        return np.flatnonzero(self.visibility(month_year, month_year)[:, 0])
+
+    # -- Installments -------------------------------------------------------
+
+    def installments_between(self, first_month: str, last_month: str) -> list[Installment]:
+        """Installments of negotiated debts due in first_month..last_month, by month then debt."""
+        first = month_index(first_month)
+        months = np.arange(first, month_index(last_month) + 1)
+        numbers = months[None, :] - self.start[:, None] + 1
+        due = self._scheduled[:, None] & (numbers >= 1) & (numbers <= self.installments[:, None])
+        paid = {
+            (row, number): p
+            for row, number, p in zip(
+                self.pay_row.tolist(), self.pay_number.tolist(), self.payments, strict=True
+            )
+        }
+        cols, rows = np.nonzero(due.T)
+        return [
+            Installment(
+                debt=self.debts[row],
+                month_year=month_label(first + col),
+                number=int(numbers[row, col]),
+                payment=paid.get((row, int(numbers[row, col]))),
+            )
+            for col, row in zip(cols.tolist(), rows.tolist(), strict=True)
+        ]
+
+    # -- Projections --------------------------------------------------------
+
+    def projections(self, now_month: str) -> list[Projection | None]:
+        """Payoff projection per debt; None for debts that are paid off or not in installments.
+
+        Velocity is the paid installments over the months spanned by their
+        payment dates; without payments one installment per month is assumed
+        from the start month.
+        """
+        n = len(self.debts)
+        now = month_index(now_month)
+        remaining = self.installments - self.paid_installments
+        eligible = self.negotiated & ~self.paid_off & (self.installments > 0) & (remaining > 0)
+
+        has_payments = np.bincount(self.pay_row, minlength=n) > 0
+        estimated = eligible & ((self.paid_installments == 0) | ~has_payments)
+
+        # Payment counts per (debt, paid month)
+        dated = self.pay_month != _NO_MONTH
+        pairs, counts = np.unique(
+            np.stack([self.pay_row[dated], self.pay_month[dated]], axis=1).reshape(-1, 2),
+            axis=0,
+            return_counts=True,
+        )
+        pair_rows = pairs[:, 0]
+        active_months = np.bincount(pair_rows, minlength=n)
+        first = np.full(n, np.iinfo(np.int64).max)
+        last = np.full(n, np.iinfo(np.int64).min)
+        np.minimum.at(first, pair_rows, pairs[:, 1])
+        np.maximum.at(last, pair_rows, pairs[:, 1])
+        measured = eligible & ~estimated & (active_months > 0)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            count_mean = np.bincount(pair_rows, weights=counts, minlength=n) / active_months
+            count_var = (
+                np.bincount(pair_rows, weights=counts.astype(np.float64) ** 2, minlength=n)
+                / active_months
+                - count_mean**2
+            )
+            is_regular = np.sqrt(np.maximum(count_var, 0.0)) / count_mean < _REGULAR_MAX_CV
+            elapsed = np.maximum(last - first + 1, 1)
+            velocity = self.paid_installments / elapsed
+            measured_months = np.ceil(
+                remaining / np.maximum(velocity, _MIN_PAYMENTS_PER_MONTH)
+            ).astype(np.int64)
+
+        estimated_payoff = np.where(self.start != _NO_MONTH, self.start, now) + remaining - 1
+
+        result: list[Projection | None] = [None] * n
+        for i in np.flatnonzero(estimated).tolist():
+            result[i] = Projection(
+                payoff_month=month_label(int(estimated_payoff[i])),
+                remaining_months=int(remaining[i]),
+                avg_payments_per_month=1.0,
+                is_regular=True,
+            )
+        for i in np.flatnonzero(measured).tolist():
+            months = int(measured_months[i])
+            result[i] = Projection(
+                payoff_month=month_label(now + months),
+                remaining_months=months,
+                avg_payments_per_month=round(float(velocity[i]), 2),
+                is_regular=bool(is_regular[i]),
+            )
+        return result
+
+
+# ---------------------------------------------------------------------------
+# Per-(user, month) cache
+# ---------------------------------------------------------------------------
+
+_schedule_cache: OrderedDict[tuple[_uuid.UUID, str], tuple[float, DebtSchedule]] = OrderedDict()
+
+
+def _cached_schedule(key: tuple[_uuid.UUID, str]) -> DebtSchedule | None:
+    entry = _schedule_cache.get(key)
+    if entry is None or entry[0] < time.monotonic():
+        _schedule_cache.pop(key, None)
+        return None
+    _schedule_cache.move_to_end(key)
+    return entry[1]
+
+
+def _cache_schedule(key: tuple[_uuid.UUID, str], schedule: DebtSchedule) -> None:
+    ttl = get_settings().DEBT_SCHEDULE_CACHE_TTL_SECONDS
+    _schedule_cache[key] = (time.monotonic() + ttl, schedule)
+    _schedule_cache.move_to_end(key)
+    while len(_schedule_cache) > _CACHE_MAX_ENTRIES:
+        _schedule_cache.popitem(last=False)
+
+
+def clear_debt_schedule_cache() -> None:
+    _schedule_cache.clear()
+
+
+def invalidate_debt_schedules(user_id: str | None, domain: str | None) -> None:
+    """Cache invalidation subscriber (see app/db/invalidation.py)."""
+    if domain not in (None, "finance"):
+        return
+    if user_id is None:
+        _schedule_cache.clear()
+        return
+    for key in [k for k in _schedule_cache if str(k[0]) == user_id]:
+        del _schedule_cache[key]
+
+
+async def load_debt_schedule(
+    session: AsyncSession, user_id: _uuid.UUID, now_month: str
+) -> DebtSchedule:
+    """The user's debt schedule as of *now_month* (the user's current month)."""
+    key = (user_id, now_month)
+    schedule = _cached_schedule(key)
+    if schedule is None:
+        debts = await FinanceRepository.get_debts(session, user_id)
+        payments = await FinanceRepository.get_debt_payments_for_debts(
+            session, [d.id for d in debts]
+        )
+        schedule = DebtSchedule.from_debts(debts, payments)
+        _cache_schedule(key, schedule)
+    return schedule
@@ -4,16 +4,20 @@ from __future__ import annotations
 
 import calendar
 import logging
-import uuid as _uuid
+import time
 from datetime import date, datetime
 from typing import TYPE_CHECKING, Any
 from zoneinfo import ZoneInfo
 
-from sqlalchemy import select
+from sqlalchemy import String, cast, func, literal, null, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
 
 from app.db.models.finance import Bill, Income, VariableExpense
+from app.db.repositories.finance import FinanceRepository
 
 if TYPE_CHECKING:
+    import uuid as _uuid
+
     from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
@@ -125,6 +129,54 @@ _ENTITY_CONFIG: dict[FinanceModel, tuple[list[str], dict[str, Any]]] = {
 # ensure_recurring_for_month — lazy recurring-item generation
 # ---------------------------------------------------------------------------
 
+# How far back a recurring group's latest item may be and still be carried
+# forward; also bounds how many missing months one call backfills
+_MAX_BACKFILL_MONTHS = 12
+
+# (user_id, month_year, table) → monotonic time the month was found complete.
+# Steady-state reads skip the INSERT ... SELECT entirely while the entry is fresh.
+# Finance writes from any process evict the user's entries (invalidate_materialized_months).
+_MATERIALIZED_TTL_SECONDS = 300.0
+_MATERIALIZED_MAX_ENTRIES = 10_000
+_materialized: dict[tuple[_uuid.UUID, str, str], float] = {}
+
+
+def add_months(month_year: str, delta: int) -> str:
+    """Return 'YYYY-MM' shifted by *delta* months (negative = earlier)."""
+    index = int(month_year[:4]) * 12 + int(month_year[5:]) - 1 + delta
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _is_materialized(key: tuple[_uuid.UUID, str, str]) -> bool:
+    marked_at = _materialized.get(key)
+    if marked_at is None:
+        return False
+    if time.monotonic() - marked_at > _MATERIALIZED_TTL_SECONDS:
+        del _materialized[key]
+        return False
+    return True
+
+
+def _mark_materialized(key: tuple[_uuid.UUID, str, str]) -> None:
+    if len(_materialized) >= _MATERIALIZED_MAX_ENTRIES:
+        # Dicts keep insertion order: drop the oldest entry
+        del _materialized[next(iter(_materialized))]
+    _materialized[key] = time.monotonic()
+
+
+def invalidate_materialized_months(user_id: str | None, domain: str | None) -> None:
+    """Cache invalidation subscriber (see app/db/invalidation.py).
+
+    A recurring item written elsewhere can leave a memoized month incomplete.
+    """
+    if domain not in (None, "finance"):
+        return
+    if user_id is None:
+        _materialized.clear()
+        return
+    for key in [k for k in _materialized if str(k[0]) == user_id]:
+        del _materialized[key]
+
 
 async def ensure_recurring_for_month(
     session: AsyncSession,
@@ -132,77 +184,99 @@ async def ensure_recurring_for_month(
     month_year: str,
     model_class: FinanceModel,
 ) -> int:
-    """Lazy-generate recurring items for *month_year* from the previous month.
-
-    Algorithm:
-    1. Load recurring items from the previous month
-       (is_recurring=True AND recurring_group_id NOT NULL)
-       — do NOT filter by status (canceled items still propagate)
-    2. Load existing recurring_group_ids in the target month
-    3. For each missing group_id, copy fields + reset fields into a new row
-    4. Bulk insert via session.add_all() — UNIQUE constraint handles races
+    """Lazy-generate recurring items up to *month_year*, backfilling missing months.
+
+    One ``INSERT ... SELECT`` per call:
+    1. Take each recurring group's latest item before *month_year* (within
+       ``_MAX_BACKFILL_MONTHS``) — do NOT filter by status (canceled items
+       still propagate), but a latest item with is_recurring=False stops the group
+    2. Copy fields + reset fields into every month after it up to *month_year*
+    3. ``ON CONFLICT DO NOTHING`` on (user, group, month) skips rows that
+       already exist and handles concurrent reads
+
+    Monthly rollups of the months that received items are dropped (the
+    reconcile job rebuilds them). Months found complete are memoized per
+    (user, month, table) so steady-state reads skip the statement. Only no-op
+    runs are memoized: rows inserted by this call may still be rolled back
+    with the caller's transaction.
 
     Returns the count of items created.
     """
     copy_fields, reset_fields = _ENTITY_CONFIG[model_class]
+    key = (user_id, month_year, model_class.__tablename__)
+    if _is_materialized(key):
+        return 0
 
-    prev_month = get_previous_month(month_year)
-
-    # 1. Recurring items from previous month
     # Use Any to satisfy mypy — all 3 models share user_id, month_year, is_recurring,
     # recurring_group_id but have no common Protocol
     m: Any = model_class
-    prev_stmt = select(m).where(
-        m.user_id == user_id,
-        m.month_year == prev_month,
-        m.is_recurring.is_(True),
-        m.recurring_group_id.is_not(None),
+    table = model_class.__table__
+
+    # 1. Latest item per recurring group before the target month
+    ranked = (
+        select(
+            m.user_id,
+            m.month_year,
+            m.is_recurring,
+            *(getattr(m, f) for f in copy_fields),
+            func.row_number()
+            .over(partition_by=m.recurring_group_id, order_by=m.month_year.desc())
+            .label("rn"),
+        )
+        .where(
+            m.user_id == user_id,
+            m.recurring_group_id.is_not(None),
+            m.month_year < month_year,
+            m.month_year >= add_months(month_year, -_MAX_BACKFILL_MONTHS),
+        )
+        .subquery("ranked")
+    )
+    latest = select(ranked).where(ranked.c.rn == 1).subquery("latest")
+
+    # 2. Every month after the latest item, up to and including the target
+    window = [add_months(month_year, -k) for k in range(_MAX_BACKFILL_MONTHS - 1, -1, -1)]
+    months = func.unnest(literal(window, ARRAY(String))).table_valued("month_year").alias("months")
+
+    columns = ["user_id", "month_year", *copy_fields, *reset_fields]
+    # Explicit casts: bind parameters in a SELECT list are not typed by the
+    # INSERT target columns
+    reset_values = [
+        cast(literal(value) if value is not None else null(), table.c[field].type)
+        for field, value in reset_fields.items()
+    ]
+    rows = (
+        select(
+            latest.c.user_id,
+            months.c.month_year,
+            *(latest.c[f] for f in copy_fields),
+            *reset_values,
+        )
+        .select_from(latest)
+        .join(months, months.c.month_year > latest.c.month_year)
+        .where(latest.c.is_recurring.is_(True))
     )
-    prev_items = list((await session.execute(prev_stmt)).scalars().all())
-
-    if not prev_items:
-        return 0
 
-    # 2. Existing group IDs in target month
-    existing_stmt = select(m.recurring_group_id).where(
-        m.user_id == user_id,
-        m.month_year == month_year,
-        m.recurring_group_id.is_not(None),
+    # 3. Set-based insert; existing (user, group, month) rows are skipped
+    stmt = (
+        insert(m)
+        .from_select(columns, rows)
+        .on_conflict_do_nothing(index_elements=[m.user_id, m.recurring_group_id, m.month_year])
+        .returning(m.month_year)
     )
-    existing_ids = set((await session.execute(existing_stmt)).scalars().all())
-
-    # 3. Build new items for missing group_ids
-    new_items: list[Any] = []
-    for item in prev_items:
-        gid = item.recurring_group_id
-        if gid in existing_ids:
-            continue
-
-        data: dict[str, Any] = {
-            "id": _uuid.uuid4(),
-            "user_id": user_id,
-            "month_year": month_year,
-        }
-        for field in copy_fields:
-            val = getattr(item, field)
-            # Enum → store its .value string
-            data[field] = val.value if hasattr(val, "value") and isinstance(val.value, str) else val
-        data.update(reset_fields)
-
-        new_items.append(model_class(**data))
-        existing_ids.add(gid)  # prevent duplicates within same batch
-
-    if not new_items:
+    created_months = (await session.execute(stmt)).scalars().all()
+    created = len(created_months)
+
+    if created == 0:
+        _mark_materialized(key)
         return 0
 
-    # 4. Bulk insert
-    session.add_all(new_items)
-    await session.flush()
+    # Backfilled months no longer match their rollups; read them live until reconciled
+    await FinanceRepository.delete_rollups(session, user_id, sorted(set(created_months)))
 
     logger.info(
-        "ensure_recurring created %d %s items for %s",
-        len(new_items),
+        "ensure_recurring created %d %s items up to %s",
+        created,
         model_class.__tablename__,
         month_year,
     )
-    return len(new_items)
+    return created
@@ -0,0 +1,227 @@
+"""Monthly finance rollups — incremental deltas, recomputation and consistency checks.
+
+A rollup row holds one month's totals keyed ``"<source>:<category>:<status>"``
+(see packages/database/src/schema/finance-rollups.ts). Write tools apply
+deltas to an existing row; rows are only created by reconciliation, so a
+month is either fully rolled up or read from the source tables. Writes that
+skip the delta path (the web app) drop the month's row at commit (migration
+0016), so it is read live until the next reconcile.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+from sqlalchemy import String, case, cast, func, literal, select, union_all
+
+from app.db.models.finance import Bill, DebtPayment, Income, VariableExpense
+from app.db.repositories.finance import FinanceRepository
+
+if TYPE_CHECKING:
+    import uuid as _uuid
+
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.db.models.finance import FinanceMonthlyRollup
+
+logger = logging.getLogger(__name__)
+
+SOURCE_BILL = "bill"
+SOURCE_EXPENSE = "expense"
+SOURCE_INCOME = "income"
+SOURCE_DEBT_PAYMENT = "debt_payment"
+
+# key → {"expected": float, "actual": float, "count": int}
+type RollupTotals = dict[str, dict[str, Any]]
+# key → (expected, actual, count) to add
+type RollupDeltas = dict[str, tuple[float, float, int]]
+
+
+def rollup_key(source: str, category: str, status: str) -> str:
+    return f"{source}:{category}:{status}"
+
+
+def parse_rollup_key(key: str) -> tuple[str, str, str]:
+    source, category, status = key.split(":", 2)
+    return source, category, status
+
+
+def bill_bucket(amount: float, status: str) -> tuple[float, float, int]:
+    """A bill's contribution: its amount is expected, and also actual once paid."""
+    return amount, amount if status == "paid" else 0.0, 1
+
+
+def merge_rollup_deltas(totals: RollupTotals, deltas: RollupDeltas) -> RollupTotals:
+    """Return *totals* with *deltas* added; buckets whose count drops to 0 are removed."""
+    merged = {key: dict(bucket) for key, bucket in totals.items()}
+    for key, (expected, actual, count) in deltas.items():
+        bucket = merged.get(key, {"expected": 0.0, "actual": 0.0, "count": 0})
+        new_count = int(bucket["count"]) + count
+        if new_count <= 0:
+            merged.pop(key, None)
+            continue
+        merged[key] = {
+            "expected": round(float(bucket["expected"]) + expected, 2),
+            "actual": round(float(bucket["actual"]) + actual, 2),
+            "count": new_count,
+        }
+    return merged
+
+
+async def apply_rollup_deltas(
+    session: AsyncSession,
+    user_id: _uuid.UUID,
+    month_year: str,
+    deltas: RollupDeltas,
+) -> bool:
+    """Apply *deltas* to the month's rollup in the caller's transaction.
+
+    Months without a rollup row are left alone (reconciliation builds them
+    from the source tables). An updated row is marked as maintained so the
+    invalidation trigger keeps it. Returns True if a row was updated.
+    """
+    rollup = await FinanceRepository.lock_rollup(session, user_id, month_year)
+    if rollup is None:
+        return False
+    await FinanceRepository.mark_rollup_maintained(session, user_id, month_year)
+    await FinanceRepository.set_rollup_totals(
+        session, rollup.id, merge_rollup_deltas(rollup.totals, deltas)
+    )
+    return True
+
+
+async def compute_rollup_totals(
+    session: AsyncSession,
+    user_id: _uuid.UUID,
+    months: list[str],
+) -> dict[str, RollupTotals]:
+    """Recompute rollups for *months* from the source tables in one statement.
+
+    Every requested month is present in the result (empty if it has no rows).
+    """
+    zero = literal(0)
+    parts = [
+        select(
+            Bill.month_year,
+            literal(SOURCE_BILL).label("source"),
+            cast(Bill.category, String).label("category"),
+            cast(Bill.status, String).label("status"),
+            func.sum(Bill.amount).label("expected"),
+            func.sum(case((Bill.status == "paid", Bill.amount), else_=zero)).label("actual"),
+            func.count().label("count"),
+        )
+        .where(Bill.user_id == user_id, Bill.month_year.in_(months))
+        .group_by(Bill.month_year, Bill.category, Bill.status),
+        select(
+            VariableExpense.month_year,
+            literal(SOURCE_EXPENSE),
+            cast(VariableExpense.category, String),
+            cast(VariableExpense.status, String),
+            func.sum(VariableExpense.expected_amount),
+            func.sum(VariableExpense.actual_amount),
+            func.count(),
+        )
+        .where(VariableExpense.user_id == user_id, VariableExpense.month_year.in_(months))
+        .group_by(VariableExpense.month_year, VariableExpense.category, VariableExpense.status),
+        select(
+            Income.month_year,
+            literal(SOURCE_INCOME),
+            cast(Income.type, String),
+            cast(Income.status, String),
+            func.sum(Income.expected_amount),
+            func.sum(func.coalesce(Income.actual_amount, zero)),
+            func.count(),
+        )
+        .where(Income.user_id == user_id, Income.month_year.in_(months))
+        .group_by(Income.month_year, Income.type, Income.status),
+        select(
+            DebtPayment.month_year,
+            literal(SOURCE_DEBT_PAYMENT),
+            literal(""),
+            literal("paid"),
+            func.sum(DebtPayment.amount),
+            func.sum(DebtPayment.amount),
+            func.count(),
+        )
+        .where(DebtPayment.user_id == user_id, DebtPayment.month_year.in_(months))
+        .group_by(DebtPayment.month_year),
+    ]
+    rows = (await session.execute(union_all(*parts))).all()
+
+    totals: dict[str, RollupTotals] = {month: {} for month in months}
+    for month_year, source, category, status, expected, actual, count in rows:
+        totals[month_year][rollup_key(source, category, status)] = {
+            "expected": round(float(expected or 0), 2),
+            "actual": round(float(actual or 0), 2),
+            "count": int(count),
+        }
+    return totals
+
+
+@dataclass(frozen=True, slots=True)
+class RollupCheck:
+    """Outcome of comparing stored rollups against the source tables."""
+
+    checked: int
+    # Stored row differs from the source tables
+    drifted: tuple[str, ...] = ()
+    # No stored row yet
+    missing: tuple[str, ...] = ()
+
+
+async def check_finance_rollups(
+    session: AsyncSession,
+    user_id: _uuid.UUID,
+    months: list[str],
+) -> RollupCheck:
+    """Consistency checker: report months whose stored rollup is stale or absent."""
+    stored = await FinanceRepository.get_rollups(session, user_id, months)
+    check, _ = await _compare(session, user_id, months, stored)
+    return check
+
+
+async def reconcile_finance_rollups(
+    session: AsyncSession,
+    user_id: _uuid.UUID,
+    months: list[str],
+) -> RollupCheck:
+    """Rewrite rollups for *months* from the source tables; returns what was off.
+
+    The months' rows are locked before recomputing, so a delta committed in
+    between is either in the recompute or applied on top of its result,
+    never overwritten by it.
+    """
+    stored = await FinanceRepository.lock_rollups(session, user_id, months)
+    check, computed = await _compare(session, user_id, months, stored)
+    await FinanceRepository.save_reconciled_rollups(session, user_id, computed)
+    if check.drifted:
+        logger.warning(
+            "Finance rollups drifted for user %s in %s", user_id, ", ".join(check.drifted)
+        )
+    return check
+
+
+async def _compare(
+    session: AsyncSession,
+    user_id: _uuid.UUID,
+    months: list[str],
+    rollups: list[FinanceMonthlyRollup],
+) -> tuple[RollupCheck, dict[str, RollupTotals]]:
+    computed = await compute_rollup_totals(session, user_id, months)
+    stored = {r.month_year: r.totals for r in rollups}
+    drifted = tuple(m for m in months if m in stored and _normalize(stored[m]) != computed[m])
+    missing = tuple(m for m in months if m not in stored)
+    return RollupCheck(checked=len(months), drifted=drifted, missing=missing), computed
+
+
+def _normalize(totals: RollupTotals) -> RollupTotals:
+    return {
+        key: {
+            "expected": round(float(bucket.get("expected", 0)), 2),
+            "actual": round(float(bucket.get("actual", 0)), 2),
+            "count": int(bucket.get("count", 0)),
+        }
+        for key, bucket in totals.items()
+    }
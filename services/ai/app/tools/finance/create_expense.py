@@ -9,9 +9,11 @@ import uuid as _uuid
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
+from app.db.models.enums import ExpenseStatus
 from app.db.repositories.finance import FinanceRepository
 from app.db.session import get_user_session
 from app.tools.finance._helpers import get_current_month_tz
+from app.tools.finance._rollups import SOURCE_EXPENSE, apply_rollup_deltas, rollup_key
 
 logger = logging.getLogger(__name__)
 
@@ -86,6 +88,12 @@ async def create_expense(
 
     async with get_user_session(session_factory, user_id) as session:
         expense = await FinanceRepository.create_expense(session, data)
+        await apply_rollup_deltas(
+            session,
+            expense.user_id,
+            month_year,
+            {rollup_key(SOURCE_EXPENSE, db_category, ExpenseStatus.ACTIVE): (expected, actual, 1)},
+        )
 
     display_amount = actual if actual > 0 else expected
     category_label = _CATEGORY_LABELS.get(category, category)
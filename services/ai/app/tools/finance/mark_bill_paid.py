@@ -10,9 +10,11 @@ from datetime import datetime
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
+from app.db.models.enums import BillStatus
 from app.db.repositories.finance import FinanceRepository
 from app.db.session import get_user_session
 from app.tools.finance._helpers import get_today_tz
+from app.tools.finance._rollups import SOURCE_BILL, apply_rollup_deltas, bill_bucket, rollup_key
 
 logger = logging.getLogger(__name__)
 
@@ -68,6 +70,22 @@ async def mark_bill_paid(
 
         await FinanceRepository.mark_bill_paid(session, bill_uuid, paid_at_dt)
 
+        # Move the bill from its old status bucket to the paid one
+        amount = float(bill.amount or 0)
+        category = bill.category.value if hasattr(bill.category, "value") else bill.category
+        old_expected, old_actual, _ = bill_bucket(amount, bill_status)
+        await apply_rollup_deltas(
+            session,
+            bill.user_id,
+            bill.month_year,
+            {
+                rollup_key(SOURCE_BILL, category, bill_status): (-old_expected, -old_actual, -1),
+                rollup_key(SOURCE_BILL, category, BillStatus.PAID): bill_bucket(
+                    amount, BillStatus.PAID
+                ),
+            },
+        )
+
     bill_name = bill.name
     bill_amount = float(bill.amount or 0)
 
@@ -9,6 +9,7 @@ import uuid
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
+from app.config import get_settings
 from app.db.repositories.memory import MemoryRepository
 from app.db.session import get_user_session
 from app.tools.memory._contradiction_detector import check_contradictions
@@ -88,8 +89,32 @@ async def add_knowledge(
     item_id = uuid.uuid4()
     superseded_info: dict[str, str] | None = None
 
+    # Phase 1: read candidates (the connection goes back to the pool right after)
     async with get_user_session(session_factory, user_id) as session:
-        # LLM contradiction detection: fetch existing items in same scope
+        # A reworded fact already known merges into it, with no LLM call
+        duplicate = await MemoryRepository.find_near_duplicate(
+            session,
+            uid,
+            content,
+            item_type=type,
+            area=area,
+            threshold=get_settings().KNOWLEDGE_DEDUP_THRESHOLD,
+        )
+        if duplicate is not None:
+            merged = await MemoryRepository.merge_duplicate_knowledge(
+                session, duplicate.id, confidence
+            )
+            if merged is not None:
+                logger.info("add_knowledge merged near-duplicate into %s", merged.id)
+                return json.dumps(
+                    {
+                        "success": True,
+                        "itemId": str(merged.id),
+                        "merged": True,
+                        "message": f"Conhecimento já existente reforçado: {merged.title}",
+                    }
+                )
+
         existing = await MemoryRepository.search_knowledge(
             session,
             uid,
@@ -98,9 +123,11 @@ async def add_knowledge(
             limit=20,
         )
 
-        contradictions = await check_contradictions(content, existing)
+    # Phase 2: LLM contradiction detection, with no DB connection held
+    contradictions = await check_contradictions(content, existing)
 
-        # Create the new item
+    # Phase 3: short transaction that re-validates and writes
+    async with get_user_session(session_factory, user_id) as session:
         new_item = await MemoryRepository.create_knowledge(
             session,
             {
@@ -116,21 +143,26 @@ async def add_knowledge(
             },
         )
 
-        # Supersede contradicted items
-        if contradictions:
-            top = contradictions[0]  # Supersede highest-confidence contradiction
-            await MemoryRepository.supersede_knowledge(session, top.item_id, new_item.id)
+        # Supersede the highest-confidence contradiction still active: another
+        # write may have superseded or deleted it during the LLM call
+        for contradiction in sorted(contradictions, key=lambda c: c.confidence, reverse=True):
+            old = await MemoryRepository.get_knowledge_by_id(session, contradiction.item_id)
+            if old is None or old.superseded_by_id is not None or old.deleted_at is not None:
+                logger.info("add_knowledge skipped %s: no longer active", contradiction.item_id)
+                continue
+            await MemoryRepository.supersede_knowledge(session, old.id, new_item.id)
             superseded_info = {
-                "oldItemId": str(top.item_id),
-                "reason": top.reason,
-                "confidence": str(top.confidence),
+                "oldItemId": str(old.id),
+                "reason": contradiction.reason,
+                "confidence": str(contradiction.confidence),
             }
             logger.info(
                 "add_knowledge superseded %s with %s: %s",
-                top.item_id,
+                old.id,
                 item_id,
-                top.reason,
+                contradiction.reason,
             )
+            break
 
     logger.info("add_knowledge created %s: %s", item_id, title)
 
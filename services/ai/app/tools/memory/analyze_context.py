@@ -2,15 +2,15 @@
 
 from __future__ import annotations
 
-import asyncio
 import json
 import logging
 import uuid
+from functools import lru_cache
 
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
-from app.db.models.memory import KnowledgeItem
+from app.db.knowledge_index import tokenize
 from app.db.repositories.memory import MemoryRepository
 from app.db.session import get_user_session
 
@@ -19,9 +19,17 @@ logger = logging.getLogger(__name__)
 _VALID_AREAS = {"health", "finance", "professional", "learning", "spiritual", "relationships"}
 
 
-def _extract_keywords(text: str, min_len: int = 4) -> set[str]:
-    """Extract unique words with length >= min_len from text (lowercased)."""
-    return {w.lower() for w in text.split() if len(w) >= min_len}
+@lru_cache(maxsize=4096)
+def _extract_keywords(text: str) -> dict[str, str]:
+    """Index terms of *text* (accent-folded, stemmed) → the word each came from.
+
+    Memoized: the same learned patterns come back on most calls (do not mutate).
+    """
+    keywords: dict[str, str] = {}
+    for word in text.split():
+        for term in tokenize(word):
+            keywords.setdefault(term, word.strip(".,;:!?()\"'").lower())
+    return keywords
 
 
 @tool(parse_docstring=True)
@@ -50,28 +58,15 @@ async def analyze_context(
     uid = uuid.UUID(user_id)
 
     async with get_user_session(session_factory, user_id) as session:
-        # Fetch items from each area in parallel
-        async def _fetch_area(area: str) -> list[KnowledgeItem]:
-            return await MemoryRepository.search_knowledge(session, uid, area=area, limit=10)
-
-        area_results = await asyncio.gather(*[_fetch_area(a) for a in valid_areas])
-
-        # Deduplicate by ID, keep all items
-        seen_ids: set[str] = set()
-        all_items = []
-        for items in area_results:
-            for item in items:
-                item_id_str = str(item.id)
-                if item_id_str not in seen_ids:
-                    seen_ids.add(item_id_str)
-                    all_items.append(item)
-
-        # Sort by confidence desc, take top 15
-        all_items.sort(key=lambda x: x.confidence, reverse=True)
-        all_items = all_items[:15]
-
-        # Load user memories for learned patterns
-        user_memories = await MemoryRepository.get_user_memories(session, uid)
+        # One query: top 10 newest per area → 15 most confident, plus user memories
+        context = await MemoryRepository.get_context(
+            session, uid, valid_areas, per_area=10, limit=15
+        )
+        # Facts of any area sharing terms with the topic (in-memory BM25)
+        index = await MemoryRepository.knowledge_index(session, uid)
+        topic_hits = index.rank(current_topic, limit=10)
+    all_items = context.items
+    user_memories = context.memories
 
     # Format related facts
     related_facts = [
@@ -105,18 +100,17 @@ async def analyze_context(
     for pattern in existing_patterns:
         pattern_text = str(pattern.get("pattern", ""))
         pattern_keywords = _extract_keywords(pattern_text)
-        overlap = topic_keywords & pattern_keywords
+        overlap = topic_keywords.keys() & pattern_keywords.keys()
         if overlap:
+            words = sorted({pattern_keywords[term] for term in overlap})
             potential_connections.append(
-                f"Padrão '{pattern_text}' pode estar relacionado ao tópico (palavras em comum: {', '.join(sorted(overlap))})"
+                f"Padrão '{pattern_text}' pode estar relacionado ao tópico (palavras em comum: {', '.join(words)})"
             )
 
-    # Also check facts for keyword overlap
-    for fact in related_facts[:10]:
-        fact_keywords = _extract_keywords(str(fact.get("content", "")))
-        overlap = topic_keywords & fact_keywords
-        if overlap and len(overlap) >= 2:
-            content_str = str(fact.get("content", ""))
+    # Also facts sharing at least two topic terms
+    for hit in topic_hits:
+        if hit.matched >= 2:
+            content_str = hit.item.content or ""
             potential_connections.append(f"Fato '{content_str[:60]}...' pode ser relevante")
 
     # Build result
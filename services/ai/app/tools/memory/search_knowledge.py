@@ -30,7 +30,7 @@ async def search_knowledge(
     """Busca fatos e conhecimentos sobre o usuário na memória.
 
     Args:
-        query: Texto para buscar no título e conteúdo (busca parcial)
+        query: Texto para buscar no título e conteúdo (resultados por relevância)
         type: Tipo do conhecimento: fact, preference, memory, insight ou person
         area: Área de vida: health, finance, professional, learning, spiritual ou relationships
         sub_area: Sub-área para filtro mais específico (ex: physical, mental, budget, career)
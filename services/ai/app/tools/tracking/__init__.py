@@ -1,10 +1,14 @@
-"""Tracking tools — 4 WRITE + 2 READ tools for the tracking domain."""
+"""Tracking tools — 6 WRITE + 4 READ tools for the tracking domain."""
 
 from app.tools.tracking.delete_metric import delete_metric
+from app.tools.tracking.delete_metrics import delete_metrics
 from app.tools.tracking.get_habits import get_habits
 from app.tools.tracking.get_history import get_history
+from app.tools.tracking.get_metric_correlations import get_metric_correlations
+from app.tools.tracking.get_tracking_insights import get_tracking_insights
 from app.tools.tracking.record_habit import record_habit
 from app.tools.tracking.record_metric import record_metric
+from app.tools.tracking.record_metrics import record_metrics
 from app.tools.tracking.update_metric import update_metric
 
 TRACKING_TOOLS = [
@@ -14,8 +18,19 @@ TRACKING_TOOLS = [
     delete_metric,
     record_habit,
     get_habits,
+    get_tracking_insights,
+    get_metric_correlations,
+    record_metrics,
+    delete_metrics,
 ]
-TRACKING_WRITE_TOOLS = {"record_metric", "update_metric", "delete_metric", "record_habit"}
+TRACKING_WRITE_TOOLS = {
+    "record_metric",
+    "update_metric",
+    "delete_metric",
+    "record_habit",
+    "record_metrics",
+    "delete_metrics",
+}
 
 __all__ = [
     "TRACKING_TOOLS",
@@ -26,4 +41,8 @@ __all__ = [
     "delete_metric",
     "record_habit",
     "get_habits",
+    "get_tracking_insights",
+    "get_metric_correlations",
+    "record_metrics",
+    "delete_metrics",
 ]
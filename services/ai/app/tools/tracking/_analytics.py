@@ -0,0 +1,284 @@
+"""Tracking analytics — trend, smoothing, anomaly detection and cross-metric correlation.
+
+Everything is computed over NumPy arrays in one pass: least-squares slope,
+EMA, rolling mean/stddev, trailing-window z-scores and, for metrics with a
+target (e.g. weight), the ETA implied by the fitted slope. Input is the
+metric's per-day values (see ``TrackingRepository.get_daily_values``).
+
+For correlations, several metrics are aligned into one day-indexed matrix
+(NaN where a day has no entry) and compared pairwise, optionally lagged.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import TYPE_CHECKING
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from app.db.repositories.tracking import TrackingRepository
+
+if TYPE_CHECKING:
+    import uuid as _uuid
+    from collections.abc import Sequence
+
+    import numpy.typing as npt
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# Metrics logged several times a day that add up (water per glass, exercise per session)
+ADDITIVE_METRICS = frozenset({"water", "exercise"})
+
+# Change over the period, relative to the mean, below which the trend is "stable"
+_STABLE_RELATIVE_CHANGE = 0.05
+# Lower bound of the stddev used for z-scores, relative to the window mean
+_MIN_RELATIVE_STD = 0.01
+
+
+@dataclass(frozen=True, slots=True)
+class Anomaly:
+    day: date
+    value: float
+    z_score: float
+
+
+@dataclass(frozen=True, slots=True)
+class MetricAnalysis:
+    points: int
+    # Days between the first and last point
+    span_days: int = 0
+    mean: float | None = None
+    # Least-squares fit over the whole series
+    slope_per_day: float | None = None
+    r_squared: float | None = None
+    trend: str = "stable"
+    ema: float | None = None
+    rolling_mean: float | None = None
+    rolling_std: float | None = None
+    anomalies: tuple[Anomaly, ...] = ()
+    target: float | None = None
+    # None when the trend does not head towards the target
+    target_eta: date | None = None
+
+    @property
+    def change_over_period(self) -> float | None:
+        """Fitted change between the first and last day."""
+        return self.slope_per_day * self.span_days if self.slope_per_day is not None else None
+
+
+def analyze_series(
+    days: Sequence[date],
+    values: Sequence[float],
+    *,
+    window: int = 7,
+    ema_span: int = 7,
+    z_threshold: float = 2.5,
+    target: float | None = None,
+) -> MetricAnalysis:
+    """Analyze per-day *values* (one per entry of *days*, ascending)."""
+    y = np.asarray(values, dtype=np.float64)
+    n = len(y)
+    if n == 0:
+        return MetricAnalysis(points=0, target=target)
+
+    x = (np.asarray(days, dtype="datetime64[D]") - np.datetime64(days[0], "D")).astype(np.float64)
+    mean = float(y.mean())
+    span = int(x[-1])
+
+    slope, r_squared = _linear_fit(x, y)
+    trend = "stable"
+    if slope is not None and n >= 3 and mean != 0:
+        relative = slope * span / abs(mean)
+        if relative > _STABLE_RELATIVE_CHANGE:
+            trend = "increasing"
+        elif relative < -_STABLE_RELATIVE_CHANGE:
+            trend = "decreasing"
+
+    ema = _ema_last(y, ema_span)
+    tail = y[-window:]
+    return MetricAnalysis(
+        points=n,
+        span_days=span,
+        mean=round(mean, 2),
+        slope_per_day=slope,
+        r_squared=r_squared,
+        trend=trend,
+        ema=round(ema, 2),
+        rolling_mean=round(float(tail.mean()), 2),
+        rolling_std=round(float(tail.std()), 2),
+        anomalies=_anomalies(days, y, window, z_threshold),
+        target=target,
+        target_eta=_target_eta(days[-1], ema, slope, target),
+    )
+
+
+async def load_metric_analysis(
+    session: AsyncSession,
+    user_id: _uuid.UUID,
+    metric_type: str,
+    date_from: date,
+    date_to: date,
+    *,
+    target: float | None = None,
+) -> MetricAnalysis:
+    """Analyze *metric_type*'s daily values in date_from..date_to (one query)."""
+    daily = await TrackingRepository.get_daily_values(
+        session,
+        user_id,
+        metric_type,
+        date_from,
+        date_to,
+        additive=metric_type in ADDITIVE_METRICS,
+    )
+    return analyze_series([d for d, _ in daily], [v for _, v in daily], target=target)
+
+
+def _linear_fit(
+    x: npt.NDArray[np.float64], y: npt.NDArray[np.float64]
+) -> tuple[float | None, float | None]:
+    """(slope, r²) of the least-squares line; None when x has no spread."""
+    dx = x - x.mean()
+    sxx = float(dx @ dx)
+    if sxx == 0:
+        return None, None
+    dy = y - y.mean()
+    slope = float(dx @ dy) / sxx
+    syy = float(dy @ dy)
+    r_squared = slope * slope * sxx / syy if syy else 1.0
+    return slope, round(r_squared, 3)
+
+
+def _ema_last(y: npt.NDArray[np.float64], span: int) -> float:
+    """Last value of the (non-adjusted) exponential moving average, as a dot product."""
+    alpha = 2 / (span + 1)
+    n = len(y)
+    weights = alpha * (1 - alpha) ** np.arange(n - 1, -1, -1, dtype=np.float64)
+    # The first value carries the weight of everything before it
+    weights[0] = (1 - alpha) ** (n - 1)
+    return float(weights @ y)
+
+
+def _anomalies(
+    days: Sequence[date], y: npt.NDArray[np.float64], window: int, z_threshold: float
+) -> tuple[Anomaly, ...]:
+    """Points more than *z_threshold* stddevs from the mean of the *window* before them."""
+    if len(y) <= window:
+        return ()
+    trailing = sliding_window_view(y[:-1], window)
+    mean = trailing.mean(axis=1)
+    # Floor at 1% of the mean so a jump after a flat stretch still scores
+    std = np.maximum(trailing.std(axis=1), _MIN_RELATIVE_STD * np.abs(mean))
+    current = y[window:]
+    z = np.divide(current - mean, std, out=np.zeros_like(current), where=std > 0)
+    flagged = np.flatnonzero(np.abs(z) >= z_threshold)
+    return tuple(
+        Anomaly(
+            day=days[i + window],
+            value=float(current[i]),
+            z_score=round(float(z[i]), 2),
+        )
+        for i in flagged.tolist()
+    )
+
+
+def _target_eta(
+    last_day: date, current: float, slope: float | None, target: float | None
+) -> date | None:
+    if target is None or slope is None or slope == 0:
+        return None
+    remaining_days = (target - current) / slope
+    if remaining_days < 0:
+        return None
+    return last_day + timedelta(days=math.ceil(remaining_days))
+
+
+# ---------------------------------------------------------------------------
+# Cross-metric correlation
+# ---------------------------------------------------------------------------
+
+# Fewest paired days for a correlation to be reported
+MIN_PAIRED_DAYS = 5
+
+
+@dataclass(frozen=True, slots=True)
+class Correlation:
+    """How *metric* on day d relates to *other* on day d + lag."""
+
+    metric: str
+    other: str
+    lag_days: int
+    paired_days: int
+    pearson: float | None = None
+    spearman: float | None = None
+    # Mean of *other* when *metric* is above / at-or-below its median
+    other_mean_when_high: float | None = None
+    other_mean_when_low: float | None = None
+
+
+def align_daily(
+    series: dict[str, list[tuple[date, float]]], date_from: date, date_to: date
+) -> npt.NDArray[np.float64]:
+    """Matrix of one row per metric (in *series* order) and one column per day; NaN = no data."""
+    days = (date_to - date_from).days + 1
+    matrix = np.full((len(series), max(days, 0)), np.nan)
+    for row, points in enumerate(series.values()):
+        if not points:
+            continue
+        offsets = np.array([(d - date_from).days for d, _ in points])
+        values = np.array([v for _, v in points], dtype=np.float64)
+        inside = (offsets >= 0) & (offsets < days)
+        matrix[row, offsets[inside]] = values[inside]
+    return matrix
+
+
+def correlate(
+    metric: str,
+    x: npt.NDArray[np.float64],
+    other: str,
+    y: npt.NDArray[np.float64],
+    lag_days: int = 0,
+) -> Correlation:
+    """Correlate aligned daily arrays *x* and *y* (NaN = missing) with *y* shifted by *lag_days*."""
+    if lag_days > 0:
+        x, y = x[:-lag_days], y[lag_days:]
+    paired = ~(np.isnan(x) | np.isnan(y))
+    xs, ys = x[paired], y[paired]
+    n = int(paired.sum())
+    if n < MIN_PAIRED_DAYS:
+        return Correlation(metric=metric, other=other, lag_days=lag_days, paired_days=n)
+
+    high = xs > np.median(xs)
+    return Correlation(
+        metric=metric,
+        other=other,
+        lag_days=lag_days,
+        paired_days=n,
+        pearson=_pearson(xs, ys),
+        spearman=_pearson(_ranks(xs), _ranks(ys)),
+        other_mean_when_high=round(float(ys[high].mean()), 2) if high.any() else None,
+        other_mean_when_low=round(float(ys[~high].mean()), 2) if (~high).any() else None,
+    )
+
+
+def _pearson(x: npt.NDArray[np.float64], y: npt.NDArray[np.float64]) -> float | None:
+    dx = x - x.mean()
+    dy = y - y.mean()
+    denominator = math.sqrt(float(dx @ dx) * float(dy @ dy))
+    if denominator == 0:
+        return None
+    return round(float(dx @ dy) / denominator, 3)
+
+
+def _ranks(values: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """Ranks starting at 1; ties get the average of the ranks they span."""
+    order = np.argsort(values, kind="stable")
+    ordered = values[order]
+    # First index of each run of equal values
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    counts = np.diff(np.r_[starts, len(values)])
+    average = starts + (counts + 1) / 2
+    ranks = np.empty(len(values), dtype=np.float64)
+    ranks[order] = np.repeat(average, counts)
+    return ranks
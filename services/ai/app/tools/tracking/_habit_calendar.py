@@ -0,0 +1,229 @@
+"""Habit completion calendars — per-habit completion bitmaps and frequency-aware streaks.
+
+Bit ``i`` of a calendar is set when the habit was completed on ``start + i``
+days, so a multi-year history is a single int. Streaks and completion rates
+are computed with bit operations against the habit's schedule (the weekdays
+its frequency expects); days outside the schedule neither count nor break a
+streak (same rules as the API's HabitsService.calculateStreak).
+
+``get_habits_with_status`` already returns each habit's most recent
+completions; a habit with fewer than ``RECENT_COMPLETIONS`` of them has its
+whole history there. Longer histories are loaded once per user with a single
+query, cached, and refreshed from the recent dates on every read.
+"""
+
+from __future__ import annotations
+
+import time
+import uuid as _uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import TYPE_CHECKING
+
+from app.config import get_settings
+from app.db.models.enums import HabitFrequency
+from app.db.repositories.tracking import TrackingRepository
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+    from app.db.models.tracking import Habit
+    from app.db.repositories.tracking import HabitStatus
+
+# Completions loaded per habit by get_habits_with_status
+RECENT_COMPLETIONS = 60
+
+# Weekday bitmasks, bit 0 = Monday (date.weekday())
+_ALL_DAYS = 0b1111111
+_WEEKDAYS = 0b0011111
+_WEEKENDS = 0b1100000
+
+# Most users kept in the history cache
+_CACHE_MAX_USERS = 1024
+
+
+def habit_weekdays(habit: Habit) -> int:
+    """Weekday mask of the days *habit* is expected to be completed."""
+    if habit.frequency == HabitFrequency.WEEKDAYS:
+        return _WEEKDAYS
+    if habit.frequency == HabitFrequency.WEEKENDS:
+        return _WEEKENDS
+    if habit.frequency == HabitFrequency.CUSTOM:
+        # frequency_days uses JS getDay() numbering (0 = Sunday)
+        return sum(1 << ((d + 6) % 7) for d in set(habit.frequency_days or []))
+    return _ALL_DAYS
+
+
+def _expected_bits(first: date, days: int, weekdays: int) -> int:
+    """Bitmap of the scheduled days among the *days* days starting at *first*."""
+    if days <= 0:
+        return 0
+    week = sum(1 << i for i in range(7) if weekdays >> ((first.weekday() + i) % 7) & 1)
+    weeks = -(-days // 7)
+    # 0b0000001_0000001_... repeats the 7-day pattern once per week
+    return week * (((1 << (7 * weeks)) - 1) // 0x7F) & ((1 << days) - 1)
+
+
+@dataclass(frozen=True, slots=True)
+class HabitCalendar:
+    """A habit's completions as a bitmap anchored at ``start``."""
+
+    start: date
+    bits: int = 0
+
+    @classmethod
+    def from_dates(cls, dates: Iterable[date]) -> HabitCalendar:
+        days = set(dates)
+        if not days:
+            return cls(start=date.min)
+        start = min(days)
+        return cls(start=start, bits=sum(1 << (d - start).days for d in days))
+
+    def has(self, day: date) -> bool:
+        offset = (day - self.start).days
+        return offset >= 0 and bool(self.bits >> offset & 1)
+
+    def with_completion(self, day: date) -> HabitCalendar:
+        if not self.bits:
+            return HabitCalendar(start=day, bits=1)
+        offset = (day - self.start).days
+        if offset < 0:
+            return HabitCalendar(start=day, bits=self.bits << -offset | 1)
+        return HabitCalendar(start=self.start, bits=self.bits | 1 << offset)
+
+    def overlay(self, since: date, dates: Iterable[date]) -> HabitCalendar:
+        """Replace every day from *since* onwards with *dates*."""
+        offset = (since - self.start).days
+        calendar = HabitCalendar(
+            start=self.start, bits=self.bits & ((1 << offset) - 1) if offset > 0 else 0
+        )
+        for day in dates:
+            calendar = calendar.with_completion(day)
+        return calendar
+
+    def _window(self, first: date, last: date, weekdays: int) -> tuple[int, int]:
+        """(completed scheduled days, missed scheduled days) for first..last, bit 0 = first."""
+        days = (last - first).days + 1
+        if days <= 0:
+            return 0, 0
+        offset = (first - self.start).days
+        done = self.bits >> offset if offset >= 0 else self.bits << -offset
+        expected = _expected_bits(first, days, weekdays)
+        return done & expected, expected & ~done
+
+    def current_streak(self, on_date: date, weekdays: int = _ALL_DAYS) -> int:
+        """Consecutive scheduled days completed up to *on_date*.
+
+        A scheduled day that is not completed yet (today) does not break the
+        streak; counting starts from the day before.
+        """
+        if not self.bits:
+            return 0
+        end = on_date if self.has(on_date) else on_date - timedelta(days=1)
+        hits, missed = self._window(self.start, end, weekdays)
+        if missed:
+            hits >>= missed.bit_length()
+        return hits.bit_count()
+
+    def longest_streak(self, until: date, weekdays: int = _ALL_DAYS) -> int:
+        """Longest run of completed scheduled days up to *until*."""
+        if not self.bits:
+            return 0
+        hits, missed = self._window(self.start, until, weekdays)
+        best = 0
+        while missed:
+            lowest = missed & -missed
+            best = max(best, (hits & (lowest - 1)).bit_count())
+            shift = lowest.bit_length()
+            hits >>= shift
+            missed >>= shift
+        return max(best, hits.bit_count())
+
+    def completion_rate(self, first: date, last: date, weekdays: int = _ALL_DAYS) -> float:
+        """Share of scheduled days in first..last that were completed (0.0 if none)."""
+        hits, missed = self._window(first, last, weekdays)
+        expected = hits.bit_count() + missed.bit_count()
+        return hits.bit_count() / expected if expected else 0.0
+
+
+# user_id → (expires_at, habit_id → full history), least recently used first
+_history_cache: OrderedDict[_uuid.UUID, tuple[float, dict[_uuid.UUID, HabitCalendar]]] = (
+    OrderedDict()
+)
+
+
+def _cached_history(user_id: _uuid.UUID) -> dict[_uuid.UUID, HabitCalendar] | None:
+    entry = _history_cache.get(user_id)
+    if entry is None or entry[0] < time.monotonic():
+        _history_cache.pop(user_id, None)
+        return None
+    _history_cache.move_to_end(user_id)
+    return entry[1]
+
+
+def _store_history(user_id: _uuid.UUID, history: dict[_uuid.UUID, HabitCalendar]) -> None:
+    ttl = get_settings().HABIT_CALENDAR_CACHE_TTL_SECONDS
+    _history_cache[user_id] = (time.monotonic() + ttl, history)
+    _history_cache.move_to_end(user_id)
+    while len(_history_cache) > _CACHE_MAX_USERS:
+        _history_cache.popitem(last=False)
+
+
+def remember_completion(user_id: _uuid.UUID, habit_id: _uuid.UUID, day: date) -> None:
+    """Record a new completion in the user's cached history, if one is cached."""
+    history = _cached_history(user_id)
+    if history is not None and habit_id in history:
+        history[habit_id] = history[habit_id].with_completion(day)
+
+
+def clear_habit_calendar_cache() -> None:
+    _history_cache.clear()
+
+
+def invalidate_habit_calendars(user_id: str | None, domain: str | None) -> None:
+    """Cache invalidation subscriber (see app/db/invalidation.py)."""
+    if domain not in (None, "habits"):
+        return
+    if user_id is None:
+        _history_cache.clear()
+    else:
+        _history_cache.pop(_uuid.UUID(user_id), None)
+
+
+async def load_habit_calendars(
+    session: AsyncSession,
+    user_id: _uuid.UUID,
+    statuses: list[HabitStatus],
+    *,
+    limit: int = RECENT_COMPLETIONS,
+) -> dict[_uuid.UUID, HabitCalendar]:
+    """Calendars for the habits in *statuses* (loaded with ``limit`` recent dates).
+
+    Habits whose recent dates are their whole history need no query; the
+    rest come from the user's cached history, with the recent window
+    replaced by the freshly loaded dates.
+    """
+    calendars: dict[_uuid.UUID, HabitCalendar] = {}
+    truncated: list[HabitStatus] = []
+    for status in statuses:
+        if len(status.recent_dates) < limit:
+            calendars[status.habit.id] = HabitCalendar.from_dates(status.recent_dates)
+        else:
+            truncated.append(status)
+    if not truncated:
+        return calendars
+
+    history = _cached_history(user_id)
+    if history is None or any(s.habit.id not in history for s in truncated):
+        dates_by_habit = await TrackingRepository.get_completion_dates(session, user_id)
+        history = {hid: HabitCalendar.from_dates(d) for hid, d in dates_by_habit.items()}
+        _store_history(user_id, history)
+
+    for status in truncated:
+        calendars[status.habit.id] = history[status.habit.id].overlay(
+            min(status.recent_dates), status.recent_dates
+        )
+    return calendars
@@ -0,0 +1,131 @@
+"""Shared metric validation for the tracking write tools (record_metric, record_metrics)."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date as date_type
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+# Type → (area, sub_area)
+AREA_MAP: dict[str, tuple[str, str | None]] = {
+    "weight": ("health", "physical"),
+    "water": ("health", "physical"),
+    "sleep": ("health", "physical"),
+    "exercise": ("health", "physical"),
+    "mood": ("health", "mental"),
+    "energy": ("health", "mental"),
+    "custom": ("learning", "informal"),
+}
+
+# Type → default unit
+DEFAULT_UNIT: dict[str, str] = {
+    "weight": "kg",
+    "water": "ml",
+    "sleep": "hours",
+    "exercise": "min",
+    "mood": "score",
+    "energy": "score",
+}
+
+# Type → (min, max) validation
+VALUE_RANGES: dict[str, tuple[float, float]] = {
+    "weight": (0.1, 500),
+    "water": (1, 10000),
+    "sleep": (0.1, 24),
+    "exercise": (1, 1440),
+    "mood": (1, 10),
+    "energy": (1, 10),
+}
+
+VALID_TYPES = {"weight", "water", "sleep", "exercise", "mood", "energy", "custom"}
+
+TYPE_LABELS: dict[str, str] = {
+    "weight": "peso",
+    "water": "água",
+    "sleep": "sono",
+    "exercise": "exercício",
+    "mood": "humor",
+    "energy": "energia",
+    "custom": "métrica personalizada",
+}
+
+UNIT_LABELS: dict[str, str] = {
+    "kg": "kg",
+    "ml": "ml",
+    "hours": "horas",
+    "min": "minutos",
+    "score": "pontos",
+}
+
+
+class MetricInput(BaseModel):
+    """One metric of a record_metrics call."""
+
+    metric_type: str = Field(
+        description="Tipo da métrica: weight, water, sleep, exercise, mood, energy ou custom"
+    )
+    value: float = Field(description="Valor numérico da métrica")
+    unit: str | None = Field(
+        default=None, description="Unidade (kg, ml, hours, min, score). Auto-preenchido se omitido"
+    )
+    date: str | None = Field(
+        default=None, description="Data no formato YYYY-MM-DD. Usa hoje se omitido"
+    )
+    notes: str | None = Field(default=None, description="Observações opcionais sobre o registro")
+
+
+def build_entry(
+    user_id: uuid.UUID,
+    metric_type: str,
+    value: float,
+    unit: str | None,
+    date: str | None,
+    notes: str | None,
+    today: date_type,
+) -> dict[str, Any]:
+    """Validate one metric and return the TrackingEntry row for it.
+
+    Raises ValueError with a user-facing (PT-BR) message when invalid.
+    """
+    if metric_type not in VALID_TYPES:
+        raise ValueError(f"Tipo inválido: {metric_type}. Use: {', '.join(sorted(VALID_TYPES))}")
+
+    if metric_type in VALUE_RANGES:
+        vmin, vmax = VALUE_RANGES[metric_type]
+        if not (vmin <= value <= vmax):
+            raise ValueError(f"Valor fora do intervalo para {metric_type}: {vmin}-{vmax}")
+
+    # Always a Python date object (asyncpg requires it)
+    if date is None:
+        entry_date = today
+    else:
+        try:
+            entry_date = datetime.strptime(date, "%Y-%m-%d").date()
+        except ValueError:
+            raise ValueError(f"Data inválida: {date}. Use o formato YYYY-MM-DD") from None
+
+    area, sub_area = AREA_MAP.get(metric_type, ("learning", "informal"))
+
+    return {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "type": metric_type,
+        "area": area,
+        "sub_area": sub_area,
+        "value": value,
+        "unit": unit if unit is not None else DEFAULT_UNIT.get(metric_type),
+        "entry_date": entry_date,
+        "source": "chat",
+        "entry_metadata": {"notes": notes} if notes else None,
+    }
+
+
+def describe_entry(entry: dict[str, Any]) -> str:
+    """'água = 2000 ml em 2026-02-23' for a row built by ``build_entry``."""
+    type_label = TYPE_LABELS.get(entry["type"], entry["type"])
+    unit = entry["unit"] or ""
+    unit_label = UNIT_LABELS.get(unit, unit)
+    return f"{type_label} = {entry['value']} {unit_label} em {entry['entry_date']}"
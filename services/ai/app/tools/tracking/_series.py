@@ -0,0 +1,119 @@
+"""Tracking time series — metric entries aggregated into date buckets in SQL.
+
+One ``GROUPING SETS`` query returns a row per bucket (day, week, month or
+year, picked from the range length so a series stays small) plus the
+whole-period row, so stats are exact however many entries the range holds.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from sqlalchemy import TIMESTAMP, Date, cast, func, literal_column, select, tuple_
+
+from app.db.models.tracking import TrackingEntry
+
+if TYPE_CHECKING:
+    import uuid as _uuid
+    from datetime import date
+
+    from sqlalchemy import RowMapping
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+# (longest range in days, bucket) — first match wins
+_BUCKETS = ((31, "day"), (183, "week"), (1096, "month"))
+_LONGEST_BUCKET = "year"
+
+
+def pick_bucket(days: int) -> str:
+    """Bucket size for a range of *days* days (≤ ~36 points per series)."""
+    for max_days, bucket in _BUCKETS:
+        if days <= max_days:
+            return bucket
+    return _LONGEST_BUCKET
+
+
+@dataclass(frozen=True, slots=True)
+class MetricStats:
+    count: int = 0
+    average: float | None = None
+    min: float | None = None
+    max: float | None = None
+    sum: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class MetricBucket:
+    start: date
+    stats: MetricStats
+
+
+@dataclass(frozen=True, slots=True)
+class MetricSeries:
+    bucket: str
+    buckets: tuple[MetricBucket, ...]
+    # Whole period
+    total: MetricStats
+
+
+async def load_metric_series(
+    session: AsyncSession,
+    user_id: _uuid.UUID,
+    metric_type: str,
+    date_from: date,
+    date_to: date,
+    bucket: str,
+) -> MetricSeries:
+    """Bucketed series and whole-period stats of *metric_type* in date_from..date_to."""
+    if bucket not in {b for _, b in _BUCKETS} | {_LONGEST_BUCKET}:
+        raise ValueError(f"Unknown bucket: {bucket}")
+
+    # Inlined (not bound) so the select and GROUP BY expressions are identical
+    start = cast(
+        func.date_trunc(literal_column(f"'{bucket}'"), cast(TrackingEntry.entry_date, TIMESTAMP)),
+        Date,
+    ).label("bucket_start")
+    value = TrackingEntry.value
+    stmt = (
+        select(
+            start,
+            func.grouping(start).label("is_total"),
+            func.count().label("count"),
+            func.avg(value).label("average"),
+            func.min(value).label("min"),
+            func.max(value).label("max"),
+            func.sum(value).label("sum"),
+        )
+        .where(
+            TrackingEntry.user_id == user_id,
+            TrackingEntry.type == metric_type,
+            TrackingEntry.entry_date >= date_from,
+            TrackingEntry.entry_date <= date_to,
+        )
+        .group_by(func.grouping_sets(tuple_(start), tuple_()))
+        .order_by(start)
+    )
+    rows = (await session.execute(stmt)).mappings().all()
+
+    buckets: list[MetricBucket] = []
+    total = MetricStats()
+    for row in rows:
+        if row["is_total"]:
+            total = _stats(row)
+        else:
+            buckets.append(MetricBucket(start=row["bucket_start"], stats=_stats(row)))
+    return MetricSeries(bucket=bucket, buckets=tuple(buckets), total=total)
+
+
+def _stats(row: RowMapping) -> MetricStats:
+    count = int(row["count"])
+    if count == 0:
+        return MetricStats()
+    return MetricStats(
+        count=count,
+        average=round(float(row["average"]), 2),
+        min=float(row["min"]),
+        max=float(row["max"]),
+        sum=round(float(row["sum"]), 2),
+    )
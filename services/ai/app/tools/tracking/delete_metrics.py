@@ -0,0 +1,106 @@
+"""delete_metrics — WRITE tool that deletes several tracking entries (by id or date range)."""
+
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from datetime import datetime
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+
+from app.db.repositories.tracking import TrackingRepository
+from app.db.session import get_user_session
+from app.tools.tracking._metrics import TYPE_LABELS, VALID_TYPES
+
+logger = logging.getLogger(__name__)
+
+_MAX_IDS = 100
+
+
+@tool(parse_docstring=True)
+async def delete_metrics(
+    entry_ids: list[str] | None = None,
+    metric_type: str | None = None,
+    date_from: str | None = None,
+    date_to: str | None = None,
+    reason: str | None = None,
+    *,
+    config: RunnableConfig,
+) -> str:
+    """Remove vários registros de tracking: por lista de IDs ou por tipo e período.
+
+    Args:
+        entry_ids: IDs (UUID) exatos dos registros a remover
+        metric_type: Tipo da métrica a remover no período (use com date_from)
+        date_from: Início do período no formato YYYY-MM-DD
+        date_to: Fim do período no formato YYYY-MM-DD. Igual a date_from se omitido
+        reason: Motivo da remoção (opcional)
+    """
+    session_factory = config["configurable"]["session_factory"]
+    user_id: str = config["configurable"]["user_id"]
+
+    if entry_ids:
+        if metric_type or date_from or date_to:
+            return json.dumps({"error": "Informe IDs OU tipo e período, não ambos."})
+        if len(entry_ids) > _MAX_IDS:
+            return json.dumps({"error": f"Máximo de {_MAX_IDS} IDs por chamada."})
+        try:
+            ids = list(dict.fromkeys(uuid.UUID(i) for i in entry_ids))
+        except ValueError:
+            invalid = [i for i in entry_ids if not _is_uuid(i)]
+            return json.dumps({"error": f"IDs inválidos: {', '.join(invalid)}"})
+
+        async with get_user_session(session_factory, user_id) as session:
+            deleted = await TrackingRepository.delete_batch(session, ids)
+
+        logger.info("delete_metrics deleted %d of %d entries by id", deleted, len(ids))
+        result: dict[str, object] = {
+            "success": True,
+            "deletedCount": deleted,
+            "message": f"Removidos {deleted} registros.",
+        }
+        if deleted < len(ids):
+            result["notFoundCount"] = len(ids) - deleted
+        return json.dumps(result)
+
+    # Range delete — always scoped to one metric type
+    if metric_type is None or date_from is None:
+        return json.dumps({"error": "Informe entry_ids, ou metric_type e date_from."})
+    if metric_type not in VALID_TYPES:
+        return json.dumps(
+            {"error": f"Tipo inválido: {metric_type}. Use: {', '.join(sorted(VALID_TYPES))}"}
+        )
+    try:
+        start = datetime.strptime(date_from, "%Y-%m-%d").date()
+        end = datetime.strptime(date_to, "%Y-%m-%d").date() if date_to else start
+    except ValueError:
+        return json.dumps({"error": "Datas devem estar no formato YYYY-MM-DD."})
+    if end < start:
+        return json.dumps({"error": "date_to deve ser igual ou posterior a date_from."})
+
+    async with get_user_session(session_factory, user_id) as session:
+        deleted = await TrackingRepository.delete_by_range(
+            session, uuid.UUID(user_id), metric_type, start, end
+        )
+
+    type_label = TYPE_LABELS.get(metric_type, metric_type)
+    period = str(start) if start == end else f"{start} a {end}"
+    logger.info("delete_metrics deleted %d %s entries in %s", deleted, metric_type, period)
+
+    return json.dumps(
+        {
+            "success": True,
+            "deletedCount": deleted,
+            "message": f"Removidos {deleted} registros de {type_label} ({period}).",
+        }
+    )
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+    except ValueError:
+        return False
+    return True
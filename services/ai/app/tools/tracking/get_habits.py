@@ -5,7 +5,7 @@ from __future__ import annotations
 import json
 import logging
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
 from langchain_core.runnables import RunnableConfig
@@ -13,6 +13,11 @@ from langchain_core.tools import tool
 
 from app.db.repositories.tracking import TrackingRepository
 from app.db.session import get_user_session
+from app.tools.tracking._habit_calendar import (
+    RECENT_COMPLETIONS,
+    habit_weekdays,
+    load_habit_calendars,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -43,34 +48,42 @@ async def get_habits(
 
     async with get_user_session(session_factory, user_id) as session:
         user_uuid = uuid.UUID(user_id)
-        habits = await TrackingRepository.get_habits(session, user_uuid)
-
-        formatted = []
-        for habit in habits:
-            entry: dict[str, object] = {
-                "id": str(habit.id),
-                "name": habit.name,
-                "icon": habit.icon,
-                "frequency": str(habit.frequency),
-                "periodOfDay": str(habit.period_of_day),
-            }
-
-            if include_streaks:
-                completions = await TrackingRepository.get_recent_completions(
-                    session, habit.id, user_uuid, limit=60
-                )
-                entry["currentStreak"] = TrackingRepository.compute_streak(completions, today)
-                entry["longestStreak"] = habit.longest_streak
-
-            if include_today_status:
-                completion = await TrackingRepository.get_completion_for_date(
-                    session, habit.id, user_uuid, today
-                )
-                entry["completedToday"] = completion is not None
-
-            formatted.append(entry)
-
-    logger.debug("get_habits found %d habits", len(habits))
+        # One query: habits + completed-today flag + recent completion dates
+        statuses = await TrackingRepository.get_habits_with_status(
+            session, user_uuid, today, limit=RECENT_COMPLETIONS
+        )
+        calendars = (
+            await load_habit_calendars(session, user_uuid, statuses) if include_streaks else {}
+        )
+
+    formatted = []
+    for status in statuses:
+        habit = status.habit
+        entry: dict[str, object] = {
+            "id": str(habit.id),
+            "name": habit.name,
+            "icon": habit.icon,
+            "frequency": str(habit.frequency),
+            "periodOfDay": str(habit.period_of_day),
+        }
+
+        if include_streaks:
+            calendar = calendars[habit.id]
+            weekdays = habit_weekdays(habit)
+            entry["currentStreak"] = calendar.current_streak(today, weekdays)
+            entry["longestStreak"] = max(
+                habit.longest_streak, calendar.longest_streak(today, weekdays)
+            )
+            entry["completionRate30d"] = round(
+                calendar.completion_rate(today - timedelta(days=29), today, weekdays) * 100
+            )
+
+        if include_today_status:
+            entry["completedToday"] = status.completed
+
+        formatted.append(entry)
+
+    logger.debug("get_habits found %d habits", len(formatted))
 
     return json.dumps(
         {
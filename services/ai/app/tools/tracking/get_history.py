@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import json
 import logging
+import uuid
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
@@ -12,9 +13,14 @@ from langchain_core.tools import tool
 
 from app.db.repositories.tracking import TrackingRepository
 from app.db.session import get_user_session
+from app.tools.tracking._analytics import load_metric_analysis
+from app.tools.tracking._series import MetricStats, load_metric_series, pick_bucket
 
 logger = logging.getLogger(__name__)
 
+# Raw entries returned (most recent first) — the rest of the range is in the series
+_RECENT_ENTRIES = 10
+
 
 @tool(parse_docstring=True)
 async def get_history(
@@ -27,7 +33,8 @@ async def get_history(
 
     Args:
         metric_type: Tipo da métrica: weight, water, sleep, exercise, mood, energy ou custom
-        days: Quantidade de dias para consultar (padrão: 30)
+        days: Quantidade de dias para consultar (padrão: 30). Períodos longos vêm agregados
+            por semana, mês ou ano
     """
     session_factory = config["configurable"]["session_factory"]
     user_id: str = config["configurable"]["user_id"]
@@ -42,19 +49,30 @@ async def get_history(
     end_date = now.date()
     start_date = end_date - timedelta(days=days - 1)
 
-    import uuid
+    bucket = pick_bucket(days)
 
     async with get_user_session(session_factory, user_id) as session:
+        user_uuid = uuid.UUID(user_id)
+        series = await load_metric_series(
+            session, user_uuid, metric_type, start_date, end_date, bucket
+        )
         entries = await TrackingRepository.find_by_filters(
             session,
-            uuid.UUID(user_id),
+            user_uuid,
             tracking_type=metric_type,
             date_from=start_date,
             date_to=end_date,
-            limit=100,
+            limit=_RECENT_ENTRIES,
         )
-
-    logger.debug("get_history found %d entries for %s", len(entries), metric_type)
+        analysis = await load_metric_analysis(session, user_uuid, metric_type, start_date, end_date)
+
+    logger.debug(
+        "get_history found %d entries for %s (%d %s buckets)",
+        series.total.count,
+        metric_type,
+        len(series.buckets),
+        bucket,
+    )
 
     # Format entries with real UUIDs (critical for update/delete)
     formatted_entries = [
@@ -67,36 +85,15 @@ async def get_history(
         for e in entries
     ]
 
-    # Compute stats
-    values = [e.value for e in entries]
-    count = len(values)
-
-    avg: float | None = None
-    min_val: float | None = None
-    max_val: float | None = None
-    sum_val: float | None = None
-    latest: float | None = None
-    previous: float | None = None
+    # Latest vs previous entry; the trend itself comes from the fit over the whole range
+    latest = entries[0].value if entries else None
+    previous = entries[1].value if len(entries) > 1 else None
     variation: float | None = None
-    trend = "stable"
 
-    if count > 0:
-        avg = sum(values) / count
-        min_val = min(values)
-        max_val = max(values)
-        sum_val = sum(values)
-        latest = values[0] if values else None
-        previous = values[1] if len(values) > 1 else None
-
-        if latest is not None and previous is not None and previous != 0:
-            variation = ((latest - previous) / previous) * 100
-
-        if variation is not None:
-            if variation > 5:
-                trend = "increasing"
-            elif variation < -5:
-                trend = "decreasing"
+    if latest is not None and previous is not None and previous != 0:
+        variation = ((latest - previous) / previous) * 100
 
+    total = series.total
     return json.dumps(
         {
             "_note": (
@@ -110,16 +107,32 @@ async def get_history(
                 "days": days,
             },
             "entries": formatted_entries,
+            "series": {
+                "bucket": series.bucket,
+                "points": [{"start": str(b.start), **_stats_json(b.stats)} for b in series.buckets],
+            },
             "stats": {
-                "count": count,
-                "average": round(avg, 2) if avg is not None else None,
-                "min": min_val,
-                "max": max_val,
-                "sum": round(sum_val, 2) if sum_val is not None else None,
+                **_stats_json(total),
                 "latestValue": latest,
                 "previousValue": previous,
                 "variation": round(variation, 2) if variation is not None else None,
-                "trend": trend,
+                "trend": analysis.trend,
+                "slopePerWeek": (
+                    round(analysis.slope_per_day * 7, 2)
+                    if analysis.slope_per_day is not None
+                    else None
+                ),
+                "movingAverage": analysis.ema,
             },
         }
     )
+
+
+def _stats_json(stats: MetricStats) -> dict[str, object]:
+    return {
+        "count": stats.count,
+        "average": stats.average,
+        "min": stats.min,
+        "max": stats.max,
+        "sum": stats.sum,
+    }
@@ -0,0 +1,124 @@
+"""get_metric_correlations — READ tool that correlates tracking metrics day by day."""
+
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from itertools import combinations, permutations
+from zoneinfo import ZoneInfo
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+
+from app.db.models.enums import TrackingType
+from app.db.repositories.tracking import TrackingRepository
+from app.db.session import get_user_session
+from app.tools.tracking._analytics import (
+    ADDITIVE_METRICS,
+    Correlation,
+    align_daily,
+    correlate,
+)
+
+logger = logging.getLogger(__name__)
+
+_MAX_METRICS = 4
+_MAX_LAG_DAYS = 7
+
+# |r| thresholds, checked in order
+_STRENGTHS = ((0.6, "strong"), (0.4, "moderate"), (0.2, "weak"))
+
+
+@tool(parse_docstring=True)
+async def get_metric_correlations(
+    metric_types: list[str],
+    days: int = 90,
+    max_lag_days: int = 1,
+    *,
+    config: RunnableConfig,
+) -> str:
+    """Calcula a correlação entre métricas de tracking (ex: sono x humor), dia a dia.
+
+    Args:
+        metric_types: 2 a 4 métricas: weight, water, sleep, exercise, mood, energy ou custom
+        days: Quantidade de dias analisados (padrão: 90)
+        max_lag_days: Defasagem máxima em dias; 1 compara hoje com o dia seguinte (máximo 7)
+    """
+    session_factory = config["configurable"]["session_factory"]
+    user_id: str = config["configurable"]["user_id"]
+    user_timezone: str = config["configurable"].get("user_timezone", "America/Sao_Paulo")
+
+    types = list(dict.fromkeys(metric_types))
+    valid = {t.value for t in TrackingType}
+    invalid = [t for t in types if t not in valid]
+    if invalid:
+        return json.dumps({"error": f"Métricas inválidas: {', '.join(invalid)}"})
+    if not 2 <= len(types) <= _MAX_METRICS:
+        return json.dumps({"error": f"Informe de 2 a {_MAX_METRICS} métricas diferentes."})
+    max_lag_days = max(0, min(max_lag_days, _MAX_LAG_DAYS))
+
+    try:
+        tz = ZoneInfo(user_timezone)
+    except (KeyError, ValueError):
+        tz = ZoneInfo("America/Sao_Paulo")
+
+    end_date = datetime.now(tz).date()
+    start_date = end_date - timedelta(days=days - 1)
+
+    async with get_user_session(session_factory, user_id) as session:
+        series = await TrackingRepository.get_daily_values_by_type(
+            session,
+            uuid.UUID(user_id),
+            types,
+            start_date,
+            end_date,
+            additive_types=ADDITIVE_METRICS,
+        )
+
+    matrix = align_daily(series, start_date, end_date)
+    row = {t: i for i, t in enumerate(series)}
+
+    results: list[Correlation] = [
+        correlate(a, matrix[row[a]], b, matrix[row[b]]) for a, b in combinations(types, 2)
+    ]
+    # Lagged: direction matters (sleep → next-day mood is not mood → next-day sleep)
+    results += [
+        correlate(a, matrix[row[a]], b, matrix[row[b]], lag)
+        for lag in range(1, max_lag_days + 1)
+        for a, b in permutations(types, 2)
+    ]
+
+    logger.debug("get_metric_correlations computed %d pairs for %s", len(results), types)
+
+    reported = [c for c in results if c.pearson is not None or c.spearman is not None]
+    strongest = max(reported, key=lambda c: abs(c.spearman or 0), default=None)
+    return json.dumps(
+        {
+            "period": {"startDate": str(start_date), "endDate": str(end_date), "days": days},
+            "daysWithData": {t: len(series[t]) for t in types},
+            "correlations": [_correlation_json(c) for c in reported],
+            "strongest": _correlation_json(strongest) if strongest else None,
+            "note": (
+                "Correlação não implica causalidade. Pares com menos de 5 dias em comum "
+                "são omitidos."
+            ),
+        }
+    )
+
+
+def _correlation_json(c: Correlation) -> dict[str, object]:
+    r = c.spearman if c.spearman is not None else c.pearson
+    strength = next((label for limit, label in _STRENGTHS if abs(r or 0) >= limit), "none")
+    return {
+        "metric": c.metric,
+        "other": c.other,
+        "lagDays": c.lag_days,
+        "pairedDays": c.paired_days,
+        "pearson": c.pearson,
+        "spearman": c.spearman,
+        "strength": strength,
+        "otherMeanWhenMetricHigh": c.other_mean_when_high,
+        "otherMeanWhenMetricLow": c.other_mean_when_low,
+    }
@@ -0,0 +1,92 @@
+"""get_tracking_insights — READ tool with trend, moving averages, anomalies and goal ETA."""
+
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+
+from app.db.session import get_user_session
+from app.tools.tracking._analytics import load_metric_analysis
+
+logger = logging.getLogger(__name__)
+
+# Most recent anomalies returned
+_MAX_ANOMALIES = 5
+
+
+@tool(parse_docstring=True)
+async def get_tracking_insights(
+    metric_type: str,
+    days: int = 365,
+    target_value: float | None = None,
+    *,
+    config: RunnableConfig,
+) -> str:
+    """Analisa a evolução de uma métrica: tendência, média móvel, atípicos e previsão de meta.
+
+    Args:
+        metric_type: Tipo da métrica: weight, water, sleep, exercise, mood, energy ou custom
+        days: Quantidade de dias analisados (padrão: 365)
+        target_value: Meta opcional (ex: peso alvo) para estimar quando será atingida
+    """
+    session_factory = config["configurable"]["session_factory"]
+    user_id: str = config["configurable"]["user_id"]
+    user_timezone: str = config["configurable"].get("user_timezone", "America/Sao_Paulo")
+
+    try:
+        tz = ZoneInfo(user_timezone)
+    except (KeyError, ValueError):
+        tz = ZoneInfo("America/Sao_Paulo")
+
+    end_date = datetime.now(tz).date()
+    start_date = end_date - timedelta(days=days - 1)
+
+    async with get_user_session(session_factory, user_id) as session:
+        analysis = await load_metric_analysis(
+            session, uuid.UUID(user_id), metric_type, start_date, end_date, target=target_value
+        )
+
+    logger.debug("get_tracking_insights analyzed %d days of %s", analysis.points, metric_type)
+
+    if analysis.points == 0:
+        return json.dumps(
+            {
+                "type": metric_type,
+                "daysWithData": 0,
+                "message": "Nenhum registro encontrado no período.",
+            }
+        )
+
+    slope = analysis.slope_per_day
+    change = analysis.change_over_period
+    result: dict[str, object] = {
+        "type": metric_type,
+        "period": {"startDate": str(start_date), "endDate": str(end_date), "days": days},
+        "daysWithData": analysis.points,
+        "average": analysis.mean,
+        "trend": {
+            "direction": analysis.trend,
+            "slopePerWeek": round(slope * 7, 2) if slope is not None else None,
+            "changeOverPeriod": round(change, 2) if change is not None else None,
+            "fit": analysis.r_squared,
+        },
+        "movingAverage": analysis.ema,
+        "last7": {"mean": analysis.rolling_mean, "stdDev": analysis.rolling_std},
+        "anomalies": [
+            {"date": str(a.day), "value": a.value, "zScore": a.z_score}
+            for a in analysis.anomalies[-_MAX_ANOMALIES:]
+        ],
+    }
+    if target_value is not None:
+        result["goal"] = {
+            "target": target_value,
+            "estimatedDate": str(analysis.target_eta) if analysis.target_eta else None,
+            "onTrack": analysis.target_eta is not None,
+        }
+    return json.dumps(result)
@@ -5,6 +5,7 @@ from __future__ import annotations
 import json
 import logging
 import uuid
+from datetime import date as date_type
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
@@ -13,6 +14,12 @@ from langchain_core.tools import tool
 
 from app.db.repositories.tracking import TrackingRepository
 from app.db.session import get_user_session
+from app.tools.tracking._habit_calendar import (
+    RECENT_COMPLETIONS,
+    habit_weekdays,
+    load_habit_calendars,
+    remember_completion,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -43,12 +50,16 @@ async def record_habit(
         except (KeyError, ValueError):
             tz = ZoneInfo("America/Sao_Paulo")
         date = datetime.now(tz).strftime("%Y-%m-%d")
+    target_date = date_type.fromisoformat(date)
 
     async with get_user_session(session_factory, user_id) as session:
         user_uuid = uuid.UUID(user_id)
 
-        # Get all active habits
-        habits = await TrackingRepository.get_habits(session, user_uuid)
+        # Get all active habits with their status for the target date (one query)
+        statuses = await TrackingRepository.get_habits_with_status(
+            session, user_uuid, target_date, limit=RECENT_COMPLETIONS
+        )
+        habits = [s.habit for s in statuses]
 
         if not habits:
             return json.dumps(
@@ -80,14 +91,9 @@ async def record_habit(
             )
 
         # Check if already completed for this date
-        from datetime import date as date_type
-
-        target_date = date_type.fromisoformat(date)
-        existing_completion = await TrackingRepository.get_completion_for_date(
-            session, matched.id, user_uuid, target_date
-        )
+        status = statuses[habits.index(matched)]
 
-        if existing_completion is not None:
+        if status.completed:
             return json.dumps(
                 {
                     "success": False,
@@ -115,11 +121,13 @@ async def record_habit(
             },
         )
 
-        # Compute current streak
-        completions = await TrackingRepository.get_recent_completions(
-            session, matched.id, user_uuid, limit=60
-        )
-        streak = TrackingRepository.compute_streak(completions, target_date)
+        # Streak from the habit's calendar plus the completion just recorded
+        calendars = await load_habit_calendars(session, user_uuid, [status])
+        calendar = calendars[matched.id].with_completion(target_date)
+        streak = calendar.current_streak(target_date, habit_weekdays(matched))
+
+    # Only once the completion is committed; a rollback must not leave it cached
+    remember_completion(user_uuid, matched.id, target_date)
 
     logger.info(
         "record_habit completed habit %s (%s) for %s — streak %d",
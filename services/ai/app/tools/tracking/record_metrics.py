@@ -0,0 +1,77 @@
+"""record_metrics — WRITE tool that records several tracking metrics at once."""
+
+from __future__ import annotations
+
+import json
+import logging
+import uuid
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+
+from app.db.repositories.tracking import TrackingRepository
+from app.db.session import get_user_session
+from app.tools.tracking._metrics import MetricInput, build_entry, describe_entry
+
+logger = logging.getLogger(__name__)
+
+_MAX_ENTRIES = 20
+
+
+@tool(parse_docstring=True)
+async def record_metrics(
+    entries: list[MetricInput],
+    *,
+    config: RunnableConfig,
+) -> str:
+    """Registra várias métricas de tracking de uma vez (ex: água, sono e humor).
+
+    Args:
+        entries: Lista de métricas a registrar (máximo 20)
+    """
+    session_factory = config["configurable"]["session_factory"]
+    user_id: str = config["configurable"]["user_id"]
+    user_timezone: str = config["configurable"].get("user_timezone", "America/Sao_Paulo")
+
+    if not entries:
+        return json.dumps({"error": "Nenhuma métrica informada."})
+    if len(entries) > _MAX_ENTRIES:
+        return json.dumps({"error": f"Máximo de {_MAX_ENTRIES} métricas por chamada."})
+
+    try:
+        tz = ZoneInfo(user_timezone)
+    except (KeyError, ValueError):
+        tz = ZoneInfo("America/Sao_Paulo")
+    today = datetime.now(tz).date()
+    user_uuid = uuid.UUID(user_id)
+
+    # Validate everything before writing anything
+    rows = []
+    errors = []
+    for i, item in enumerate(entries, start=1):
+        try:
+            rows.append(
+                build_entry(
+                    user_uuid, item.metric_type, item.value, item.unit, item.date, item.notes, today
+                )
+            )
+        except ValueError as e:
+            errors.append(f"#{i}: {e}")
+    if errors:
+        return json.dumps({"error": "Nenhuma métrica registrada. " + "; ".join(errors)})
+
+    async with get_user_session(session_factory, user_id) as session:
+        await TrackingRepository.create_batch(session, rows)
+
+    logger.info("record_metrics saved %d entries", len(rows))
+
+    return json.dumps(
+        {
+            "success": True,
+            "entryIds": [str(r["id"]) for r in rows],
+            "count": len(rows),
+            "message": "Registrado: " + "; ".join(describe_entry(r) for r in rows),
+        }
+    )
@@ -1,5 +1,6 @@
-"""Workers package — APScheduler-based background jobs."""
+"""Workers package — APScheduler cron enqueuing onto the Postgres job queue."""
 
+from app.workers.job_queue import JobWorker, register_handler
 from app.workers.scheduler import refresh_schedules, setup_scheduler
 
-__all__ = ["refresh_schedules", "setup_scheduler"]
+__all__ = ["JobWorker", "refresh_schedules", "register_handler", "setup_scheduler"]
@@ -1,26 +1,39 @@
 """Memory consolidation worker — daily extraction of facts from conversations.
 
 Ported from apps/api/src/jobs/memory-consolidation/memory-consolidation.processor.ts.
-Runs at 3:00 AM local time per timezone via APScheduler. For each user:
-  1. Get user memory + messages since last consolidation
+At 3:00 AM local time per timezone, APScheduler enqueues one job per user on
+the Postgres job queue (see app/workers/job_queue.py); any replica's worker
+claims and runs it. Between nightly runs, every chat turn adds to a per-user
+pending-volume counter and crossing a threshold schedules a debounced,
+low-priority incremental job for that user (see schedule_incremental_consolidation).
+For each user:
+  1. Get user memory + stream messages since last consolidation in token-budgeted chunks
   2. Run deduplication phase on existing knowledge
-  3. Build prompt, call LLM, parse response
-  4. Apply memory updates + create/update knowledge items
+  3. Per chunk: select the existing knowledge relevant to it (under a token budget),
+     build prompt, call LLM, parse response, checkpoint (map)
+  4. Merge partial results, apply memory updates + create/update knowledge items (reduce);
+     new items that only reword an existing one merge into it (no LLM call)
   5. Log consolidation result
 """
 
 from __future__ import annotations
 
 import datetime as _dt
+import functools
 import logging
 import uuid as _uuid
+from contextlib import aclosing
+from dataclasses import dataclass
 from typing import TYPE_CHECKING, Any
+from zoneinfo import ZoneInfo
 
 from pydantic import BaseModel
 
 from app.agents.llm import create_llm
+from app.agents.llm_batch import BatchRequest, create_batch_client
 from app.config import get_settings
 from app.db.repositories.chat import ChatRepository
+from app.db.repositories.job import JobRepository
 from app.db.repositories.memory import MemoryRepository
 from app.db.repositories.user import UserRepository
 from app.db.session import get_service_session
@@ -28,17 +41,38 @@ from app.tools.memory._contradiction_detector import check_contradictions
 from app.workers.consolidation_prompt import (
     ConsolidationResponse,
     build_consolidation_prompt,
+    estimate_knowledge_tokens,
+    estimate_message_tokens,
+    merge_consolidation_responses,
     parse_consolidation_response,
 )
 
 if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
+
     from app.db.engine import AsyncSessionFactory
-    from app.db.models.memory import KnowledgeItem
-    from app.db.models.users import User
+    from app.db.models.chat import Message
+    from app.db.models.jobs import BackgroundJob
+    from app.db.models.memory import KnowledgeItem, MemoryConsolidation
+    from app.db.models.users import User, UserMemory
 from app.workers.utils import retry_with_backoff
 
 logger = logging.getLogger(__name__)
 
+CONSOLIDATION_QUEUE = "consolidation"
+# Manual/backfill triggers: one job per batch that fans out into per-user jobs
+CONSOLIDATION_BATCH_QUEUE = "consolidation_batch"
+# Nightly runs in batch LLM mode: one job per timezone submits a provider
+# batch, then poll jobs collect it (see handle_consolidation_llm_batch_job)
+CONSOLIDATION_LLM_BATCH_QUEUE = "consolidation_llm_batch"
+
+_LLM_TEMPERATURE = 0.3
+
+# Job priority is a Postgres integer; backlog bytes are clamped to fit
+_MAX_JOB_PRIORITY = 2**31 - 1
+# Incremental jobs yield to every nightly job (whose priority is backlog bytes)
+_INCREMENTAL_JOB_PRIORITY = 0
+
 # Module-level reference to session factory, set during scheduler setup
 _session_factory: AsyncSessionFactory | None = None
 
@@ -56,6 +90,12 @@ def _get_session_factory() -> AsyncSessionFactory:
     return _session_factory
 
 
+def _concurrency_key(user_id: _uuid.UUID | str) -> str:
+    """Shared by every per-user consolidation job, so at most one is pending
+    or running per user whichever path enqueued it."""
+    return f"{CONSOLIDATION_QUEUE}:{user_id}"
+
+
 class ConsolidationResult(BaseModel):
     users_processed: int = 0
     users_consolidated: int = 0
@@ -64,81 +104,568 @@ class ConsolidationResult(BaseModel):
     completed_at: str = ""
 
 
-async def run_consolidation(timezone: str) -> ConsolidationResult:
-    """Run memory consolidation for all active users in a timezone.
+async def enqueue_consolidation(timezone: str) -> int:
+    """Enqueue one consolidation job per user in a timezone with new messages.
 
-    Called by APScheduler at 3 AM local time for each timezone.
+    Called by APScheduler at 3 AM local time for each timezone. Inactive users
+    are filtered out by a single eligibility query, and jobs are prioritized by
+    backlog size so the largest run first. Jobs are deduplicated per user and
+    local day, so every replica's cron may fire without the work running more
+    than once. Returns the number of new jobs.
+
+    In batch LLM mode (``CONSOLIDATION_LLM_MODE=batch``) a single job per
+    timezone and local day is enqueued instead; it consolidates every eligible
+    user through one provider batch (see handle_consolidation_llm_batch_job).
     """
     session_factory = _get_session_factory()
-    logger.info("Starting memory consolidation for timezone %s", timezone)
+    settings = get_settings()
+    local_date = _dt.datetime.now(tz=ZoneInfo(timezone)).date().isoformat()
+
+    if settings.CONSOLIDATION_LLM_MODE == "batch":
+        async with get_service_session(session_factory) as session:
+            job_ids = await JobRepository.enqueue_many(
+                session,
+                [
+                    {
+                        "queue": CONSOLIDATION_LLM_BATCH_QUEUE,
+                        "payload": {"timezone": timezone},
+                        "dedupe_key": f"{CONSOLIDATION_LLM_BATCH_QUEUE}:{timezone}:{local_date}",
+                        "max_attempts": settings.JOB_MAX_ATTEMPTS,
+                    }
+                ],
+            )
+        logger.info("Enqueued %d batch-mode consolidation job(s) for %s", len(job_ids), timezone)
+        return len(job_ids)
 
     async with get_service_session(session_factory) as session:
-        users = await UserRepository.get_users_by_timezone(session, timezone)
+        candidates = await UserRepository.get_consolidation_candidates(session, timezone)
+        job_ids = await JobRepository.enqueue_many(
+            session,
+            [
+                {
+                    "queue": CONSOLIDATION_QUEUE,
+                    "user_id": c.user.id,
+                    "payload": {
+                        "user_id": str(c.user.id),
+                        "timezone": timezone,
+                        "message_count": c.message_count,
+                        "message_bytes": c.message_bytes,
+                    },
+                    "dedupe_key": f"{CONSOLIDATION_QUEUE}:{c.user.id}:{local_date}",
+                    "concurrency_key": _concurrency_key(c.user.id),
+                    "max_attempts": settings.JOB_MAX_ATTEMPTS,
+                    "priority": min(c.message_bytes, _MAX_JOB_PRIORITY),
+                }
+                for c in candidates
+            ],
+        )
 
-    users_consolidated = 0
-    users_skipped = 0
-    errors = 0
+    logger.info(
+        "Enqueued %d consolidation job(s) for %s (%d eligible users, %d already queued)",
+        len(job_ids),
+        timezone,
+        len(candidates),
+        len(candidates) - len(job_ids),
+    )
+    return len(job_ids)
 
-    for user in users:
-        try:
-            consolidated = await _process_user(user)
-            if consolidated:
-                users_consolidated += 1
-            else:
-                users_skipped += 1
-        except Exception:
-            errors += 1
-            logger.exception("Failed to consolidate user %s", user.id)
-            await _log_consolidation(user.id, status="failed")
+
+async def schedule_incremental_consolidation(
+    session_factory: AsyncSessionFactory,
+    user_id: _uuid.UUID,
+    *,
+    messages: int,
+    tokens: int,
+) -> _uuid.UUID | None:
+    """Record new message volume and schedule an incremental consolidation if due.
+
+    Called once per chat turn. The first time the user's pending volume
+    crosses the message or token threshold, a low-priority job is enqueued
+    to run after the debounce delay. While that job is pending, later turns
+    only push it back (capped at the max delay) so a burst of messages is
+    coalesced into one run. No job is added while another consolidation of
+    the user is pending or running. Returns the id of a newly scheduled job.
+    """
+    settings = get_settings()
+
+    async with get_service_session(session_factory) as session:
+        trigger = await MemoryRepository.bump_consolidation_trigger(
+            session, user_id, messages=messages, tokens=tokens
+        )
+        if trigger.scheduled_job_id is not None and await JobRepository.postpone(
+            session,
+            trigger.scheduled_job_id,
+            delay_seconds=settings.CONSOLIDATION_INCREMENTAL_DEBOUNCE_SECONDS,
+            max_delay_seconds=settings.CONSOLIDATION_INCREMENTAL_MAX_DELAY_SECONDS,
+        ):
+            return None
+
+        if (
+            trigger.pending_messages < settings.CONSOLIDATION_INCREMENTAL_MESSAGE_THRESHOLD
+            and trigger.pending_tokens < settings.CONSOLIDATION_INCREMENTAL_TOKEN_THRESHOLD
+        ):
+            return None
+
+        job_ids = await JobRepository.enqueue_many(
+            session,
+            [
+                {
+                    "queue": CONSOLIDATION_QUEUE,
+                    "user_id": user_id,
+                    "payload": {
+                        "user_id": str(user_id),
+                        "trigger": "incremental",
+                        "message_count": trigger.pending_messages,
+                        "token_estimate": trigger.pending_tokens,
+                    },
+                    "concurrency_key": _concurrency_key(user_id),
+                    "max_attempts": settings.JOB_MAX_ATTEMPTS,
+                    "priority": _INCREMENTAL_JOB_PRIORITY,
+                    "run_at": _dt.datetime.now(tz=_UTC)
+                    + _dt.timedelta(seconds=settings.CONSOLIDATION_INCREMENTAL_DEBOUNCE_SECONDS),
+                }
+            ],
+        )
+        if not job_ids:
+            logger.debug("Consolidation already queued or running for user %s", user_id)
+            return None
+        await MemoryRepository.set_consolidation_trigger_job(session, user_id, job_ids[0])
 
     logger.info(
-        "Consolidation complete for %s: %d consolidated, %d skipped, %d errors",
-        timezone,
-        users_consolidated,
-        users_skipped,
-        errors,
+        "Scheduled incremental consolidation %s for user %s (%d messages, ~%d tokens pending)",
+        job_ids[0],
+        user_id,
+        trigger.pending_messages,
+        trigger.pending_tokens,
     )
+    return job_ids[0]
 
-    return ConsolidationResult(
-        users_processed=len(users),
-        users_consolidated=users_consolidated,
-        users_skipped=users_skipped,
-        errors=errors,
-        completed_at=_dt.datetime.now(tz=_UTC).isoformat(),
+
+async def enqueue_consolidation_batch(
+    *,
+    user_ids: list[_uuid.UUID] | None = None,
+    timezone: str | None = None,
+) -> _uuid.UUID:
+    """Enqueue a batch consolidation for explicit users or a whole timezone.
+
+    Returns the batch job id right away; a worker fans the batch out into
+    one child job per user (see handle_consolidation_batch_job).
+    """
+    session_factory = _get_session_factory()
+    settings = get_settings()
+    payload: dict[str, Any] = (
+        {"timezone": timezone} if timezone else {"user_ids": [str(u) for u in user_ids or []]}
     )
 
+    async with get_service_session(session_factory) as session:
+        job_ids = await JobRepository.enqueue_many(
+            session,
+            [
+                {
+                    "queue": CONSOLIDATION_BATCH_QUEUE,
+                    "payload": payload,
+                    "max_attempts": settings.JOB_MAX_ATTEMPTS,
+                }
+            ],
+        )
+
+    logger.info("Enqueued consolidation batch %s (%s)", job_ids[0], payload)
+    return job_ids[0]
 
-async def run_consolidation_for_user(user_id: str) -> ConsolidationResult:
-    """Manual trigger: run consolidation for a single user."""
+
+async def handle_consolidation_batch_job(job: BackgroundJob) -> dict[str, Any]:
+    """Job queue handler: fan a batch out into per-user consolidation jobs.
+
+    Children point at the batch through ``parent_id`` and are deduplicated
+    per batch, so a retried fan-out does not enqueue a user twice. A user
+    whose consolidation is already pending or running gets no child.
+    """
     session_factory = _get_session_factory()
+    settings = get_settings()
+    timezone = job.payload.get("timezone")
 
     async with get_service_session(session_factory) as session:
-        user = await UserRepository.get_by_id(session, _uuid.UUID(user_id))
+        if timezone:
+            candidates = await UserRepository.get_consolidation_candidates(session, timezone)
+            targets = [(c.user.id, min(c.message_bytes, _MAX_JOB_PRIORITY)) for c in candidates]
+        else:
+            targets = [(_uuid.UUID(u), 0) for u in job.payload.get("user_ids", [])]
 
-    if user is None:
-        logger.warning("User %s not found for consolidation", user_id)
-        return ConsolidationResult(
-            users_processed=0,
-            completed_at=_dt.datetime.now(tz=_UTC).isoformat(),
+        if not await JobRepository.lock_if_running(session, job.id):
+            logger.info("Consolidation batch %s was cancelled before fan-out", job.id)
+            return {"users_enqueued": 0}
+
+        job_ids = await JobRepository.enqueue_many(
+            session,
+            [
+                {
+                    "queue": CONSOLIDATION_QUEUE,
+                    "user_id": user_id,
+                    "parent_id": job.id,
+                    "payload": {"user_id": str(user_id), "batch_id": str(job.id)},
+                    "dedupe_key": f"{CONSOLIDATION_QUEUE}:{user_id}:batch:{job.id}",
+                    "concurrency_key": _concurrency_key(user_id),
+                    "max_attempts": settings.JOB_MAX_ATTEMPTS,
+                    "priority": priority,
+                }
+                for user_id, priority in targets
+            ],
         )
 
+    logger.info("Consolidation batch %s fanned out to %d user(s)", job.id, len(job_ids))
+    return {"users_enqueued": len(job_ids)}
+
+
+async def handle_consolidation_job(job: BackgroundJob) -> dict[str, Any]:
+    """Job queue handler: consolidate the user referenced by ``job``.
+
+    Exceptions propagate so the queue retries the job; a ``failed``
+    consolidation log is written only once attempts are exhausted. The job
+    is skipped while an older job for the same user is still running (only
+    possible for jobs without a concurrency key); the user's next trigger
+    picks up what is left.
+    """
+    session_factory = _get_session_factory()
+    user_id = _uuid.UUID(job.payload["user_id"])
+
+    async with get_service_session(session_factory) as session:
+        if not await JobRepository.try_lock_user_queue(
+            session, CONSOLIDATION_QUEUE, user_id, job=job
+        ):
+            logger.info("User %s is already being consolidated; skipping job %s", user_id, job.id)
+            return ConsolidationResult(
+                users_skipped=1, completed_at=_dt.datetime.now(tz=_UTC).isoformat()
+            ).model_dump()
+        user = await UserRepository.get_by_id(session, user_id)
+        if user is not None:
+            # Volume from here on belongs to the next run
+            await MemoryRepository.reset_consolidation_trigger(session, user_id, job_id=job.id)
+
+    if user is None:
+        logger.warning("User %s not found for consolidation job %s", user_id, job.id)
+        return ConsolidationResult(completed_at=_dt.datetime.now(tz=_UTC).isoformat()).model_dump()
+
     try:
         consolidated = await _process_user(user)
-        return ConsolidationResult(
-            users_processed=1,
-            users_consolidated=1 if consolidated else 0,
-            users_skipped=0 if consolidated else 1,
-            completed_at=_dt.datetime.now(tz=_UTC).isoformat(),
-        )
     except Exception:
-        logger.exception("Failed to consolidate user %s", user_id)
-        await _log_consolidation(user.id, status="failed")
-        return ConsolidationResult(
-            users_processed=1,
-            errors=1,
-            completed_at=_dt.datetime.now(tz=_UTC).isoformat(),
+        if job.attempts >= job.max_attempts:
+            await _log_consolidation(user.id, status="failed")
+        raise
+
+    return ConsolidationResult(
+        users_processed=1,
+        users_consolidated=1 if consolidated else 0,
+        users_skipped=0 if consolidated else 1,
+        completed_at=_dt.datetime.now(tz=_UTC).isoformat(),
+    ).model_dump()
+
+
+# --- Batch LLM mode (nightly) ---
+
+
+async def handle_consolidation_llm_batch_job(job: BackgroundJob) -> dict[str, Any]:
+    """Job queue handler: nightly consolidation through a provider batch API.
+
+    The first job of a timezone builds every eligible user's chunk prompts and
+    submits them as one batch (app/agents/llm_batch.py). It then enqueues a
+    poll job carrying the batch id and each user's consolidation window. Poll
+    jobs re-enqueue themselves until the batch has finished, then apply each
+    user whose chunks all came back. Users with failed or unparseable chunks
+    are rebuilt over the same window and resubmitted, up to
+    ``CONSOLIDATION_BATCH_MAX_RESUBMITS`` times, then handed to a regular
+    (sync) consolidation job; so is every user of a batch still running after
+    ``CONSOLIDATION_BATCH_MAX_POLLS`` polls.
+
+    A job that submits a batch records it in its payload before enqueuing the
+    poll, so a retry re-enqueues that poll instead of paying for a new batch.
+    """
+    submitted = job.payload.get("submitted")
+    if submitted is not None:
+        await _enqueue_batch_poll(submitted)
+        return {"batch_id": submitted["batch_id"], "status": "submitted"}
+    if "batch_id" in job.payload:
+        return await _collect_llm_batch(job)
+
+    session_factory = _get_session_factory()
+    timezone = job.payload["timezone"]
+    async with get_service_session(session_factory) as session:
+        candidates = await UserRepository.get_consolidation_candidates(session, timezone)
+
+    users: dict[str, dict[str, Any]] = {}
+    requests: list[BatchRequest] = []
+    for candidate in candidates:
+        user_id = candidate.user.id
+        async with get_service_session(session_factory) as session:
+            memory = await MemoryRepository.get_user_memories(session, user_id)
+            # Volume from here on belongs to the next run
+            await MemoryRepository.reset_consolidation_trigger(session, user_id, job_id=job.id)
+        if memory is None:
+            continue
+        window = (memory.last_consolidated_at or memory.created_at, _dt.datetime.now(tz=_UTC))
+        prepared = await _build_batch_requests(user_id, memory, *window)
+        if prepared is not None:
+            users[str(user_id)], user_requests = prepared
+            requests.extend(user_requests)
+
+    batch_id = await _submit_llm_batch(job, users, requests, resubmits=0)
+    return {"batch_id": batch_id, "users": len(users), "requests": len(requests)}
+
+
+async def _build_batch_requests(
+    user_id: _uuid.UUID,
+    memory: UserMemory,
+    consolidated_from: _dt.datetime,
+    consolidated_to: _dt.datetime,
+) -> tuple[dict[str, Any], list[BatchRequest]] | None:
+    """One batch request per message chunk of the window, plus the state needed
+    to apply the results; None if the window has no messages."""
+    memory_dict = _memory_dict(memory)
+    requests: list[BatchRequest] = []
+    shown_knowledge: set[str] = set()
+    messages_processed = 0
+
+    chunk = await _fetch_message_chunk(user_id, consolidated_from, consolidated_to, None)
+    while chunk:
+        prompt_knowledge = await _select_prompt_knowledge(user_id, chunk)
+        shown_knowledge.update(str(ki.id) for ki in prompt_knowledge)
+        prompt = build_consolidation_prompt(
+            chunk, memory_dict, [_knowledge_dict(ki) for ki in prompt_knowledge]
+        )
+        requests.append(BatchRequest(f"{user_id}_{len(requests)}", prompt))
+        messages_processed += len(chunk)
+        cursor = (chunk[-1].created_at, chunk[-1].id)
+        chunk = await _fetch_message_chunk(user_id, consolidated_from, consolidated_to, cursor)
+
+    if not requests:
+        return None
+    state = {
+        "consolidated_from": consolidated_from.isoformat(),
+        "consolidated_to": consolidated_to.isoformat(),
+        "messages_processed": messages_processed,
+        "chunks": len(requests),
+        "knowledge_ids": sorted(shown_knowledge),
+    }
+    return state, requests
+
+
+async def _submit_llm_batch(
+    job: BackgroundJob,
+    users: dict[str, dict[str, Any]],
+    requests: list[BatchRequest],
+    *,
+    resubmits: int,
+) -> str | None:
+    """Submit *requests* on behalf of *job* and enqueue the first poll job;
+    returns the batch id."""
+    if not requests:
+        return None
+    settings = get_settings()
+    timezone = job.payload["timezone"]
+    client = create_batch_client(settings, temperature=_LLM_TEMPERATURE)
+    batch_id = await client.submit(requests)
+    poll = {
+        "timezone": timezone,
+        "batch_id": batch_id,
+        "users": users,
+        "resubmits": resubmits,
+        "polls": 0,
+    }
+    async with get_service_session(_get_session_factory()) as session:
+        await JobRepository.set_payload(session, job.id, {**job.payload, "submitted": poll})
+    await _enqueue_batch_poll(poll)
+    logger.info(
+        "Submitted consolidation batch %s for %s: %d user(s), %d request(s)",
+        batch_id,
+        timezone,
+        len(users),
+        len(requests),
+    )
+    return batch_id
+
+
+async def _enqueue_batch_poll(payload: dict[str, Any]) -> None:
+    settings = get_settings()
+    async with get_service_session(_get_session_factory()) as session:
+        await JobRepository.enqueue_many(
+            session,
+            [
+                {
+                    "queue": CONSOLIDATION_LLM_BATCH_QUEUE,
+                    "payload": payload,
+                    # A retried poll job does not enqueue its successor twice
+                    "dedupe_key": (
+                        f"{CONSOLIDATION_LLM_BATCH_QUEUE}:{payload['batch_id']}:{payload['polls']}"
+                    ),
+                    "max_attempts": settings.JOB_MAX_ATTEMPTS,
+                    "run_at": _dt.datetime.now(tz=_UTC)
+                    + _dt.timedelta(seconds=settings.CONSOLIDATION_BATCH_POLL_INTERVAL_SECONDS),
+                }
+            ],
+        )
+
+
+async def _collect_llm_batch(job: BackgroundJob) -> dict[str, Any]:
+    settings = get_settings()
+    payload = job.payload
+    batch_id: str = payload["batch_id"]
+    client = create_batch_client(settings, temperature=_LLM_TEMPERATURE)
+
+    if not await client.poll(batch_id):
+        if payload["polls"] + 1 < settings.CONSOLIDATION_BATCH_MAX_POLLS:
+            await _enqueue_batch_poll({**payload, "polls": payload["polls"] + 1})
+            return {"batch_id": batch_id, "status": "in_progress"}
+        logger.warning(
+            "Batch %s still running after %d polls; giving up on it", batch_id, payload["polls"] + 1
+        )
+        await _fall_back_to_sync(batch_id, list(payload["users"]))
+        return {"batch_id": batch_id, "status": "expired", "users_failed": len(payload["users"])}
+
+    outputs: dict[str, str] = {}
+    for result in await client.results(batch_id):
+        if result.output is not None and result.error is None:
+            outputs[result.custom_id] = result.output
+        else:
+            logger.warning(
+                "Batch %s request %s failed: %s", batch_id, result.custom_id, result.error
+            )
+
+    consolidated = skipped = errors = 0
+    failed: dict[str, dict[str, Any]] = {}
+    for user_id, state in payload["users"].items():
+        try:
+            raw_outputs = [outputs[f"{user_id}_{i}"] for i in range(state["chunks"])]
+            partials = [parse_consolidation_response(raw) for raw in raw_outputs]
+        except (KeyError, ValueError):
+            failed[user_id] = state
+            continue
+        try:
+            if await _apply_batch_user(_uuid.UUID(user_id), state, partials, raw_outputs):
+                consolidated += 1
+            else:
+                skipped += 1
+        except Exception:
+            errors += 1
+            logger.exception("Failed to apply batch consolidation for user %s", user_id)
+            await _log_consolidation(_uuid.UUID(user_id), status="failed")
+
+    if failed:
+        await _resubmit_failed_users(job, failed)
+
+    logger.info(
+        "Collected consolidation batch %s: %d consolidated, %d skipped, %d errors, %d failed",
+        batch_id,
+        consolidated,
+        skipped,
+        errors,
+        len(failed),
+    )
+    return {
+        "batch_id": batch_id,
+        "status": "ended",
+        "users_consolidated": consolidated,
+        "users_skipped": skipped,
+        "errors": errors,
+        "users_failed": len(failed),
+    }
+
+
+async def _apply_batch_user(
+    user_id: _uuid.UUID,
+    state: dict[str, Any],
+    partials: list[ConsolidationResponse],
+    raw_outputs: list[str],
+) -> bool:
+    """Apply one user's batch results; False if the window was consolidated
+    meanwhile or a per-user consolidation job is running for the user."""
+    consolidated_from = _dt.datetime.fromisoformat(state["consolidated_from"])
+    async with get_service_session(_get_session_factory()) as session:
+        if not await JobRepository.try_lock_user_queue(session, CONSOLIDATION_QUEUE, user_id):
+            logger.warning("User %s is being consolidated by a job; skipping batch", user_id)
+            return False
+        memory = await MemoryRepository.get_user_memories(session, user_id)
+        if memory is None or (memory.last_consolidated_at or memory.created_at) != (
+            consolidated_from
+        ):
+            logger.warning("User %s was consolidated while its batch ran; skipping", user_id)
+            return False
+        existing_knowledge = await MemoryRepository.get_active_knowledge(
+            session, user_id, [_uuid.UUID(i) for i in state["knowledge_ids"]]
         )
 
+    dedup_resolved = await _run_deduplication_phase(user_id, existing_knowledge)
+    if dedup_resolved > 0:
+        logger.info("Resolved %d existing contradictions for user %s", dedup_resolved, user_id)
+
+    await _complete_consolidation(
+        user_id,
+        merge_consolidation_responses(partials),
+        existing_knowledge,
+        consolidated_from=consolidated_from,
+        consolidated_to=_dt.datetime.fromisoformat(state["consolidated_to"]),
+        messages_processed=state["messages_processed"],
+        raw_outputs=raw_outputs,
+    )
+    return True
+
+
+async def _resubmit_failed_users(job: BackgroundJob, failed: dict[str, dict[str, Any]]) -> None:
+    """Rebuild failed users' requests over the same windows and submit a new
+    batch, or hand them to sync consolidation jobs once resubmits run out."""
+    settings = get_settings()
+    session_factory = _get_session_factory()
+    payload = job.payload
+
+    if payload["resubmits"] >= settings.CONSOLIDATION_BATCH_MAX_RESUBMITS:
+        logger.warning(
+            "Batch %s: %d user(s) still failing after %d resubmit(s)",
+            payload["batch_id"],
+            len(failed),
+            payload["resubmits"],
+        )
+        await _fall_back_to_sync(payload["batch_id"], list(failed))
+        return
+
+    users: dict[str, dict[str, Any]] = {}
+    requests: list[BatchRequest] = []
+    for user_id, state in failed.items():
+        uid = _uuid.UUID(user_id)
+        async with get_service_session(session_factory) as session:
+            memory = await MemoryRepository.get_user_memories(session, uid)
+        if memory is None:
+            continue
+        prepared = await _build_batch_requests(
+            uid,
+            memory,
+            _dt.datetime.fromisoformat(state["consolidated_from"]),
+            _dt.datetime.fromisoformat(state["consolidated_to"]),
+        )
+        if prepared is not None:
+            users[user_id], user_requests = prepared
+            requests.extend(user_requests)
+
+    await _submit_llm_batch(job, users, requests, resubmits=payload["resubmits"] + 1)
+
+
+async def _fall_back_to_sync(batch_id: str, user_ids: list[str]) -> None:
+    """Hand the users of a batch to regular (sync) consolidation jobs."""
+    settings = get_settings()
+    async with get_service_session(_get_session_factory()) as session:
+        await JobRepository.enqueue_many(
+            session,
+            [
+                {
+                    "queue": CONSOLIDATION_QUEUE,
+                    "user_id": _uuid.UUID(user_id),
+                    "payload": {"user_id": user_id, "llm_batch_id": batch_id},
+                    "dedupe_key": f"{CONSOLIDATION_QUEUE}:{user_id}:llm_batch:{batch_id}",
+                    "concurrency_key": _concurrency_key(user_id),
+                    "max_attempts": settings.JOB_MAX_ATTEMPTS,
+                }
+                for user_id in user_ids
+            ],
+        )
+    logger.warning("Batch %s: %d user(s) handed to sync jobs", batch_id, len(user_ids))
+
 
 _UTC = _dt.UTC
 
@@ -151,9 +678,15 @@ def _enum_val(v: object) -> str:
 async def _process_user(user: User) -> bool:
     """Process a single user's messages for consolidation.
 
+    Messages are streamed in token-budgeted chunks; each chunk is consolidated
+    independently (map) and the partial results are merged (reduce) before
+    being applied. Progress is checkpointed between chunks so a crashed run
+    resumes after the last consolidated chunk.
+
     Returns True if messages were consolidated, False if skipped.
     """
     session_factory = _get_session_factory()
+    settings = get_settings()
     logger.debug("Processing user %s (%s)", user.id, user.name)
 
     async with get_service_session(session_factory) as session:
@@ -167,29 +700,128 @@ async def _process_user(user: User) -> bool:
         consolidated_from = memory.last_consolidated_at or memory.created_at
         consolidated_to = _dt.datetime.now(tz=_UTC)
 
-        # Get messages since last consolidation
-        messages = await ChatRepository.get_messages_since(session, user.id, consolidated_from)
+        checkpoint = _load_checkpoint(
+            await MemoryRepository.get_consolidation_checkpoint(session, user.id, consolidated_from)
+        )
+        # Knowledge shown to the chunks the checkpoint covers
+        restored_knowledge = (
+            await MemoryRepository.get_active_knowledge(session, user.id, checkpoint.knowledge_ids)
+            if checkpoint and checkpoint.knowledge_ids
+            else []
+        )
 
-        if not messages:
-            logger.debug("No messages to consolidate for user %s", user.id)
-            return False
+    cursor = checkpoint.cursor if checkpoint else None
+    checkpointed = cursor
+    partials = [checkpoint.partial] if checkpoint else []
+    # Outputs of this run only; earlier chunks' outputs stay on their checkpoints
+    raw_outputs: list[str] = []
+    messages_processed = checkpoint.messages_processed if checkpoint else 0
 
-        logger.info("Found %d messages to consolidate for user %s", len(messages), user.id)
+    chunk = await _fetch_message_chunk(user.id, consolidated_from, consolidated_to, cursor)
 
-        # Get existing knowledge items
-        existing_knowledge = await MemoryRepository.search_knowledge(
-            session,
-            user.id,
-            limit=100,
+    if not chunk and checkpoint is None:
+        logger.debug("No messages to consolidate for user %s", user.id)
+        return False
+
+    if checkpoint is not None:
+        logger.info(
+            "Resuming consolidation for user %s after %d messages", user.id, messages_processed
         )
 
+    # Existing knowledge shown to any chunk's prompt, including those of a
+    # resumed run: deduplicated, and contradiction candidates for new items
+    shown_knowledge = {ki.id: ki for ki in restored_knowledge}
+    prompt_knowledge = await _select_prompt_knowledge(user.id, chunk)
+    shown_knowledge.update((ki.id, ki) for ki in prompt_knowledge)
+
+    # Build prompt
+    memory_dict = _memory_dict(memory)
+    llm = create_llm(settings, temperature=_LLM_TEMPERATURE)
+
+    # Map: consolidate each chunk independently
+    while chunk:
+        if cursor is not None and cursor != checkpointed:
+            # Checkpoint progress before starting the next chunk
+            await _save_checkpoint(
+                user.id,
+                consolidated_from=consolidated_from,
+                cursor=cursor,
+                partial=merge_consolidation_responses(partials),
+                raw_output=raw_outputs[-1],
+                messages_processed=messages_processed,
+                knowledge_ids=list(shown_knowledge),
+            )
+            checkpointed = cursor
+
+        logger.info("Consolidating %d messages for user %s", len(chunk), user.id)
+        prompt = build_consolidation_prompt(
+            chunk, memory_dict, [_knowledge_dict(ki) for ki in prompt_knowledge]
+        )
+        raw_output = await retry_with_backoff(functools.partial(_call_llm, llm, prompt))
+
+        partials.append(parse_consolidation_response(raw_output))
+        raw_outputs.append(raw_output)
+        messages_processed += len(chunk)
+        cursor = (chunk[-1].created_at, chunk[-1].id)
+
+        chunk = await _fetch_message_chunk(user.id, consolidated_from, consolidated_to, cursor)
+        if chunk:
+            prompt_knowledge = await _select_prompt_knowledge(user.id, chunk)
+            shown_knowledge.update((ki.id, ki) for ki in prompt_knowledge)
+
     # Run deduplication phase (outside session — it opens its own)
+    existing_knowledge = list(shown_knowledge.values())
     dedup_resolved = await _run_deduplication_phase(user.id, existing_knowledge)
     if dedup_resolved > 0:
         logger.info("Resolved %d existing contradictions for user %s", dedup_resolved, user.id)
 
-    # Build prompt
-    memory_dict = {
+    # Reduce: merge partial results deterministically, then apply
+    await _complete_consolidation(
+        user.id,
+        merge_consolidation_responses(partials),
+        existing_knowledge,
+        consolidated_from=consolidated_from,
+        consolidated_to=consolidated_to,
+        messages_processed=messages_processed,
+        raw_outputs=raw_outputs,
+    )
+    return True
+
+
+async def _complete_consolidation(
+    user_id: _uuid.UUID,
+    result: ConsolidationResponse,
+    existing_knowledge: list[KnowledgeItem],
+    *,
+    consolidated_from: _dt.datetime,
+    consolidated_to: _dt.datetime,
+    messages_processed: int,
+    raw_outputs: list[str],
+) -> None:
+    """Apply a merged result, advance ``last_consolidated_at`` and write the log."""
+    duplicates_merged = await _apply_consolidation_result(user_id, result, existing_knowledge)
+
+    async with get_service_session(_get_session_factory()) as session:
+        await MemoryRepository.update_user_memories(
+            session,
+            user_id,
+            {"last_consolidated_at": consolidated_to},
+        )
+
+    await _log_consolidation(
+        user_id,
+        status="completed",
+        consolidated_from=consolidated_from,
+        consolidated_to=consolidated_to,
+        messages_processed=messages_processed,
+        result=result,
+        raw_output=raw_outputs[0] if len(raw_outputs) == 1 else raw_outputs,
+        duplicates_merged=duplicates_merged,
+    )
+
+
+def _memory_dict(memory: UserMemory) -> dict[str, Any]:
+    return {
         "bio": memory.bio,
         "occupation": memory.occupation,
         "family_context": memory.family_context,
@@ -198,62 +830,175 @@ async def _process_user(user: User) -> bool:
         "top_of_mind": memory.top_of_mind,
         "values": memory.values,
     }
-    knowledge_dicts = [
-        {
-            "id": str(ki.id),
-            "type": _enum_val(ki.type),
-            "content": ki.content,
-            "title": ki.title or "",
-        }
-        for ki in existing_knowledge
-    ]
-    prompt = build_consolidation_prompt(messages, memory_dict, knowledge_dicts)
 
-    # Call LLM with retry
+
+async def _select_prompt_knowledge(
+    user_id: _uuid.UUID, chunk: list[Message]
+) -> list[KnowledgeItem]:
+    """Existing knowledge items for one chunk's prompt.
+
+    Items relevant to the chunk's messages come first, then the most recently
+    touched, up to CONSOLIDATION_KNOWLEDGE_MAX_ITEMS and
+    CONSOLIDATION_KNOWLEDGE_TOKEN_BUDGET. Updates by id still apply to items
+    left out; the LLM just doesn't see them.
+    """
     settings = get_settings()
-    llm = create_llm(settings, temperature=0.3)
-
-    raw_output: str = ""
-
-    async def _call_llm() -> str:
-        response = await llm.ainvoke(prompt)
-        content = response.content
-        if isinstance(content, str):
-            return content
-        if isinstance(content, list):
-            return " ".join(
-                block.get("text", "") if isinstance(block, dict) else str(block)
-                for block in content
-            )
-        return str(content)
+    async with get_service_session(_get_session_factory()) as session:
+        candidates = await MemoryRepository.select_knowledge(
+            session, user_id, " ".join(message.content for message in chunk)
+        )
 
-    raw_output = await retry_with_backoff(_call_llm)
+    selected: list[KnowledgeItem] = []
+    tokens = 0
+    for item in candidates[: settings.CONSOLIDATION_KNOWLEDGE_MAX_ITEMS]:
+        tokens += estimate_knowledge_tokens(_knowledge_dict(item))
+        if tokens > settings.CONSOLIDATION_KNOWLEDGE_TOKEN_BUDGET:
+            break
+        selected.append(item)
+
+    if len(selected) < len(candidates):
+        logger.info(
+            "Consolidation prompt for user %s: %d of %d knowledge items, %d dropped",
+            user_id,
+            len(selected),
+            len(candidates),
+            len(candidates) - len(selected),
+        )
+    return selected
 
-    # Parse response
-    consolidation_result = parse_consolidation_response(raw_output)
 
-    # Apply updates
-    await _apply_consolidation_result(user.id, consolidation_result, existing_knowledge)
+def _knowledge_dict(item: KnowledgeItem) -> dict[str, str]:
+    return {
+        "id": str(item.id),
+        "type": _enum_val(item.type),
+        "content": item.content,
+        "title": item.title or "",
+    }
 
-    # Update last_consolidated_at and log
-    async with get_service_session(session_factory) as session:
-        await MemoryRepository.update_user_memories(
-            session,
-            user.id,
-            {"last_consolidated_at": consolidated_to},
+
+async def _call_llm(llm: BaseChatModel, prompt: str) -> str:
+    response = await llm.ainvoke(prompt)
+    content = response.content
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(
+            block.get("text", "") if isinstance(block, dict) else str(block) for block in content
         )
+    return str(content)
 
-    await _log_consolidation(
-        user.id,
-        status="completed",
-        consolidated_from=consolidated_from,
-        consolidated_to=consolidated_to,
-        messages_processed=len(messages),
-        result=consolidation_result,
-        raw_output=raw_output,
-    )
 
-    return True
+async def _fetch_message_chunk(
+    user_id: _uuid.UUID,
+    since: _dt.datetime,
+    until: _dt.datetime,
+    after: tuple[_dt.datetime, _uuid.UUID] | None,
+) -> list[Message]:
+    """Read the next token-budgeted chunk of messages after ``after``.
+
+    The cursor is held only while reading, never across LLM calls. A single
+    message larger than the budget still forms its own chunk.
+    """
+    settings = get_settings()
+    budget = settings.CONSOLIDATION_CHUNK_TOKEN_BUDGET
+    session_factory = _get_session_factory()
+
+    chunk: list[Message] = []
+    used = 0
+    async with (
+        get_service_session(session_factory) as session,
+        aclosing(
+            ChatRepository.stream_messages_since(
+                session,
+                user_id,
+                since,
+                until=until,
+                after=after,
+                batch_size=settings.CONSOLIDATION_FETCH_BATCH_SIZE,
+            )
+        ) as stream,
+    ):
+        async for message in stream:
+            cost = estimate_message_tokens(message)
+            if chunk and used + cost > budget:
+                break
+            chunk.append(message)
+            used += cost
+    return chunk
+
+
+# --- Per-chunk checkpoints ---
+# Stored as "partial" rows in memory_consolidations; raw_output carries the
+# keyset cursor, the merged result of every chunk consolidated so far, the ids
+# of the knowledge shown to their prompts and the raw output of the newest
+# chunk only, so each row stays bounded.
+
+
+@dataclass
+class _Checkpoint:
+    cursor: tuple[_dt.datetime, _uuid.UUID]
+    partial: ConsolidationResponse
+    messages_processed: int
+    knowledge_ids: list[_uuid.UUID]
+
+
+def _load_checkpoint(log: MemoryConsolidation | None) -> _Checkpoint | None:
+    """Parse a checkpoint row; None if there is none or it is malformed."""
+    if log is None:
+        return None
+    data = log.raw_output
+    if not isinstance(data, dict) or "checkpoint" not in data:
+        return None
+    try:
+        cp = data["checkpoint"]
+        return _Checkpoint(
+            cursor=(
+                _dt.datetime.fromisoformat(cp["cursor_created_at"]),
+                _uuid.UUID(cp["cursor_id"]),
+            ),
+            partial=ConsolidationResponse.model_validate(cp["partial"]),
+            messages_processed=log.messages_processed,
+            knowledge_ids=[_uuid.UUID(i) for i in cp.get("knowledge_ids", [])],
+        )
+    except (KeyError, TypeError, ValueError):
+        logger.warning("Ignoring malformed consolidation checkpoint %s", log.id)
+        return None
+
+
+async def _save_checkpoint(
+    user_id: _uuid.UUID,
+    *,
+    consolidated_from: _dt.datetime,
+    cursor: tuple[_dt.datetime, _uuid.UUID],
+    partial: ConsolidationResponse,
+    raw_output: str,
+    messages_processed: int,
+    knowledge_ids: list[_uuid.UUID],
+) -> None:
+    session_factory = _get_session_factory()
+    data: dict[str, Any] = {
+        "id": _uuid.uuid4(),
+        "user_id": user_id,
+        "consolidated_from": consolidated_from,
+        "consolidated_to": cursor[0],
+        "messages_processed": messages_processed,
+        "raw_output": {
+            "checkpoint": {
+                "cursor_created_at": cursor[0].isoformat(),
+                "cursor_id": str(cursor[1]),
+                "partial": partial.model_dump(by_alias=True, exclude_none=True),
+                "knowledge_ids": sorted(str(i) for i in knowledge_ids),
+                "raw_output": raw_output,
+            }
+        },
+        "status": "partial",
+    }
+    try:
+        async with get_service_session(session_factory) as session:
+            await MemoryRepository.create_consolidation_log(session, data)
+    except Exception:
+        # A lost checkpoint only costs re-work on crash; keep consolidating
+        logger.exception("Failed to checkpoint consolidation for user %s", user_id)
 
 
 async def _run_deduplication_phase(
@@ -348,9 +1093,14 @@ async def _apply_consolidation_result(
     user_id: _uuid.UUID,
     result: ConsolidationResponse,
     existing_knowledge: list[KnowledgeItem],
-) -> None:
-    """Apply consolidation result: update memory, create/update knowledge items."""
+) -> int:
+    """Apply consolidation result: update memory, create/update knowledge items.
+
+    Returns how many new items were merged into near-duplicates instead of created.
+    """
     session_factory = _get_session_factory()
+    dedup_threshold = get_settings().KNOWLEDGE_DEDUP_THRESHOLD
+    duplicates_merged = 0
 
     # Apply memory updates
     updates = result.memory_updates
@@ -380,6 +1130,28 @@ async def _apply_consolidation_result(
 
     # Create new knowledge items (with contradiction detection)
     for item in result.new_knowledge_items:
+        # A reworded fact already known merges into it, with no LLM call
+        async with get_service_session(session_factory) as session:
+            duplicate = await MemoryRepository.find_near_duplicate(
+                session,
+                user_id,
+                item.content,
+                item_type=item.type,
+                area=item.area,
+                threshold=dedup_threshold,
+            )
+            merged = (
+                await MemoryRepository.merge_duplicate_knowledge(
+                    session, duplicate.id, item.confidence
+                )
+                if duplicate is not None
+                else None
+            )
+        if merged is not None:
+            logger.debug("Merged near-duplicate into item %s during consolidation", merged.id)
+            duplicates_merged += 1
+            continue
+
         ki_data: dict[str, Any] = {
             "id": _uuid.uuid4(),
             "user_id": user_id,
@@ -434,9 +1206,10 @@ async def _apply_consolidation_result(
 
     if result.new_knowledge_items:
         logger.debug(
-            "Created %d knowledge items for user %s",
-            len(result.new_knowledge_items),
+            "Created %d knowledge items for user %s (%d merged into near-duplicates)",
+            len(result.new_knowledge_items) - duplicates_merged,
             user_id,
+            duplicates_merged,
         )
 
     # Update existing knowledge items
@@ -461,6 +1234,8 @@ async def _apply_consolidation_result(
             user_id,
         )
 
+    return duplicates_merged
+
 
 async def _log_consolidation(
     user_id: _uuid.UUID,
@@ -470,13 +1245,14 @@ async def _log_consolidation(
     consolidated_to: _dt.datetime | None = None,
     messages_processed: int = 0,
     result: ConsolidationResponse | None = None,
-    raw_output: str | None = None,
+    raw_output: str | list[str] | None = None,
+    duplicates_merged: int = 0,
 ) -> None:
     """Create a consolidation audit log entry."""
     session_factory = _get_session_factory()
     now = _dt.datetime.now(tz=_UTC)
 
-    facts_created = len(result.new_knowledge_items) if result else 0
+    facts_created = len(result.new_knowledge_items) - duplicates_merged if result else 0
     facts_updated = len(result.updated_knowledge_items) if result else 0
     inferences_created = (
         sum(1 for item in result.new_knowledge_items if item.inference_evidence is not None)
@@ -497,6 +1273,7 @@ async def _log_consolidation(
         "facts_created": facts_created,
         "facts_updated": facts_updated,
         "inferences_created": inferences_created,
+        "duplicates_merged": duplicates_merged,
         "memory_updates": memory_updates_dict,
         "raw_output": raw_output,
         "status": status,
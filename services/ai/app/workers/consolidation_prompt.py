@@ -163,14 +163,15 @@ def _format_current_memory(memory: dict[str, Any]) -> str:
     return "\n".join(parts) if parts else "(Memória vazia)"
 
 
+def _format_knowledge_item(item: dict[str, str]) -> str:
+    return f"[{item['id']}] ({item['type']}) {item.get('title', '')}: {item['content']}"
+
+
 def _format_knowledge_items(items: list[dict[str, str]]) -> str:
     """Format existing knowledge items for the prompt."""
     if not items:
         return "(Nenhum conhecimento registrado)"
-    return "\n".join(
-        f"[{item['id']}] ({item['type']}) {item.get('title', '')}: {item['content']}"
-        for item in items
-    )
+    return "\n".join(_format_knowledge_item(item) for item in items)
 
 
 def build_consolidation_prompt(
@@ -265,6 +266,109 @@ Exemplos CORRETOS:
 - Retorne APENAS o JSON, sem texto adicional"""
 
 
+# --- Token budgeting (map phase) ---
+
+# Rough chars-per-token ratio for PT-BR text; good enough for chunk sizing.
+_CHARS_PER_TOKEN = 4
+# Per-message overhead from the "[dd/mm/yyyy hh:mm] Role: " prefix and separators
+_MESSAGE_OVERHEAD_TOKENS = 8
+
+
+def estimate_text_tokens(content: str) -> int:
+    """Estimate how many prompt tokens a message body adds once formatted."""
+    return len(content) // _CHARS_PER_TOKEN + _MESSAGE_OVERHEAD_TOKENS
+
+
+def estimate_message_tokens(message: Any) -> int:
+    """Estimate how many prompt tokens a message adds once formatted."""
+    return estimate_text_tokens(message.content or "")
+
+
+def estimate_knowledge_tokens(item: dict[str, str]) -> int:
+    """Estimate how many prompt tokens an existing knowledge item adds once formatted."""
+    return len(_format_knowledge_item(item)) // _CHARS_PER_TOKEN + 1
+
+
+# --- Partial result merging (reduce phase) ---
+
+
+def _merge_str_lists(a: list[str] | None, b: list[str] | None) -> list[str] | None:
+    """Ordered union of two string lists (earlier entries keep their position)."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return list(dict.fromkeys([*a, *b]))
+
+
+def _merge_patterns(
+    a: list[LearnedPattern] | None, b: list[LearnedPattern] | None
+) -> list[LearnedPattern] | None:
+    """Merge learned patterns by normalized text: max confidence, union of evidence."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    merged: dict[str, LearnedPattern] = {}
+    for lp in [*a, *b]:
+        key = lp.pattern.strip().casefold()
+        prev = merged.get(key)
+        if prev is None:
+            merged[key] = lp.model_copy()
+            continue
+        prev.confidence = max(prev.confidence, lp.confidence)
+        prev.evidence = list(dict.fromkeys([*prev.evidence, *lp.evidence]))
+    return list(merged.values())
+
+
+def merge_consolidation_responses(
+    responses: list[ConsolidationResponse],
+) -> ConsolidationResponse:
+    """Deterministically fold per-chunk results into one consolidation result.
+
+    Responses must be in chronological chunk order:
+    - scalar memory fields: the latest non-null value wins
+    - list memory fields: ordered union
+    - new knowledge items: deduped by (type, area, content), keeping max confidence
+    - updated knowledge items: merged per id, later non-null fields win
+    """
+    memory = MemoryUpdates()
+    new_items: dict[tuple[str, str | None, str], NewKnowledgeItem] = {}
+    updated: dict[str, UpdatedKnowledgeItem] = {}
+
+    for resp in responses:
+        mu = resp.memory_updates
+        for field in ("bio", "occupation", "family_context"):
+            value = getattr(mu, field)
+            if value is not None:
+                setattr(memory, field, value)
+        for field in ("current_goals", "current_challenges", "top_of_mind", "values"):
+            setattr(memory, field, _merge_str_lists(getattr(memory, field), getattr(mu, field)))
+        memory.learned_patterns = _merge_patterns(memory.learned_patterns, mu.learned_patterns)
+
+        for item in resp.new_knowledge_items:
+            key = (item.type, item.area, item.content.strip().casefold())
+            prev = new_items.get(key)
+            if prev is None or item.confidence > prev.confidence:
+                new_items[key] = item
+
+        for upd in resp.updated_knowledge_items:
+            prev_upd = updated.get(upd.id)
+            if prev_upd is None:
+                updated[upd.id] = upd.model_copy()
+                continue
+            if upd.content is not None:
+                prev_upd.content = upd.content
+            if upd.confidence is not None:
+                prev_upd.confidence = upd.confidence
+
+    return ConsolidationResponse(
+        memory_updates=memory,
+        new_knowledge_items=list(new_items.values()),
+        updated_knowledge_items=list(updated.values()),
+    )
+
+
 def _remove_nulls(obj: Any) -> Any:
     """Recursively remove None/null values from parsed JSON."""
     if obj is None:
@@ -0,0 +1,104 @@
+"""Finance rollup reconciliation — nightly recompute of monthly finance rollups.
+
+The finance write tools keep rollups current with deltas (see
+app/tools/finance/_rollups.py), but the web app writes the same tables
+directly; those writes drop the month's rollup (migration 0016) and readers
+fall back to the source tables until it is rebuilt. Once a night APScheduler
+enqueues one job per user with finance rows in the reconcile window; the job
+recomputes those months from the source tables, logs drift found by the
+consistency check, and stamps the rows.
+"""
+
+from __future__ import annotations
+
+import datetime as _dt
+import logging
+import uuid as _uuid
+from typing import TYPE_CHECKING, Any
+
+from app.config import get_settings
+from app.db.repositories.finance import FinanceRepository
+from app.db.repositories.job import JobRepository
+from app.db.session import get_service_session
+from app.tools.finance._helpers import add_months
+from app.tools.finance._rollups import reconcile_finance_rollups
+
+if TYPE_CHECKING:
+    from app.db.engine import AsyncSessionFactory
+    from app.db.models.jobs import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+FINANCE_ROLLUP_QUEUE = "finance_rollup"
+
+_UTC = _dt.UTC
+
+# Module-level reference to session factory, set during app startup
+_session_factory: AsyncSessionFactory | None = None
+
+
+def set_session_factory(sf: AsyncSessionFactory) -> None:
+    """Set the module-level session factory (called from lifespan)."""
+    global _session_factory  # noqa: PLW0603
+    _session_factory = sf
+
+
+def _get_session_factory() -> AsyncSessionFactory:
+    if _session_factory is None:
+        msg = "Session factory not initialized — call set_session_factory() first"
+        raise RuntimeError(msg)
+    return _session_factory
+
+
+def reconcile_window(today: _dt.date, size: int) -> list[str]:
+    """The *size* months ending with *today*'s month, oldest first."""
+    current = f"{today.year:04d}-{today.month:02d}"
+    return [add_months(current, -k) for k in range(size - 1, -1, -1)]
+
+
+async def enqueue_finance_rollup_reconcile() -> int:
+    """Enqueue one reconcile job per user with finance rows in the window.
+
+    Called nightly by APScheduler. Jobs are deduplicated per user and UTC day.
+    Returns the number of new jobs.
+    """
+    session_factory = _get_session_factory()
+    settings = get_settings()
+    today = _dt.datetime.now(tz=_UTC).date()
+    months = reconcile_window(today, settings.FINANCE_ROLLUP_RECONCILE_MONTHS)
+
+    async with get_service_session(session_factory) as session:
+        user_ids = await FinanceRepository.get_users_with_finance_rows(session, months)
+        job_ids = await JobRepository.enqueue_many(
+            session,
+            [
+                {
+                    "queue": FINANCE_ROLLUP_QUEUE,
+                    "user_id": user_id,
+                    "payload": {"user_id": str(user_id), "months": months},
+                    "dedupe_key": f"finance_rollup:{user_id}:{today.isoformat()}",
+                }
+                for user_id in user_ids
+            ],
+        )
+
+    logger.info(
+        "Enqueued %d finance rollup reconcile job(s) for %d user(s)", len(job_ids), len(user_ids)
+    )
+    return len(job_ids)
+
+
+async def handle_finance_rollup_job(job: BackgroundJob) -> dict[str, Any]:
+    """Job queue handler: recompute the user's rollups for the payload months."""
+    session_factory = _get_session_factory()
+    user_id = _uuid.UUID(job.payload["user_id"])
+    months: list[str] = job.payload["months"]
+
+    async with get_service_session(session_factory) as session:
+        check = await reconcile_finance_rollups(session, user_id, months)
+
+    return {
+        "months_checked": check.checked,
+        "months_drifted": len(check.drifted),
+        "months_created": len(check.missing),
+    }
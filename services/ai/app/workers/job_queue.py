@@ -0,0 +1,210 @@
+"""Job queue worker — claims and runs jobs from the Postgres ``background_jobs`` table.
+
+Every replica runs one ``JobWorker``. Cron jobs only enqueue work; whichever
+worker claims a job first (``FOR UPDATE SKIP LOCKED``) runs it, so adding
+replicas spreads the load instead of duplicating it.
+
+While a handler runs, the worker heartbeats to extend its lease. If the
+process dies, the lease expires and another worker picks the job up again
+until ``max_attempts`` is reached. Failed attempts are retried with
+exponential backoff.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import socket
+import uuid as _uuid
+from collections.abc import Callable, Coroutine
+from typing import TYPE_CHECKING, Any
+
+from app.agents.llm_scheduler import BACKGROUND, llm_priority
+from app.config import get_settings
+from app.db.models.enums import JobStatus
+from app.db.repositories.job import JobRepository
+from app.db.session import get_service_session
+
+if TYPE_CHECKING:
+    from app.db.engine import AsyncSessionFactory
+    from app.db.models.jobs import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[["BackgroundJob"], Coroutine[Any, Any, dict[str, Any] | None]]
+
+_handlers: dict[str, JobHandler] = {}
+
+
+def register_handler(queue: str, handler: JobHandler) -> None:
+    """Register the coroutine that runs jobs of ``queue``."""
+    _handlers[queue] = handler
+
+
+def _default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{_uuid.uuid4().hex[:8]}"
+
+
+class JobWorker:
+    """Polls the job table and runs claimed jobs with bounded concurrency."""
+
+    def __init__(
+        self,
+        session_factory: AsyncSessionFactory,
+        *,
+        queues: list[str] | None = None,
+        worker_id: str | None = None,
+    ) -> None:
+        settings = get_settings()
+        self._session_factory = session_factory
+        self._queues = queues
+        self.worker_id = worker_id or _default_worker_id()
+        self._concurrency = settings.JOB_WORKER_CONCURRENCY
+        self._poll_interval = settings.JOB_POLL_INTERVAL_SECONDS
+        self._lease_seconds = settings.JOB_LEASE_SECONDS
+        self._heartbeat_interval = settings.JOB_HEARTBEAT_INTERVAL_SECONDS
+        self._retry_base_delay = settings.JOB_RETRY_BASE_DELAY_SECONDS
+        self._running: set[asyncio.Task[None]] = set()
+        self._loop_task: asyncio.Task[None] | None = None
+
+    @property
+    def queues(self) -> list[str]:
+        return self._queues if self._queues is not None else sorted(_handlers)
+
+    def start(self) -> None:
+        if self._loop_task is None:
+            self._loop_task = asyncio.create_task(self._run_loop())
+            logger.info("Job worker %s started (queues=%s)", self.worker_id, self.queues)
+
+    async def stop(self) -> None:
+        """Stop polling and cancel in-flight jobs.
+
+        Cancelled jobs keep their lease until it expires, then get retried
+        by another worker.
+        """
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        logger.info("Job worker %s stopped", self.worker_id)
+
+    async def _run_loop(self) -> None:
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception:
+                logger.exception("Job worker %s poll failed", self.worker_id)
+                claimed = 0
+            if claimed == 0:
+                await asyncio.sleep(self._poll_interval)
+            else:
+                # Yield so claimed jobs start before the next poll
+                await asyncio.sleep(0)
+
+    async def run_once(self) -> int:
+        """Claim as many jobs as there are free slots and start them.
+
+        Returns the number of jobs claimed.
+        """
+        free = self._concurrency - len(self._running)
+        queues = self.queues
+        if free <= 0 or not queues:
+            return 0
+
+        async with get_service_session(self._session_factory) as session:
+            expired = await JobRepository.fail_expired(session, queues=queues)
+            jobs = await JobRepository.claim(
+                session,
+                queues=queues,
+                worker_id=self.worker_id,
+                limit=free,
+                lease_seconds=self._lease_seconds,
+            )
+        if expired:
+            logger.warning("Marked %d job(s) failed after lease expiry", expired)
+
+        for job in jobs:
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+        return len(jobs)
+
+    async def _execute(self, job: BackgroundJob) -> None:
+        handler = _handlers.get(job.queue)
+        if handler is None:
+            await self._fail(job, f"No handler registered for queue {job.queue!r}")
+            return
+
+        logger.info(
+            "Running job %s (queue=%s, attempt %d/%d)",
+            job.id,
+            job.queue,
+            job.attempts,
+            job.max_attempts,
+        )
+        # The task inherits the context: its LLM calls yield to chat traffic
+        with llm_priority(BACKGROUND, key=str(job.user_id) if job.user_id else None):
+            work = asyncio.create_task(handler(job))
+        lease_lost = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(job, work, lease_lost))
+        try:
+            result = await work
+        except asyncio.CancelledError:
+            if not lease_lost.is_set():
+                raise  # Worker shutdown — leave the lease to expire
+            logger.warning("Job %s cancelled after losing its lease", job.id)
+            return
+        except Exception as exc:
+            logger.exception("Job %s failed", job.id)
+            await self._fail(job, f"{type(exc).__name__}: {exc}")
+            return
+        finally:
+            heartbeat.cancel()
+
+        async with get_service_session(self._session_factory) as session:
+            owned = await JobRepository.complete(
+                session, job.id, worker_id=self.worker_id, result=result
+            )
+        if not owned:
+            logger.warning("Job %s finished after its lease was taken over", job.id)
+
+    async def _heartbeat(
+        self, job: BackgroundJob, work: asyncio.Task[Any], lease_lost: asyncio.Event
+    ) -> None:
+        while True:
+            await asyncio.sleep(self._heartbeat_interval)
+            try:
+                async with get_service_session(self._session_factory) as session:
+                    owned = await JobRepository.heartbeat(
+                        session,
+                        job.id,
+                        worker_id=self.worker_id,
+                        lease_seconds=self._lease_seconds,
+                    )
+            except Exception:
+                # Transient DB error: the lease still has time left, try again next tick
+                logger.warning("Heartbeat failed for job %s", job.id, exc_info=True)
+                continue
+            if not owned:
+                lease_lost.set()
+                work.cancel()
+                return
+
+    async def _fail(self, job: BackgroundJob, error: str) -> None:
+        delay = self._retry_base_delay * (2 ** max(job.attempts - 1, 0))
+        async with get_service_session(self._session_factory) as session:
+            status = await JobRepository.fail(
+                session,
+                job.id,
+                worker_id=self.worker_id,
+                error=error,
+                retry_delay_seconds=delay,
+            )
+        if status == JobStatus.FAILED:
+            logger.error("Job %s failed permanently after %d attempts", job.id, job.attempts)
+        elif status == JobStatus.PENDING:
+            logger.info("Job %s will be retried in %.0fs", job.id, delay)
@@ -0,0 +1,132 @@
+"""Leader election over a PostgreSQL session-level advisory lock.
+
+Only the process holding the lock runs APScheduler, so cron jobs fire once
+no matter how many uvicorn workers or replicas are up. The lock lives on a
+dedicated autocommit connection: if the leader dies, Postgres drops the
+connection and releases the lock, and a follower acquires it on its next
+check. Failover therefore takes at most one check interval after the old
+connection is gone.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import zlib
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+
+from app.config import get_settings
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+    from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+# Stable 32-bit key so every replica contends for the same lock
+SCHEDULER_LOCK_KEY = zlib.crc32(b"life-assistant-ai:scheduler-leader")
+
+
+class LeaderElector:
+    """Holds leadership while it owns ``pg_try_advisory_lock(lock_key)``.
+
+    ``on_elected`` runs when this process becomes leader and ``on_demoted``
+    when it loses or gives up leadership.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        *,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+        lock_key: int = SCHEDULER_LOCK_KEY,
+    ) -> None:
+        self._engine = engine
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        self._lock_key = lock_key
+        self._interval = get_settings().LEADER_CHECK_INTERVAL_SECONDS
+        self._conn: AsyncConnection | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._conn is not None
+
+    async def start(self) -> None:
+        """Run the first election immediately, then keep checking in the background."""
+        await self.check()
+        self._task = asyncio.create_task(self._run_loop())
+
+    async def stop(self) -> None:
+        """Stop checking and release leadership if held."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._conn is not None:
+            await self._demote(release=True)
+
+    async def _run_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Leader election check failed")
+
+    async def check(self) -> None:
+        """Try to acquire the lock as follower, or verify it is still held as leader."""
+        if self._conn is None:
+            await self._try_acquire()
+            return
+        try:
+            # The lock lives as long as this session; a live session means we still hold it
+            await self._conn.execute(text("SELECT 1"))
+        except Exception:
+            logger.warning("Lost leader connection, stepping down", exc_info=True)
+            await self._demote(release=False)
+
+    async def _try_acquire(self) -> None:
+        conn = await self._engine.connect()
+        try:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            result = await conn.execute(
+                text("SELECT pg_try_advisory_lock(:key)"), {"key": self._lock_key}
+            )
+            acquired = bool(result.scalar())
+        except Exception:
+            await conn.close()
+            raise
+        if not acquired:
+            await conn.close()
+            return
+
+        self._conn = conn
+        logger.info("Acquired scheduler leadership (lock %d)", self._lock_key)
+        try:
+            await self._on_elected()
+        except Exception:
+            logger.exception("Leader startup failed, releasing leadership")
+            await self._demote(release=True)
+
+    async def _demote(self, *, release: bool) -> None:
+        conn, self._conn = self._conn, None
+        try:
+            await self._on_demoted()
+        except Exception:
+            logger.exception("Leader shutdown callback failed")
+        if conn is None:
+            return
+        try:
+            if release:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self._lock_key})
+            await conn.close()
+        except Exception:
+            # Closing the session releases the lock server-side anyway
+            await conn.invalidate()
+        logger.info("Released scheduler leadership")
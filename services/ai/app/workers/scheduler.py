@@ -1,7 +1,10 @@
 """APScheduler setup — timezone-aware consolidation scheduling.
 
 Queries distinct user timezones and registers one CronTrigger job per timezone
-so that consolidation runs at 3:00 AM local time for each group.
+so that consolidation is enqueued at 3:00 AM local time for each group. A single
+UTC cron enqueues the nightly finance rollup reconcile. The crons only enqueue
+per-user jobs; the job queue worker on any replica runs them. Each cron is
+registered only when its own feature flag is on.
 """
 
 import logging
@@ -18,14 +21,32 @@ logger = logging.getLogger(__name__)
 
 
 async def setup_scheduler(session_factory: AsyncSessionFactory) -> AsyncIOScheduler:
-    """Create and start the APScheduler instance with consolidation jobs.
+    """Create and start the APScheduler instance with the enabled crons.
 
-    Queries the database for distinct user timezones and registers a cron job
-    for each so consolidation runs at 3 AM local time.
+    With consolidation enabled, queries the database for distinct user
+    timezones and registers a cron job for each so consolidation runs at 3 AM
+    local time. The finance rollup reconcile cron has its own flag.
     """
     settings = get_settings()
     scheduler = AsyncIOScheduler()
 
+    if settings.FINANCE_ROLLUP_RECONCILE_ENABLED:
+        scheduler.add_job(
+            "app.workers.finance_rollups:enqueue_finance_rollup_reconcile",
+            CronTrigger(
+                hour=settings.FINANCE_ROLLUP_RECONCILE_CRON_HOUR,
+                minute=settings.FINANCE_ROLLUP_RECONCILE_CRON_MINUTE,
+                timezone="UTC",
+            ),
+            id="finance_rollup_reconcile",
+            replace_existing=True,
+        )
+
+    if not settings.CONSOLIDATION_ENABLED:
+        scheduler.start()
+        logger.info("APScheduler started without consolidation jobs (disabled)")
+        return scheduler
+
     async with get_service_session(session_factory) as session:
         timezones = await UserRepository.get_distinct_timezones(session)
 
@@ -36,7 +57,7 @@ async def setup_scheduler(session_factory: AsyncSessionFactory) -> AsyncIOSchedu
 
     for tz in timezones:
         scheduler.add_job(
-            "app.workers.consolidation:run_consolidation",
+            "app.workers.consolidation:enqueue_consolidation",
             CronTrigger(
                 hour=settings.CONSOLIDATION_CRON_HOUR,
                 minute=settings.CONSOLIDATION_CRON_MINUTE,
@@ -68,6 +89,8 @@ async def refresh_schedules(
 ) -> None:
     """Re-query timezones and upsert jobs (e.g. when a new user registers)."""
     settings = get_settings()
+    if not settings.CONSOLIDATION_ENABLED:
+        return
 
     async with get_service_session(session_factory) as session:
         timezones = await UserRepository.get_distinct_timezones(session)
@@ -78,7 +101,7 @@ async def refresh_schedules(
         job_id = f"consolidation:{tz}"
         if job_id not in existing_ids:
             scheduler.add_job(
-                "app.workers.consolidation:run_consolidation",
+                "app.workers.consolidation:enqueue_consolidation",
                 CronTrigger(
                     hour=settings.CONSOLIDATION_CRON_HOUR,
                     minute=settings.CONSOLIDATION_CRON_MINUTE,
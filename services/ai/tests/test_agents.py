@@ -94,6 +94,43 @@ async def test_save_response_persists_assistant_message() -> None:
     assert added_obj.content == "Olá! Como posso ajudar?"
 
 
+@pytest.mark.asyncio
+async def test_save_response_counts_turn_for_incremental_consolidation() -> None:
+    """save_response should add the user + assistant message to the pending volume."""
+    mock_session_cm = AsyncMock()
+    mock_session_cm.__aenter__ = AsyncMock(return_value=MagicMock(flush=AsyncMock()))
+    mock_session_cm.__aexit__ = AsyncMock(return_value=None)
+    user_id = uuid.uuid4()
+
+    state: AgentState = {
+        "messages": [
+            HumanMessage(content="x" * 400),
+            AIMessage(content=[{"type": "text", "text": "y" * 200}]),
+        ],
+        "user_id": str(user_id),
+        "conversation_id": str(uuid.uuid4()),
+        "current_agent": None,
+    }
+    config = {"configurable": {"session_factory": MagicMock(), "thread_id": "t"}}
+
+    with (
+        patch("app.agents.save_response.get_user_session", return_value=mock_session_cm),
+        patch(
+            "app.agents.save_response.schedule_incremental_consolidation",
+            new_callable=AsyncMock,
+            side_effect=RuntimeError("db down"),
+        ) as mock_schedule,
+    ):
+        result = await save_response(state, config)  # type: ignore[arg-type]
+
+    # Counting is best effort — a failure never breaks the chat turn
+    assert result == {}
+    assert mock_schedule.call_args.args[1] == user_id
+    assert mock_schedule.call_args.kwargs["messages"] == 2
+    # 400/4 + 200/4 chars plus per-message overhead
+    assert mock_schedule.call_args.kwargs["tokens"] == 100 + 50 + 16
+
+
 @pytest.mark.asyncio
 async def test_save_response_handles_no_ai_message() -> None:
     """save_response should return empty dict when no AI message exists."""
@@ -11,6 +11,7 @@ from langchain_core.tools import BaseTool
 from pydantic import BaseModel, Field
 
 from app.tools.common.confirmable_tool_node import ConfirmableToolNode
+from app.tools.common.tool_cache import ToolResultCache
 
 if TYPE_CHECKING:
     from app.agents.state import AgentState
@@ -241,3 +242,105 @@ async def test_tool_error_returns_error_message(tools: list[BaseTool]) -> None:
 
     assert len(result["messages"]) == 1
     assert "Erro ao executar read_data" in result["messages"][0].content
+
+
+# ---------------------------------------------------------------------------
+# Tool result cache
+# ---------------------------------------------------------------------------
+
+
+def _cached_node(tools: list[BaseTool]) -> tuple[ConfirmableToolNode, ToolResultCache]:
+    cache = ToolResultCache(
+        {"read_data": frozenset({"data"}), "write_data": frozenset({"data"})},
+        ttl_seconds=60,
+        max_entries=100,
+    )
+    return ConfirmableToolNode(tools, write_tools={"write_data"}, cache=cache), cache
+
+
+_USER_CONFIG: dict[str, Any] = {"configurable": {"user_id": "user-1", "user_timezone": "UTC"}}
+
+
+@pytest.mark.asyncio
+async def test_repeated_read_is_served_from_cache(tools: list[BaseTool]) -> None:
+    node, cache = _cached_node(tools)
+    read_tool = node.tools_by_name["read_data"]
+    call = {"name": "read_data", "args": {"query": "q"}, "type": "tool_call"}
+
+    with patch.object(type(read_tool), "_arun", autospec=True, return_value="fresh") as run:
+        first = await node(_make_state([{**call, "id": "tc-1"}]), _USER_CONFIG)  # type: ignore[arg-type]
+        second = await node(_make_state([{**call, "id": "tc-2"}]), _USER_CONFIG)  # type: ignore[arg-type]
+
+    assert run.call_count == 1
+    assert second["messages"][0].content == first["messages"][0].content == "fresh"
+    # Cached results keep the new call's id
+    assert second["messages"][0].tool_call_id == "tc-2"
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_write_invalidates_cached_reads(tools: list[BaseTool]) -> None:
+    node, cache = _cached_node(tools)
+    read = {"name": "read_data", "args": {"query": "q"}, "id": "tc-1", "type": "tool_call"}
+    write = {"name": "write_data", "args": {"value": "v"}, "id": "tc-2", "type": "tool_call"}
+
+    await node(_make_state([read]), _USER_CONFIG)  # type: ignore[arg-type]
+    assert cache.stats()["entries"] == 1
+
+    with patch(
+        "app.tools.common.confirmable_tool_node.interrupt",
+        return_value={"action": "confirm"},
+    ):
+        await node(_make_state([write]), _USER_CONFIG)  # type: ignore[arg-type]
+
+    assert cache.stats()["entries"] == 0
+    assert cache.stats()["invalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_write_keeps_cache(tools: list[BaseTool]) -> None:
+    node, cache = _cached_node(tools)
+    read = {"name": "read_data", "args": {"query": "q"}, "id": "tc-1", "type": "tool_call"}
+    write = {"name": "write_data", "args": {"value": "v"}, "id": "tc-2", "type": "tool_call"}
+
+    await node(_make_state([read]), _USER_CONFIG)  # type: ignore[arg-type]
+    with patch(
+        "app.tools.common.confirmable_tool_node.interrupt",
+        return_value={"action": "reject"},
+    ):
+        await node(_make_state([write]), _USER_CONFIG)  # type: ignore[arg-type]
+
+    assert cache.stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_read_is_not_cached(tools: list[BaseTool]) -> None:
+    node, cache = _cached_node(tools)
+    mock_tool = AsyncMock()
+    mock_tool.ainvoke = AsyncMock(side_effect=RuntimeError("DB down"))
+    node.tools_by_name["read_data"] = mock_tool
+    read = {"name": "read_data", "args": {"query": "q"}, "id": "tc-1", "type": "tool_call"}
+
+    await node(_make_state([read]), _USER_CONFIG)  # type: ignore[arg-type]
+    await node(_make_state([read]), _USER_CONFIG)  # type: ignore[arg-type]
+
+    assert mock_tool.ainvoke.await_count == 2
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "content",
+    ['{"error": "Dívida não encontrada"}', '{"success": false, "message": "Falhou"}'],
+)
+async def test_read_reporting_failure_is_not_cached(tools: list[BaseTool], content: str) -> None:
+    node, cache = _cached_node(tools)
+    read_tool = node.tools_by_name["read_data"]
+    read = {"name": "read_data", "args": {"query": "q"}, "id": "tc-1", "type": "tool_call"}
+
+    with patch.object(type(read_tool), "_arun", autospec=True, return_value=content) as run:
+        await node(_make_state([read]), _USER_CONFIG)  # type: ignore[arg-type]
+        await node(_make_state([read]), _USER_CONFIG)  # type: ignore[arg-type]
+
+    assert run.call_count == 2
+    assert cache.stats()["entries"] == 0
@@ -65,6 +65,40 @@ class TestGenerateConfirmationMessage:
         assert "Meditação" in msg
         assert "hoje" in msg
 
+    def test_record_metrics_lists_every_entry(self) -> None:
+        msg = generate_confirmation_message(
+            "record_metrics",
+            {
+                "entries": [
+                    {"metric_type": "water", "value": 2000, "unit": "ml"},
+                    {"metric_type": "sleep", "value": 7, "date": "2026-02-22"},
+                    {"metric_type": "mood", "value": 8},
+                ]
+            },
+        )
+        assert msg == "Registrar 3 métricas: water 2000 ml, sleep 7 2026-02-22, mood 8?"
+
+    def test_delete_metrics_by_ids(self) -> None:
+        msg = generate_confirmation_message("delete_metrics", {"entry_ids": ["a", "b", "c"]})
+        assert msg == "Remover 3 registros?"
+
+    def test_delete_metrics_by_range(self) -> None:
+        msg = generate_confirmation_message(
+            "delete_metrics",
+            {"metric_type": "water", "date_from": "2026-01-20", "date_to": "2026-01-26"},
+        )
+        assert msg == "Remover todos os registros de water de 2026-01-20 a 2026-01-26?"
+
+    def test_delete_metrics_single_day(self) -> None:
+        msg = generate_confirmation_message(
+            "delete_metrics", {"metric_type": "water", "date_from": "2026-01-20"}
+        )
+        assert msg == "Remover todos os registros de water em 2026-01-20?"
+
+    def test_list_tool_fallback_on_malformed_args(self) -> None:
+        msg = generate_confirmation_message("record_metrics", {"entries": [{"value": 1}]})
+        assert msg == "Executar record_metrics?"
+
 
 class TestGenerateBatchMessage:
     def test_single_tool_delegates(self) -> None:
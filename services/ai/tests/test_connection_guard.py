@@ -0,0 +1,72 @@
+"""Unit tests for the held-connection detector (no DB required)."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+from unittest.mock import AsyncMock, MagicMock
+
+from app.db.connection_guard import (
+    HeldConnectionDetector,
+    connection_held,
+    holding_connection,
+    llm_callbacks,
+    warn_if_connection_held,
+)
+from app.db.session import get_user_session
+
+if TYPE_CHECKING:
+    import pytest
+
+USER_ID = "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+
+
+def _session_factory() -> MagicMock:
+    session = AsyncMock()
+    session.begin = MagicMock(return_value=AsyncMock())
+    factory_cm = AsyncMock()
+    factory_cm.__aenter__ = AsyncMock(return_value=session)
+    return MagicMock(return_value=factory_cm)
+
+
+async def test_user_session_marks_connection_held() -> None:
+    assert not connection_held()
+    async with get_user_session(_session_factory(), USER_ID):
+        assert connection_held()
+
+        # Tasks spawned inside the session inherit the mark
+        async def _child() -> bool:
+            return connection_held()
+
+        assert await asyncio.create_task(_child())
+    assert not connection_held()
+
+
+def test_warns_only_inside_a_session(caplog: pytest.LogCaptureFixture) -> None:
+    with caplog.at_level(logging.WARNING, logger="app.db.connection_guard"):
+        assert warn_if_connection_held("HTTP request") is False
+        with holding_connection():
+            assert warn_if_connection_held("HTTP request") is True
+
+    [record] = caplog.records
+    assert "HTTP request awaited while holding a DB connection" in record.getMessage()
+    assert record.stack_info
+
+
+async def test_detector_warns_on_llm_start(caplog: pytest.LogCaptureFixture) -> None:
+    detector = HeldConnectionDetector()
+    serialized = {"id": ["langchain", "chat_models", "ChatAnthropic"]}
+    with caplog.at_level(logging.WARNING, logger="app.db.connection_guard"):
+        await detector.on_chat_model_start(serialized, [[]])
+        with holding_connection():
+            await detector.on_chat_model_start(serialized, [[]])
+
+    [record] = caplog.records
+    assert "LLM call (ChatAnthropic)" in record.getMessage()
+
+
+def test_detector_only_in_debug_mode() -> None:
+    assert llm_callbacks(MagicMock(DEBUG_HELD_CONNECTIONS=False)) is None
+    [callback] = llm_callbacks(MagicMock(DEBUG_HELD_CONNECTIONS=True)) or []
+    assert isinstance(callback, HeldConnectionDetector)
@@ -4,25 +4,35 @@ from __future__ import annotations
 
 import datetime as _dt
 import json
+import logging
 import uuid
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
-from typing import Any
+from typing import TYPE_CHECKING, Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from app.agents.llm_batch import LocalBatchClient
 from app.db.models.enums import KnowledgeItemSource, KnowledgeItemType, LifeArea
 from app.db.models.memory import KnowledgeItem
 from app.db.models.users import User, UserMemory
+from app.db.repositories.user import ConsolidationCandidate
 from app.workers.consolidation import (
+    CONSOLIDATION_LLM_BATCH_QUEUE,
+    CONSOLIDATION_QUEUE,
     _log_consolidation,
     _resolve_priority,
     _run_deduplication_phase,
-    run_consolidation,
+    enqueue_consolidation,
+    handle_consolidation_job,
+    handle_consolidation_llm_batch_job,
     set_session_factory,
 )
 
+if TYPE_CHECKING:
+    from pathlib import Path
+
 # ---------------------------------------------------------------------------
 # Constants
 # ---------------------------------------------------------------------------
@@ -82,6 +92,7 @@ def _make_mock_message(
     created_at: _dt.datetime | None = None,
 ) -> MagicMock:
     msg = MagicMock()
+    msg.id = uuid.uuid4()
     msg.role = role
     msg.content = content
     msg.created_at = created_at or _dt.datetime(2026, 1, 15, 10, 0, tzinfo=_UTC)
@@ -119,11 +130,57 @@ def _make_llm_json_response(data: dict[str, Any]) -> MagicMock:
     return resp
 
 
+def _candidates(*users: MagicMock) -> list[ConsolidationCandidate]:
+    return [ConsolidationCandidate(user=u, message_count=1, message_bytes=100) for u in users]
+
+
+def _message_stream(messages: list[MagicMock]) -> Any:
+    """Fake ChatRepository.stream_messages_since honouring the keyset cursor."""
+    ordered = sorted(messages, key=lambda m: (m.created_at, m.id))
+
+    async def _stream(
+        *_a: object, after: tuple[_dt.datetime, uuid.UUID] | None = None, **_kw: object
+    ) -> AsyncIterator[MagicMock]:
+        for msg in ordered:
+            if after is None or (msg.created_at, msg.id) > after:
+                yield msg
+
+    return _stream
+
+
+def _mock_settings(
+    chunk_token_budget: int = 24000, knowledge_token_budget: int = 3000
+) -> MagicMock:
+    settings = MagicMock()
+    settings.CONSOLIDATION_CHUNK_TOKEN_BUDGET = chunk_token_budget
+    settings.CONSOLIDATION_FETCH_BATCH_SIZE = 200
+    settings.CONSOLIDATION_KNOWLEDGE_MAX_ITEMS = 100
+    settings.CONSOLIDATION_KNOWLEDGE_TOKEN_BUDGET = knowledge_token_budget
+    settings.CONSOLIDATION_BATCH_POLL_INTERVAL_SECONDS = 300.0
+    settings.CONSOLIDATION_BATCH_MAX_RESUBMITS = 1
+    settings.CONSOLIDATION_BATCH_MAX_POLLS = 3
+    settings.JOB_MAX_ATTEMPTS = 3
+    return settings
+
+
 @asynccontextmanager
 async def _fake_service_session(*_a: object, **_kw: object) -> AsyncIterator[AsyncMock]:
     yield AsyncMock()
 
 
+async def _consolidate(user: MagicMock, *, attempts: int = 1) -> dict[str, Any]:
+    """Run *user*'s consolidation job with no other job running for the user."""
+    job = MagicMock(
+        id=uuid.uuid4(), payload={"user_id": str(user.id)}, attempts=attempts, max_attempts=3
+    )
+    with (
+        patch(f"{_C}.JobRepository.try_lock_user_queue", new_callable=AsyncMock, return_value=True),
+        patch(f"{_C}.UserRepository.get_by_id", new_callable=AsyncMock, return_value=user),
+        patch(f"{_C}.MemoryRepository.reset_consolidation_trigger", new_callable=AsyncMock),
+    ):
+        return await handle_consolidation_job(job)
+
+
 # ---------------------------------------------------------------------------
 # Fixture: set and reset session factory
 # ---------------------------------------------------------------------------
@@ -196,23 +253,32 @@ async def test_consolidation_extracts_facts_from_conversations() -> None:
 
     with (
         patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
-        patch(f"{_C}.UserRepository.get_users_by_timezone", new_callable=AsyncMock, return_value=[user]),
         patch(f"{_C}.MemoryRepository.get_user_memories", new_callable=AsyncMock, return_value=memory),
-        patch(f"{_C}.ChatRepository.get_messages_since", new_callable=AsyncMock, return_value=messages),
-        patch(f"{_C}.MemoryRepository.search_knowledge", new_callable=AsyncMock, return_value=[]),
+        patch(f"{_C}.ChatRepository.stream_messages_since", side_effect=_message_stream(messages)),
+        patch(
+            f"{_C}.MemoryRepository.get_consolidation_checkpoint",
+            new_callable=AsyncMock,
+            return_value=None,
+        ),
+        patch(f"{_C}.MemoryRepository.select_knowledge", new_callable=AsyncMock, return_value=[]),
         patch(f"{_C}.check_contradictions", new_callable=AsyncMock, return_value=[]),
         patch(f"{_C}.create_llm", return_value=mock_llm),
-        patch(f"{_C}.MemoryRepository.update_user_memories", new_callable=AsyncMock) as mock_update_mem,
+        patch(
+            f"{_C}.MemoryRepository.update_user_memories", new_callable=AsyncMock
+        ) as mock_update_mem,
+        patch(
+            f"{_C}.MemoryRepository.find_near_duplicate", new_callable=AsyncMock, return_value=None
+        ),
         patch(f"{_C}.MemoryRepository.create_knowledge", new_callable=AsyncMock) as mock_create_ki,
         patch(f"{_C}.MemoryRepository.update_knowledge", new_callable=AsyncMock),
         patch(f"{_C}.MemoryRepository.supersede_knowledge", new_callable=AsyncMock),
         patch(f"{_C}.MemoryRepository.create_consolidation_log", new_callable=AsyncMock),
-        patch(f"{_C}.get_settings", return_value=MagicMock()),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
     ):
-        result = await run_consolidation("America/Sao_Paulo")
+        result = await _consolidate(user)
 
-    assert result.users_consolidated == 1
-    assert result.errors == 0
+    assert result["users_consolidated"] == 1
+    assert result["errors"] == 0
 
     # LLM was called
     mock_llm.ainvoke.assert_called_once()
@@ -276,22 +342,33 @@ async def test_contradictions_detected_and_resolved() -> None:
 
     with (
         patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
-        patch(f"{_C}.UserRepository.get_users_by_timezone", new_callable=AsyncMock, return_value=[user]),
         patch(f"{_C}.MemoryRepository.get_user_memories", new_callable=AsyncMock, return_value=memory),
-        patch(f"{_C}.ChatRepository.get_messages_since", new_callable=AsyncMock, return_value=messages),
-        patch(f"{_C}.MemoryRepository.search_knowledge", new_callable=AsyncMock, return_value=[old_item]),
+        patch(f"{_C}.ChatRepository.stream_messages_since", side_effect=_message_stream(messages)),
+        patch(
+            f"{_C}.MemoryRepository.get_consolidation_checkpoint",
+            new_callable=AsyncMock,
+            return_value=None,
+        ),
+        patch(
+            f"{_C}.MemoryRepository.select_knowledge",
+            new_callable=AsyncMock,
+            return_value=[old_item],
+        ),
         patch(f"{_C}.check_contradictions", new_callable=AsyncMock, return_value=[contradiction]),
         patch(f"{_C}.create_llm", return_value=mock_llm),
         patch(f"{_C}.MemoryRepository.update_user_memories", new_callable=AsyncMock),
+        patch(
+            f"{_C}.MemoryRepository.find_near_duplicate", new_callable=AsyncMock, return_value=None
+        ),
         patch(f"{_C}.MemoryRepository.create_knowledge", new_callable=AsyncMock),
         patch(f"{_C}.MemoryRepository.update_knowledge", new_callable=AsyncMock),
         patch(f"{_C}.MemoryRepository.supersede_knowledge", new_callable=AsyncMock) as mock_supersede,
         patch(f"{_C}.MemoryRepository.create_consolidation_log", new_callable=AsyncMock),
-        patch(f"{_C}.get_settings", return_value=MagicMock()),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
     ):
-        result = await run_consolidation("America/Sao_Paulo")
+        result = await _consolidate(user)
 
-    assert result.users_consolidated == 1
+    assert result["users_consolidated"] == 1
     assert mock_supersede.call_count >= 1
 
 
@@ -310,20 +387,29 @@ async def test_user_memories_updated_after_consolidation() -> None:
 
     with (
         patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
-        patch(f"{_C}.UserRepository.get_users_by_timezone", new_callable=AsyncMock, return_value=[user]),
         patch(f"{_C}.MemoryRepository.get_user_memories", new_callable=AsyncMock, return_value=memory),
-        patch(f"{_C}.ChatRepository.get_messages_since", new_callable=AsyncMock, return_value=messages),
-        patch(f"{_C}.MemoryRepository.search_knowledge", new_callable=AsyncMock, return_value=[]),
+        patch(f"{_C}.ChatRepository.stream_messages_since", side_effect=_message_stream(messages)),
+        patch(
+            f"{_C}.MemoryRepository.get_consolidation_checkpoint",
+            new_callable=AsyncMock,
+            return_value=None,
+        ),
+        patch(f"{_C}.MemoryRepository.select_knowledge", new_callable=AsyncMock, return_value=[]),
         patch(f"{_C}.check_contradictions", new_callable=AsyncMock, return_value=[]),
         patch(f"{_C}.create_llm", return_value=mock_llm),
-        patch(f"{_C}.MemoryRepository.update_user_memories", new_callable=AsyncMock) as mock_update_mem,
+        patch(
+            f"{_C}.MemoryRepository.update_user_memories", new_callable=AsyncMock
+        ) as mock_update_mem,
+        patch(
+            f"{_C}.MemoryRepository.find_near_duplicate", new_callable=AsyncMock, return_value=None
+        ),
         patch(f"{_C}.MemoryRepository.create_knowledge", new_callable=AsyncMock),
         patch(f"{_C}.MemoryRepository.update_knowledge", new_callable=AsyncMock),
         patch(f"{_C}.MemoryRepository.supersede_knowledge", new_callable=AsyncMock),
         patch(f"{_C}.MemoryRepository.create_consolidation_log", new_callable=AsyncMock),
-        patch(f"{_C}.get_settings", return_value=MagicMock()),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
     ):
-        await run_consolidation("America/Sao_Paulo")
+        await _consolidate(user)
 
     # Called at least twice: memory_updates from LLM + last_consolidated_at
     assert mock_update_mem.call_count >= 2
@@ -356,20 +442,31 @@ async def test_knowledge_items_created_and_updated_without_duplicates() -> None:
 
     with (
         patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
-        patch(f"{_C}.UserRepository.get_users_by_timezone", new_callable=AsyncMock, return_value=[user]),
         patch(f"{_C}.MemoryRepository.get_user_memories", new_callable=AsyncMock, return_value=memory),
-        patch(f"{_C}.ChatRepository.get_messages_since", new_callable=AsyncMock, return_value=messages),
-        patch(f"{_C}.MemoryRepository.search_knowledge", new_callable=AsyncMock, return_value=[existing_item]),
+        patch(f"{_C}.ChatRepository.stream_messages_since", side_effect=_message_stream(messages)),
+        patch(
+            f"{_C}.MemoryRepository.get_consolidation_checkpoint",
+            new_callable=AsyncMock,
+            return_value=None,
+        ),
+        patch(
+            f"{_C}.MemoryRepository.select_knowledge",
+            new_callable=AsyncMock,
+            return_value=[existing_item],
+        ),
         patch(f"{_C}.check_contradictions", new_callable=AsyncMock, return_value=[]),
         patch(f"{_C}.create_llm", return_value=mock_llm),
         patch(f"{_C}.MemoryRepository.update_user_memories", new_callable=AsyncMock),
+        patch(
+            f"{_C}.MemoryRepository.find_near_duplicate", new_callable=AsyncMock, return_value=None
+        ),
         patch(f"{_C}.MemoryRepository.create_knowledge", new_callable=AsyncMock) as mock_create_ki,
         patch(f"{_C}.MemoryRepository.update_knowledge", new_callable=AsyncMock) as mock_update_ki,
         patch(f"{_C}.MemoryRepository.supersede_knowledge", new_callable=AsyncMock),
         patch(f"{_C}.MemoryRepository.create_consolidation_log", new_callable=AsyncMock),
-        patch(f"{_C}.get_settings", return_value=MagicMock()),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
     ):
-        await run_consolidation("America/Sao_Paulo")
+        await _consolidate(user)
 
     # 2 new items created
     assert mock_create_ki.call_count == 2
@@ -382,6 +479,62 @@ async def test_knowledge_items_created_and_updated_without_duplicates() -> None:
     assert update_call[1] == existing_item_id
 
 
+async def test_near_duplicates_merged_and_counted() -> None:
+    user = _make_mock_user()
+    memory = _make_mock_memory()
+    messages = [_make_mock_message("user", "Trabalho com Python e TypeScript")]
+    existing_item = _make_knowledge_item(
+        content="Trabalha com Python e com TypeScript", area="professional"
+    )
+
+    async def _find_near_duplicate(
+        _session: object, _user_id: object, content: str, **_kw: object
+    ) -> MagicMock | None:
+        return existing_item if "Python" in content else None
+
+    mock_llm = MagicMock()
+    mock_llm.ainvoke = AsyncMock(return_value=_make_llm_json_response(_STANDARD_LLM_RESPONSE))
+
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(
+            f"{_C}.MemoryRepository.get_user_memories", new_callable=AsyncMock, return_value=memory
+        ),
+        patch(f"{_C}.ChatRepository.stream_messages_since", side_effect=_message_stream(messages)),
+        patch(
+            f"{_C}.MemoryRepository.get_consolidation_checkpoint",
+            new_callable=AsyncMock,
+            return_value=None,
+        ),
+        patch(f"{_C}.MemoryRepository.select_knowledge", new_callable=AsyncMock, return_value=[]),
+        patch(f"{_C}.check_contradictions", new_callable=AsyncMock, return_value=[]),
+        patch(f"{_C}.create_llm", return_value=mock_llm),
+        patch(f"{_C}.MemoryRepository.update_user_memories", new_callable=AsyncMock),
+        patch(f"{_C}.MemoryRepository.find_near_duplicate", side_effect=_find_near_duplicate),
+        patch(
+            f"{_C}.MemoryRepository.merge_duplicate_knowledge",
+            new_callable=AsyncMock,
+            return_value=existing_item,
+        ) as mock_merge,
+        patch(f"{_C}.MemoryRepository.create_knowledge", new_callable=AsyncMock) as mock_create_ki,
+        patch(f"{_C}.MemoryRepository.update_knowledge", new_callable=AsyncMock),
+        patch(f"{_C}.MemoryRepository.supersede_knowledge", new_callable=AsyncMock),
+        patch(
+            f"{_C}.MemoryRepository.create_consolidation_log", new_callable=AsyncMock
+        ) as mock_log,
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
+    ):
+        await _consolidate(user)
+
+    # The Python fact merged into the existing item; the insight was created
+    assert mock_merge.call_args[0][1:] == (existing_item.id, 0.95)
+    assert mock_create_ki.call_count == 1
+    assert mock_create_ki.call_args[0][1]["type"] == "insight"
+
+    data = mock_log.call_args[0][1]
+    assert (data["facts_created"], data["duplicates_merged"]) == (1, 1)
+
+
 # ---------------------------------------------------------------------------
 # #6 — Batch deduplication groups by type+area
 # ---------------------------------------------------------------------------
@@ -450,28 +603,57 @@ async def test_skip_user_no_messages_since_last_consolidation() -> None:
 
     with (
         patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
-        patch(f"{_C}.UserRepository.get_users_by_timezone", new_callable=AsyncMock, return_value=[user]),
         patch(f"{_C}.MemoryRepository.get_user_memories", new_callable=AsyncMock, return_value=memory),
-        patch(f"{_C}.ChatRepository.get_messages_since", new_callable=AsyncMock, return_value=[]),
-        patch(f"{_C}.MemoryRepository.search_knowledge", new_callable=AsyncMock, return_value=[]),
+        patch(f"{_C}.ChatRepository.stream_messages_since", side_effect=_message_stream([])),
+        patch(
+            f"{_C}.MemoryRepository.get_consolidation_checkpoint",
+            new_callable=AsyncMock,
+            return_value=None,
+        ),
+        patch(f"{_C}.MemoryRepository.select_knowledge", new_callable=AsyncMock, return_value=[]),
         patch(f"{_C}.check_contradictions", new_callable=AsyncMock, return_value=[]),
         patch(f"{_C}.create_llm", return_value=mock_llm),
         patch(f"{_C}.MemoryRepository.update_user_memories", new_callable=AsyncMock),
+        patch(
+            f"{_C}.MemoryRepository.find_near_duplicate", new_callable=AsyncMock, return_value=None
+        ),
         patch(f"{_C}.MemoryRepository.create_knowledge", new_callable=AsyncMock),
         patch(f"{_C}.MemoryRepository.update_knowledge", new_callable=AsyncMock),
         patch(f"{_C}.MemoryRepository.supersede_knowledge", new_callable=AsyncMock),
         patch(f"{_C}.MemoryRepository.create_consolidation_log", new_callable=AsyncMock),
-        patch(f"{_C}.get_settings", return_value=MagicMock()),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
     ):
-        result = await run_consolidation("America/Sao_Paulo")
+        result = await _consolidate(user)
 
-    assert result.users_skipped == 1
-    assert result.users_consolidated == 0
+    assert result["users_skipped"] == 1
+    assert result["users_consolidated"] == 0
 
     # LLM should NOT be called
     mock_llm.ainvoke.assert_not_called()
 
 
+async def test_ineligible_users_never_loaded() -> None:
+    """Users without new messages are filtered by the eligibility query, not per user."""
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
+        patch(
+            f"{_C}.UserRepository.get_consolidation_candidates",
+            new_callable=AsyncMock,
+            return_value=[],
+        ),
+        patch(
+            f"{_C}.JobRepository.enqueue_many", new_callable=AsyncMock, return_value=[]
+        ) as mock_enqueue,
+        patch(f"{_C}.MemoryRepository.get_user_memories", new_callable=AsyncMock) as mock_get_mem,
+    ):
+        created = await enqueue_consolidation("America/Sao_Paulo")
+
+    assert created == 0
+    assert mock_enqueue.call_args[0][1] == []
+    mock_get_mem.assert_not_called()
+
+
 # ---------------------------------------------------------------------------
 # #11 — Partial failure: one user fails, others continue
 # ---------------------------------------------------------------------------
@@ -500,24 +682,32 @@ async def test_partial_failure_one_user_fails_others_continue() -> None:
 
     with (
         patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
-        patch(f"{_C}.UserRepository.get_users_by_timezone", new_callable=AsyncMock, return_value=[user_a, user_b, user_c]),
         patch(f"{_C}.MemoryRepository.get_user_memories", new_callable=AsyncMock, side_effect=_get_memories),
-        patch(f"{_C}.ChatRepository.get_messages_since", new_callable=AsyncMock, return_value=msgs),
-        patch(f"{_C}.MemoryRepository.search_knowledge", new_callable=AsyncMock, return_value=[]),
+        patch(f"{_C}.ChatRepository.stream_messages_since", side_effect=_message_stream(msgs)),
+        patch(
+            f"{_C}.MemoryRepository.get_consolidation_checkpoint",
+            new_callable=AsyncMock,
+            return_value=None,
+        ),
+        patch(f"{_C}.MemoryRepository.select_knowledge", new_callable=AsyncMock, return_value=[]),
         patch(f"{_C}.check_contradictions", new_callable=AsyncMock, return_value=[]),
         patch(f"{_C}.create_llm", return_value=mock_llm),
         patch(f"{_C}.MemoryRepository.update_user_memories", new_callable=AsyncMock),
+        patch(
+            f"{_C}.MemoryRepository.find_near_duplicate", new_callable=AsyncMock, return_value=None
+        ),
         patch(f"{_C}.MemoryRepository.create_knowledge", new_callable=AsyncMock),
         patch(f"{_C}.MemoryRepository.update_knowledge", new_callable=AsyncMock),
         patch(f"{_C}.MemoryRepository.supersede_knowledge", new_callable=AsyncMock),
         patch(f"{_C}.MemoryRepository.create_consolidation_log", new_callable=AsyncMock) as mock_log,
-        patch(f"{_C}.get_settings", return_value=MagicMock()),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
     ):
-        result = await run_consolidation("America/Sao_Paulo")
+        results = [await _consolidate(user_a)]
+        with pytest.raises(RuntimeError, match="user B"):
+            await _consolidate(user_b, attempts=3)
+        results.append(await _consolidate(user_c))
 
-    assert result.users_processed == 3
-    assert result.users_consolidated == 2
-    assert result.errors == 1
+    assert [r["users_consolidated"] for r in results] == [1, 1]
 
     # _log_consolidation called with status="failed" for failing user
     failed_calls = [
@@ -563,6 +753,551 @@ async def test_consolidation_log_created_correctly() -> None:
     assert data["user_id"] == USER_A_ID
 
 
+# ---------------------------------------------------------------------------
+# Chunked map-reduce: token budget, checkpoint, resume
+# ---------------------------------------------------------------------------
+
+
+def _chunk_llm_response(content: str, bio: str) -> MagicMock:
+    return _make_llm_json_response(
+        {
+            "memory_updates": {"bio": bio, "currentGoals": [content]},
+            "new_knowledge_items": [
+                {"type": "fact", "area": "health", "content": content, "confidence": 0.8},
+                {"type": "fact", "area": "health", "content": "Corre 5km", "confidence": 0.7},
+            ],
+            "updated_knowledge_items": [],
+        }
+    )
+
+
+async def test_large_window_split_into_token_budgeted_chunks() -> None:
+    user = _make_mock_user()
+    memory = _make_mock_memory()
+    base = _dt.datetime(2026, 1, 15, 10, 0, tzinfo=_UTC)
+    # ~108 estimated tokens each; budget 250 fits two messages per chunk
+    messages = [
+        _make_mock_message("user", "x" * 400, created_at=base + _dt.timedelta(minutes=i))
+        for i in range(5)
+    ]
+
+    responses = [
+        _chunk_llm_response("Dorme mal", "Bio 1"),
+        _chunk_llm_response("Bebe café", "Bio 2"),
+        _chunk_llm_response("Medita", "Bio 3"),
+    ]
+    mock_llm = MagicMock()
+    mock_llm.ainvoke = AsyncMock(side_effect=responses)
+
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(
+            f"{_C}.MemoryRepository.get_user_memories", new_callable=AsyncMock, return_value=memory
+        ),
+        patch(f"{_C}.ChatRepository.stream_messages_since", side_effect=_message_stream(messages)),
+        patch(
+            f"{_C}.MemoryRepository.get_consolidation_checkpoint",
+            new_callable=AsyncMock,
+            return_value=None,
+        ),
+        patch(f"{_C}.MemoryRepository.select_knowledge", new_callable=AsyncMock, return_value=[]),
+        patch(f"{_C}.check_contradictions", new_callable=AsyncMock, return_value=[]),
+        patch(f"{_C}.create_llm", return_value=mock_llm),
+        patch(
+            f"{_C}.MemoryRepository.update_user_memories", new_callable=AsyncMock
+        ) as mock_update_mem,
+        patch(
+            f"{_C}.MemoryRepository.find_near_duplicate", new_callable=AsyncMock, return_value=None
+        ),
+        patch(f"{_C}.MemoryRepository.create_knowledge", new_callable=AsyncMock) as mock_create_ki,
+        patch(f"{_C}.MemoryRepository.update_knowledge", new_callable=AsyncMock),
+        patch(f"{_C}.MemoryRepository.supersede_knowledge", new_callable=AsyncMock),
+        patch(
+            f"{_C}.MemoryRepository.create_consolidation_log", new_callable=AsyncMock
+        ) as mock_log,
+        patch(f"{_C}.get_settings", return_value=_mock_settings(chunk_token_budget=250)),
+    ):
+        result = await _consolidate(user)
+
+    assert result["users_consolidated"] == 1
+    assert mock_llm.ainvoke.call_count == 3
+
+    # Reduce: duplicated item across chunks created once, chunk-specific items kept
+    created = [c[0][1]["content"] for c in mock_create_ki.call_args_list]
+    assert sorted(created) == sorted(["Dorme mal", "Corre 5km", "Bebe café", "Medita"])
+
+    # Latest scalar wins, lists are unioned in order
+    memory_update = mock_update_mem.call_args_list[0][0][-1]
+    assert memory_update["bio"] == "Bio 3"
+    assert memory_update["current_goals"] == ["Dorme mal", "Bebe café", "Medita"]
+
+    # Checkpoints before chunks 2 and 3, then the final log
+    statuses = [c[0][1]["status"] for c in mock_log.call_args_list]
+    assert statuses == ["partial", "partial", "completed"]
+    second_cp = mock_log.call_args_list[1][0][1]
+    assert second_cp["messages_processed"] == 4
+    # Each checkpoint carries only the newest chunk's raw output
+    assert second_cp["raw_output"]["checkpoint"]["raw_output"] == responses[1].content
+    assert second_cp["raw_output"]["checkpoint"]["cursor_id"] == str(messages[3].id)
+    assert mock_log.call_args_list[-1][0][1]["messages_processed"] == 5
+
+
+async def test_prompt_knowledge_selected_per_chunk_under_budget(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    user = _make_mock_user()
+    memory = _make_mock_memory()
+    base = _dt.datetime(2026, 1, 15, 10, 0, tzinfo=_UTC)
+    # Budget 250 fits two messages per chunk: two chunks
+    messages = [
+        _make_mock_message("user", f"{i}" * 400, created_at=base + _dt.timedelta(minutes=i))
+        for i in range(3)
+    ]
+    # ~30 estimated tokens each; budget 70 fits the two most relevant per chunk
+    first = [_make_knowledge_item(content=f"Primeiro {i} " + "a" * 30) for i in range(3)]
+    second = [_make_knowledge_item(content=f"Segundo {i} " + "b" * 30) for i in range(3)]
+
+    mock_llm = MagicMock()
+    mock_llm.ainvoke = AsyncMock(
+        side_effect=[
+            _chunk_llm_response("Dorme mal", "Bio 1"),
+            _chunk_llm_response("Bebe café", "Bio 2"),
+        ]
+    )
+
+    with (
+        caplog.at_level(logging.INFO, logger=_C),
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(
+            f"{_C}.MemoryRepository.get_user_memories", new_callable=AsyncMock, return_value=memory
+        ),
+        patch(f"{_C}.ChatRepository.stream_messages_since", side_effect=_message_stream(messages)),
+        patch(
+            f"{_C}.MemoryRepository.get_consolidation_checkpoint",
+            new_callable=AsyncMock,
+            return_value=None,
+        ),
+        patch(
+            f"{_C}.MemoryRepository.select_knowledge",
+            new_callable=AsyncMock,
+            side_effect=[first, second],
+        ) as mock_select,
+        patch(f"{_C}.check_contradictions", new_callable=AsyncMock, return_value=[]) as mock_check,
+        patch(f"{_C}.create_llm", return_value=mock_llm),
+        patch(f"{_C}.MemoryRepository.update_user_memories", new_callable=AsyncMock),
+        patch(
+            f"{_C}.MemoryRepository.find_near_duplicate", new_callable=AsyncMock, return_value=None
+        ),
+        patch(f"{_C}.MemoryRepository.create_knowledge", new_callable=AsyncMock),
+        patch(f"{_C}.MemoryRepository.update_knowledge", new_callable=AsyncMock),
+        patch(f"{_C}.MemoryRepository.supersede_knowledge", new_callable=AsyncMock),
+        patch(f"{_C}.MemoryRepository.create_consolidation_log", new_callable=AsyncMock),
+        patch(
+            f"{_C}.get_settings",
+            return_value=_mock_settings(chunk_token_budget=250, knowledge_token_budget=70),
+        ),
+        patch(f"{_C}.build_consolidation_prompt", return_value="prompt") as mock_prompt,
+    ):
+        await _consolidate(user)
+
+    # Each chunk is scored against its own messages
+    assert [c[0][2] for c in mock_select.call_args_list] == [
+        f"{'0' * 400} {'1' * 400}",
+        "2" * 400,
+    ]
+    shown = [[k["id"] for k in c[0][2]] for c in mock_prompt.call_args_list]
+    assert shown == [[str(k.id) for k in first[:2]], [str(k.id) for k in second[:2]]]
+    assert "3 knowledge items, 1 dropped" in caplog.text
+
+    # Contradiction candidates: every item shown to a prompt
+    candidates = {k.id for k in mock_check.call_args_list[-1][0][1]}
+    assert candidates == {k.id for k in first[:2] + second[:2]}
+    # Deduplication compares items across both chunks' selections
+    assert [len(c[0][1]) for c in mock_check.call_args_list[:3]] == [1, 2, 3]
+
+
+async def test_resume_from_checkpoint_after_failed_run() -> None:
+    from app.workers.consolidation_prompt import ConsolidationResponse
+
+    user = _make_mock_user()
+    memory = _make_mock_memory()
+    base = _dt.datetime(2026, 1, 15, 10, 0, tzinfo=_UTC)
+    # ~108 estimated tokens each; budget 250 fits two messages per chunk
+    messages = [
+        _make_mock_message("user", "x" * 400, created_at=base + _dt.timedelta(minutes=i))
+        for i in range(6)
+    ]
+
+    partial = ConsolidationResponse.model_validate(
+        {
+            "memory_updates": {"bio": "Bio antiga"},
+            "new_knowledge_items": [{"type": "fact", "content": "Já extraído", "confidence": 0.9}],
+            "updated_knowledge_items": [],
+        }
+    )
+    # The crashed run logged "failed" after this checkpoint; the repository
+    # still hands back the checkpoint for the window
+    checkpoint = MagicMock()
+    checkpoint.status = "partial"
+    checkpoint.consolidated_from = memory.created_at
+    checkpoint.messages_processed = 2
+    shown = _make_knowledge_item(content="Mostrado ao chunk anterior")
+    checkpoint.raw_output = {
+        "checkpoint": {
+            "cursor_created_at": messages[1].created_at.isoformat(),
+            "cursor_id": str(messages[1].id),
+            "partial": partial.model_dump(by_alias=True, exclude_none=True),
+            "knowledge_ids": [str(shown.id)],
+            "raw_output": "{}",
+        }
+    }
+
+    responses = [_chunk_llm_response("Novo", "Bio nova"), _chunk_llm_response("Medita", "Bio 3")]
+    mock_llm = MagicMock()
+    mock_llm.ainvoke = AsyncMock(side_effect=responses)
+
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(
+            f"{_C}.MemoryRepository.get_user_memories", new_callable=AsyncMock, return_value=memory
+        ),
+        patch(f"{_C}.ChatRepository.stream_messages_since", side_effect=_message_stream(messages)),
+        patch(
+            f"{_C}.MemoryRepository.get_consolidation_checkpoint",
+            new_callable=AsyncMock,
+            return_value=checkpoint,
+        ) as mock_get_cp,
+        patch(
+            f"{_C}.MemoryRepository.get_active_knowledge",
+            new_callable=AsyncMock,
+            return_value=[shown],
+        ) as mock_active,
+        patch(f"{_C}.MemoryRepository.select_knowledge", new_callable=AsyncMock, return_value=[]),
+        patch(f"{_C}.check_contradictions", new_callable=AsyncMock, return_value=[]),
+        patch(f"{_C}.create_llm", return_value=mock_llm),
+        patch(f"{_C}.MemoryRepository.update_user_memories", new_callable=AsyncMock),
+        patch(
+            f"{_C}.MemoryRepository.find_near_duplicate", new_callable=AsyncMock, return_value=None
+        ),
+        patch(f"{_C}.MemoryRepository.create_knowledge", new_callable=AsyncMock) as mock_create_ki,
+        patch(f"{_C}.MemoryRepository.update_knowledge", new_callable=AsyncMock),
+        patch(f"{_C}.MemoryRepository.supersede_knowledge", new_callable=AsyncMock),
+        patch(
+            f"{_C}.MemoryRepository.create_consolidation_log", new_callable=AsyncMock
+        ) as mock_log,
+        patch(f"{_C}.get_settings", return_value=_mock_settings(chunk_token_budget=250)),
+        patch(f"{_C}.build_consolidation_prompt", return_value="prompt") as mock_prompt,
+    ):
+        result = await _consolidate(user)
+
+    assert result["users_consolidated"] == 1
+    # Looked up for the current window, not just the newest log row
+    assert mock_get_cp.call_args[0][1:] == (USER_A_ID, memory.created_at)
+
+    # Only messages after the checkpoint cursor are sent to the LLM
+    assert [c[0][0] for c in mock_prompt.call_args_list] == [messages[2:4], messages[4:]]
+
+    # Checkpointed partial result is merged with the new chunks
+    created = {c[0][1]["content"] for c in mock_create_ki.call_args_list}
+    assert created == {"Já extraído", "Novo", "Medita", "Corre 5km"}
+
+    # The loaded checkpoint is not written again: one new checkpoint, then the final log
+    logs = [c[0][1] for c in mock_log.call_args_list]
+    assert [log["status"] for log in logs] == ["partial", "completed"]
+    new_cp = logs[0]["raw_output"]["checkpoint"]
+    assert new_cp["cursor_id"] == str(messages[3].id)
+    assert new_cp["raw_output"] == responses[0].content
+    assert logs[0]["messages_processed"] == 4
+
+    # Knowledge shown before the crash is restored and carried forward
+    assert mock_active.call_args[0][1:] == (USER_A_ID, [shown.id])
+    assert new_cp["knowledge_ids"] == [str(shown.id)]
+    assert logs[1]["messages_processed"] == 6
+
+
+# ---------------------------------------------------------------------------
+# Batch LLM mode
+# ---------------------------------------------------------------------------
+
+
+def _batch_job(payload: dict[str, Any]) -> MagicMock:
+    job = MagicMock()
+    job.id = uuid.uuid4()
+    job.payload = payload
+    return job
+
+
+async def test_batch_mode_submits_then_applies_results(tmp_path: Path) -> None:
+    users = [_make_mock_user(USER_A_ID), _make_mock_user(USER_B_ID)]
+    memories = {USER_A_ID: _make_mock_memory(), USER_B_ID: _make_mock_memory()}
+    messages = [_make_mock_message("user", "Comecei a correr 5km")]
+    ki = _make_knowledge_item(content="Pesa 80kg")
+
+    async def _respond(prompt: str) -> str:
+        return json.dumps(_STANDARD_LLM_RESPONSE)
+
+    client = LocalBatchClient(tmp_path, responder=_respond)
+
+    async def _get_memories(_session: object, user_id: uuid.UUID) -> MagicMock:
+        return memories[user_id]
+
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
+        patch(f"{_C}.create_batch_client", return_value=client),
+        patch(
+            f"{_C}.UserRepository.get_consolidation_candidates",
+            new_callable=AsyncMock,
+            return_value=_candidates(*users),
+        ),
+        patch(f"{_C}.MemoryRepository.get_user_memories", side_effect=_get_memories),
+        patch(
+            f"{_C}.MemoryRepository.reset_consolidation_trigger", new_callable=AsyncMock
+        ) as mock_reset,
+        patch(f"{_C}.ChatRepository.stream_messages_since", side_effect=_message_stream(messages)),
+        patch(f"{_C}.MemoryRepository.select_knowledge", new_callable=AsyncMock, return_value=[ki]),
+        patch(f"{_C}.JobRepository", autospec=True) as mock_jobs,
+        patch(f"{_C}.create_llm") as mock_create_llm,
+    ):
+        mock_enqueue = mock_jobs.enqueue_many
+        # No per-user consolidation job is running
+        mock_jobs.try_lock_user_queue.return_value = True
+        submitted = await handle_consolidation_llm_batch_job(
+            _batch_job({"timezone": "America/Sao_Paulo"})
+        )
+
+        assert submitted["users"] == 2
+        assert submitted["requests"] == 2
+        assert mock_reset.call_count == 2
+        # Nothing is sent to the synchronous model
+        mock_create_llm.assert_not_called()
+
+        [poll] = mock_enqueue.call_args[0][1]
+        assert poll["queue"] == CONSOLIDATION_LLM_BATCH_QUEUE
+        assert poll["payload"]["batch_id"] == submitted["batch_id"]
+        state = poll["payload"]["users"][str(USER_A_ID)]
+        assert state["chunks"] == 1
+        assert state["messages_processed"] == 1
+        assert state["knowledge_ids"] == [str(ki.id)]
+
+        # User B was consolidated by another run while the batch was pending
+        memories[USER_B_ID].last_consolidated_at = _dt.datetime(2026, 1, 20, tzinfo=_UTC)
+
+        with (
+            patch(
+                f"{_C}.MemoryRepository.get_active_knowledge",
+                new_callable=AsyncMock,
+                return_value=[ki],
+            ) as mock_active,
+            patch(f"{_C}.check_contradictions", new_callable=AsyncMock, return_value=[]),
+            patch(
+                f"{_C}.MemoryRepository.update_user_memories", new_callable=AsyncMock
+            ) as mock_update_mem,
+            patch(
+                f"{_C}.MemoryRepository.find_near_duplicate",
+                new_callable=AsyncMock,
+                return_value=None,
+            ),
+            patch(
+                f"{_C}.MemoryRepository.create_knowledge", new_callable=AsyncMock
+            ) as mock_create_ki,
+            patch(f"{_C}.MemoryRepository.update_knowledge", new_callable=AsyncMock),
+            patch(f"{_C}.MemoryRepository.supersede_knowledge", new_callable=AsyncMock),
+            patch(
+                f"{_C}.MemoryRepository.create_consolidation_log", new_callable=AsyncMock
+            ) as mock_log,
+        ):
+            collected = await handle_consolidation_llm_batch_job(_batch_job(poll["payload"]))
+
+    assert collected["status"] == "ended"
+    assert collected["users_consolidated"] == 1
+    assert collected["users_skipped"] == 1
+    assert collected["users_failed"] == 0
+
+    assert mock_active.call_args[0][1] == USER_A_ID
+    assert mock_active.call_args[0][2] == [ki.id]
+    assert mock_create_ki.call_count == 2
+    assert mock_update_mem.call_args_list[-1][0][2] == {
+        "last_consolidated_at": _dt.datetime.fromisoformat(state["consolidated_to"])
+    }
+    [log_call] = mock_log.call_args_list
+    assert log_call[0][1]["user_id"] == USER_A_ID
+    assert log_call[0][1]["status"] == "completed"
+
+
+async def test_batch_mode_resubmits_failures_then_falls_back(tmp_path: Path) -> None:
+    user = _make_mock_user()
+    memory = _make_mock_memory()
+    messages = [_make_mock_message("user", "Comecei a correr 5km")]
+
+    async def _respond(prompt: str) -> str:
+        return "não é JSON"
+
+    waiting = LocalBatchClient(tmp_path)
+    answering = LocalBatchClient(tmp_path, responder=_respond)
+
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
+        patch(
+            f"{_C}.UserRepository.get_consolidation_candidates",
+            new_callable=AsyncMock,
+            return_value=_candidates(user),
+        ),
+        patch(
+            f"{_C}.MemoryRepository.get_user_memories", new_callable=AsyncMock, return_value=memory
+        ),
+        patch(f"{_C}.MemoryRepository.reset_consolidation_trigger", new_callable=AsyncMock),
+        patch(f"{_C}.ChatRepository.stream_messages_since", side_effect=_message_stream(messages)),
+        patch(f"{_C}.MemoryRepository.select_knowledge", new_callable=AsyncMock, return_value=[]),
+        patch(
+            f"{_C}.MemoryRepository.create_consolidation_log", new_callable=AsyncMock
+        ) as mock_log,
+        patch(f"{_C}.JobRepository.enqueue_many", new_callable=AsyncMock) as mock_enqueue,
+    ):
+        with patch(f"{_C}.create_batch_client", return_value=waiting):
+            await handle_consolidation_llm_batch_job(_batch_job({"timezone": "America/Sao_Paulo"}))
+            first_poll = mock_enqueue.call_args[0][1][0]["payload"]
+
+            # Still running: the poll job re-enqueues itself
+            result = await handle_consolidation_llm_batch_job(_batch_job(first_poll))
+            assert result["status"] == "in_progress"
+            second_poll = mock_enqueue.call_args[0][1][0]
+            assert second_poll["payload"]["polls"] == 1
+            assert (
+                second_poll["dedupe_key"] != mock_enqueue.call_args_list[0][0][1][0]["dedupe_key"]
+            )
+
+        with patch(f"{_C}.create_batch_client", return_value=answering):
+            # Unparseable output: rebuilt over the same window and resubmitted
+            result = await handle_consolidation_llm_batch_job(_batch_job(second_poll["payload"]))
+            assert result["users_failed"] == 1
+            resubmitted = mock_enqueue.call_args[0][1][0]["payload"]
+            assert resubmitted["batch_id"] != first_poll["batch_id"]
+            assert resubmitted["resubmits"] == 1
+            assert resubmitted["users"] == first_poll["users"]
+
+            # Resubmits exhausted: handed to a regular consolidation job
+            await handle_consolidation_llm_batch_job(_batch_job(resubmitted))
+
+    [fallback] = mock_enqueue.call_args[0][1]
+    assert fallback["queue"] == CONSOLIDATION_QUEUE
+    assert fallback["user_id"] == USER_A_ID
+    assert fallback["payload"]["user_id"] == str(USER_A_ID)
+    assert fallback["concurrency_key"] == f"{CONSOLIDATION_QUEUE}:{USER_A_ID}"
+    mock_log.assert_not_called()
+
+
+async def test_batch_mode_retry_after_submit_reuses_the_batch(tmp_path: Path) -> None:
+    user = _make_mock_user()
+    messages = [_make_mock_message("user", "Comecei a correr 5km")]
+    job = _batch_job({"timezone": "America/Sao_Paulo"})
+
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
+        patch(f"{_C}.create_batch_client", return_value=LocalBatchClient(tmp_path)),
+        patch(
+            f"{_C}.UserRepository.get_consolidation_candidates",
+            new_callable=AsyncMock,
+            return_value=_candidates(user),
+        ),
+        patch(
+            f"{_C}.MemoryRepository.get_user_memories",
+            new_callable=AsyncMock,
+            return_value=_make_mock_memory(),
+        ),
+        patch(f"{_C}.MemoryRepository.reset_consolidation_trigger", new_callable=AsyncMock),
+        patch(f"{_C}.ChatRepository.stream_messages_since", side_effect=_message_stream(messages)),
+        patch(f"{_C}.MemoryRepository.select_knowledge", new_callable=AsyncMock, return_value=[]),
+        patch(f"{_C}.JobRepository", autospec=True) as mock_jobs,
+    ):
+        # The batch is submitted, then enqueuing its poll fails
+        mock_jobs.enqueue_many.side_effect = [RuntimeError("DB down"), []]
+        with pytest.raises(RuntimeError):
+            await handle_consolidation_llm_batch_job(job)
+
+        # The retry sees the batch recorded on the job and only enqueues the poll
+        job.payload = mock_jobs.set_payload.call_args[0][2]
+        result = await handle_consolidation_llm_batch_job(job)
+
+    assert len(list(tmp_path.iterdir())) == 1
+    submitted = job.payload["submitted"]
+    assert result == {"batch_id": submitted["batch_id"], "status": "submitted"}
+    [poll] = mock_jobs.enqueue_many.call_args[0][1]
+    assert poll["payload"] == submitted
+    assert poll["dedupe_key"] == mock_jobs.enqueue_many.call_args_list[0][0][1][0]["dedupe_key"]
+
+
+async def test_batch_mode_gives_up_after_max_polls(tmp_path: Path) -> None:
+    client = LocalBatchClient(tmp_path)
+    batch_id = await client.submit([])
+    payload = {
+        "timezone": "America/Sao_Paulo",
+        "batch_id": batch_id,
+        "users": {str(USER_A_ID): {}, str(USER_B_ID): {}},
+        "resubmits": 0,
+        "polls": 1,
+    }
+
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
+        patch(f"{_C}.create_batch_client", return_value=client),
+        patch(f"{_C}.JobRepository.enqueue_many", new_callable=AsyncMock) as mock_enqueue,
+    ):
+        # Still running, one poll left
+        result = await handle_consolidation_llm_batch_job(_batch_job(payload))
+        assert result["status"] == "in_progress"
+
+        # Last poll: the batch is abandoned and its users go to sync jobs
+        result = await handle_consolidation_llm_batch_job(_batch_job({**payload, "polls": 2}))
+
+    assert result["status"] == "expired"
+    assert result["users_failed"] == 2
+    fallback = mock_enqueue.call_args[0][1]
+    assert [job["user_id"] for job in fallback] == [USER_A_ID, USER_B_ID]
+    assert all(job["queue"] == CONSOLIDATION_QUEUE for job in fallback)
+
+
+def test_merge_consolidation_responses_is_order_deterministic() -> None:
+    from app.workers.consolidation_prompt import (
+        ConsolidationResponse,
+        merge_consolidation_responses,
+    )
+
+    first = ConsolidationResponse.model_validate(
+        {
+            "memory_updates": {"occupation": "Dev", "values": ["Família"]},
+            "new_knowledge_items": [
+                {"type": "fact", "content": "Gosta de café", "confidence": 0.6}
+            ],
+            "updated_knowledge_items": [{"id": "k1", "content": "v1", "confidence": 0.5}],
+        }
+    )
+    second = ConsolidationResponse.model_validate(
+        {
+            "memory_updates": {"values": ["Saúde", "Família"]},
+            "new_knowledge_items": [
+                {"type": "fact", "content": "gosta de CAFÉ ", "confidence": 0.9}
+            ],
+            "updated_knowledge_items": [{"id": "k1", "confidence": 0.8}],
+        }
+    )
+
+    merged = merge_consolidation_responses([first, second])
+    again = merge_consolidation_responses([first, second])
+
+    assert merged == again
+    assert merged.memory_updates.occupation == "Dev"
+    assert merged.memory_updates.values == ["Família", "Saúde"]
+    assert len(merged.new_knowledge_items) == 1
+    assert merged.new_knowledge_items[0].confidence == 0.9
+    assert len(merged.updated_knowledge_items) == 1
+    assert merged.updated_knowledge_items[0].content == "v1"
+    assert merged.updated_knowledge_items[0].confidence == 0.8
+
+
 # ---------------------------------------------------------------------------
 # Bonus: _resolve_priority 3-tier logic
 # ---------------------------------------------------------------------------
@@ -0,0 +1,207 @@
+"""Unit tests for the debt schedule engine — visibility, balances, installments, projections."""
+
+from __future__ import annotations
+
+import itertools
+import uuid
+from collections.abc import Iterator
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.db.models.enums import DebtStatus
+from app.db.models.finance import Debt, DebtPayment
+from app.tools.finance import _debt_schedule
+from app.tools.finance._debt_schedule import (
+    DebtSchedule,
+    clear_debt_schedule_cache,
+    load_debt_schedule,
+    month_index,
+    month_label,
+)
+from app.tools.finance._helpers import add_months
+
+
+@pytest.fixture(autouse=True)
+def empty_cache() -> Iterator[None]:
+    clear_debt_schedule_cache()
+    yield
+    clear_debt_schedule_cache()
+
+
+def _debt(
+    *,
+    status: str = "active",
+    negotiated: bool = True,
+    start: str | None = "2025-11",
+    installments: int | None = 12,
+    current: int = 1,
+    amount: float = 100.0,
+    total: float = 1200.0,
+) -> MagicMock:
+    debt = MagicMock(spec=Debt)
+    debt.id = uuid.uuid4()
+    debt.status = DebtStatus(status)
+    debt.is_negotiated = negotiated
+    debt.start_month_year = start
+    debt.total_installments = installments
+    debt.current_installment = current
+    debt.installment_amount = amount
+    debt.total_amount = total
+    return debt
+
+
+def _payment(debt: MagicMock, number: int, paid_at: str) -> MagicMock:
+    p = MagicMock(spec=DebtPayment)
+    p.debt_id = debt.id
+    p.installment_number = number
+    p.paid_at = datetime.fromisoformat(paid_at)
+    return p
+
+
+def _reference_visible(debt: MagicMock, target: str) -> bool:
+    """The scalar §3.6 rules the engine replaces."""
+    status = debt.status.value
+    if not debt.is_negotiated or status == "defaulted":
+        return True
+    if not debt.start_month_year or not debt.total_installments:
+        return True
+    end = add_months(debt.start_month_year, debt.total_installments - 1)
+    if status in ("paid_off", "settled"):
+        return target <= end
+    return debt.start_month_year <= target <= end
+
+
+class TestMonths:
+    def test_round_trip(self) -> None:
+        for label in ("2025-01", "2025-12", "2026-02", "0999-07"):
+            assert month_label(month_index(label)) == label
+
+    def test_rejects_malformed(self) -> None:
+        for bad in ("2026-13", "2026-00", "2026/02", "fev/2026"):
+            with pytest.raises(ValueError):
+                month_index(bad)
+
+
+class TestVisibility:
+    def test_matches_scalar_rules_for_every_combination(self) -> None:
+        debts = [
+            _debt(status=status, negotiated=negotiated, start=start, installments=installments)
+            for status, negotiated, start, installments in itertools.product(
+                [s.value for s in DebtStatus],
+                (True, False),
+                ("2025-11", None),
+                (12, 1, None),
+            )
+        ]
+        schedule = DebtSchedule.from_debts(debts, [])
+        grid = schedule.visibility("2025-06", "2027-01")
+        months = [add_months("2025-06", k) for k in range(grid.shape[1])]
+        for row, debt in enumerate(debts):
+            expected = [_reference_visible(debt, m) for m in months]
+            assert grid[row].tolist() == expected, (debt.status, debt.start_month_year)
+
+    def test_visible_rows(self) -> None:
+        ended = _debt(start="2024-01", installments=6)
+        running = _debt(start="2026-01", installments=6)
+        schedule = DebtSchedule.from_debts([ended, running], [])
+        assert schedule.visible_rows("2026-02").tolist() == [1]
+
+
+class TestBalances:
+    def test_paid_remaining_and_percent(self) -> None:
+        debts = [
+            _debt(current=4, amount=900.0, total=10000.0),
+            _debt(current=13, amount=1000.0, total=10000.0),  # overpaid → clamped
+            _debt(total=0.0),
+        ]
+        schedule = DebtSchedule.from_debts(debts, [])
+        assert schedule.paid_amount.tolist() == [2700.0, 12000.0, 0.0]
+        assert schedule.remaining_amount.tolist() == [7300.0, 0.0, 0.0]
+        assert schedule.percent_complete.tolist() == [27.0, 120.0, 0.0]
+
+
+class TestInstallments:
+    def test_range_is_ordered_by_month_then_debt(self) -> None:
+        a = _debt(start="2026-01", installments=2)
+        b = _debt(start="2025-12", installments=3)
+        paid = _payment(a, 1, "2025-12-28")
+        schedule = DebtSchedule.from_debts([a, b, _debt(negotiated=False)], [paid])
+
+        got = schedule.installments_between("2026-01", "2026-03")
+
+        assert [(i.month_year, i.debt.id, i.number) for i in got] == [
+            ("2026-01", a.id, 1),
+            ("2026-01", b.id, 2),
+            ("2026-02", a.id, 2),
+            ("2026-02", b.id, 3),
+        ]
+        assert got[0].payment is paid
+        assert all(i.payment is None for i in got[1:])
+
+
+class TestProjections:
+    def test_without_payments_counts_from_start(self) -> None:
+        schedule = DebtSchedule.from_debts([_debt(start="2026-01", installments=10)], [])
+        [projection] = schedule.projections("2026-02")
+        assert projection is not None
+        assert projection.payoff_month == "2026-10"
+        assert projection.remaining_months == 10
+        assert projection.avg_payments_per_month == 1.0
+
+    def test_velocity_from_payment_months(self) -> None:
+        debt = _debt(start="2025-11", installments=12, current=7)
+        # Six installments paid over three months, two per month
+        payments = [
+            _payment(debt, n, f"{month}-{day:02d}")
+            for n, (month, day) in enumerate(
+                itertools.product(("2025-11", "2025-12", "2026-01"), (5, 20)), start=1
+            )
+        ]
+        [projection] = DebtSchedule.from_debts([debt], payments).projections("2026-02")
+        assert projection is not None
+        assert projection.avg_payments_per_month == 2.0
+        assert projection.is_regular is True
+        assert projection.remaining_months == 3
+        assert projection.payoff_month == "2026-05"
+
+    def test_irregular_payments(self) -> None:
+        debt = _debt(installments=12, current=5)
+        payments = [
+            _payment(debt, 1, "2025-11-05"),
+            _payment(debt, 2, "2025-11-06"),
+            _payment(debt, 3, "2025-11-07"),
+            _payment(debt, 4, "2026-01-05"),
+        ]
+        [projection] = DebtSchedule.from_debts([debt], payments).projections("2026-02")
+        assert projection is not None
+        assert projection.is_regular is False
+        # 4 paid over 3 months
+        assert projection.avg_payments_per_month == 1.33
+
+    def test_no_projection_when_not_in_installments(self) -> None:
+        debts = [
+            _debt(status="paid_off", current=13),
+            _debt(negotiated=False),
+            _debt(installments=None),
+            _debt(current=13),
+        ]
+        assert DebtSchedule.from_debts(debts, []).projections("2026-02") == [None] * 4
+
+
+class TestCache:
+    async def test_loads_once_per_user_and_month(self) -> None:
+        repo = MagicMock()
+        repo.get_debts = AsyncMock(return_value=[_debt()])
+        repo.get_debt_payments_for_debts = AsyncMock(return_value=[])
+        user_id = uuid.uuid4()
+
+        with patch.object(_debt_schedule, "FinanceRepository", repo):
+            first = await load_debt_schedule(AsyncMock(), user_id, "2026-02")
+            again = await load_debt_schedule(AsyncMock(), user_id, "2026-02")
+            next_month = await load_debt_schedule(AsyncMock(), user_id, "2026-03")
+
+        assert first is again
+        assert next_month is not first
+        assert repo.get_debts.await_count == 2
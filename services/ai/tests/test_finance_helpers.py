@@ -1,16 +1,21 @@
-"""Unit tests for finance tool helpers — TZ utils + ensure_recurring."""
+"""Unit tests for finance tool helpers — TZ utils + ensure_recurring + monthly rollups."""
 
 from __future__ import annotations
 
 import uuid
+from collections.abc import Iterator
 from datetime import date
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from sqlalchemy.dialects import postgresql
 
-from app.db.models.enums import BillCategory, BillStatus
-from app.db.models.finance import Bill
+from app.db.models.finance import Bill, Income
+from app.tools.finance import _helpers
+from app.tools.finance._aggregates import month_totals_from_rollup
 from app.tools.finance._helpers import (
+    add_months,
     ensure_recurring_for_month,
     get_current_month_tz,
     get_days_until_due_day,
@@ -19,6 +24,13 @@ from app.tools.finance._helpers import (
     months_diff,
     resolve_month_year,
 )
+from app.tools.finance._rollups import (
+    RollupCheck,
+    apply_rollup_deltas,
+    check_finance_rollups,
+    merge_rollup_deltas,
+    reconcile_finance_rollups,
+)
 
 # ---------------------------------------------------------------------------
 # Timezone helpers
@@ -121,123 +133,291 @@ class TestMonthsDiff:
         assert months_diff("2026-05", "2026-02") == -3
 
 
+class TestAddMonths:
+    def test_forward_across_year(self) -> None:
+        assert add_months("2025-11", 3) == "2026-02"
+
+    def test_backward_across_year(self) -> None:
+        assert add_months("2026-01", -1) == "2025-12"
+
+    def test_twelve_months(self) -> None:
+        assert add_months("2026-02", -12) == "2025-02"
+
+
 # ---------------------------------------------------------------------------
 # ensure_recurring_for_month
 # ---------------------------------------------------------------------------
 
+_USER_ID = uuid.UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")
+
+
+@pytest.fixture(autouse=True)
+def clear_materialized_memo() -> Iterator[None]:
+    _helpers._materialized.clear()
+    yield
+    _helpers._materialized.clear()
+
 
-def _make_bill(
-    bill_id: str,
-    group_id: str,
-    month_year: str,
-    *,
-    is_recurring: bool = True,
-    status: str = "paid",
-) -> MagicMock:
-    bill = MagicMock(spec=Bill)
-    bill.id = uuid.UUID(bill_id)
-    bill.user_id = uuid.UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")
-    bill.name = "Test Bill"
-    bill.category = BillCategory.UTILITIES
-    bill.amount = 100.0
-    bill.due_day = 10
-    bill.currency = "BRL"
-    bill.recurring_group_id = uuid.UUID(group_id) if group_id else None
-    bill.is_recurring = is_recurring
-    bill.status = BillStatus(status)
-    bill.paid_at = None
-    bill.month_year = month_year
-    return bill
+@pytest.fixture(autouse=True)
+def mock_delete_rollups() -> Iterator[AsyncMock]:
+    with patch(
+        "app.tools.finance._helpers.FinanceRepository.delete_rollups", new_callable=AsyncMock
+    ) as mock:
+        yield mock
+
+
+def _session_returning(*created_counts: int) -> AsyncMock:
+    """Session whose successive INSERT ... RETURNING calls yield ``created_counts`` rows."""
+    results = []
+    for count in created_counts:
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = ["2026-02"] * count
+        results.append(result)
+    session = AsyncMock()
+    session.execute = AsyncMock(side_effect=results)
+    return session
+
+
+def _sql(session: AsyncMock) -> str:
+    stmt = session.execute.call_args[0][0]
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
 
 
 class TestEnsureRecurringForMonth:
     @pytest.mark.asyncio
-    async def test_creates_items_from_previous_month(self) -> None:
-        session = AsyncMock()
-        user_id = uuid.UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")
-        group_id = "11111111-1111-1111-1111-111111111111"
+    async def test_single_set_based_insert(self) -> None:
+        session = _session_returning(3)
 
-        prev_bill = _make_bill("22222222-2222-2222-2222-222222222222", group_id, "2026-01")
+        count = await ensure_recurring_for_month(session, _USER_ID, "2026-02", Bill)
 
-        # Mock: prev month has 1 recurring bill
-        prev_result = MagicMock()
-        prev_result.scalars.return_value.all.return_value = [prev_bill]
-        # Mock: target month has no existing items
-        existing_result = MagicMock()
-        existing_result.scalars.return_value.all.return_value = []
+        assert count == 3
+        session.execute.assert_awaited_once()
+        sql = _sql(session)
+        assert sql.startswith("INSERT INTO bills")
+        # Latest item per group, carried into every later month of the window
+        assert "PARTITION BY bills.recurring_group_id ORDER BY bills.month_year DESC" in sql
+        assert "unnest" in sql
+        assert "'2025-03'" in sql and "'2026-02'" in sql
+        assert "ON CONFLICT (user_id, recurring_group_id, month_year) DO NOTHING" in sql
 
-        session.execute = AsyncMock(side_effect=[prev_result, existing_result])
-        session.add_all = MagicMock()
-        session.flush = AsyncMock()
+    @pytest.mark.asyncio
+    async def test_resets_status_and_propagates_canceled_items(self) -> None:
+        """Canceled recurring items still propagate; only is_recurring=False stops a group."""
+        session = _session_returning(1)
 
-        count = await ensure_recurring_for_month(session, user_id, "2026-02", Bill)
+        await ensure_recurring_for_month(session, _USER_ID, "2026-02", Bill)
 
-        assert count == 1
-        session.add_all.assert_called_once()
-        added_items = session.add_all.call_args[0][0]
-        assert len(added_items) == 1
-        assert added_items[0].month_year == "2026-02"
+        sql = _sql(session)
+        source_filter = sql[sql.index("FROM bills") : sql.index(") AS ranked")]
+        assert "status" not in source_filter
+        assert "CAST('pending' AS bill_status)" in sql
+        assert "latest.is_recurring IS true" in sql
 
     @pytest.mark.asyncio
-    async def test_idempotent_skips_existing(self) -> None:
+    async def test_created_months_drop_their_rollups(self, mock_delete_rollups: AsyncMock) -> None:
         session = AsyncMock()
-        user_id = uuid.UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")
-        group_id = "11111111-1111-1111-1111-111111111111"
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = ["2026-01", "2026-02", "2026-01"]
+        session.execute = AsyncMock(return_value=result)
 
-        prev_bill = _make_bill("22222222-2222-2222-2222-222222222222", group_id, "2026-01")
+        await ensure_recurring_for_month(session, _USER_ID, "2026-02", Bill)
 
-        prev_result = MagicMock()
-        prev_result.scalars.return_value.all.return_value = [prev_bill]
-        # Target month already has this group_id
-        existing_result = MagicMock()
-        existing_result.scalars.return_value.all.return_value = [uuid.UUID(group_id)]
+        mock_delete_rollups.assert_awaited_once_with(session, _USER_ID, ["2026-01", "2026-02"])
 
-        session.execute = AsyncMock(side_effect=[prev_result, existing_result])
+    @pytest.mark.asyncio
+    async def test_complete_month_is_memoized(self, mock_delete_rollups: AsyncMock) -> None:
+        session = _session_returning(0)
 
-        count = await ensure_recurring_for_month(session, user_id, "2026-02", Bill)
+        assert await ensure_recurring_for_month(session, _USER_ID, "2026-02", Bill) == 0
+        assert await ensure_recurring_for_month(session, _USER_ID, "2026-02", Bill) == 0
 
-        assert count == 0
-        session.add_all.assert_not_called()
+        # Second read skips the statement entirely
+        session.execute.assert_awaited_once()
+        mock_delete_rollups.assert_not_awaited()
 
     @pytest.mark.asyncio
-    async def test_no_previous_month_items(self) -> None:
-        session = AsyncMock()
-        user_id = uuid.UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")
+    async def test_memo_is_per_user_month_and_model(self) -> None:
+        session = _session_returning(0, 0, 0)
 
-        prev_result = MagicMock()
-        prev_result.scalars.return_value.all.return_value = []
+        await ensure_recurring_for_month(session, _USER_ID, "2026-02", Bill)
+        await ensure_recurring_for_month(session, _USER_ID, "2026-03", Bill)
+        await ensure_recurring_for_month(session, _USER_ID, "2026-02", Income)
 
-        session.execute = AsyncMock(return_value=prev_result)
+        assert session.execute.await_count == 3
 
-        count = await ensure_recurring_for_month(session, user_id, "2026-02", Bill)
+    @pytest.mark.asyncio
+    async def test_insert_is_not_memoized(self) -> None:
+        """Rows created by a call may still be rolled back with the caller's transaction."""
+        session = _session_returning(2, 0)
+
+        await ensure_recurring_for_month(session, _USER_ID, "2026-02", Bill)
+        await ensure_recurring_for_month(session, _USER_ID, "2026-02", Bill)
 
-        assert count == 0
+        assert session.execute.await_count == 2
 
     @pytest.mark.asyncio
-    async def test_propagates_canceled_items(self) -> None:
-        """Canceled recurring items should still propagate to future months."""
-        session = AsyncMock()
-        user_id = uuid.UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")
-        group_id = "11111111-1111-1111-1111-111111111111"
+    async def test_memo_expires(self) -> None:
+        session = _session_returning(0, 0)
+
+        with patch("app.tools.finance._helpers.time.monotonic", side_effect=[0.0, 1000.0, 1000.0]):
+            await ensure_recurring_for_month(session, _USER_ID, "2026-02", Bill)
+            await ensure_recurring_for_month(session, _USER_ID, "2026-02", Bill)
+
+        assert session.execute.await_count == 2
+
+
+# ---------------------------------------------------------------------------
+# Monthly rollups
+# ---------------------------------------------------------------------------
+
 
-        # Canceled bill from prev month should still be picked up
-        canceled_bill = _make_bill(
-            "22222222-2222-2222-2222-222222222222", group_id, "2026-01", status="canceled"
+class TestFinanceRollups:
+    def test_merge_adds_and_drops_empty_buckets(self) -> None:
+        totals = {
+            "bill:housing:pending": {"expected": 1500.0, "actual": 0.0, "count": 1},
+            "expense:food:active": {"expected": 100.0, "actual": 80.1, "count": 2},
+        }
+
+        merged = merge_rollup_deltas(
+            totals,
+            {
+                "bill:housing:pending": (-1500.0, 0.0, -1),
+                "bill:housing:paid": (1500.0, 1500.0, 1),
+                "expense:food:active": (50.0, 49.9, 1),
+            },
         )
 
-        prev_result = MagicMock()
-        prev_result.scalars.return_value.all.return_value = [canceled_bill]
-        existing_result = MagicMock()
-        existing_result.scalars.return_value.all.return_value = []
+        assert merged == {
+            "bill:housing:paid": {"expected": 1500.0, "actual": 1500.0, "count": 1},
+            "expense:food:active": {"expected": 150.0, "actual": 130.0, "count": 3},
+        }
+        # Input is not mutated
+        assert totals["bill:housing:pending"]["count"] == 1
+
+    def test_month_totals_from_rollup_matches_live_semantics(self) -> None:
+        totals = {
+            "bill:housing:paid": {"expected": 1500.0, "actual": 1500.0, "count": 1},
+            "bill:utilities:pending": {"expected": 200.0, "actual": 0.0, "count": 2},
+            "bill:other:canceled": {"expected": 99.0, "actual": 0.0, "count": 1},
+            "expense:food:active": {"expected": 800.0, "actual": 600.0, "count": 3},
+            "expense:food:excluded": {"expected": 50.0, "actual": 50.0, "count": 1},
+            "income:salary:active": {"expected": 5000.0, "actual": 5200.0, "count": 1},
+            "debt_payment::paid": {"expected": 900.0, "actual": 900.0, "count": 1},
+        }
+
+        month = month_totals_from_rollup("2026-01", totals)
+
+        assert month.month_year == "2026-01"
+        # Canceled bills are counted but not summed; excluded expenses ignored
+        assert (month.bills_total, month.bills_paid) == (1700.0, 1500.0)
+        assert (month.bills_paid_count, month.bills_pending_count) == (1, 2)
+        assert month.bills_canceled_count == 1
+        assert (month.expenses_expected, month.expenses_actual) == (800.0, 600.0)
+        assert (month.income_expected, month.income_actual) == (5000.0, 5200.0)
+        assert month.debt_payments == 900.0
+
+    @pytest.mark.asyncio
+    async def test_check_reports_drifted_and_missing_months(self) -> None:
+        fresh = {"expense:food:active": {"expected": 10.0, "actual": 10.0, "count": 1}}
+        stale = {"expense:food:active": {"expected": 10.0, "actual": 0.0, "count": 1}}
+        stored = [
+            MagicMock(month_year="2026-01", totals=fresh),
+            MagicMock(month_year="2026-02", totals=stale),
+        ]
+        months = ["2026-01", "2026-02", "2026-03"]
+
+        with (
+            patch(
+                "app.tools.finance._rollups.compute_rollup_totals",
+                new_callable=AsyncMock,
+                return_value={"2026-01": fresh, "2026-02": fresh, "2026-03": {}},
+            ),
+            patch(
+                "app.tools.finance._rollups.FinanceRepository.get_rollups",
+                new_callable=AsyncMock,
+                return_value=stored,
+            ),
+        ):
+            check = await check_finance_rollups(AsyncMock(), _USER_ID, months)
+
+        assert check == RollupCheck(checked=3, drifted=("2026-02",), missing=("2026-03",))
 
-        session.execute = AsyncMock(side_effect=[prev_result, existing_result])
-        session.add_all = MagicMock()
-        session.flush = AsyncMock()
+    @pytest.mark.asyncio
+    async def test_reconcile_locks_rows_before_recomputing(self) -> None:
+        calls: list[str] = []
+        totals = {"expense:food:active": {"expected": 10.0, "actual": 10.0, "count": 1}}
+
+        async def _lock(*_args: object) -> list[MagicMock]:
+            calls.append("lock")
+            return [MagicMock(month_year="2026-01", totals={})]
+
+        async def _compute(*_args: object) -> dict[str, Any]:
+            calls.append("compute")
+            return {"2026-01": totals}
+
+        async def _save(*_args: object) -> None:
+            calls.append("save")
+
+        with (
+            patch("app.tools.finance._rollups.FinanceRepository.lock_rollups", side_effect=_lock),
+            patch("app.tools.finance._rollups.compute_rollup_totals", side_effect=_compute),
+            patch(
+                "app.tools.finance._rollups.FinanceRepository.save_reconciled_rollups",
+                side_effect=_save,
+            ),
+        ):
+            check = await reconcile_finance_rollups(AsyncMock(), _USER_ID, ["2026-01"])
+
+        # A delta can't land between the recompute and the upsert
+        assert calls == ["lock", "compute", "save"]
+        assert check == RollupCheck(checked=1, drifted=("2026-01",))
 
-        count = await ensure_recurring_for_month(session, user_id, "2026-02", Bill)
+    @pytest.mark.asyncio
+    async def test_deltas_skip_months_without_rollup(self) -> None:
+        with (
+            patch(
+                "app.tools.finance._rollups.FinanceRepository.lock_rollup",
+                new_callable=AsyncMock,
+                return_value=None,
+            ),
+            patch(
+                "app.tools.finance._rollups.FinanceRepository.set_rollup_totals",
+                new_callable=AsyncMock,
+            ) as mock_set,
+        ):
+            applied = await apply_rollup_deltas(
+                AsyncMock(), _USER_ID, "2026-02", {"expense:food:active": (1.0, 1.0, 1)}
+            )
+
+        assert applied is False
+        mock_set.assert_not_awaited()
 
-        # Canceled items still propagate
-        assert count == 1
-        added = session.add_all.call_args[0][0][0]
-        # Reset field: new item should have status="pending" (not "canceled")
-        assert added.status == "pending"
+    @pytest.mark.asyncio
+    async def test_deltas_mark_the_rollup_maintained(self) -> None:
+        rollup = MagicMock(id="r1", totals={})
+        with (
+            patch(
+                "app.tools.finance._rollups.FinanceRepository.lock_rollup",
+                new_callable=AsyncMock,
+                return_value=rollup,
+            ),
+            patch(
+                "app.tools.finance._rollups.FinanceRepository.mark_rollup_maintained",
+                new_callable=AsyncMock,
+            ) as mock_mark,
+            patch(
+                "app.tools.finance._rollups.FinanceRepository.set_rollup_totals",
+                new_callable=AsyncMock,
+            ) as mock_set,
+        ):
+            session = AsyncMock()
+            applied = await apply_rollup_deltas(
+                session, _USER_ID, "2026-02", {"expense:food:active": (1.0, 1.0, 1)}
+            )
+
+        assert applied is True
+        # Otherwise the commit-time trigger drops the row just updated
+        mock_mark.assert_awaited_once_with(session, _USER_ID, "2026-02")
+        mock_set.assert_awaited_once_with(
+            session, "r1", {"expense:food:active": {"expected": 1.0, "actual": 1.0, "count": 1}}
+        )
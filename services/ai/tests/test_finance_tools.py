@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import json
 import uuid
+from collections.abc import Iterator
 from datetime import date, datetime
 from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
@@ -29,6 +30,7 @@ from app.db.models.finance import (
     Investment,
     VariableExpense,
 )
+from app.tools.finance._debt_schedule import clear_debt_schedule_cache
 from app.tools.finance.create_expense import create_expense
 from app.tools.finance.get_bills import get_bills
 from app.tools.finance.get_debt_payment_history import get_debt_payment_history
@@ -48,6 +50,24 @@ from app.tools.finance.mark_bill_paid import mark_bill_paid
 TEST_USER_ID = "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
 
 
+@pytest.fixture(autouse=True)
+def empty_debt_schedule_cache() -> Iterator[None]:
+    clear_debt_schedule_cache()
+    yield
+    clear_debt_schedule_cache()
+
+
+@pytest.fixture(autouse=True)
+def mock_rollup_deltas() -> Iterator[AsyncMock]:
+    """Write tools apply monthly rollup deltas; record them instead of hitting the DB."""
+    mock = AsyncMock(return_value=True)
+    with (
+        patch("app.tools.finance.create_expense.apply_rollup_deltas", mock),
+        patch("app.tools.finance.mark_bill_paid.apply_rollup_deltas", mock),
+    ):
+        yield mock
+
+
 def _make_config(user_id: str = TEST_USER_ID) -> dict[str, Any]:
     mock_session = AsyncMock()
     mock_session_cm = AsyncMock()
@@ -497,7 +517,7 @@ async def test_get_debt_payment_history_invalid_uuid() -> None:
 @patch("app.tools.finance.get_debt_progress.get_today_tz")
 @patch("app.tools.finance.get_debt_progress.get_current_month_tz")
 @patch("app.tools.finance.get_debt_progress.get_user_session")
-@patch("app.tools.finance.get_debt_progress.FinanceRepository")
+@patch("app.tools.finance._debt_schedule.FinanceRepository")
 async def test_get_debt_progress_with_projection(
     mock_repo: MagicMock,
     mock_session: MagicMock,
@@ -537,7 +557,7 @@ async def test_get_debt_progress_with_projection(
 @patch("app.tools.finance.get_debt_progress.get_today_tz")
 @patch("app.tools.finance.get_debt_progress.get_current_month_tz")
 @patch("app.tools.finance.get_debt_progress.get_user_session")
-@patch("app.tools.finance.get_debt_progress.FinanceRepository")
+@patch("app.tools.finance._debt_schedule.FinanceRepository")
 async def test_get_debt_progress_paid_off_no_projection(
     mock_repo: MagicMock,
     mock_session: MagicMock,
@@ -572,7 +592,7 @@ async def test_get_debt_progress_paid_off_no_projection(
 @patch("app.tools.finance.get_upcoming_installments.get_today_tz")
 @patch("app.tools.finance.get_upcoming_installments.get_current_month_tz")
 @patch("app.tools.finance.get_upcoming_installments.get_user_session")
-@patch("app.tools.finance.get_upcoming_installments.FinanceRepository")
+@patch("app.tools.finance._debt_schedule.FinanceRepository")
 async def test_get_upcoming_installments_status_logic(
     mock_repo: MagicMock,
     mock_session: MagicMock,
@@ -604,7 +624,7 @@ async def test_get_upcoming_installments_status_logic(
 @patch("app.tools.finance.get_upcoming_installments.get_today_tz")
 @patch("app.tools.finance.get_upcoming_installments.get_current_month_tz")
 @patch("app.tools.finance.get_upcoming_installments.get_user_session")
-@patch("app.tools.finance.get_upcoming_installments.FinanceRepository")
+@patch("app.tools.finance._debt_schedule.FinanceRepository")
 async def test_get_upcoming_installments_paid_early(
     mock_repo: MagicMock,
     mock_session: MagicMock,
@@ -636,74 +656,70 @@ async def test_get_upcoming_installments_paid_early(
 # ---------------------------------------------------------------------------
 
 
+def _aggregate_row(month_year: str, **overrides: Any) -> dict[str, Any]:
+    """One row of the load_finance_aggregate statement (NULLs where nothing matched)."""
+    row: dict[str, Any] = {
+        "month_year": month_year,
+        "income_expected": None,
+        "income_actual": None,
+        "bills_total": None,
+        "bills_paid": None,
+        "bills_pending_count": 0,
+        "bills_paid_count": 0,
+        "bills_overdue_count": 0,
+        "bills_canceled_count": 0,
+        "expenses_expected": None,
+        "expenses_actual": None,
+        "debt_payments": None,
+        "debt_count": 1,
+        "debt_total_amount": 10800.0,
+        "debt_total_paid": 2700.0,
+        "debt_monthly_installment": 900.0,
+        "debt_negotiated_count": 1,
+        "debt_pending_negotiation_count": 0,
+        "inv_count": 1,
+        "inv_total_current": 5000.0,
+        "inv_total_goal": 10000.0,
+        "inv_monthly_contribution": 500.0,
+        "inv_average_progress": 50.0,
+    }
+    row.update(overrides)
+    return row
+
+
+def _summary_session(rows: list[dict[str, Any]]) -> tuple[AsyncMock, AsyncMock]:
+    mock_session_obj = AsyncMock()
+    result = MagicMock()
+    result.mappings.return_value.all.return_value = rows
+    mock_session_obj.execute = AsyncMock(return_value=result)
+
+    mock_session_cm = AsyncMock()
+    mock_session_cm.__aenter__ = AsyncMock(return_value=mock_session_obj)
+    mock_session_cm.__aexit__ = AsyncMock(return_value=None)
+    return mock_session_obj, mock_session_cm
+
+
 @pytest.mark.asyncio
 @patch("app.tools.finance.get_finance_summary.ensure_recurring_for_month")
 @patch("app.tools.finance.get_finance_summary.get_user_session")
-@patch("app.tools.finance.get_finance_summary.FinanceRepository")
 async def test_get_finance_summary_current_month(
-    mock_repo: MagicMock,
     mock_session: MagicMock,
     mock_ensure: AsyncMock,
 ) -> None:
     mock_ensure.return_value = 0
-    mock_session_obj = AsyncMock()
-
-    # Income sums
-    income_row = MagicMock()
-    income_row.__getitem__ = lambda self, i: [5000.0, 5200.0][i]
-
-    # Bills total
-    bills_total = 2000.0
-    paid_bills = 1500.0
-
-    # Bill status counts
-    bill_status_rows = [
-        (BillStatus.PENDING, 2),
-        (BillStatus.PAID, 3),
-    ]
-
-    # Expenses
-    exp_row = MagicMock()
-    exp_row.__getitem__ = lambda self, i: [1000.0, 800.0][i]
-
-    # Build a list of return values for sequential session.execute calls
-    income_result = MagicMock()
-    income_result.one.return_value = income_row
-
-    bill_status_result = MagicMock()
-    bill_status_result.all.return_value = bill_status_rows
-
-    exp_result = MagicMock()
-    exp_result.one.return_value = exp_row
-
-    mock_session_obj.execute = AsyncMock(
-        side_effect=[
-            income_result,  # income sums
-            bill_status_result,  # bill status counts
-            exp_result,  # expense sums
-        ]
+    row = _aggregate_row(
+        "2026-02",
+        income_expected=5000.0,
+        income_actual=5200.0,
+        bills_total=2000.0,
+        bills_paid=1500.0,
+        bills_pending_count=2,
+        bills_paid_count=3,
+        expenses_expected=1000.0,
+        expenses_actual=800.0,
+        debt_payments=100.0,
     )
-    mock_session_obj.scalar = AsyncMock(
-        side_effect=[
-            bills_total,  # bills total
-            paid_bills,  # paid bills
-            100.0,  # debt payments this month
-        ]
-    )
-
-    # Debts
-    debt = _make_debt(installment_amt=900.0, current_inst=4)
-    mock_repo.get_debts = AsyncMock(return_value=[debt])
-    mock_repo.sum_payments_by_month_year = AsyncMock(return_value=100.0)
-
-    # Investments
-    inv = _make_investment(current=5000.0, goal=10000.0, monthly=500.0)
-    mock_repo.get_investments = AsyncMock(return_value=[inv])
-
-    mock_session_cm = AsyncMock()
-    mock_session_cm.__aenter__ = AsyncMock(return_value=mock_session_obj)
-    mock_session_cm.__aexit__ = AsyncMock(return_value=None)
-    mock_session.return_value = mock_session_cm
+    mock_session_obj, mock_session.return_value = _summary_session([row])
 
     result = await get_finance_summary.ainvoke({"period": "current_month"}, _make_config())
     parsed = json.loads(result)
@@ -713,11 +729,75 @@ async def test_get_finance_summary_current_month(
     assert "breakdown" in parsed
     assert "debts" in parsed
     assert "investments" in parsed
+    assert "months" not in parsed
+
+    # Every KPI comes from one aggregate statement
+    assert mock_session_obj.execute.await_count == 1
+    assert mock_ensure.await_count == 3
 
     # KPI: spent = paid_bills + expenses_actual + debt_payments = 1500 + 800 + 100
     assert parsed["kpis"]["spent"] == 2400.0
     # KPI: balance = income_actual - spent = 5200 - 2400
     assert parsed["kpis"]["balance"] == 2800.0
+    # KPI: budgeted = bills + expenses_expected + installment = 2000 + 1000 + 900
+    assert parsed["kpis"]["budgeted"] == 3900.0
+    assert parsed["billsCount"] == {"pending": 2, "paid": 3, "overdue": 0, "canceled": 0}
+    assert parsed["debts"]["totalRemaining"] == 8100.0
+    assert parsed["investments"]["averageProgress"] == 50.0
+
+
+@pytest.mark.asyncio
+@patch("app.tools.finance._aggregates.FinanceRepository.get_rollups")
+@patch("app.tools.finance.get_finance_summary.get_current_month_tz")
+@patch("app.tools.finance.get_finance_summary.ensure_recurring_for_month")
+@patch("app.tools.finance.get_finance_summary.get_user_session")
+async def test_get_finance_summary_year_is_year_to_date(
+    mock_session: MagicMock,
+    mock_ensure: AsyncMock,
+    mock_current_month: MagicMock,
+    mock_get_rollups: AsyncMock,
+) -> None:
+    mock_current_month.return_value = "2026-03"
+    # January is rolled up; February has no rollup yet and March is still open
+    january = MagicMock(
+        month_year="2026-01",
+        totals={
+            "income:salary:active": {"expected": 5000.0, "actual": 5000.0, "count": 1},
+            "bill:housing:paid": {"expected": 1000.0, "actual": 1000.0, "count": 1},
+        },
+    )
+    mock_get_rollups.return_value = [january]
+    rows = [
+        _aggregate_row("2026-02"),
+        _aggregate_row("2026-03", income_actual=5000.0, expenses_actual=300.0),
+    ]
+    mock_session_obj, mock_session.return_value = _summary_session(rows)
+
+    result = await get_finance_summary.ainvoke({"period": "year"}, _make_config())
+    parsed = json.loads(result)
+
+    mock_ensure.assert_not_awaited()
+    # Only closed months are looked up in the rollups
+    assert mock_get_rollups.await_args.args[2] == ["2026-01", "2026-02"]
+    stmt = mock_session_obj.execute.await_args.args[0]
+    params = stmt.compile().params
+    # Only this year's months without a rollup are aggregated live
+    assert ["2026-02", "2026-03"] in params.values()
+
+    assert parsed["monthYear"] == "2026 (ano)"
+    assert parsed["kpis"]["income"] == 10000.0
+    assert parsed["kpis"]["spent"] == 1300.0
+    # Installment counted once per month covered
+    assert parsed["kpis"]["budgeted"] == 1000.0 + 3 * 900.0
+    assert parsed["billsCount"]["paid"] == 1
+    assert [m["monthYear"] for m in parsed["months"]] == ["2026-01", "2026-02", "2026-03"]
+    assert parsed["months"][1] == {
+        "monthYear": "2026-02",
+        "income": 0.0,
+        "budgeted": 900.0,
+        "spent": 0.0,
+        "balance": 0.0,
+    }
 
 
 # ---------------------------------------------------------------------------
@@ -728,7 +808,9 @@ async def test_get_finance_summary_current_month(
 @pytest.mark.asyncio
 @patch("app.tools.finance.mark_bill_paid.get_user_session")
 @patch("app.tools.finance.mark_bill_paid.FinanceRepository")
-async def test_mark_bill_paid_success(mock_repo: MagicMock, mock_session: MagicMock) -> None:
+async def test_mark_bill_paid_success(
+    mock_repo: MagicMock, mock_session: MagicMock, mock_rollup_deltas: AsyncMock
+) -> None:
     bill = _make_bill(name="Internet", amount=100.0, status="pending")
     updated_bill = _make_bill(name="Internet", amount=100.0, status="paid")
 
@@ -749,6 +831,14 @@ async def test_mark_bill_paid_success(mock_repo: MagicMock, mock_session: MagicM
     assert "paidAt" in parsed
     assert "Internet" in parsed["message"]
 
+    # Rollup: the bill moves from the pending bucket to the paid one
+    _, user_id, month_year, deltas = mock_rollup_deltas.await_args.args
+    assert (str(user_id), month_year) == (TEST_USER_ID, "2026-02")
+    assert deltas == {
+        "bill:housing:pending": (-100.0, -0.0, -1),
+        "bill:housing:paid": (100.0, 100.0, 1),
+    }
+
 
 @pytest.mark.asyncio
 @patch("app.tools.finance.mark_bill_paid.get_user_session")
@@ -829,7 +919,9 @@ async def test_mark_bill_paid_invalid_uuid() -> None:
 @pytest.mark.asyncio
 @patch("app.tools.finance.create_expense.get_user_session")
 @patch("app.tools.finance.create_expense.FinanceRepository")
-async def test_create_expense_success(mock_repo: MagicMock, mock_session: MagicMock) -> None:
+async def test_create_expense_success(
+    mock_repo: MagicMock, mock_session: MagicMock, mock_rollup_deltas: AsyncMock
+) -> None:
     expense = _make_expense(name="Almoço", actual=50.0)
 
     mock_repo.create_expense = AsyncMock(return_value=expense)
@@ -848,6 +940,9 @@ async def test_create_expense_success(mock_repo: MagicMock, mock_session: MagicM
     assert parsed["expense"]["category"] == "food"
     assert "Alimentação" in parsed["message"]
 
+    _, _, _, deltas = mock_rollup_deltas.await_args.args
+    assert deltas == {"expense:food:active": (50.0, 50.0, 1)}
+
 
 @pytest.mark.asyncio
 @patch("app.tools.finance.create_expense.get_user_session")
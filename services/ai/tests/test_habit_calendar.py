@@ -0,0 +1,218 @@
+"""Unit tests for habit completion calendars — bitmap streaks, schedules, history cache."""
+
+from __future__ import annotations
+
+import random
+import uuid
+from collections.abc import Iterator
+from datetime import date, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.db.models.enums import HabitFrequency
+from app.db.models.tracking import Habit
+from app.db.repositories.tracking import HabitStatus
+from app.tools.tracking import _habit_calendar
+from app.tools.tracking._habit_calendar import (
+    HabitCalendar,
+    clear_habit_calendar_cache,
+    habit_weekdays,
+    load_habit_calendars,
+    remember_completion,
+)
+
+USER_ID = uuid.UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")
+# A Monday
+MONDAY = date(2026, 2, 2)
+
+
+def _habit(
+    frequency: HabitFrequency = HabitFrequency.DAILY, frequency_days: list[int] | None = None
+) -> Habit:
+    habit = MagicMock(spec=Habit)
+    habit.id = uuid.uuid4()
+    habit.frequency = frequency
+    habit.frequency_days = frequency_days
+    return habit
+
+
+def _days(first: date, count: int) -> list[date]:
+    return [first + timedelta(days=i) for i in range(count)]
+
+
+def _reference_streak(done: set[date], on_date: date, weekdays: int) -> int:
+    """Day-by-day walk, as in the API's calculateStreak."""
+    day = on_date if on_date in done else on_date - timedelta(days=1)
+    earliest = min(done, default=on_date)
+    streak = 0
+    while day >= earliest:
+        if weekdays >> day.weekday() & 1:
+            if day not in done:
+                break
+            streak += 1
+        day -= timedelta(days=1)
+    return streak
+
+
+@pytest.fixture(autouse=True)
+def empty_cache() -> Iterator[None]:
+    clear_habit_calendar_cache()
+    yield
+    clear_habit_calendar_cache()
+
+
+# ---------------------------------------------------------------------------
+# Schedules
+# ---------------------------------------------------------------------------
+
+
+class TestHabitWeekdays:
+    def test_frequencies(self) -> None:
+        assert habit_weekdays(_habit(HabitFrequency.DAILY)) == 0b1111111
+        assert habit_weekdays(_habit(HabitFrequency.WEEKDAYS)) == 0b0011111
+        assert habit_weekdays(_habit(HabitFrequency.WEEKENDS)) == 0b1100000
+
+    def test_custom_days_use_sunday_zero(self) -> None:
+        # 0 = Sunday, 1 = Monday, 3 = Wednesday
+        habit = _habit(HabitFrequency.CUSTOM, [0, 1, 3])
+        assert habit_weekdays(habit) == (1 << 6) | (1 << 0) | (1 << 2)
+
+    def test_custom_without_days_expects_nothing(self) -> None:
+        assert habit_weekdays(_habit(HabitFrequency.CUSTOM, None)) == 0
+
+
+# ---------------------------------------------------------------------------
+# Streaks and rates
+# ---------------------------------------------------------------------------
+
+
+class TestHabitCalendar:
+    def test_empty_calendar(self) -> None:
+        calendar = HabitCalendar.from_dates([])
+        assert calendar.current_streak(MONDAY) == 0
+        assert calendar.longest_streak(MONDAY) == 0
+        assert calendar.completion_rate(MONDAY, MONDAY + timedelta(days=6)) == 0.0
+
+    def test_streak_longer_than_recent_window(self) -> None:
+        today = date(2026, 10, 18)
+        calendar = HabitCalendar.from_dates(_days(today - timedelta(days=399), 400))
+        assert calendar.current_streak(today) == 400
+        assert calendar.longest_streak(today) == 400
+
+    def test_today_not_done_yet_keeps_streak(self) -> None:
+        calendar = HabitCalendar.from_dates(_days(MONDAY, 3))
+        assert calendar.current_streak(MONDAY + timedelta(days=3)) == 3
+        # A missed day before today breaks it
+        assert calendar.current_streak(MONDAY + timedelta(days=4)) == 0
+
+    def test_weekday_habit_skips_weekends(self) -> None:
+        # Mon-Fri of two weeks; weekend in between not completed
+        dates = _days(MONDAY, 5) + _days(MONDAY + timedelta(days=7), 5)
+        calendar = HabitCalendar.from_dates(dates)
+        friday = MONDAY + timedelta(days=11)
+        assert calendar.current_streak(friday, 0b0011111) == 10
+        assert calendar.current_streak(friday) == 5
+
+    def test_weekly_custom_habit(self) -> None:
+        # Every Monday for 20 weeks
+        dates = [MONDAY + timedelta(weeks=w) for w in range(20)]
+        calendar = HabitCalendar.from_dates(dates)
+        mondays = 1 << 0
+        last = dates[-1] + timedelta(days=3)
+        assert calendar.current_streak(last, mondays) == 20
+        assert calendar.completion_rate(dates[0], dates[-1], mondays) == 1.0
+
+    def test_longest_streak_between_misses(self) -> None:
+        dates = _days(MONDAY, 3) + _days(MONDAY + timedelta(days=4), 7) + [MONDAY + timedelta(20)]
+        calendar = HabitCalendar.from_dates(dates)
+        assert calendar.longest_streak(MONDAY + timedelta(days=20)) == 7
+        assert calendar.current_streak(MONDAY + timedelta(days=20)) == 1
+
+    def test_completion_rate_window_before_first_completion(self) -> None:
+        calendar = HabitCalendar.from_dates(_days(MONDAY, 5))
+        rate = calendar.completion_rate(MONDAY - timedelta(days=5), MONDAY + timedelta(days=4))
+        assert rate == 0.5
+
+    def test_with_completion_and_overlay(self) -> None:
+        calendar = HabitCalendar.from_dates([MONDAY])
+        earlier = calendar.with_completion(MONDAY - timedelta(days=2))
+        assert earlier.start == MONDAY - timedelta(days=2)
+        assert earlier.has(MONDAY) and earlier.has(MONDAY - timedelta(days=2))
+
+        full = HabitCalendar.from_dates(_days(MONDAY, 10))
+        # Day 8 was deleted since the history was loaded
+        refreshed = full.overlay(MONDAY + timedelta(days=7), [MONDAY + timedelta(days=7)])
+        assert refreshed.has(MONDAY + timedelta(days=6))
+        assert not refreshed.has(MONDAY + timedelta(days=8))
+
+    @pytest.mark.parametrize("weekdays", [0b1111111, 0b0011111, 0b1100000, 0b0000101])
+    def test_matches_day_by_day_walk(self, weekdays: int) -> None:
+        rng = random.Random(weekdays)
+        start = date(2024, 1, 1)
+        for _ in range(50):
+            done = {start + timedelta(days=i) for i in range(300) if rng.random() < 0.85}
+            calendar = HabitCalendar.from_dates(done)
+            on_date = start + timedelta(days=rng.randrange(250, 320))
+            assert calendar.current_streak(on_date, weekdays) == _reference_streak(
+                done, on_date, weekdays
+            )
+
+
+# ---------------------------------------------------------------------------
+# Loading and caching
+# ---------------------------------------------------------------------------
+
+
+class TestLoadHabitCalendars:
+    async def test_short_histories_need_no_query(self) -> None:
+        habit = _habit()
+        status = HabitStatus(habit=habit, completed=True, recent_dates=[MONDAY])
+        session = AsyncMock()
+
+        calendars = await load_habit_calendars(session, USER_ID, [status], limit=60)
+
+        assert calendars[habit.id].has(MONDAY)
+        session.execute.assert_not_awaited()
+
+    async def test_long_history_loaded_once_and_refreshed(self) -> None:
+        habit = _habit()
+        today = MONDAY + timedelta(days=199)
+        history = _days(MONDAY, 200)
+        recent = sorted(history, reverse=True)[:60]
+        status = HabitStatus(habit=habit, completed=True, recent_dates=recent)
+
+        with patch.object(
+            _habit_calendar.TrackingRepository,
+            "get_completion_dates",
+            AsyncMock(return_value={habit.id: history}),
+        ) as mock_history:
+            session = AsyncMock()
+            calendars = await load_habit_calendars(session, USER_ID, [status], limit=60)
+            assert calendars[habit.id].current_streak(today) == 200
+
+            # Second read hits the cache; recent window reflects a deleted day
+            newer = [d for d in recent if d != today - timedelta(days=3)]
+            status = HabitStatus(habit=habit, completed=True, recent_dates=newer)
+            calendars = await load_habit_calendars(session, USER_ID, [status], limit=59)
+
+        mock_history.assert_awaited_once()
+        assert calendars[habit.id].current_streak(today) == 3
+        assert calendars[habit.id].longest_streak(today) == 196
+
+    async def test_remember_completion_updates_cached_history(self) -> None:
+        habit = _habit()
+        history = _days(MONDAY, 60)
+        status = HabitStatus(habit=habit, completed=False, recent_dates=history[::-1])
+
+        with patch.object(
+            _habit_calendar.TrackingRepository,
+            "get_completion_dates",
+            AsyncMock(return_value={habit.id: history}),
+        ):
+            await load_habit_calendars(AsyncMock(), USER_ID, [status], limit=60)
+
+        old = MONDAY - timedelta(days=1)
+        remember_completion(USER_ID, habit.id, old)
+        cached = _habit_calendar._cached_history(USER_ID)
+        assert cached is not None and cached[habit.id].has(old)
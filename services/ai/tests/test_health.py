@@ -1,3 +1,6 @@
+from unittest.mock import MagicMock
+
+from fastapi import FastAPI
 from httpx import AsyncClient
 
 
@@ -14,3 +17,29 @@ async def test_health_accessible_without_auth(client: AsyncClient) -> None:
     """Health endpoint must NOT require authentication."""
     response = await client.get("/health")
     assert response.status_code == 200
+
+
+async def test_health_reports_scheduler_disabled_without_elector(client: AsyncClient) -> None:
+    response = await client.get("/health")
+    assert response.json()["scheduler"] == "disabled"
+
+
+async def test_health_reports_scheduler_leadership(app: FastAPI, client: AsyncClient) -> None:
+    app.state.scheduler_elector = MagicMock(is_leader=True)
+    response = await client.get("/health")
+    assert response.json()["scheduler"] == "leader"
+
+    app.state.scheduler_elector = MagicMock(is_leader=False)
+    response = await client.get("/health")
+    assert response.json()["scheduler"] == "follower"
+
+
+async def test_health_reports_tool_cache_stats(client: AsyncClient) -> None:
+    response = await client.get("/health")
+    stats = response.json()["toolCache"]
+    assert {"entries", "hits", "misses", "hitRate", "tools"} <= stats.keys()
+
+
+async def test_health_reports_llm_scheduler_stats(client: AsyncClient) -> None:
+    response = await client.get("/health")
+    assert isinstance(response.json()["llmScheduler"], dict)
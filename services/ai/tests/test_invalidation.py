@@ -0,0 +1,240 @@
+"""Unit tests for LISTEN/NOTIFY cache invalidation (mocked connections, no real DB)."""
+
+from __future__ import annotations
+
+import json
+import time
+import uuid
+from collections.abc import Iterator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.db import invalidation
+from app.db.invalidation import CHANNEL, InvalidationListener, dispatch, parse_event, subscribe
+from app.tools.finance import _debt_schedule, _helpers
+from app.tools.finance._debt_schedule import clear_debt_schedule_cache, invalidate_debt_schedules
+from app.tools.finance._helpers import invalidate_materialized_months
+from app.tools.tracking import _habit_calendar
+from app.tools.tracking._habit_calendar import (
+    clear_habit_calendar_cache,
+    invalidate_habit_calendars,
+)
+
+_I = "app.db.invalidation"
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(autouse=True)
+def subscribers() -> Iterator[list[MagicMock]]:
+    """Isolated subscriber list; yields the mocks registered by the test."""
+    with patch.object(invalidation, "_subscribers", []):
+        yield []
+
+
+def _mock_conn() -> AsyncMock:
+    conn = AsyncMock()
+    conn.execution_options = AsyncMock(return_value=conn)
+    raw = MagicMock()
+    raw.driver_connection.add_listener = AsyncMock()
+    conn.get_raw_connection = AsyncMock(return_value=raw)
+    return conn
+
+
+def _make_listener(*conns: AsyncMock) -> InvalidationListener:
+    engine = MagicMock()
+    engine.connect = AsyncMock(side_effect=list(conns))
+    settings = MagicMock(CACHE_INVALIDATION_CHECK_INTERVAL_SECONDS=0.01)
+    with patch(f"{_I}.get_settings", return_value=settings):
+        return InvalidationListener(engine)
+
+
+def _subscriber(subscribers: list[MagicMock]) -> MagicMock:
+    invalidator = MagicMock()
+    subscribe(invalidator)
+    subscribers.append(invalidator)
+    return invalidator
+
+
+# ---------------------------------------------------------------------------
+# Events
+# ---------------------------------------------------------------------------
+
+
+class TestParseEvent:
+    def test_valid_payload(self) -> None:
+        payload = json.dumps({"user_id": "u-1", "domain": "finance"})
+        assert parse_event(payload) == ("u-1", "finance")
+
+    def test_missing_fields_are_none(self) -> None:
+        assert parse_event("{}") == (None, None)
+
+    def test_malformed_payloads(self) -> None:
+        for payload in ("not json", "[1, 2]", '{"user_id": 5}', '{"domain": ["x"]}'):
+            assert parse_event(payload) is None
+
+
+class TestDispatch:
+    def test_failing_subscriber_does_not_stop_others(self, subscribers: list[MagicMock]) -> None:
+        broken = _subscriber(subscribers)
+        broken.side_effect = RuntimeError("boom")
+        healthy = _subscriber(subscribers)
+
+        dispatch("u-1", "habits")
+
+        broken.assert_called_once_with("u-1", "habits")
+        healthy.assert_called_once_with("u-1", "habits")
+
+    def test_subscribe_is_idempotent(self, subscribers: list[MagicMock]) -> None:
+        invalidator = _subscriber(subscribers)
+        subscribe(invalidator)
+
+        dispatch(None, None)
+
+        invalidator.assert_called_once_with(None, None)
+
+
+# ---------------------------------------------------------------------------
+# Listener
+# ---------------------------------------------------------------------------
+
+
+class TestListener:
+    async def test_connect_listens_and_resyncs(self, subscribers: list[MagicMock]) -> None:
+        invalidator = _subscriber(subscribers)
+        conn = _mock_conn()
+        listener = _make_listener(conn)
+
+        await listener.check()
+
+        assert listener.is_listening
+        conn.execution_options.assert_awaited_once_with(isolation_level="AUTOCOMMIT")
+        raw = conn.get_raw_connection.return_value
+        raw.driver_connection.add_listener.assert_awaited_once_with(CHANNEL, listener._on_notify)
+        # Events may have been missed before LISTEN: everything is dropped
+        invalidator.assert_called_once_with(None, None)
+
+    async def test_failed_listen_discards_connection(self) -> None:
+        conn = _mock_conn()
+        raw = conn.get_raw_connection.return_value
+        raw.driver_connection.add_listener.side_effect = OSError("gone")
+        listener = _make_listener(conn)
+
+        with pytest.raises(OSError):
+            await listener.check()
+
+        assert not listener.is_listening
+        conn.invalidate.assert_awaited_once()
+        conn.close.assert_awaited_once()
+
+    async def test_reconnects_when_connection_dies(self, subscribers: list[MagicMock]) -> None:
+        invalidator = _subscriber(subscribers)
+        dead, fresh = _mock_conn(), _mock_conn()
+        listener = _make_listener(dead, fresh)
+        await listener.check()
+
+        dead.execute.side_effect = ConnectionError("closed")
+        await listener.check()
+
+        assert listener.is_listening
+        dead.invalidate.assert_awaited_once()
+        fresh.get_raw_connection.return_value.driver_connection.add_listener.assert_awaited_once()
+        assert invalidator.call_count == 2  # Resync after each connect
+
+    async def test_healthy_connection_is_kept(self) -> None:
+        conn = _mock_conn()
+        listener = _make_listener(conn)
+        await listener.check()
+
+        await listener.check()
+
+        assert "SELECT 1" in str(conn.execute.call_args.args[0])
+        conn.close.assert_not_called()
+
+    async def test_notify_dispatches_event(self, subscribers: list[MagicMock]) -> None:
+        invalidator = _subscriber(subscribers)
+        listener = _make_listener()
+
+        listener._on_notify(None, 1, CHANNEL, '{"user_id": "u-1", "domain": "memory"}')
+        listener._on_notify(None, 1, CHANNEL, "garbage")
+
+        invalidator.assert_called_once_with("u-1", "memory")
+
+    async def test_start_survives_connect_failure_and_stop_closes(self) -> None:
+        engine_error = _make_listener()
+        engine_error._engine.connect.side_effect = OSError("db down")
+
+        await engine_error.start()
+        assert not engine_error.is_listening
+        await engine_error.stop()
+
+        conn = _mock_conn()
+        listener = _make_listener(conn)
+        await listener.start()
+        await listener.stop()
+
+        assert not listener.is_listening
+        conn.close.assert_awaited_once()
+
+
+# ---------------------------------------------------------------------------
+# Subscribers
+# ---------------------------------------------------------------------------
+
+
+class TestCacheSubscribers:
+    def test_debt_schedules_drop_user_on_finance_events(self) -> None:
+        clear_debt_schedule_cache()
+        user, other = uuid.uuid4(), uuid.uuid4()
+        expires = time.monotonic() + 60
+        cache = _debt_schedule._schedule_cache
+        for key in ((user, "2026-02"), (user, "2026-03"), (other, "2026-02")):
+            cache[key] = (expires, MagicMock())
+
+        invalidate_debt_schedules(str(user), "habits")
+        assert len(cache) == 3
+
+        invalidate_debt_schedules(str(user), "finance")
+        assert list(cache) == [(other, "2026-02")]
+
+        invalidate_debt_schedules(None, None)
+        assert not cache
+
+    def test_materialized_months_drop_user_on_finance_events(self) -> None:
+        user, other = uuid.uuid4(), uuid.uuid4()
+        memo = _helpers._materialized
+        memo.clear()
+        now = time.monotonic()
+        for key in ((user, "2026-02", "bills"), (user, "2026-02", "incomes")):
+            memo[key] = now
+        memo[(other, "2026-02", "bills")] = now
+
+        invalidate_materialized_months(str(user), "tracking")
+        assert len(memo) == 3
+
+        # A recurring bill created in an earlier month by the web app
+        invalidate_materialized_months(str(user), "finance")
+        assert list(memo) == [(other, "2026-02", "bills")]
+
+        invalidate_materialized_months(None, None)
+        assert not memo
+
+    def test_habit_calendars_drop_user_on_habit_events(self) -> None:
+        clear_habit_calendar_cache()
+        user, other = uuid.uuid4(), uuid.uuid4()
+        expires = time.monotonic() + 60
+        cache = _habit_calendar._history_cache
+        cache[user] = (expires, {})
+        cache[other] = (expires, {})
+
+        invalidate_habit_calendars(str(user), "finance")
+        assert len(cache) == 2
+
+        invalidate_habit_calendars(str(user), "habits")
+        assert list(cache) == [other]
+
+        invalidate_habit_calendars(None, None)
+        assert not cache
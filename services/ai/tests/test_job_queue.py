@@ -0,0 +1,651 @@
+"""Unit tests for the Postgres job queue worker, consolidation and rollup enqueueing."""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import Any
+from unittest.mock import ANY, AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.agents.llm_scheduler import BACKGROUND, INTERACTIVE, current_llm_priority
+from app.db.models.enums import JobStatus
+from app.db.repositories.user import ConsolidationCandidate
+from app.workers import finance_rollups, job_queue
+from app.workers.consolidation import (
+    CONSOLIDATION_BATCH_QUEUE,
+    CONSOLIDATION_LLM_BATCH_QUEUE,
+    CONSOLIDATION_QUEUE,
+    enqueue_consolidation,
+    enqueue_consolidation_batch,
+    handle_consolidation_batch_job,
+    handle_consolidation_job,
+    schedule_incremental_consolidation,
+    set_session_factory,
+)
+from app.workers.finance_rollups import (
+    FINANCE_ROLLUP_QUEUE,
+    enqueue_finance_rollup_reconcile,
+    handle_finance_rollup_job,
+    reconcile_window,
+)
+from app.workers.job_queue import JobWorker, register_handler
+
+USER_A_ID = uuid.UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")
+USER_B_ID = uuid.UUID("bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb")
+
+_Q = "app.workers.job_queue"
+_C = "app.workers.consolidation"
+_F = "app.workers.finance_rollups"
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+@asynccontextmanager
+async def _fake_service_session(*_a: object, **_kw: object) -> AsyncIterator[AsyncMock]:
+    yield AsyncMock()
+
+
+def _mock_settings(**overrides: Any) -> MagicMock:
+    settings = MagicMock()
+    settings.JOB_WORKER_CONCURRENCY = 2
+    settings.JOB_POLL_INTERVAL_SECONDS = 0.01
+    settings.JOB_LEASE_SECONDS = 30.0
+    settings.JOB_HEARTBEAT_INTERVAL_SECONDS = 10.0
+    settings.JOB_MAX_ATTEMPTS = 3
+    settings.JOB_RETRY_BASE_DELAY_SECONDS = 60.0
+    settings.CONSOLIDATION_INCREMENTAL_MESSAGE_THRESHOLD = 40
+    settings.CONSOLIDATION_INCREMENTAL_TOKEN_THRESHOLD = 12000
+    settings.CONSOLIDATION_INCREMENTAL_DEBOUNCE_SECONDS = 600.0
+    settings.CONSOLIDATION_INCREMENTAL_MAX_DELAY_SECONDS = 3600.0
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    return settings
+
+
+def _make_job(
+    queue: str = "test",
+    attempts: int = 1,
+    max_attempts: int = 3,
+    payload: dict[str, Any] | None = None,
+) -> MagicMock:
+    job = MagicMock()
+    job.id = uuid.uuid4()
+    job.queue = queue
+    job.attempts = attempts
+    job.max_attempts = max_attempts
+    job.payload = payload or {}
+    return job
+
+
+def _make_worker(**settings: Any) -> JobWorker:
+    with patch(f"{_Q}.get_settings", return_value=_mock_settings(**settings)):
+        return JobWorker(MagicMock(), queues=["test"], worker_id="worker-1")
+
+
+async def _drain(worker: JobWorker) -> None:
+    await asyncio.gather(*worker._running, return_exceptions=True)
+
+
+@pytest.fixture(autouse=True)
+def isolated_handlers() -> Any:
+    saved = dict(job_queue._handlers)
+    job_queue._handlers.clear()
+    yield
+    job_queue._handlers.clear()
+    job_queue._handlers.update(saved)
+
+
+# ---------------------------------------------------------------------------
+# JobWorker
+# ---------------------------------------------------------------------------
+
+
+async def test_worker_claims_up_to_free_slots_and_completes() -> None:
+    jobs = [_make_job(), _make_job()]
+    priorities: list[str] = []
+
+    async def _handle(job: Any) -> dict[str, Any]:
+        priorities.append(current_llm_priority())
+        return {"ok": True}
+
+    handler = AsyncMock(side_effect=_handle)
+    register_handler("test", handler)
+    worker = _make_worker(JOB_WORKER_CONCURRENCY=3)
+
+    with (
+        patch(f"{_Q}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_Q}.JobRepository.fail_expired", new_callable=AsyncMock, return_value=0),
+        patch(f"{_Q}.JobRepository.claim", new_callable=AsyncMock, return_value=jobs) as mock_claim,
+        patch(
+            f"{_Q}.JobRepository.complete", new_callable=AsyncMock, return_value=True
+        ) as mock_complete,
+    ):
+        claimed = await worker.run_once()
+        await _drain(worker)
+
+    assert claimed == 2
+    assert mock_claim.call_args.kwargs["limit"] == 3
+    assert mock_claim.call_args.kwargs["worker_id"] == "worker-1"
+    assert handler.call_count == 2
+    assert mock_complete.call_count == 2
+    assert mock_complete.call_args.kwargs["result"] == {"ok": True}
+    # Handlers' LLM calls yield to chat traffic
+    assert priorities == [BACKGROUND, BACKGROUND]
+    assert current_llm_priority() == INTERACTIVE
+
+
+async def test_worker_does_not_claim_when_saturated() -> None:
+    worker = _make_worker(JOB_WORKER_CONCURRENCY=1)
+    blocker: asyncio.Task[None] = asyncio.create_task(asyncio.sleep(10))
+    worker._running.add(blocker)
+
+    with patch(f"{_Q}.JobRepository.claim", new_callable=AsyncMock) as mock_claim:
+        claimed = await worker.run_once()
+
+    blocker.cancel()
+    assert claimed == 0
+    mock_claim.assert_not_called()
+
+
+async def test_failed_job_retried_with_exponential_backoff() -> None:
+    job = _make_job(attempts=2)
+    register_handler("test", AsyncMock(side_effect=RuntimeError("LLM timeout")))
+    worker = _make_worker()
+
+    with (
+        patch(f"{_Q}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_Q}.JobRepository.fail_expired", new_callable=AsyncMock, return_value=0),
+        patch(f"{_Q}.JobRepository.claim", new_callable=AsyncMock, return_value=[job]),
+        patch(f"{_Q}.JobRepository.complete", new_callable=AsyncMock) as mock_complete,
+        patch(
+            f"{_Q}.JobRepository.fail", new_callable=AsyncMock, return_value=JobStatus.PENDING
+        ) as mock_fail,
+    ):
+        await worker.run_once()
+        await _drain(worker)
+
+    mock_complete.assert_not_called()
+    mock_fail.assert_called_once()
+    # Second attempt: base delay * 2^1
+    assert mock_fail.call_args.kwargs["retry_delay_seconds"] == 120.0
+    assert "LLM timeout" in mock_fail.call_args.kwargs["error"]
+
+
+async def test_job_without_handler_is_failed() -> None:
+    worker = _make_worker()
+    job = _make_job(queue="unknown")
+
+    with (
+        patch(f"{_Q}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_Q}.JobRepository.fail", new_callable=AsyncMock) as mock_fail,
+    ):
+        await worker._execute(job)
+
+    assert "No handler" in mock_fail.call_args.kwargs["error"]
+
+
+async def test_lost_lease_cancels_running_job() -> None:
+    job = _make_job()
+    started = asyncio.Event()
+
+    async def _slow(_job: Any) -> dict[str, Any]:
+        started.set()
+        await asyncio.sleep(10)
+        return {}
+
+    register_handler("test", _slow)
+    worker = _make_worker(JOB_HEARTBEAT_INTERVAL_SECONDS=0.01)
+
+    with (
+        patch(f"{_Q}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_Q}.JobRepository.heartbeat", new_callable=AsyncMock, return_value=False),
+        patch(f"{_Q}.JobRepository.complete", new_callable=AsyncMock) as mock_complete,
+        patch(f"{_Q}.JobRepository.fail", new_callable=AsyncMock) as mock_fail,
+    ):
+        await asyncio.wait_for(worker._execute(job), timeout=2)
+
+    assert started.is_set()
+    mock_complete.assert_not_called()
+    mock_fail.assert_not_called()
+
+
+async def test_heartbeat_extends_lease_while_running() -> None:
+    job = _make_job()
+
+    async def _work(_job: Any) -> dict[str, Any]:
+        await asyncio.sleep(0.05)
+        return {"done": 1}
+
+    register_handler("test", _work)
+    worker = _make_worker(JOB_HEARTBEAT_INTERVAL_SECONDS=0.01)
+
+    with (
+        patch(f"{_Q}.get_service_session", side_effect=_fake_service_session),
+        patch(
+            f"{_Q}.JobRepository.heartbeat", new_callable=AsyncMock, return_value=True
+        ) as mock_hb,
+        patch(
+            f"{_Q}.JobRepository.complete", new_callable=AsyncMock, return_value=True
+        ) as mock_complete,
+    ):
+        await worker._execute(job)
+
+    assert mock_hb.call_count >= 1
+    assert mock_hb.call_args.kwargs["lease_seconds"] == 30.0
+    mock_complete.assert_called_once()
+
+
+# ---------------------------------------------------------------------------
+# Consolidation enqueue + handler
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def init_session_factory() -> Any:
+    set_session_factory(MagicMock())
+    yield
+    import app.workers.consolidation as mod
+
+    mod._session_factory = None
+
+
+async def test_enqueue_consolidation_one_deduped_job_per_eligible_user(
+    init_session_factory: Any,
+) -> None:
+    candidates = [
+        ConsolidationCandidate(user=MagicMock(id=USER_A_ID), message_count=40, message_bytes=9000),
+        ConsolidationCandidate(user=MagicMock(id=USER_B_ID), message_count=2, message_bytes=120),
+    ]
+
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
+        patch(
+            f"{_C}.UserRepository.get_consolidation_candidates",
+            new_callable=AsyncMock,
+            return_value=candidates,
+        ),
+        patch(
+            f"{_C}.JobRepository.enqueue_many",
+            new_callable=AsyncMock,
+            return_value=[uuid.uuid4()],
+        ) as mock_enqueue,
+    ):
+        created = await enqueue_consolidation("America/Sao_Paulo")
+
+    assert created == 1
+    jobs = mock_enqueue.call_args[0][1]
+    assert [j["user_id"] for j in jobs] == [USER_A_ID, USER_B_ID]
+    assert all(j["queue"] == CONSOLIDATION_QUEUE for j in jobs)
+    assert all(j["max_attempts"] == 3 for j in jobs)
+    # Same user + local day → same key, so every replica's cron enqueues once
+    assert jobs[0]["dedupe_key"].startswith(f"consolidation:{USER_A_ID}:")
+    assert len({j["dedupe_key"] for j in jobs}) == 2
+    # One active consolidation per user, whichever path enqueued it
+    assert [j["concurrency_key"] for j in jobs] == [
+        f"{CONSOLIDATION_QUEUE}:{USER_A_ID}",
+        f"{CONSOLIDATION_QUEUE}:{USER_B_ID}",
+    ]
+    # Largest backlog claimed first
+    assert [j["priority"] for j in jobs] == [9000, 120]
+    assert jobs[0]["payload"]["message_count"] == 40
+
+
+async def test_enqueue_consolidation_batch_mode_one_job_per_timezone(
+    init_session_factory: Any,
+) -> None:
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_C}.get_settings", return_value=_mock_settings(CONSOLIDATION_LLM_MODE="batch")),
+        patch(
+            f"{_C}.UserRepository.get_consolidation_candidates", new_callable=AsyncMock
+        ) as mock_candidates,
+        patch(
+            f"{_C}.JobRepository.enqueue_many",
+            new_callable=AsyncMock,
+            return_value=[uuid.uuid4()],
+        ) as mock_enqueue,
+    ):
+        created = await enqueue_consolidation("America/Sao_Paulo")
+
+    assert created == 1
+    # Candidates are loaded by the batch job itself
+    mock_candidates.assert_not_called()
+    [job] = mock_enqueue.call_args[0][1]
+    assert job["queue"] == CONSOLIDATION_LLM_BATCH_QUEUE
+    assert job["payload"] == {"timezone": "America/Sao_Paulo"}
+    assert job["dedupe_key"].startswith(f"{CONSOLIDATION_LLM_BATCH_QUEUE}:America/Sao_Paulo:")
+
+
+async def test_consolidation_job_logs_failure_only_on_last_attempt(
+    init_session_factory: Any,
+) -> None:
+    user = MagicMock(id=USER_A_ID)
+
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_C}.JobRepository.try_lock_user_queue", new_callable=AsyncMock, return_value=True),
+        patch(f"{_C}.UserRepository.get_by_id", new_callable=AsyncMock, return_value=user),
+        patch(f"{_C}._process_user", new_callable=AsyncMock, side_effect=RuntimeError("boom")),
+        patch(f"{_C}._log_consolidation", new_callable=AsyncMock) as mock_log,
+    ):
+        with pytest.raises(RuntimeError):
+            await handle_consolidation_job(
+                _make_job(attempts=1, payload={"user_id": str(USER_A_ID)})
+            )
+        mock_log.assert_not_called()
+
+        with pytest.raises(RuntimeError):
+            await handle_consolidation_job(
+                _make_job(attempts=3, payload={"user_id": str(USER_A_ID)})
+            )
+        mock_log.assert_called_once_with(USER_A_ID, status="failed")
+
+
+async def test_consolidation_job_returns_result(init_session_factory: Any) -> None:
+    user = MagicMock(id=USER_A_ID)
+
+    job = _make_job(payload={"user_id": str(USER_A_ID)})
+
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(
+            f"{_C}.JobRepository.try_lock_user_queue", new_callable=AsyncMock, return_value=True
+        ) as mock_lock,
+        patch(f"{_C}.UserRepository.get_by_id", new_callable=AsyncMock, return_value=user),
+        patch(
+            f"{_C}.MemoryRepository.reset_consolidation_trigger", new_callable=AsyncMock
+        ) as mock_reset,
+        patch(f"{_C}._process_user", new_callable=AsyncMock, return_value=True),
+    ):
+        result = await handle_consolidation_job(job)
+
+    assert result["users_consolidated"] == 1
+    assert result["users_processed"] == 1
+    assert mock_lock.call_args.args[1:] == (CONSOLIDATION_QUEUE, USER_A_ID)
+    assert mock_lock.call_args.kwargs["job"] is job
+    # Pending volume restarts from zero once a run begins
+    assert mock_reset.call_args.kwargs["job_id"] == job.id
+
+
+async def test_consolidation_job_skips_user_already_being_consolidated(
+    init_session_factory: Any,
+) -> None:
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(
+            f"{_C}.JobRepository.try_lock_user_queue", new_callable=AsyncMock, return_value=False
+        ),
+        patch(
+            f"{_C}.MemoryRepository.reset_consolidation_trigger", new_callable=AsyncMock
+        ) as mock_reset,
+        patch(f"{_C}._process_user", new_callable=AsyncMock) as mock_process,
+    ):
+        result = await handle_consolidation_job(_make_job(payload={"user_id": str(USER_A_ID)}))
+
+    assert result["users_skipped"] == 1
+    assert result["users_processed"] == 0
+    mock_process.assert_not_called()
+    # The running job's trigger state is left alone
+    mock_reset.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# Batch (manual / backfill) consolidation
+# ---------------------------------------------------------------------------
+
+
+async def test_enqueue_batch_returns_single_job_id(init_session_factory: Any) -> None:
+    batch_id = uuid.uuid4()
+
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
+        patch(
+            f"{_C}.JobRepository.enqueue_many", new_callable=AsyncMock, return_value=[batch_id]
+        ) as mock_enqueue,
+    ):
+        job_id = await enqueue_consolidation_batch(user_ids=[USER_A_ID, USER_B_ID])
+
+    assert job_id == batch_id
+    (job,) = mock_enqueue.call_args[0][1]
+    assert job["queue"] == CONSOLIDATION_BATCH_QUEUE
+    assert job["payload"] == {"user_ids": [str(USER_A_ID), str(USER_B_ID)]}
+
+
+async def test_batch_fans_out_one_child_per_user(init_session_factory: Any) -> None:
+    batch = _make_job(
+        queue=CONSOLIDATION_BATCH_QUEUE, payload={"user_ids": [str(USER_A_ID), str(USER_B_ID)]}
+    )
+
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
+        patch(f"{_C}.JobRepository.lock_if_running", new_callable=AsyncMock, return_value=True),
+        patch(
+            f"{_C}.JobRepository.enqueue_many",
+            new_callable=AsyncMock,
+            return_value=[uuid.uuid4(), uuid.uuid4()],
+        ) as mock_enqueue,
+    ):
+        result = await handle_consolidation_batch_job(batch)
+
+    assert result == {"users_enqueued": 2}
+    children = mock_enqueue.call_args[0][1]
+    assert [c["user_id"] for c in children] == [USER_A_ID, USER_B_ID]
+    assert all(c["parent_id"] == batch.id for c in children)
+    assert all(c["queue"] == CONSOLIDATION_QUEUE for c in children)
+    # Retried fan-out cannot enqueue a user twice for the same batch
+    assert children[0]["dedupe_key"] == f"{CONSOLIDATION_QUEUE}:{USER_A_ID}:batch:{batch.id}"
+    assert children[0]["concurrency_key"] == f"{CONSOLIDATION_QUEUE}:{USER_A_ID}"
+
+
+async def test_batch_for_timezone_uses_eligible_candidates(init_session_factory: Any) -> None:
+    batch = _make_job(queue=CONSOLIDATION_BATCH_QUEUE, payload={"timezone": "America/Sao_Paulo"})
+    candidates = [
+        ConsolidationCandidate(user=MagicMock(id=USER_B_ID), message_count=5, message_bytes=700)
+    ]
+
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
+        patch(
+            f"{_C}.UserRepository.get_consolidation_candidates",
+            new_callable=AsyncMock,
+            return_value=candidates,
+        ),
+        patch(f"{_C}.JobRepository.lock_if_running", new_callable=AsyncMock, return_value=True),
+        patch(
+            f"{_C}.JobRepository.enqueue_many", new_callable=AsyncMock, return_value=[uuid.uuid4()]
+        ) as mock_enqueue,
+    ):
+        await handle_consolidation_batch_job(batch)
+
+    (child,) = mock_enqueue.call_args[0][1]
+    assert child["user_id"] == USER_B_ID
+    assert child["priority"] == 700
+
+
+async def test_cancelled_batch_does_not_fan_out(init_session_factory: Any) -> None:
+    batch = _make_job(queue=CONSOLIDATION_BATCH_QUEUE, payload={"user_ids": [str(USER_A_ID)]})
+
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
+        patch(f"{_C}.JobRepository.lock_if_running", new_callable=AsyncMock, return_value=False),
+        patch(f"{_C}.JobRepository.enqueue_many", new_callable=AsyncMock) as mock_enqueue,
+    ):
+        result = await handle_consolidation_batch_job(batch)
+
+    assert result == {"users_enqueued": 0}
+    mock_enqueue.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# Incremental (volume-triggered) consolidation
+# ---------------------------------------------------------------------------
+
+
+def _trigger(messages: int, tokens: int, scheduled_job_id: uuid.UUID | None = None) -> MagicMock:
+    return MagicMock(
+        pending_messages=messages, pending_tokens=tokens, scheduled_job_id=scheduled_job_id
+    )
+
+
+async def _schedule(
+    trigger: MagicMock, *, postponed: bool = False, inserted: bool = True
+) -> tuple[uuid.UUID | None, AsyncMock, AsyncMock, AsyncMock]:
+    new_job_ids = [uuid.uuid4()] if inserted else []
+    with (
+        patch(f"{_C}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_C}.get_settings", return_value=_mock_settings()),
+        patch(
+            f"{_C}.MemoryRepository.bump_consolidation_trigger",
+            new_callable=AsyncMock,
+            return_value=trigger,
+        ),
+        patch(
+            f"{_C}.MemoryRepository.set_consolidation_trigger_job", new_callable=AsyncMock
+        ) as mock_set,
+        patch(
+            f"{_C}.JobRepository.postpone", new_callable=AsyncMock, return_value=postponed
+        ) as mock_postpone,
+        patch(
+            f"{_C}.JobRepository.enqueue_many", new_callable=AsyncMock, return_value=new_job_ids
+        ) as mock_enqueue,
+    ):
+        job_id = await schedule_incremental_consolidation(
+            MagicMock(), USER_A_ID, messages=2, tokens=300
+        )
+    return job_id, mock_enqueue, mock_postpone, mock_set
+
+
+async def test_incremental_below_threshold_only_counts() -> None:
+    job_id, mock_enqueue, mock_postpone, _ = await _schedule(_trigger(12, 3000))
+
+    assert job_id is None
+    mock_enqueue.assert_not_called()
+    mock_postpone.assert_not_called()
+
+
+@pytest.mark.parametrize(("messages", "tokens"), [(40, 100), (3, 12000)])
+async def test_incremental_threshold_schedules_low_priority_debounced_job(
+    messages: int, tokens: int
+) -> None:
+    job_id, mock_enqueue, _, mock_set = await _schedule(_trigger(messages, tokens))
+
+    assert job_id is not None
+    job = mock_enqueue.call_args[0][1][0]
+    assert job["queue"] == CONSOLIDATION_QUEUE
+    assert job["payload"]["trigger"] == "incremental"
+    assert job["payload"]["message_count"] == messages
+    # Below every nightly job (priority = backlog bytes)
+    assert job["priority"] == 0
+    assert "dedupe_key" not in job
+    assert job["concurrency_key"] == f"{CONSOLIDATION_QUEUE}:{USER_A_ID}"
+    mock_set.assert_awaited_once_with(ANY, USER_A_ID, job_id)
+
+
+async def test_incremental_pending_job_is_postponed_not_duplicated() -> None:
+    scheduled = uuid.uuid4()
+    job_id, mock_enqueue, mock_postpone, _ = await _schedule(
+        _trigger(90, 30000, scheduled_job_id=scheduled), postponed=True
+    )
+
+    assert job_id is None
+    mock_enqueue.assert_not_called()
+    assert mock_postpone.call_args.args[1] == scheduled
+    assert mock_postpone.call_args.kwargs == {"delay_seconds": 600.0, "max_delay_seconds": 3600.0}
+
+
+async def test_incremental_reschedules_when_previous_job_already_left_pending() -> None:
+    job_id, mock_enqueue, mock_postpone, _ = await _schedule(
+        _trigger(45, 100, scheduled_job_id=uuid.uuid4()), postponed=False
+    )
+
+    mock_postpone.assert_awaited_once()
+    mock_enqueue.assert_awaited_once()
+    assert job_id is not None
+
+
+async def test_incremental_yields_to_another_active_consolidation() -> None:
+    # The concurrency key is held, e.g. by the user's nightly job
+    job_id, mock_enqueue, _, mock_set = await _schedule(_trigger(45, 100), inserted=False)
+
+    mock_enqueue.assert_awaited_once()
+    assert job_id is None
+    mock_set.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# Finance rollup reconcile
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def init_rollup_session_factory() -> Any:
+    finance_rollups.set_session_factory(MagicMock())
+    yield
+    finance_rollups._session_factory = None
+
+
+def test_reconcile_window_ends_with_current_month() -> None:
+    assert reconcile_window(date(2026, 2, 15), 3) == ["2025-12", "2026-01", "2026-02"]
+
+
+async def test_enqueue_rollup_reconcile_one_deduped_job_per_user(
+    init_rollup_session_factory: Any,
+) -> None:
+    with (
+        patch(f"{_F}.get_service_session", side_effect=_fake_service_session),
+        patch(f"{_F}.get_settings", return_value=_mock_settings(FINANCE_ROLLUP_RECONCILE_MONTHS=2)),
+        patch(
+            f"{_F}.FinanceRepository.get_users_with_finance_rows",
+            new_callable=AsyncMock,
+            return_value=[USER_A_ID, USER_B_ID],
+        ) as mock_users,
+        patch(
+            f"{_F}.JobRepository.enqueue_many",
+            new_callable=AsyncMock,
+            return_value=[uuid.uuid4(), uuid.uuid4()],
+        ) as mock_enqueue,
+    ):
+        created = await enqueue_finance_rollup_reconcile()
+
+    assert created == 2
+    months = mock_users.call_args.args[1]
+    assert len(months) == 2
+    jobs = mock_enqueue.call_args.args[1]
+    assert [j["user_id"] for j in jobs] == [USER_A_ID, USER_B_ID]
+    assert all(j["queue"] == FINANCE_ROLLUP_QUEUE for j in jobs)
+    assert all(j["payload"]["months"] == months for j in jobs)
+    # Same user + UTC day → same key, so a re-fired cron enqueues once
+    assert jobs[0]["dedupe_key"].startswith(f"finance_rollup:{USER_A_ID}:")
+
+
+async def test_rollup_job_reports_drift(init_rollup_session_factory: Any) -> None:
+    from app.tools.finance._rollups import RollupCheck
+
+    check = RollupCheck(checked=3, drifted=("2026-01",), missing=("2026-02", "2026-03"))
+    job = _make_job(
+        queue=FINANCE_ROLLUP_QUEUE,
+        payload={"user_id": str(USER_A_ID), "months": ["2026-01", "2026-02", "2026-03"]},
+    )
+
+    with (
+        patch(f"{_F}.get_service_session", side_effect=_fake_service_session),
+        patch(
+            f"{_F}.reconcile_finance_rollups", new_callable=AsyncMock, return_value=check
+        ) as mock_reconcile,
+    ):
+        result = await handle_finance_rollup_job(job)
+
+    assert mock_reconcile.call_args.args[1:] == (USER_A_ID, ["2026-01", "2026-02", "2026-03"])
+    assert result == {"months_checked": 3, "months_drifted": 1, "months_created": 2}
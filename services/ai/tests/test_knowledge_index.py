@@ -0,0 +1,240 @@
+"""Unit tests for the per-user BM25 knowledge index (no DB required)."""
+
+from __future__ import annotations
+
+import uuid
+from collections.abc import Iterator
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.db import knowledge_index
+from app.db.knowledge_index import (
+    KnowledgeIndex,
+    cached_index,
+    clear_knowledge_indexes,
+    invalidate_knowledge_indexes,
+    minhash,
+    queue_remove,
+    queue_upsert,
+    similarity,
+    stem,
+    store_index,
+    tokenize,
+)
+from app.db.models.enums import KnowledgeItemSource, KnowledgeItemType, LifeArea
+from app.db.models.memory import KnowledgeItem
+
+USER = uuid.UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")
+_BASE = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+@pytest.fixture(autouse=True)
+def empty_registry() -> Iterator[None]:
+    clear_knowledge_indexes()
+    yield
+    clear_knowledge_indexes()
+
+
+def _item(
+    content: str,
+    *,
+    title: str = "",
+    area: str = "health",
+    item_type: str = "fact",
+    age_days: int = 0,
+    user_id: uuid.UUID = USER,
+) -> KnowledgeItem:
+    return KnowledgeItem(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        type=KnowledgeItemType(item_type),
+        area=LifeArea(area),
+        title=title,
+        content=content,
+        source=KnowledgeItemSource.CONVERSATION,
+        confidence=0.9,
+        created_at=_BASE - timedelta(days=age_days),
+    )
+
+
+def _session(pending: bool = False) -> MagicMock:
+    session = MagicMock()
+    session.info = {"knowledge_index_pending": [object()]} if pending else {}
+    return session
+
+
+def _commit(session: MagicMock) -> None:
+    knowledge_index._on_commit(session)
+
+
+class TestNormalization:
+    def test_folds_accents_and_drops_stopwords(self) -> None:
+        assert tokenize("O Café da manhã é ótimo") == ["caf", "manh", "otim"]
+
+    def test_plurals_share_the_singular_stem(self) -> None:
+        for plural, singular in [
+            ("dívidas", "dívida"),
+            ("corações", "coração"),
+            ("animais", "animal"),
+            ("homens", "homem"),
+            ("mulheres", "mulher"),
+        ]:
+            assert tokenize(plural) == tokenize(singular), plural
+
+    def test_short_words_are_not_stemmed(self) -> None:
+        assert stem("mes") == "mes"
+        assert stem("stress") == "stress"
+
+
+class TestSearch:
+    def test_ranks_by_relevance(self) -> None:
+        weak = _item("Gosta de correr no parque e de ler livros")
+        strong = _item("Corre todo dia, corrida é seu hobby", title="Corrida")
+        other = _item("Trabalha como engenheiro")
+        index = KnowledgeIndex([weak, strong, other])
+
+        assert index.search("corridas") == [strong]
+        hits = index.rank("correr corrida")
+        assert [h.item for h in hits] == [strong, weak]
+        assert hits[0].matched == 1
+
+    def test_filters_and_recency_without_query(self) -> None:
+        old = _item("Dorme mal", age_days=3)
+        new = _item("Dorme bem", age_days=1)
+        money = _item("Guarda dinheiro", area="finance")
+        index = KnowledgeIndex([old, new, money])
+
+        assert index.search(area="health") == [new, old]
+        assert index.search("dorme", area="finance") == []
+        assert index.search(item_type="preference") == []
+
+    def test_partial_word_falls_back_to_substring(self) -> None:
+        item = _item("Toma café expresso")
+        assert KnowledgeIndex([item]).search("expres") == [item]
+
+    def test_inactive_items_are_not_indexed(self) -> None:
+        superseded = _item("Pesa 80kg")
+        superseded.superseded_by_id = uuid.uuid4()
+        assert len(KnowledgeIndex([superseded])) == 0
+
+    def test_update_and_remove(self) -> None:
+        item = _item("Mora em Curitiba")
+        index = KnowledgeIndex([item])
+        moved = _item("Mora em Recife")
+        moved.id = item.id
+        index.add(moved)
+
+        assert index.search("curitiba") == []
+        assert index.search("recife") == [moved]
+        assert index.get(item.id) is moved
+        assert index.remove(item.id)
+        assert index.get(item.id) is None
+        assert index.postings == 0
+
+    def test_select_prefers_relevant_then_newest(self) -> None:
+        relevant = _item("Quer quitar o financiamento", age_days=30)
+        newest = _item("Começou a meditar", age_days=0)
+        older = _item("Viajou para a praia", age_days=5)
+        index = KnowledgeIndex([relevant, newest, older])
+
+        assert index.select("preciso quitar o financiamento", limit=2) == [relevant, newest]
+        assert index.select("preciso quitar o financiamento") == [relevant, newest, older]
+
+    def test_select_fills_with_recently_touched(self) -> None:
+        created_recently = _item("Começou a meditar", age_days=1)
+        updated_today = _item("Viajou para a praia", age_days=5)
+        updated_today.updated_at = _BASE
+        index = KnowledgeIndex([created_recently, updated_today])
+
+        assert index.select("") == [updated_today, created_recently]
+
+
+class TestNearDuplicates:
+    def test_rewording_is_similar_other_facts_are_not(self) -> None:
+        coffee = minhash("Gosta de tomar café expresso de manhã")
+        assert similarity(coffee, minhash("gosta de tomar cafés expressos pela manhã")) == 1.0
+        assert similarity(coffee, minhash("Tem dois filhos")) < 0.2
+        assert similarity(minhash("Pesa 80kg"), minhash("Pesa 75kg")) < 0.7
+        assert similarity(coffee, minhash("")) == 0.0
+
+    def test_sketch_is_bounded(self) -> None:
+        assert len(minhash("Corre todos os dias no parque da cidade " * 20)) <= 64
+
+    def test_matches_same_type_and_area_only(self) -> None:
+        coffee = _item("Gosta de café expresso", item_type="preference")
+        other_area = _item("Gosta de café expresso", item_type="preference", area="finance")
+        index = KnowledgeIndex([coffee, other_area, _item("Gosta de chá verde")])
+
+        match = index.near_duplicate(
+            "Gosta de cafés expressos", item_type="preference", area="health", threshold=0.7
+        )
+        assert match == (coffee, 1.0)
+        assert (
+            index.near_duplicate(
+                "Gosta de café expresso", item_type="fact", area="health", threshold=0.7
+            )
+            is None
+        )
+        assert (
+            index.near_duplicate(
+                "Prefere chá", item_type="preference", area="health", threshold=0.7
+            )
+            is None
+        )
+
+
+class TestRegistry:
+    def test_store_and_lru_cap(self) -> None:
+        other = uuid.uuid4()
+        settings = MagicMock(KNOWLEDGE_INDEX_TTL_SECONDS=60.0, KNOWLEDGE_INDEX_MAX_POSTINGS=3)
+        with patch.object(knowledge_index, "get_settings", return_value=settings):
+            store_index(_session(), USER, [_item("corrida leitura")])
+            store_index(_session(), other, [_item("viagem praia", user_id=other)])
+
+        assert cached_index(USER) is None  # 4 postings > 3: the oldest index is evicted
+        assert cached_index(other) is not None
+
+    def test_not_kept_with_uncommitted_writes(self) -> None:
+        index = store_index(_session(pending=True), USER, [_item("Pesa 80kg")])
+        assert len(index) == 1
+        assert cached_index(USER) is None
+
+    def test_writes_apply_on_commit_only(self) -> None:
+        kept = _item("Pesa 80kg")
+        index = store_index(_session(), USER, [kept])
+
+        created = _item("Pesa 75kg")
+        rolled_back = _session()
+        queue_upsert(rolled_back, created)
+        knowledge_index._on_rollback(rolled_back)
+        _commit(rolled_back)
+        assert created.id not in index
+
+        session = _session()
+        queue_upsert(session, created)
+        queue_remove(session, kept.id)
+        assert created.id not in index
+        _commit(session)
+
+        assert created.id in index
+        assert kept.id not in index
+
+    def test_own_commit_event_is_skipped_others_drop(self) -> None:
+        store_index(_session(), USER, [])
+        session = _session()
+        queue_upsert(session, _item("Pesa 80kg"))
+        _commit(session)
+
+        invalidate_knowledge_indexes(str(USER), "memory")  # Our own commit
+        assert cached_index(USER) is not None
+        invalidate_knowledge_indexes(str(USER), "finance")
+        assert cached_index(USER) is not None
+        invalidate_knowledge_indexes(str(USER), "memory")  # Someone else's write
+        assert cached_index(USER) is None
+
+    def test_resync_drops_everything(self) -> None:
+        store_index(_session(), USER, [])
+        invalidate_knowledge_indexes(None, None)
+        assert cached_index(USER) is None
@@ -0,0 +1,111 @@
+"""Unit tests for advisory-lock leader election (mocked connections, no real DB)."""
+
+from __future__ import annotations
+
+from typing import Any
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.workers.leader import LeaderElector
+
+_L = "app.workers.leader"
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _mock_conn(lock_acquired: bool = True) -> AsyncMock:
+    """Connection whose pg_try_advisory_lock returns ``lock_acquired``."""
+    conn = AsyncMock()
+    conn.execution_options = AsyncMock(return_value=conn)
+    result = MagicMock()
+    result.scalar.return_value = lock_acquired
+    conn.execute = AsyncMock(return_value=result)
+    return conn
+
+
+def _make_elector(*conns: AsyncMock) -> tuple[LeaderElector, AsyncMock, AsyncMock]:
+    engine = MagicMock()
+    engine.connect = AsyncMock(side_effect=list(conns))
+    on_elected = AsyncMock()
+    on_demoted = AsyncMock()
+    settings = MagicMock(LEADER_CHECK_INTERVAL_SECONDS=0.01)
+    with patch(f"{_L}.get_settings", return_value=settings):
+        elector = LeaderElector(engine, on_elected=on_elected, on_demoted=on_demoted, lock_key=42)
+    return elector, on_elected, on_demoted
+
+
+def _sql(call: Any) -> str:
+    return str(call.args[0])
+
+
+# ---------------------------------------------------------------------------
+# Election
+# ---------------------------------------------------------------------------
+
+
+async def test_acquires_lock_and_starts_scheduler() -> None:
+    conn = _mock_conn(lock_acquired=True)
+    elector, on_elected, _ = _make_elector(conn)
+
+    await elector.check()
+
+    assert elector.is_leader
+    on_elected.assert_awaited_once()
+    conn.execution_options.assert_awaited_once_with(isolation_level="AUTOCOMMIT")
+    assert "pg_try_advisory_lock" in _sql(conn.execute.call_args)
+    assert conn.execute.call_args.args[1] == {"key": 42}
+    conn.close.assert_not_called()  # Lock is held by keeping the session open
+
+
+async def test_follower_closes_connection_and_retries() -> None:
+    busy = _mock_conn(lock_acquired=False)
+    free = _mock_conn(lock_acquired=True)
+    elector, on_elected, _ = _make_elector(busy, free)
+
+    await elector.check()
+    assert not elector.is_leader
+    on_elected.assert_not_called()
+    busy.close.assert_awaited_once()
+
+    # Old leader went away → next check takes over
+    await elector.check()
+    assert elector.is_leader
+    on_elected.assert_awaited_once()
+
+
+async def test_leader_steps_down_when_connection_dies() -> None:
+    conn = _mock_conn(lock_acquired=True)
+    elector, _, on_demoted = _make_elector(conn)
+    await elector.check()
+
+    conn.execute = AsyncMock(side_effect=ConnectionError("server closed the connection"))
+    await elector.check()
+
+    assert not elector.is_leader
+    on_demoted.assert_awaited_once()
+
+
+async def test_stop_releases_lock() -> None:
+    conn = _mock_conn(lock_acquired=True)
+    elector, _, on_demoted = _make_elector(conn)
+    await elector.start()
+
+    await elector.stop()
+
+    assert not elector.is_leader
+    on_demoted.assert_awaited_once()
+    assert "pg_advisory_unlock" in _sql(conn.execute.call_args)
+    conn.close.assert_awaited_once()
+
+
+async def test_failed_scheduler_start_releases_leadership() -> None:
+    conn = _mock_conn(lock_acquired=True)
+    elector, on_elected, on_demoted = _make_elector(conn)
+    on_elected.side_effect = RuntimeError("no timezones")
+
+    await elector.check()
+
+    assert not elector.is_leader
+    on_demoted.assert_awaited_once()
+    assert "pg_advisory_unlock" in _sql(conn.execute.call_args)
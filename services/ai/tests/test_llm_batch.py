@@ -0,0 +1,60 @@
+"""Unit tests for the batch LLM clients (no provider calls)."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.agents.llm_batch import BatchRequest, BatchResult, LocalBatchClient, create_batch_client
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+async def test_local_client_answers_through_responder(tmp_path: Path) -> None:
+    async def _respond(prompt: str) -> str:
+        if prompt == "falha":
+            raise RuntimeError("boom")
+        return prompt.upper()
+
+    client = LocalBatchClient(tmp_path, responder=_respond)
+    batch_id = await client.submit([BatchRequest("a_0", "olá"), BatchRequest("a_1", "falha")])
+
+    assert client.requests_path(batch_id).exists()
+    assert not client.results_path(batch_id).exists()
+    assert await client.poll(batch_id)
+
+    ok, failed = await client.results(batch_id)
+    assert ok == BatchResult("a_0", output="OLÁ")
+    assert failed.custom_id == "a_1"
+    assert failed.output is None
+    assert failed.error is not None
+    assert "boom" in failed.error
+
+
+async def test_local_client_waits_for_results_file(tmp_path: Path) -> None:
+    client = LocalBatchClient(tmp_path)
+    batch_id = await client.submit([BatchRequest("a_0", "olá")])
+    assert not await client.poll(batch_id)
+
+    client.results_path(batch_id).write_text(
+        json.dumps({"custom_id": "a_0", "output": "pronto"}) + "\n", encoding="utf-8"
+    )
+    assert await client.poll(batch_id)
+    assert await client.results(batch_id) == [BatchResult("a_0", output="pronto")]
+
+
+def test_factory_defaults_to_llm_provider(tmp_path: Path) -> None:
+    settings = MagicMock(LLM_BATCH_PROVIDER="", LLM_PROVIDER="openai", LLM_BATCH_LOCAL_DIR=tmp_path)
+    with pytest.raises(ValueError, match="Unsupported LLM batch provider: openai"):
+        create_batch_client(settings)
+
+    settings.LLM_BATCH_PROVIDER = "local"
+    with patch("app.agents.llm_batch.create_llm") as mock_create_llm:
+        client = create_batch_client(settings, temperature=0.3)
+
+    assert isinstance(client, LocalBatchClient)
+    mock_create_llm.assert_called_once_with(settings, temperature=0.3)
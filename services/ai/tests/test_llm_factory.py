@@ -3,6 +3,7 @@
 import pytest
 
 from app.agents.llm import create_llm, create_triage_llm
+from app.agents.llm_scheduler import ScheduledChatModel
 from app.config import Settings
 
 
@@ -26,6 +27,8 @@ def test_gemini_provider_returns_correct_class() -> None:
     llm = create_llm(settings)
     # Check class name to avoid importing the actual class at module level
     assert type(llm).__name__ == "ChatGoogleGenerativeAI"
+    # Calls go through the provider's LLM scheduler
+    assert isinstance(llm, ScheduledChatModel)
 
 
 def test_anthropic_provider_returns_correct_class() -> None:
@@ -0,0 +1,293 @@
+"""Unit tests for the outbound LLM scheduler (no provider calls)."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+
+import pytest
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from app.agents import llm_scheduler
+from app.agents.llm_scheduler import (
+    BACKGROUND,
+    INTERACTIVE,
+    LLMLease,
+    LLMScheduler,
+    ScheduledChatModel,
+    clear_llm_schedulers,
+    get_llm_scheduler,
+    llm_priority,
+    llm_scheduler_stats,
+    scheduled_model,
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_registry() -> Iterator[None]:
+    clear_llm_schedulers()
+    yield
+    clear_llm_schedulers()
+
+
+def _scheduler(
+    max_concurrency: int = 1,
+    *,
+    background_max: int = 8,
+    reserved: int = 0,
+    tokens_per_minute: int = 0,
+) -> LLMScheduler:
+    scheduler = LLMScheduler(
+        "test",
+        max_concurrency=max_concurrency,
+        background_max_concurrency=background_max,
+        interactive_reserved_concurrency=reserved,
+        tokens_per_minute=tokens_per_minute,
+    )
+    # Picked up by scheduled_model(..., "test")
+    llm_scheduler._schedulers["test"] = scheduler
+    return scheduler
+
+
+class _SlowChatModel(BaseChatModel):
+    """Answers after *delay* seconds."""
+
+    delay: float = 10.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow"
+
+    def _generate(self, messages: list[BaseMessage], *args: Any, **kwargs: Any) -> ChatResult:
+        raise NotImplementedError
+
+    async def _agenerate(
+        self, messages: list[BaseMessage], *args: Any, **kwargs: Any
+    ) -> ChatResult:
+        await asyncio.sleep(self.delay)
+        message = AIMessage(
+            "ok",
+            usage_metadata={"input_tokens": 3, "output_tokens": 2, "total_tokens": 5},
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self, messages: list[BaseMessage], *args: Any, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        yield ChatGenerationChunk(message=AIMessageChunk("o"))
+        await asyncio.sleep(self.delay)
+        yield ChatGenerationChunk(message=AIMessageChunk("k"))
+
+
+def _queue(
+    scheduler: LLMScheduler,
+    priority: str,
+    key: str,
+    order: list[str],
+    tokens: int = 1,
+    *,
+    hold: bool = False,
+) -> asyncio.Task[LLMLease]:
+    """Queue a call that records its admission, then releases unless *hold*."""
+
+    async def _call() -> LLMLease:
+        lease = await scheduler.acquire(priority, key, tokens)
+        order.append(f"{priority[0]}:{key}")
+        if not hold:
+            scheduler.release(lease)
+        return lease
+
+    return asyncio.create_task(_call())
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_interactive_goes_before_queued_background() -> None:
+    scheduler = _scheduler()
+    order: list[str] = []
+    first = await scheduler.acquire(BACKGROUND, "job", 1)
+
+    tasks = [
+        _queue(scheduler, BACKGROUND, "a", order),
+        _queue(scheduler, INTERACTIVE, "b", order),
+    ]
+    await _settle()
+    assert order == []
+    assert scheduler.stats()["classes"][BACKGROUND]["waiting"] == 1
+
+    scheduler.release(first)
+    await asyncio.gather(*tasks)
+    assert order == ["i:b", "b:a"]
+
+
+async def test_background_leaves_reserved_slots_to_interactive() -> None:
+    scheduler = _scheduler(3, reserved=1)
+    order: list[str] = []
+    first = await scheduler.acquire(BACKGROUND, "a", 1)
+    await scheduler.acquire(BACKGROUND, "b", 1)
+
+    waiting = _queue(scheduler, BACKGROUND, "c", order, hold=True)
+    await _settle()
+    assert not waiting.done()
+
+    # The reserved slot is still free for chat
+    interactive = await asyncio.wait_for(scheduler.acquire(INTERACTIVE, "u", 1), 1)
+
+    # While chat holds a slot, a freed one is not handed back to background
+    scheduler.release(first)
+    await _settle()
+    assert not waiting.done()
+
+    scheduler.release(interactive)
+    await _settle()
+    assert waiting.done()
+    assert scheduler.stats()["classes"][BACKGROUND]["inFlight"] == 2
+
+
+async def test_round_robin_across_users() -> None:
+    scheduler = _scheduler()
+    order: list[str] = []
+    first = await scheduler.acquire(INTERACTIVE, "busy", 1)
+    tasks = [_queue(scheduler, INTERACTIVE, "busy", order) for _ in range(3)]
+    await _settle()
+    tasks.append(_queue(scheduler, INTERACTIVE, "quiet", order))
+    await _settle()
+
+    scheduler.release(first)
+    await asyncio.gather(*tasks)
+    assert order == ["i:busy", "i:quiet", "i:busy", "i:busy"]
+
+
+async def test_token_budget_refills_and_uses_reported_usage() -> None:
+    # 1000 tokens per second
+    scheduler = _scheduler(4, tokens_per_minute=60_000)
+    order: list[str] = []
+    big = await scheduler.acquire(INTERACTIVE, "a", 60_000)
+
+    waiting = _queue(scheduler, INTERACTIVE, "b", order, tokens=30_000, hold=True)
+    await _settle()
+    assert not waiting.done()
+
+    # The call used far less than estimated: the difference goes back
+    scheduler.release(big, used_tokens=20_000)
+    await _settle()
+    assert waiting.done()
+
+    small = _queue(scheduler, INTERACTIVE, "c", order, tokens=10_100, hold=True)
+    await asyncio.wait_for(small, 1)  # Waits ~0.1s for the bucket to refill
+    assert order == ["i:b", "i:c"]
+
+
+async def test_background_keeps_out_of_the_token_reserve() -> None:
+    scheduler = _scheduler(4, tokens_per_minute=60_000)
+    await scheduler.acquire(INTERACTIVE, "a", 40_000)
+
+    background = asyncio.create_task(scheduler.acquire(BACKGROUND, "job", 10_000))
+    await _settle()
+    # 20k left, but background needs its 10k on top of the 15k reserve
+    assert not background.done()
+    await asyncio.wait_for(scheduler.acquire(INTERACTIVE, "b", 10_000), 1)
+    background.cancel()
+
+
+async def test_cancelled_waiter_frees_its_place() -> None:
+    scheduler = _scheduler()
+    order: list[str] = []
+    first = await scheduler.acquire(INTERACTIVE, "a", 1)
+    cancelled = _queue(scheduler, INTERACTIVE, "b", order)
+    later = _queue(scheduler, INTERACTIVE, "c", order)
+    await _settle()
+
+    cancelled.cancel()
+    await _settle()
+    scheduler.release(first)
+    await _settle()
+
+    assert later.done()
+    assert order == ["i:c"]
+    assert scheduler.stats()["classes"][INTERACTIVE]["waiting"] == 0
+
+
+async def test_scheduled_model_holds_the_call_until_admitted() -> None:
+    scheduler = _scheduler()
+    llm = scheduled_model(FakeListChatModel, "test")(responses=["ok"])
+    held = await scheduler.acquire(INTERACTIVE, "chat", 1)
+
+    with llm_priority(BACKGROUND, key="job-user"):
+        call = asyncio.create_task(llm.ainvoke("olá"))
+    await _settle()
+    assert not call.done()
+    assert scheduler.stats()["classes"][BACKGROUND]["waiting"] == 1
+
+    scheduler.release(held)
+    assert (await asyncio.wait_for(call, 1)).content == "ok"
+
+    stats = scheduler.stats()
+    assert stats["inFlight"] == 0
+    assert stats["classes"][BACKGROUND]["admitted"] == 1
+    assert stats["classes"][BACKGROUND]["waitMaxMs"] is not None
+
+
+async def test_cancelled_call_frees_its_slot() -> None:
+    scheduler = _scheduler(2)
+    llm = scheduled_model(_SlowChatModel, "test")()
+
+    call = asyncio.create_task(llm.ainvoke("olá"))
+    await _settle()
+    assert scheduler.stats()["inFlight"] == 1
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+    assert scheduler.stats()["inFlight"] == 0
+
+    with pytest.raises(TimeoutError):
+        await asyncio.wait_for(llm.ainvoke("olá"), 0.01)
+    assert scheduler.stats()["inFlight"] == 0
+
+    # Streaming calls too
+    async def _stream() -> None:
+        async for _ in llm.astream("olá"):
+            pass
+
+    stream = asyncio.create_task(_stream())
+    await _settle()
+    assert scheduler.stats()["inFlight"] == 1
+    stream.cancel()
+    await asyncio.gather(stream, return_exceptions=True)
+    assert scheduler.stats()["inFlight"] == 0
+
+
+async def test_reported_usage_replaces_the_estimate() -> None:
+    scheduler = _scheduler(tokens_per_minute=60_000)
+    llm = scheduled_model(_SlowChatModel, "test")(delay=0)
+
+    await llm.ainvoke("olá")
+    # Estimate taken, 5 reported tokens charged instead (plus a little refill)
+    assert 59_990 <= scheduler.stats()["tokensAvailable"] <= 60_000
+
+
+def test_unknown_priority_rejected() -> None:
+    with pytest.raises(ValueError, match="Unknown LLM priority"), llm_priority("urgent"):
+        pass
+
+
+def test_scheduled_model_keeps_the_provider_class() -> None:
+    scheduled = scheduled_model(FakeListChatModel, "Gemini")
+    assert scheduled is scheduled_model(FakeListChatModel, "gemini")
+    assert scheduled.__name__ == "FakeListChatModel"
+    assert issubclass(scheduled, FakeListChatModel)
+    assert issubclass(scheduled, ScheduledChatModel)
+    assert scheduled.llm_provider == "gemini"
+    assert scheduled.provider_streams
+
+
+def test_stats_by_provider() -> None:
+    assert get_llm_scheduler("Gemini") is get_llm_scheduler("gemini")
+    assert set(llm_scheduler_stats()) == {"gemini"}
@@ -4,13 +4,17 @@ from __future__ import annotations
 
 import json
 import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from app.db.knowledge_index import KnowledgeIndex
 from app.db.models.enums import KnowledgeItemSource, KnowledgeItemType, LifeArea, SubArea
 from app.db.models.memory import KnowledgeItem
+from app.db.repositories.memory import MemoryContext
 from app.tools.memory._contradiction_detector import ContradictionResult, check_contradictions
 from app.tools.memory.add_knowledge import add_knowledge
 from app.tools.memory.analyze_context import analyze_context
@@ -204,6 +208,10 @@ async def test_add_knowledge_basic() -> None:
 
     with (
         patch("app.tools.memory.add_knowledge.get_user_session") as mock_session,
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.find_near_duplicate",
+            return_value=None,
+        ),
         patch(
             "app.tools.memory.add_knowledge.MemoryRepository.search_knowledge",
             return_value=[],
@@ -237,6 +245,147 @@ async def test_add_knowledge_basic() -> None:
     assert "Conhecimento adicionado" in data["message"]
 
 
+def _tracked_sessions(open_sessions: list[int]) -> Any:
+    """get_user_session stand-in counting the sessions currently open."""
+
+    @asynccontextmanager
+    async def _session(*_args: Any) -> AsyncIterator[AsyncMock]:
+        open_sessions[0] += 1
+        try:
+            yield AsyncMock()
+        finally:
+            open_sessions[0] -= 1
+
+    return _session
+
+
+@pytest.mark.asyncio
+async def test_add_knowledge_runs_llm_without_session() -> None:
+    old_item = _make_knowledge_item(item_id=TEST_ITEM_ID_2, content="Mora em São Paulo")
+    new_item = _make_knowledge_item()
+    open_sessions = [0]
+    sessions_during_llm: list[int] = []
+
+    async def _check(*_args: Any, **_kwargs: Any) -> list[ContradictionResult]:
+        sessions_during_llm.append(open_sessions[0])
+        return [ContradictionResult(old_item.id, True, 0.9, "mudou de cidade")]
+
+    with (
+        patch(
+            "app.tools.memory.add_knowledge.get_user_session",
+            side_effect=_tracked_sessions(open_sessions),
+        ) as mock_session,
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.find_near_duplicate",
+            return_value=None,
+        ),
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.search_knowledge",
+            return_value=[old_item],
+        ),
+        patch("app.tools.memory.add_knowledge.check_contradictions", side_effect=_check),
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.create_knowledge",
+            return_value=new_item,
+        ),
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.get_knowledge_by_id",
+            return_value=old_item,
+        ),
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.supersede_knowledge",
+        ) as mock_supersede,
+    ):
+        result = await add_knowledge.ainvoke(
+            input={"type": "fact", "content": "Mora no Rio de Janeiro"},
+            config=_make_config(),
+        )
+
+    assert sessions_during_llm == [0]
+    assert mock_session.call_count == 2  # Read, then write
+    mock_supersede.assert_awaited_once()
+    assert json.loads(result)["superseded"]["oldItemId"] == TEST_ITEM_ID_2
+
+
+@pytest.mark.asyncio
+async def test_add_knowledge_skips_contradiction_superseded_meanwhile() -> None:
+    old_item = _make_knowledge_item(item_id=TEST_ITEM_ID_2)
+    # Superseded by another write while the LLM was running
+    old_item.superseded_by_id = uuid.uuid4()
+
+    with (
+        patch(
+            "app.tools.memory.add_knowledge.get_user_session",
+            side_effect=_tracked_sessions([0]),
+        ),
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.find_near_duplicate",
+            return_value=None,
+        ),
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.search_knowledge",
+            return_value=[old_item],
+        ),
+        patch(
+            "app.tools.memory.add_knowledge.check_contradictions",
+            return_value=[ContradictionResult(old_item.id, True, 0.9, "mudou")],
+        ),
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.create_knowledge",
+            return_value=_make_knowledge_item(),
+        ),
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.get_knowledge_by_id",
+            return_value=old_item,
+        ),
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.supersede_knowledge",
+        ) as mock_supersede,
+    ):
+        result = await add_knowledge.ainvoke(
+            input={"type": "fact", "content": "Pesa 75kg"}, config=_make_config()
+        )
+
+    mock_supersede.assert_not_called()
+    data = json.loads(result)
+    assert data["success"] is True
+    assert "superseded" not in data
+
+
+@pytest.mark.asyncio
+async def test_add_knowledge_merges_near_duplicate_without_llm() -> None:
+    existing = _make_knowledge_item(item_id=TEST_ITEM_ID_2, content="Gosta de café")
+
+    with (
+        patch(
+            "app.tools.memory.add_knowledge.get_user_session",
+            side_effect=_tracked_sessions([0]),
+        ) as mock_session,
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.find_near_duplicate",
+            return_value=existing,
+        ),
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.merge_duplicate_knowledge",
+            return_value=existing,
+        ) as mock_merge,
+        patch("app.tools.memory.add_knowledge.check_contradictions") as mock_check,
+        patch("app.tools.memory.add_knowledge.MemoryRepository.create_knowledge") as mock_create,
+    ):
+        result = await add_knowledge.ainvoke(
+            input={"type": "fact", "content": "Gosta muito de café", "confidence": 0.8},
+            config=_make_config(),
+        )
+
+    data = json.loads(result)
+    assert data["merged"] is True
+    assert data["itemId"] == TEST_ITEM_ID_2
+    assert mock_session.call_count == 1
+    mock_merge.assert_awaited_once_with(mock_merge.call_args[0][0], existing.id, 0.8)
+    mock_check.assert_not_called()
+    mock_create.assert_not_called()
+
+
 @pytest.mark.asyncio
 async def test_add_knowledge_title_generation() -> None:
     """Verify title is generated with type label prefix."""
@@ -263,6 +412,10 @@ async def test_add_knowledge_contradiction_detection() -> None:
 
     with (
         patch("app.tools.memory.add_knowledge.get_user_session") as mock_session,
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.find_near_duplicate",
+            return_value=None,
+        ),
         patch(
             "app.tools.memory.add_knowledge.MemoryRepository.search_knowledge",
             return_value=[old_item],
@@ -275,6 +428,10 @@ async def test_add_knowledge_contradiction_detection() -> None:
             "app.tools.memory.add_knowledge.MemoryRepository.create_knowledge",
             return_value=new_item,
         ),
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.get_knowledge_by_id",
+            return_value=old_item,
+        ),
         patch(
             "app.tools.memory.add_knowledge.MemoryRepository.supersede_knowledge",
         ) as mock_supersede,
@@ -308,6 +465,10 @@ async def test_add_knowledge_no_contradiction() -> None:
 
     with (
         patch("app.tools.memory.add_knowledge.get_user_session") as mock_session,
+        patch(
+            "app.tools.memory.add_knowledge.MemoryRepository.find_near_duplicate",
+            return_value=None,
+        ),
         patch(
             "app.tools.memory.add_knowledge.MemoryRepository.search_knowledge",
             return_value=[existing_item],
@@ -443,12 +604,12 @@ async def test_analyze_context_multi_area() -> None:
     with (
         patch("app.tools.memory.analyze_context.get_user_session") as mock_session,
         patch(
-            "app.tools.memory.analyze_context.MemoryRepository.search_knowledge",
-            side_effect=[[item1], [item2]],
-        ),
+            "app.tools.memory.analyze_context.MemoryRepository.get_context",
+            return_value=MemoryContext(items=[item1, item2], memories=None),
+        ) as mock_get_context,
         patch(
-            "app.tools.memory.analyze_context.MemoryRepository.get_user_memories",
-            return_value=None,
+            "app.tools.memory.analyze_context.MemoryRepository.knowledge_index",
+            return_value=KnowledgeIndex([item1, item2]),
         ),
     ):
         mock_ctx = AsyncMock()
@@ -469,6 +630,9 @@ async def test_analyze_context_multi_area() -> None:
     ids = {f["id"] for f in data["relatedFacts"]}
     assert str(uuid.UUID(TEST_ITEM_ID)) in ids
     assert str(uuid.UUID(TEST_ITEM_ID_2)) in ids
+    # Both areas in a single round trip
+    mock_get_context.assert_awaited_once()
+    assert mock_get_context.await_args.args[2] == ["health", "finance"]
 
 
 @pytest.mark.asyncio
@@ -484,12 +648,12 @@ async def test_analyze_context_patterns() -> None:
     with (
         patch("app.tools.memory.analyze_context.get_user_session") as mock_session,
         patch(
-            "app.tools.memory.analyze_context.MemoryRepository.search_knowledge",
-            return_value=[],
+            "app.tools.memory.analyze_context.MemoryRepository.get_context",
+            return_value=MemoryContext(items=[], memories=user_memories),
         ),
         patch(
-            "app.tools.memory.analyze_context.MemoryRepository.get_user_memories",
-            return_value=user_memories,
+            "app.tools.memory.analyze_context.MemoryRepository.knowledge_index",
+            return_value=KnowledgeIndex([]),
         ),
     ):
         mock_ctx = AsyncMock()
@@ -511,6 +675,38 @@ async def test_analyze_context_patterns() -> None:
     assert data["existingPatterns"][0]["pattern"] == "Stress causa insônia"
 
 
+@pytest.mark.asyncio
+async def test_analyze_context_single_keyword_topic_has_no_fact_connections() -> None:
+    item = _make_knowledge_item(item_id=TEST_ITEM_ID, area="health", content="Dorme pouco")
+    config = _make_config()
+
+    with (
+        patch("app.tools.memory.analyze_context.get_user_session") as mock_session,
+        patch(
+            "app.tools.memory.analyze_context.MemoryRepository.get_context",
+            return_value=MemoryContext(items=[item], memories=None),
+        ),
+        patch(
+            "app.tools.memory.analyze_context.MemoryRepository.knowledge_index",
+            return_value=KnowledgeIndex([item]),
+        ),
+    ):
+        mock_ctx = AsyncMock()
+        mock_ctx.__aenter__ = AsyncMock(return_value=AsyncMock())
+        mock_ctx.__aexit__ = AsyncMock(return_value=None)
+        mock_session.return_value = mock_ctx
+
+        result = await analyze_context.ainvoke(
+            input={"current_topic": "dorme", "related_areas": ["health"]},
+            config=config,
+        )
+
+    data = json.loads(result)
+    # One shared word is not enough to call the fact a connection
+    assert len(data["relatedFacts"]) == 1
+    assert data["potentialConnections"] == []
+
+
 @pytest.mark.asyncio
 async def test_analyze_context_hint() -> None:
     config = _make_config()
@@ -518,12 +714,12 @@ async def test_analyze_context_hint() -> None:
     with (
         patch("app.tools.memory.analyze_context.get_user_session") as mock_session,
         patch(
-            "app.tools.memory.analyze_context.MemoryRepository.search_knowledge",
-            return_value=[],
+            "app.tools.memory.analyze_context.MemoryRepository.get_context",
+            return_value=MemoryContext(items=[], memories=None),
         ),
         patch(
-            "app.tools.memory.analyze_context.MemoryRepository.get_user_memories",
-            return_value=None,
+            "app.tools.memory.analyze_context.MemoryRepository.knowledge_index",
+            return_value=KnowledgeIndex([]),
         ),
     ):
         mock_ctx = AsyncMock()
@@ -553,12 +749,12 @@ async def test_analyze_context_no_hint() -> None:
     with (
         patch("app.tools.memory.analyze_context.get_user_session") as mock_session,
         patch(
-            "app.tools.memory.analyze_context.MemoryRepository.search_knowledge",
-            return_value=[],
+            "app.tools.memory.analyze_context.MemoryRepository.get_context",
+            return_value=MemoryContext(items=[], memories=None),
         ),
         patch(
-            "app.tools.memory.analyze_context.MemoryRepository.get_user_memories",
-            return_value=None,
+            "app.tools.memory.analyze_context.MemoryRepository.knowledge_index",
+            return_value=KnowledgeIndex([]),
         ),
     ):
         mock_ctx = AsyncMock()
@@ -579,6 +775,40 @@ async def test_analyze_context_no_hint() -> None:
     assert "_hint" not in data
 
 
+@pytest.mark.asyncio
+async def test_analyze_context_connections_ignore_accents_and_plurals() -> None:
+    fact = _make_knowledge_item(area="finance", content="Sente ansiedade com dívidas do cartão")
+    user_memories = _make_user_memories(
+        learned_patterns=[{"pattern": "Ansiedade aumenta no fim do mês", "confidence": 0.9}]
+    )
+
+    with (
+        patch("app.tools.memory.analyze_context.get_user_session") as mock_session,
+        patch(
+            "app.tools.memory.analyze_context.MemoryRepository.get_context",
+            return_value=MemoryContext(items=[], memories=user_memories),
+        ),
+        patch(
+            "app.tools.memory.analyze_context.MemoryRepository.knowledge_index",
+            return_value=KnowledgeIndex([fact]),
+        ),
+    ):
+        mock_ctx = AsyncMock()
+        mock_ctx.__aenter__ = AsyncMock(return_value=AsyncMock())
+        mock_ctx.__aexit__ = AsyncMock(return_value=None)
+        mock_session.return_value = mock_ctx
+
+        result = await analyze_context.ainvoke(
+            input={"current_topic": "Ansiedade e divida", "related_areas": ["health"]},
+            config=_make_config(),
+        )
+
+    connections = json.loads(result)["potentialConnections"]
+    assert len(connections) == 2
+    assert "palavras em comum: ansiedade" in connections[0]
+    assert connections[1].startswith("Fato 'Sente ansiedade com dívidas")
+
+
 @pytest.mark.asyncio
 async def test_analyze_context_invalid_areas() -> None:
     config = _make_config()
@@ -18,11 +18,11 @@ def test_registry_returns_domain_config_instances() -> None:
 
 
 def test_tracking_tool_count() -> None:
-    """Tracking: 6 domain tools + 2 shared memory READ = 8 total, 4 WRITE."""
+    """Tracking: 10 domain tools + 2 shared memory READ = 12 total, 6 WRITE."""
     registry = build_domain_registry()
     dc = registry["tracking"]
-    assert len(dc.tools) == 8
-    assert len(dc.write_tools) == 4
+    assert len(dc.tools) == 12
+    assert len(dc.write_tools) == 6
 
 
 def test_finance_tool_count() -> None:
@@ -88,7 +88,14 @@ def test_all_domains_have_prompt_extension() -> None:
 def test_tracking_write_tools_are_correct() -> None:
     """Tracking WRITE tools must be the expected set."""
     registry = build_domain_registry()
-    expected = {"record_metric", "update_metric", "delete_metric", "record_habit"}
+    expected = {
+        "record_metric",
+        "update_metric",
+        "delete_metric",
+        "record_habit",
+        "record_metrics",
+        "delete_metrics",
+    }
     assert registry["tracking"].write_tools == expected
 
 
@@ -167,6 +167,77 @@ class TestTrackingRepository:
             count = await TrackingRepository.delete_batch(session, ids)
             assert count == 2
 
+    async def test_metric_series_buckets_and_totals(
+        self,
+        session_factory: AsyncSessionFactory,
+        seed_test_users: None,
+        user_a_id: uuid.UUID,
+    ) -> None:
+        from app.tools.tracking._series import load_metric_series
+
+        ids = [uuid.uuid4() for _ in range(3)]
+        days = [date(2020, 1, 6), date(2020, 1, 7), date(2020, 1, 15)]
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            for eid, day, value in zip(ids, days, (1.0, 2.0, 4.0), strict=True):
+                await TrackingRepository.create(
+                    session,
+                    {
+                        "id": eid,
+                        "user_id": user_a_id,
+                        "type": TrackingType.ENERGY,
+                        "area": LifeArea.HEALTH,
+                        "value": value,
+                        "entry_date": day,
+                    },
+                )
+
+        try:
+            async with get_user_session(session_factory, str(user_a_id)) as session:
+                series = await load_metric_series(
+                    session, user_a_id, "energy", date(2020, 1, 1), date(2020, 1, 31), "week"
+                )
+            assert series.total.count == 3
+            assert series.total.sum == 7.0
+            assert [(b.start, b.stats.count) for b in series.buckets] == [
+                (date(2020, 1, 6), 2),
+                (date(2020, 1, 13), 1),
+            ]
+        finally:
+            async with get_user_session(session_factory, str(user_a_id)) as session:
+                await TrackingRepository.delete_batch(session, ids)
+
+    async def test_create_batch_and_delete_by_range(
+        self,
+        session_factory: AsyncSessionFactory,
+        seed_test_users: None,
+        user_a_id: uuid.UUID,
+    ) -> None:
+        days = [date(2020, 2, 1), date(2020, 2, 2), date(2020, 2, 5)]
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_a_id,
+                "type": TrackingType.WATER,
+                "area": LifeArea.HEALTH,
+                "value": 500.0,
+                "unit": "ml",
+                "entry_date": day,
+                "source": "chat",
+                "entry_metadata": None,
+            }
+            for day in days
+        ]
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            assert await TrackingRepository.create_batch(session, rows) == 3
+
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            deleted = await TrackingRepository.delete_by_range(
+                session, user_a_id, "water", date(2020, 2, 1), date(2020, 2, 2)
+            )
+            assert deleted == 2
+            remaining = await TrackingRepository.delete_batch(session, [r["id"] for r in rows])
+            assert remaining == 1
+
 
 # ---------------------------------------------------------------------------
 # FinanceRepository
@@ -240,6 +311,330 @@ class TestFinanceRepository:
 
             await session.execute(delete(VariableExpense).where(VariableExpense.id == expense_id))
 
+    async def test_ensure_recurring_backfills_missing_months(
+        self,
+        session_factory: AsyncSessionFactory,
+        seed_test_users: None,
+        user_a_id: uuid.UUID,
+    ) -> None:
+        from sqlalchemy import delete, select
+
+        from app.db.models.finance import Bill
+        from app.tools.finance._helpers import ensure_recurring_for_month
+
+        group_id = uuid.uuid4()
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            session.add(
+                Bill(
+                    id=uuid.uuid4(),
+                    user_id=user_a_id,
+                    name="Internet",
+                    category="utilities",
+                    amount=120.00,
+                    due_day=10,
+                    status="paid",
+                    is_recurring=True,
+                    recurring_group_id=group_id,
+                    month_year="2025-10",
+                )
+            )
+
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            created = await ensure_recurring_for_month(session, user_a_id, "2026-01", Bill)
+            again = await ensure_recurring_for_month(session, user_a_id, "2026-01", Bill)
+            rows = (
+                await session.execute(
+                    select(Bill.month_year, Bill.status).where(Bill.recurring_group_id == group_id)
+                )
+            ).all()
+
+        assert created == 3
+        assert again == 0
+        assert sorted(rows) == [
+            ("2025-10", "paid"),
+            ("2025-11", "pending"),
+            ("2025-12", "pending"),
+            ("2026-01", "pending"),
+        ]
+
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            await session.execute(delete(Bill).where(Bill.recurring_group_id == group_id))
+
+    async def test_finance_aggregate_groups_by_month(
+        self,
+        session_factory: AsyncSessionFactory,
+        seed_test_users: None,
+        user_a_id: uuid.UUID,
+    ) -> None:
+        from sqlalchemy import delete
+
+        from app.db.models.finance import Bill
+        from app.tools.finance._aggregates import load_finance_aggregate
+
+        bills = [
+            Bill(
+                id=uuid.uuid4(),
+                user_id=user_a_id,
+                name=f"Agg {month} {status}",
+                category="utilities",
+                amount=amount,
+                due_day=5,
+                status=status,
+                month_year=month,
+            )
+            for month, status, amount in [
+                ("2031-01", "paid", 100.00),
+                ("2031-01", "pending", 50.00),
+                ("2031-01", "canceled", 999.00),
+                ("2031-03", "overdue", 70.00),
+            ]
+        ]
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            session.add_all(bills)
+
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            agg = await load_finance_aggregate(
+                session, user_a_id, ["2031-01", "2031-02", "2031-03"]
+            )
+
+        jan, feb, mar = agg.months
+        assert (jan.month_year, jan.bills_total, jan.bills_paid) == ("2031-01", 150.0, 100.0)
+        assert (jan.bills_paid_count, jan.bills_pending_count, jan.bills_canceled_count) == (
+            1,
+            1,
+            1,
+        )
+        assert (feb.month_year, feb.bills_total) == ("2031-02", 0.0)
+        assert (mar.bills_total, mar.bills_overdue_count) == (70.0, 1)
+        assert agg.totals.bills_total == 220.0
+
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            await session.execute(delete(Bill).where(Bill.name.like("Agg 2031-%")))
+
+    async def test_rollups_reconcile_deltas_and_match_live_totals(
+        self,
+        session_factory: AsyncSessionFactory,
+        seed_test_users: None,
+        user_a_id: uuid.UUID,
+    ) -> None:
+        from sqlalchemy import delete
+
+        from app.db.models.finance import Bill, FinanceMonthlyRollup, VariableExpense
+        from app.tools.finance._aggregates import load_finance_aggregate
+        from app.tools.finance._rollups import (
+            apply_rollup_deltas,
+            check_finance_rollups,
+            reconcile_finance_rollups,
+        )
+
+        month = "2032-05"
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            session.add(
+                Bill(
+                    id=uuid.uuid4(),
+                    user_id=user_a_id,
+                    name="Rollup rent",
+                    category="housing",
+                    amount=1500.00,
+                    due_day=5,
+                    status="paid",
+                    month_year=month,
+                )
+            )
+
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            first = await reconcile_finance_rollups(session, user_a_id, [month])
+        assert first.missing == (month,)
+
+        # A write through the delta path keeps the rollup consistent
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            session.add(
+                VariableExpense(
+                    id=uuid.uuid4(),
+                    user_id=user_a_id,
+                    name="Rollup groceries",
+                    category="food",
+                    expected_amount=300.00,
+                    actual_amount=250.00,
+                    month_year=month,
+                )
+            )
+            assert await apply_rollup_deltas(
+                session, user_a_id, month, {"expense:food:active": (300.0, 250.0, 1)}
+            )
+
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            check = await check_finance_rollups(session, user_a_id, [month])
+            rolled = await load_finance_aggregate(
+                session, user_a_id, [month], rollup_before="2099-01"
+            )
+            live = await load_finance_aggregate(session, user_a_id, [month])
+
+        assert check.drifted == ()
+        assert check.missing == ()
+        assert rolled.months == live.months
+        assert (live.months[0].bills_paid, live.months[0].expenses_actual) == (1500.0, 250.0)
+
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            await session.execute(delete(Bill).where(Bill.month_year == month))
+            await session.execute(
+                delete(VariableExpense).where(VariableExpense.month_year == month)
+            )
+            await session.execute(
+                delete(FinanceMonthlyRollup).where(FinanceMonthlyRollup.month_year == month)
+            )
+
+    async def test_rollup_dropped_on_write_outside_the_delta_path(
+        self,
+        session_factory: AsyncSessionFactory,
+        seed_test_users: None,
+        user_a_id: uuid.UUID,
+    ) -> None:
+        from sqlalchemy import delete, update
+
+        from app.db.models.finance import Bill, FinanceMonthlyRollup, VariableExpense
+        from app.db.repositories.finance import FinanceRepository
+        from app.tools.finance._aggregates import load_finance_aggregate
+        from app.tools.finance._rollups import apply_rollup_deltas, reconcile_finance_rollups
+
+        month = "2032-06"
+        bill_id = uuid.uuid4()
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            session.add(
+                Bill(
+                    id=bill_id,
+                    user_id=user_a_id,
+                    name="Rollup rent",
+                    category="housing",
+                    amount=1500.00,
+                    due_day=5,
+                    status="paid",
+                    month_year=month,
+                )
+            )
+
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            await reconcile_finance_rollups(session, user_a_id, [month])
+
+        # The delta path keeps the row
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            session.add(
+                VariableExpense(
+                    id=uuid.uuid4(),
+                    user_id=user_a_id,
+                    name="Rollup groceries",
+                    category="food",
+                    expected_amount=300.00,
+                    actual_amount=250.00,
+                    month_year=month,
+                )
+            )
+            await apply_rollup_deltas(
+                session, user_a_id, month, {"expense:food:active": (300.0, 250.0, 1)}
+            )
+
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            assert len(await FinanceRepository.get_rollups(session, user_a_id, [month])) == 1
+
+        # Another writer (the web app) changes the month without deltas
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            await session.execute(update(Bill).where(Bill.id == bill_id).values(amount=1700.00))
+
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            rollups = await FinanceRepository.get_rollups(session, user_a_id, [month])
+            aggregate = await load_finance_aggregate(
+                session, user_a_id, [month], rollup_before="2099-01"
+            )
+
+        assert rollups == []
+        assert aggregate.months[0].bills_paid == 1700.0
+
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            await session.execute(delete(Bill).where(Bill.month_year == month))
+            await session.execute(
+                delete(VariableExpense).where(VariableExpense.month_year == month)
+            )
+            await session.execute(
+                delete(FinanceMonthlyRollup).where(FinanceMonthlyRollup.month_year == month)
+            )
+
+    async def test_reconcile_waits_for_a_concurrent_delta(
+        self,
+        session_factory: AsyncSessionFactory,
+        seed_test_users: None,
+        user_a_id: uuid.UUID,
+    ) -> None:
+        import asyncio
+
+        from sqlalchemy import delete
+
+        from app.db.models.finance import Bill, FinanceMonthlyRollup, VariableExpense
+        from app.db.session import get_service_session
+        from app.tools.finance._rollups import (
+            apply_rollup_deltas,
+            check_finance_rollups,
+            reconcile_finance_rollups,
+        )
+
+        month = "2032-07"
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            session.add(
+                Bill(
+                    id=uuid.uuid4(),
+                    user_id=user_a_id,
+                    name="Rollup rent",
+                    category="housing",
+                    amount=1500.00,
+                    due_day=5,
+                    status="paid",
+                    month_year=month,
+                )
+            )
+
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            await reconcile_finance_rollups(session, user_a_id, [month])
+
+        async def _reconcile() -> None:
+            async with get_service_session(session_factory) as session:
+                await reconcile_finance_rollups(session, user_a_id, [month])
+
+        # The delta holds the row while a reconcile starts, then commits
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            session.add(
+                VariableExpense(
+                    id=uuid.uuid4(),
+                    user_id=user_a_id,
+                    name="Rollup groceries",
+                    category="food",
+                    expected_amount=300.00,
+                    actual_amount=250.00,
+                    month_year=month,
+                )
+            )
+            await apply_rollup_deltas(
+                session, user_a_id, month, {"expense:food:active": (300.0, 250.0, 1)}
+            )
+            reconcile = asyncio.create_task(_reconcile())
+            await asyncio.sleep(0.2)
+            assert not reconcile.done()
+
+        await asyncio.wait_for(reconcile, 5)
+
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            check = await check_finance_rollups(session, user_a_id, [month])
+
+        assert check.drifted == ()
+        assert check.missing == ()
+
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            await session.execute(delete(Bill).where(Bill.month_year == month))
+            await session.execute(
+                delete(VariableExpense).where(VariableExpense.month_year == month)
+            )
+            await session.execute(
+                delete(FinanceMonthlyRollup).where(FinanceMonthlyRollup.month_year == month)
+            )
+
 
 # ---------------------------------------------------------------------------
 # MemoryRepository
@@ -282,6 +677,179 @@ class TestMemoryRepository:
 
             await session.execute(delete(KnowledgeItem).where(KnowledgeItem.id == item_id))
 
+    async def test_get_context_ranks_per_area(
+        self,
+        session_factory: AsyncSessionFactory,
+        seed_test_users: None,
+        user_a_id: uuid.UUID,
+    ) -> None:
+        from sqlalchemy import delete
+
+        from app.db.models.memory import KnowledgeItem
+
+        # Future creation dates: newer than any other item of the seeded user
+        rows = [
+            ("health", 0.5, datetime(2100, 1, 1, tzinfo=UTC)),
+            ("health", 0.6, datetime(2100, 1, 2, tzinfo=UTC)),
+            ("finance", 0.9, datetime(2100, 1, 1, tzinfo=UTC)),
+            ("learning", 1.0, datetime(2100, 1, 3, tzinfo=UTC)),
+        ]
+        ids = [uuid.uuid4() for _ in rows]
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            for item_id, (area, confidence, created_at) in zip(ids, rows, strict=True):
+                await MemoryRepository.create_knowledge(
+                    session,
+                    {
+                        "id": item_id,
+                        "user_id": user_a_id,
+                        "type": KnowledgeItemType.FACT,
+                        "area": area,
+                        "title": f"Fact {area}",
+                        "content": f"Fact about {area}.",
+                        "source": KnowledgeItemSource.CONVERSATION,
+                        "confidence": confidence,
+                        "created_at": created_at,
+                    },
+                )
+
+        try:
+            async with get_user_session(session_factory, str(user_a_id)) as session:
+                context = await MemoryRepository.get_context(
+                    session, user_a_id, ["health", "finance"], per_area=1
+                )
+            # Newest health item only, then ordered by confidence; learning not requested
+            assert [k.id for k in context.items if k.id in ids] == [ids[2], ids[1]]
+        finally:
+            async with get_user_session(session_factory, str(user_a_id)) as session:
+                await session.execute(delete(KnowledgeItem).where(KnowledgeItem.id.in_(ids)))
+
+    async def test_merge_duplicate_knowledge(
+        self,
+        session_factory: AsyncSessionFactory,
+        seed_test_users: None,
+        user_a_id: uuid.UUID,
+    ) -> None:
+        from sqlalchemy import delete
+
+        from app.db.models.memory import KnowledgeItem
+
+        item_id = uuid.uuid4()
+        async with get_user_session(session_factory, str(user_a_id)) as session:
+            await MemoryRepository.create_knowledge(
+                session,
+                {
+                    "id": item_id,
+                    "user_id": user_a_id,
+                    "type": KnowledgeItemType.PREFERENCE,
+                    "area": "health",
+                    "title": "Café",
+                    "content": "Gosta de tomar café expresso de manhã",
+                    "source": KnowledgeItemSource.CONVERSATION,
+                    "confidence": 0.8,
+                },
+            )
+
+        try:
+            async with get_user_session(session_factory, str(user_a_id)) as session:
+                duplicate = await MemoryRepository.find_near_duplicate(
+                    session,
+                    user_a_id,
+                    "Gosta de tomar cafés expressos de manhã",
+                    item_type="preference",
+                    area="health",
+                    threshold=0.7,
+                )
+                assert duplicate is not None and duplicate.id == item_id
+                merged = await MemoryRepository.merge_duplicate_knowledge(session, item_id, 0.9)
+                assert merged is not None
+                assert merged.confidence == pytest.approx(0.95)
+                active = await MemoryRepository.get_active_knowledge(
+                    session, user_a_id, [item_id, uuid.uuid4()]
+                )
+                assert [ki.id for ki in active] == [item_id]
+
+                await MemoryRepository.supersede_knowledge(session, item_id, uuid.uuid4())
+                assert (
+                    await MemoryRepository.merge_duplicate_knowledge(session, item_id, 0.9) is None
+                )
+                assert (
+                    await MemoryRepository.get_active_knowledge(session, user_a_id, [item_id]) == []
+                )
+        finally:
+            async with get_user_session(session_factory, str(user_a_id)) as session:
+                await session.execute(delete(KnowledgeItem).where(KnowledgeItem.id == item_id))
+
+    async def test_consolidation_trigger_accumulates_and_resets(
+        self,
+        session_factory: AsyncSessionFactory,
+        seed_test_users: None,
+        user_a_id: uuid.UUID,
+    ) -> None:
+        from app.db.session import get_service_session
+
+        job_id = uuid.uuid4()
+        async with get_service_session(session_factory) as session:
+            await MemoryRepository.bump_consolidation_trigger(
+                session, user_a_id, messages=2, tokens=100
+            )
+            trigger = await MemoryRepository.bump_consolidation_trigger(
+                session, user_a_id, messages=2, tokens=50
+            )
+            assert (trigger.pending_messages, trigger.pending_tokens) == (4, 150)
+
+            await MemoryRepository.reset_consolidation_trigger(session, user_a_id, job_id=job_id)
+            trigger = await MemoryRepository.bump_consolidation_trigger(
+                session, user_a_id, messages=1, tokens=10
+            )
+            assert (trigger.pending_messages, trigger.pending_tokens) == (1, 10)
+
+    async def test_checkpoint_not_hidden_by_later_failed_log(
+        self,
+        session_factory: AsyncSessionFactory,
+        seed_test_users: None,
+        user_a_id: uuid.UUID,
+    ) -> None:
+        from sqlalchemy import delete
+
+        from app.db.models.memory import MemoryConsolidation
+        from app.db.session import get_service_session
+
+        window = datetime(2020, 1, 1, tzinfo=UTC)
+        ids = [uuid.uuid4() for _ in range(3)]
+        rows = [
+            # Checkpoint of an older window
+            (ids[0], datetime(2019, 1, 1, tzinfo=UTC), "partial", datetime(2020, 1, 2, tzinfo=UTC)),
+            (ids[1], window, "partial", datetime(2020, 1, 3, tzinfo=UTC)),
+            # The crashed run's failure log comes last
+            (ids[2], window, "failed", datetime(2020, 1, 4, tzinfo=UTC)),
+        ]
+        try:
+            async with get_service_session(session_factory) as session:
+                for log_id, consolidated_from, status, created_at in rows:
+                    await MemoryRepository.create_consolidation_log(
+                        session,
+                        {
+                            "id": log_id,
+                            "user_id": user_a_id,
+                            "consolidated_from": consolidated_from,
+                            "consolidated_to": created_at,
+                            "status": status,
+                            "created_at": created_at,
+                        },
+                    )
+
+            async with get_service_session(session_factory) as session:
+                checkpoint = await MemoryRepository.get_consolidation_checkpoint(
+                    session, user_a_id, window
+                )
+                assert checkpoint is not None
+                assert checkpoint.id == ids[1]
+        finally:
+            async with get_service_session(session_factory) as session:
+                await session.execute(
+                    delete(MemoryConsolidation).where(MemoryConsolidation.id.in_(ids))
+                )
+
 
 # ---------------------------------------------------------------------------
 # ChatRepository
@@ -386,3 +954,139 @@ class TestChatRepository:
             from app.db.models.chat import Conversation as Conv
 
             await session.execute(delete(Conv).where(Conv.id == conv_id))
+
+
+# ---------------------------------------------------------------------------
+# JobRepository
+# ---------------------------------------------------------------------------
+
+
+class TestJobRepository:
+    async def test_concurrent_claims_never_share_a_job(
+        self,
+        session_factory: AsyncSessionFactory,
+        seed_test_users: None,
+        user_a_id: uuid.UUID,
+    ) -> None:
+        import asyncio
+
+        from sqlalchemy import delete
+
+        from app.db.models.jobs import BackgroundJob
+        from app.db.repositories.job import JobRepository
+        from app.db.session import get_service_session
+
+        queue = f"test-{uuid.uuid4().hex[:8]}"
+        async with get_service_session(session_factory) as session:
+            ids = await JobRepository.enqueue_many(
+                session,
+                [
+                    {
+                        "queue": queue,
+                        "user_id": user_a_id,
+                        "payload": {},
+                        "dedupe_key": f"{queue}:{i}",
+                    }
+                    for i in range(4)
+                ],
+            )
+            # Duplicate dedupe key is skipped
+            dup = await JobRepository.enqueue_many(
+                session, [{"queue": queue, "payload": {}, "dedupe_key": f"{queue}:0"}]
+            )
+        assert len(ids) == 4
+        assert dup == []
+
+        async def _claim(worker_id: str) -> list[uuid.UUID]:
+            async with get_service_session(session_factory) as session:
+                jobs = await JobRepository.claim(
+                    session, queues=[queue], worker_id=worker_id, limit=3, lease_seconds=60
+                )
+                await asyncio.sleep(0.1)  # hold row locks while the other claim runs
+                return [j.id for j in jobs]
+
+        first, second = await asyncio.gather(_claim("w1"), _claim("w2"))
+        assert set(first).isdisjoint(second)
+        assert sorted(first + second) == sorted(ids)
+
+        # Cleanup
+        async with get_service_session(session_factory) as session:
+            await session.execute(delete(BackgroundJob).where(BackgroundJob.queue == queue))
+
+    async def test_cancel_batch_cancels_unfinished_children(
+        self,
+        session_factory: AsyncSessionFactory,
+        seed_test_users: None,
+        user_a_id: uuid.UUID,
+    ) -> None:
+        from sqlalchemy import delete
+
+        from app.db.models.enums import JobStatus
+        from app.db.models.jobs import BackgroundJob
+        from app.db.repositories.job import JobRepository
+        from app.db.session import get_service_session
+
+        queue = f"test-{uuid.uuid4().hex[:8]}"
+        async with get_service_session(session_factory) as session:
+            (parent_id,) = await JobRepository.enqueue_many(session, [{"queue": queue}])
+            child_ids = await JobRepository.enqueue_many(
+                session,
+                [{"queue": queue, "user_id": user_a_id, "parent_id": parent_id} for _ in range(3)],
+            )
+            await session.execute(
+                BackgroundJob.__table__.update()
+                .where(BackgroundJob.id == child_ids[0])
+                .values(status=JobStatus.COMPLETED, result={"users_consolidated": 1})
+            )
+
+        async with get_service_session(session_factory) as session:
+            cancelled = await JobRepository.cancel(session, parent_id)
+            by_status = await JobRepository.count_children_by_status(session, parent_id)
+            sums = await JobRepository.sum_children_results(session, parent_id)
+
+        assert cancelled == 3  # parent + two unfinished children
+        assert by_status == {JobStatus.COMPLETED: 1, JobStatus.CANCELLED: 2}
+        assert sums == {"users_consolidated": 1.0}
+
+        async with get_service_session(session_factory) as session:
+            await session.execute(delete(BackgroundJob).where(BackgroundJob.queue == queue))
+
+    async def test_one_active_job_per_concurrency_key(
+        self,
+        session_factory: AsyncSessionFactory,
+        seed_test_users: None,
+        user_a_id: uuid.UUID,
+    ) -> None:
+        from sqlalchemy import delete
+
+        from app.db.models.jobs import BackgroundJob
+        from app.db.repositories.job import JobRepository
+        from app.db.session import get_service_session
+
+        queue = f"test-{uuid.uuid4().hex[:8]}"
+        job = {"queue": queue, "user_id": user_a_id, "concurrency_key": f"{queue}:{user_a_id}"}
+        async with get_service_session(session_factory) as session:
+            first = await JobRepository.enqueue_many(session, [job])
+            # Pending job holds the key
+            assert await JobRepository.enqueue_many(session, [job]) == []
+
+        async with get_service_session(session_factory) as session:
+            (claimed,) = await JobRepository.claim(
+                session, queues=[queue], worker_id="w1", limit=1, lease_seconds=60
+            )
+            assert [claimed.id] == first
+            # Running job still holds it, and no job runs ahead of the claimed one
+            assert await JobRepository.enqueue_many(session, [job]) == []
+            assert await JobRepository.try_lock_user_queue(session, queue, user_a_id, job=claimed)
+            # Anything else waits for it
+            assert not await JobRepository.try_lock_user_queue(session, queue, user_a_id)
+
+        async with get_service_session(session_factory) as session:
+            await JobRepository.complete(session, claimed.id, worker_id="w1")
+            # Released once finished
+            assert len(await JobRepository.enqueue_many(session, [job])) == 1
+            assert await JobRepository.try_lock_user_queue(session, queue, user_a_id)
+
+        # Cleanup
+        async with get_service_session(session_factory) as session:
+            await session.execute(delete(BackgroundJob).where(BackgroundJob.queue == queue))
@@ -0,0 +1,115 @@
+"""Unit tests for the READ tool result cache."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from app.agents.registry import TOOL_DATA_DOMAINS, build_domain_registry
+from app.tools.common import tool_cache
+from app.tools.common.tool_cache import ToolResultCache, normalize_args
+
+_DOMAINS = {
+    "get_bills": frozenset({"finance"}),
+    "get_habits": frozenset({"habits"}),
+    "mark_bill_paid": frozenset({"finance"}),
+}
+DAY = "2026-02-23"
+
+
+def _cache(ttl_seconds: float = 60.0, max_entries: int = 100) -> ToolResultCache:
+    return ToolResultCache(_DOMAINS, ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+
+def test_normalize_args_ignores_order_and_nulls() -> None:
+    assert normalize_args({"b": 1, "a": "x", "c": None}) == normalize_args({"a": "x", "b": 1})
+
+
+def test_key_includes_user_args_and_day() -> None:
+    cache = _cache()
+    cache.put("u1", "get_bills", {"month": 2}, DAY, "bills")
+
+    assert cache.get("u1", "get_bills", {"month": 2}, DAY) == "bills"
+    assert cache.get("u2", "get_bills", {"month": 2}, DAY) is None
+    assert cache.get("u1", "get_bills", {"month": 3}, DAY) is None
+    assert cache.get("u1", "get_bills", {"month": 2}, "2026-02-24") is None
+
+
+def test_undeclared_tools_are_not_cached() -> None:
+    cache = _cache()
+    assert not cache.cacheable("some_new_tool")
+    cache.put("u1", "some_new_tool", {}, DAY, "x")
+    assert cache.stats()["entries"] == 0
+
+
+def test_entries_expire() -> None:
+    cache = _cache(ttl_seconds=10)
+    with patch.object(tool_cache.time, "monotonic", return_value=1000.0):
+        cache.put("u1", "get_bills", {}, DAY, "bills")
+    with patch.object(tool_cache.time, "monotonic", return_value=1009.0):
+        assert cache.get("u1", "get_bills", {}, DAY) == "bills"
+    with patch.object(tool_cache.time, "monotonic", return_value=1011.0):
+        assert cache.get("u1", "get_bills", {}, DAY) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_bound() -> None:
+    cache = _cache(max_entries=2)
+    cache.put("u1", "get_bills", {"m": 1}, DAY, "1")
+    cache.put("u1", "get_bills", {"m": 2}, DAY, "2")
+    # Touch m=1 so m=2 is the least recently used
+    assert cache.get("u1", "get_bills", {"m": 1}, DAY) == "1"
+    cache.put("u1", "get_bills", {"m": 3}, DAY, "3")
+
+    assert cache.get("u1", "get_bills", {"m": 2}, DAY) is None
+    assert cache.get("u1", "get_bills", {"m": 1}, DAY) == "1"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_write_invalidates_only_its_domain_for_that_user() -> None:
+    cache = _cache()
+    cache.put("u1", "get_bills", {}, DAY, "bills")
+    cache.put("u1", "get_habits", {}, DAY, "habits")
+    cache.put("u2", "get_bills", {}, DAY, "other user")
+
+    assert cache.invalidate_write("u1", "mark_bill_paid") == 1
+
+    assert cache.get("u1", "get_bills", {}, DAY) is None
+    assert cache.get("u1", "get_habits", {}, DAY) == "habits"
+    assert cache.get("u2", "get_bills", {}, DAY) == "other user"
+
+
+def test_undeclared_write_invalidates_everything_for_user() -> None:
+    cache = _cache()
+    cache.put("u1", "get_bills", {}, DAY, "bills")
+    cache.put("u1", "get_habits", {}, DAY, "habits")
+    assert cache.invalidate_write("u1", "some_new_write") == 2
+
+
+def test_invalidate_every_user() -> None:
+    cache = _cache()
+    cache.put("u1", "get_bills", {}, DAY, "bills")
+    cache.put("u1", "get_habits", {}, DAY, "habits")
+    cache.put("u2", "get_bills", {}, DAY, "other user")
+
+    assert cache.invalidate(None, ["finance"]) == 2
+    assert cache.get("u1", "get_habits", {}, DAY) == "habits"
+    assert cache.invalidate(None) == 1
+
+
+def test_stats_hit_rates() -> None:
+    cache = _cache()
+    assert cache.stats()["hitRate"] is None
+    cache.get("u1", "get_bills", {}, DAY)
+    cache.put("u1", "get_bills", {}, DAY, "bills")
+    cache.get("u1", "get_bills", {}, DAY)
+    cache.get("u1", "get_bills", {}, DAY)
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hitRate"] == 0.667
+    assert stats["tools"]["get_bills"]["hits"] == 2
+
+
+def test_every_registered_tool_declares_its_data_domains() -> None:
+    names = {t.name for dc in build_domain_registry().values() for t in dc.tools}
+    assert names <= TOOL_DATA_DOMAINS.keys()
@@ -0,0 +1,170 @@
+"""Unit tests for tracking analytics — trend, EMA, rolling stats, anomalies, ETA, correlation."""
+
+from __future__ import annotations
+
+import uuid
+from datetime import date, timedelta
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from app.tools.tracking import _analytics
+from app.tools.tracking._analytics import (
+    align_daily,
+    analyze_series,
+    correlate,
+    load_metric_analysis,
+)
+
+START = date(2026, 1, 1)
+
+
+def _days(count: int, step: int = 1) -> list[date]:
+    return [START + timedelta(days=i * step) for i in range(count)]
+
+
+class TestAnalyzeSeries:
+    def test_empty(self) -> None:
+        analysis = analyze_series([], [], target=70.0)
+        assert analysis.points == 0
+        assert analysis.trend == "stable"
+        assert analysis.target_eta is None
+
+    def test_single_point(self) -> None:
+        analysis = analyze_series([START], [80.0])
+        assert analysis.slope_per_day is None
+        assert analysis.ema == 80.0
+        assert analysis.trend == "stable"
+
+    def test_linear_slope_uses_real_day_gaps(self) -> None:
+        # Every other day, -0.1 per day
+        days = _days(30, step=2)
+        values = [90.0 - 0.1 * (d - START).days for d in days]
+        analysis = analyze_series(days, values)
+        assert analysis.slope_per_day == pytest.approx(-0.1)
+        assert analysis.r_squared == 1.0
+        assert analysis.span_days == 58
+        assert analysis.change_over_period == pytest.approx(-5.8)
+        assert analysis.trend == "decreasing"
+
+    def test_single_noisy_entry_does_not_flip_trend(self) -> None:
+        values = [80.0] * 29 + [88.0]
+        analysis = analyze_series(_days(30), values)
+        assert analysis.trend == "stable"
+        assert [a.day for a in analysis.anomalies] == [_days(30)[-1]]
+
+    def test_ema_matches_recursive_definition(self) -> None:
+        rng = np.random.default_rng(1)
+        values = rng.normal(70, 2, 200).tolist()
+        alpha = 2 / (7 + 1)
+        expected = values[0]
+        for v in values[1:]:
+            expected = alpha * v + (1 - alpha) * expected
+        assert analyze_series(_days(200), values).ema == round(expected, 2)
+
+    def test_rolling_window_stats(self) -> None:
+        values = [1.0, 1.0, 1.0, 2.0, 4.0, 4.0, 2.0, 2.0, 4.0, 4.0]
+        analysis = analyze_series(_days(10), values)
+        tail = np.array(values[-7:])
+        assert analysis.rolling_mean == round(float(tail.mean()), 2)
+        assert analysis.rolling_std == round(float(tail.std()), 2)
+
+    def test_anomalies_against_trailing_window(self) -> None:
+        rng = np.random.default_rng(7)
+        values = rng.normal(2000, 50, 60)
+        values[40] = 3500
+        analysis = analyze_series(_days(60), values.tolist())
+        assert _days(60)[40] in [a.day for a in analysis.anomalies]
+        assert all(abs(a.z_score) >= 2.5 for a in analysis.anomalies)
+
+    def test_constant_window_has_no_anomalies(self) -> None:
+        analysis = analyze_series(_days(20), [7.0] * 20)
+        assert analysis.anomalies == ()
+        assert analysis.rolling_std == 0.0
+
+    def test_target_eta_when_heading_to_target(self) -> None:
+        days = _days(60)
+        values = [90.0 - 0.1 * i for i in range(60)]
+        analysis = analyze_series(days, values, target=80.0)
+        assert analysis.target_eta is not None
+        assert analysis.target_eta > days[-1]
+
+    def test_no_eta_when_moving_away(self) -> None:
+        values = [80.0 + 0.1 * i for i in range(60)]
+        assert analyze_series(_days(60), values, target=75.0).target_eta is None
+
+    def test_thousands_of_points(self) -> None:
+        rng = np.random.default_rng(3)
+        values = (80 - 0.01 * np.arange(3000) + rng.normal(0, 0.5, 3000)).tolist()
+        analysis = analyze_series(_days(3000), values)
+        assert analysis.points == 3000
+        assert analysis.slope_per_day == pytest.approx(-0.01, abs=1e-3)
+        assert analysis.trend == "decreasing"
+
+
+class TestLoadMetricAnalysis:
+    async def test_sums_additive_metrics_per_day(self) -> None:
+        daily = AsyncMock(return_value=[(START, 1500.0), (START + timedelta(days=1), 2000.0)])
+        with patch.object(_analytics.TrackingRepository, "get_daily_values", daily):
+            analysis = await load_metric_analysis(
+                AsyncMock(), uuid.uuid4(), "water", START, START + timedelta(days=30)
+            )
+        assert analysis.points == 2
+        assert daily.await_args.kwargs["additive"] is True
+
+    async def test_averages_other_metrics_per_day(self) -> None:
+        daily = AsyncMock(return_value=[])
+        with patch.object(_analytics.TrackingRepository, "get_daily_values", daily):
+            await load_metric_analysis(AsyncMock(), uuid.uuid4(), "weight", START, START)
+        assert daily.await_args.kwargs["additive"] is False
+
+
+class TestCorrelation:
+    def test_align_daily_marks_missing_days(self) -> None:
+        series = {
+            "sleep": [(START, 7.0), (START + timedelta(days=2), 6.0)],
+            "mood": [(START + timedelta(days=1), 8.0), (START + timedelta(days=9), 5.0)],
+        }
+        matrix = align_daily(series, START, START + timedelta(days=3))
+        assert matrix.shape == (2, 4)
+        np.testing.assert_array_equal(matrix[0], [7.0, np.nan, 6.0, np.nan])
+        # Day outside the range is dropped
+        np.testing.assert_array_equal(matrix[1], [np.nan, 8.0, np.nan, np.nan])
+
+    def test_pearson_and_spearman(self) -> None:
+        rng = np.random.default_rng(5)
+        x = rng.normal(7, 1, 60)
+        y = 2 * x + rng.normal(0, 0.1, 60)
+        c = correlate("sleep", x, "mood", y)
+        assert c.paired_days == 60
+        assert c.pearson == pytest.approx(np.corrcoef(x, y)[0, 1], abs=1e-3)
+        assert c.spearman is not None and c.spearman > 0.95
+        assert c.other_mean_when_high is not None and c.other_mean_when_low is not None
+        assert c.other_mean_when_high > c.other_mean_when_low
+
+    def test_spearman_handles_ties_and_monotonic_curves(self) -> None:
+        x = np.array([1.0, 2.0, 2.0, 3.0, 4.0, 5.0, 6.0])
+        c = correlate("a", x, "b", np.exp(x))
+        assert c.spearman == 1.0
+        assert c.pearson is not None and c.pearson < 1.0
+
+    def test_lag_pairs_day_with_following_day(self) -> None:
+        rng = np.random.default_rng(9)
+        sleep = rng.normal(7, 1, 40)
+        # Mood follows the previous night's sleep
+        mood = np.r_[np.nan, sleep[:-1] + 1]
+        assert correlate("sleep", sleep, "mood", mood, lag_days=1).pearson == 1.0
+        same_day = correlate("sleep", sleep, "mood", mood)
+        assert same_day.pearson is not None and abs(same_day.pearson) < 0.9
+
+    def test_missing_days_are_skipped(self) -> None:
+        x = np.array([1.0, np.nan, 3.0, 4.0, 5.0, 6.0, np.nan])
+        y = np.array([2.0, 5.0, np.nan, 8.0, 10.0, 12.0, 1.0])
+        c = correlate("a", x, "b", y)
+        assert c.paired_days == 4
+        assert c.pearson is None  # below the minimum paired days
+
+    def test_constant_series_has_no_correlation(self) -> None:
+        c = correlate("a", np.full(10, 3.0), "b", np.arange(10, dtype=np.float64))
+        assert c.pearson is None and c.spearman is None
@@ -4,19 +4,34 @@ from __future__ import annotations
 
 import json
 import uuid
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
+from zoneinfo import ZoneInfo
 
 import pytest
+from sqlalchemy.dialects import postgresql
 
 from app.db.models.enums import HabitFrequency, LifeArea, PeriodOfDay, SubArea, TrackingType
-from app.db.models.tracking import Habit, HabitCompletion, TrackingEntry
+from app.db.models.tracking import Habit, TrackingEntry
+from app.db.repositories.tracking import HabitStatus
+from app.tools.tracking._analytics import Anomaly, MetricAnalysis
+from app.tools.tracking._series import (
+    MetricBucket,
+    MetricSeries,
+    MetricStats,
+    load_metric_series,
+    pick_bucket,
+)
 from app.tools.tracking.delete_metric import delete_metric
+from app.tools.tracking.delete_metrics import delete_metrics
 from app.tools.tracking.get_habits import get_habits
 from app.tools.tracking.get_history import get_history
+from app.tools.tracking.get_metric_correlations import get_metric_correlations
+from app.tools.tracking.get_tracking_insights import get_tracking_insights
 from app.tools.tracking.record_habit import record_habit
 from app.tools.tracking.record_metric import record_metric
+from app.tools.tracking.record_metrics import record_metrics
 from app.tools.tracking.update_metric import update_metric
 
 # ---------------------------------------------------------------------------
@@ -28,6 +43,11 @@ TEST_ENTRY_ID = "bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb"
 TEST_HABIT_ID = "cccccccc-cccc-cccc-cccc-cccccccccccc"
 
 
+def _user_today() -> date:
+    """Today for ``_make_config``'s user timezone (what date-relative tools compare to)."""
+    return datetime.now(ZoneInfo("America/Sao_Paulo")).date()
+
+
 def _make_config(user_id: str = TEST_USER_ID) -> dict[str, Any]:
     """Create a mock RunnableConfig with session_factory for tool testing."""
     mock_session = AsyncMock()
@@ -88,21 +108,6 @@ def _make_habit(
     return habit
 
 
-def _make_completion(
-    habit_id: str = TEST_HABIT_ID,
-    completion_date: date | None = None,
-) -> HabitCompletion:
-    """Create a mock HabitCompletion."""
-    comp = MagicMock(spec=HabitCompletion)
-    comp.id = uuid.uuid4()
-    comp.habit_id = uuid.UUID(habit_id)
-    comp.user_id = uuid.UUID(TEST_USER_ID)
-    comp.completion_date = completion_date or date.today()
-    comp.source = "chat"
-    comp.notes = None
-    return comp
-
-
 # ---------------------------------------------------------------------------
 # Tests
 # ---------------------------------------------------------------------------
@@ -164,10 +169,15 @@ async def test_record_metric_validation_rejects_out_of_range() -> None:
 
 
 @pytest.mark.asyncio
+@patch("app.tools.tracking.get_history.load_metric_analysis")
+@patch("app.tools.tracking.get_history.load_metric_series")
 @patch("app.tools.tracking.get_history.get_user_session")
 @patch("app.tools.tracking.get_history.TrackingRepository")
 async def test_get_history_returns_formatted_entries(
-    mock_repo: MagicMock, mock_session: MagicMock
+    mock_repo: MagicMock,
+    mock_session: MagicMock,
+    mock_series: AsyncMock,
+    mock_analysis: AsyncMock,
 ) -> None:
     """get_history returns entries with real UUIDs, stats, and a warning note."""
     today = date.today()
@@ -184,6 +194,18 @@ async def test_get_history_returns_formatted_entries(
         ),
     ]
     mock_repo.find_by_filters = AsyncMock(return_value=entries)
+    stats = MetricStats(count=2, average=79.75, min=79.5, max=80.0, sum=159.5)
+    mock_series.return_value = MetricSeries(
+        bucket="day",
+        buckets=(
+            MetricBucket(
+                start=today - timedelta(days=1), stats=MetricStats(1, 79.5, 79.5, 79.5, 79.5)
+            ),
+            MetricBucket(start=today, stats=MetricStats(1, 80.0, 80.0, 80.0, 80.0)),
+        ),
+        total=stats,
+    )
+    mock_analysis.return_value = MetricAnalysis(points=2, slope_per_day=-0.5, trend="decreasing")
     mock_session.return_value = AsyncMock()
     mock_session.return_value.__aenter__ = AsyncMock()
     mock_session.return_value.__aexit__ = AsyncMock(return_value=None)
@@ -201,6 +223,107 @@ async def test_get_history_returns_formatted_entries(
     assert parsed["entries"][0]["id"] == "11111111-1111-1111-1111-111111111111"
     assert parsed["stats"]["count"] == 2
     assert parsed["stats"]["average"] == 79.75
+    assert parsed["series"]["bucket"] == "day"
+    assert parsed["stats"]["trend"] == "decreasing"
+    assert parsed["stats"]["slopePerWeek"] == -3.5
+    assert [p["count"] for p in parsed["series"]["points"]] == [1, 1]
+
+
+@pytest.mark.asyncio
+@patch("app.tools.tracking.get_history.load_metric_analysis")
+@patch("app.tools.tracking.get_history.load_metric_series")
+@patch("app.tools.tracking.get_history.get_user_session")
+@patch("app.tools.tracking.get_history.TrackingRepository")
+async def test_get_history_long_range_uses_exact_stats(
+    mock_repo: MagicMock,
+    mock_session: MagicMock,
+    mock_series: AsyncMock,
+    mock_analysis: AsyncMock,
+) -> None:
+    """A year of entries: stats come from SQL, only the recent entries are listed."""
+    today = date.today()
+    mock_repo.find_by_filters = AsyncMock(
+        return_value=[
+            _make_tracking_entry(entry_id=str(uuid.uuid4()), value=2000.0, entry_date=today)
+            for _ in range(10)
+        ]
+    )
+    mock_series.return_value = MetricSeries(
+        bucket="month",
+        buckets=(),
+        total=MetricStats(count=730, average=1900.0, min=500.0, max=3500.0, sum=1387000.0),
+    )
+    mock_analysis.return_value = MetricAnalysis(points=365, slope_per_day=0.0)
+    mock_session.return_value = AsyncMock()
+    mock_session.return_value.__aenter__ = AsyncMock()
+    mock_session.return_value.__aexit__ = AsyncMock(return_value=None)
+
+    result = await get_history.ainvoke({"metric_type": "water", "days": 365}, _make_config())
+
+    parsed = json.loads(result)
+    assert parsed["stats"]["count"] == 730
+    assert parsed["stats"]["sum"] == 1387000.0
+    assert len(parsed["entries"]) == 10
+    assert mock_series.await_args.args[-1] == "month"
+    assert mock_repo.find_by_filters.await_args.kwargs["limit"] == 10
+
+
+def test_pick_bucket_by_range() -> None:
+    assert pick_bucket(7) == "day"
+    assert pick_bucket(31) == "day"
+    assert pick_bucket(90) == "week"
+    assert pick_bucket(365) == "month"
+    assert pick_bucket(5 * 365) == "year"
+
+
+@pytest.mark.asyncio
+async def test_load_metric_series_groups_in_sql() -> None:
+    """One GROUPING SETS query: bucket rows plus the whole-period row."""
+    start = date(2026, 1, 1)
+    rows = [
+        {
+            "bucket_start": None,
+            "is_total": 1,
+            "count": 3,
+            "average": 2.0,
+            "min": 1.0,
+            "max": 3.0,
+            "sum": 6.0,
+        },
+        {
+            "bucket_start": date(2026, 1, 1),
+            "is_total": 0,
+            "count": 2,
+            "average": 1.5,
+            "min": 1.0,
+            "max": 2.0,
+            "sum": 3.0,
+        },
+        {
+            "bucket_start": date(2026, 2, 1),
+            "is_total": 0,
+            "count": 1,
+            "average": 3.0,
+            "min": 3.0,
+            "max": 3.0,
+            "sum": 3.0,
+        },
+    ]
+    result = MagicMock()
+    result.mappings.return_value.all.return_value = rows
+    session = AsyncMock()
+    session.execute = AsyncMock(return_value=result)
+
+    series = await load_metric_series(
+        session, uuid.UUID(TEST_USER_ID), "water", start, date(2026, 2, 28), "month"
+    )
+
+    assert series.total == MetricStats(count=3, average=2.0, min=1.0, max=3.0, sum=6.0)
+    assert [b.start for b in series.buckets] == [date(2026, 1, 1), date(2026, 2, 1)]
+    assert session.execute.await_count == 1
+    sql = str(session.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "date_trunc('month'" in sql
+    assert "GROUPING SETS" in sql
 
 
 @pytest.mark.asyncio
@@ -248,6 +371,133 @@ async def test_delete_metric_success(mock_repo: MagicMock, mock_session: MagicMo
     assert "peso" in parsed["message"]
 
 
+@pytest.mark.asyncio
+@patch("app.tools.tracking.record_metrics.get_user_session")
+@patch("app.tools.tracking.record_metrics.TrackingRepository")
+async def test_record_metrics_single_batch_insert(
+    mock_repo: MagicMock, mock_session: MagicMock
+) -> None:
+    """record_metrics writes every entry with one create_batch call."""
+    mock_repo.create_batch = AsyncMock(return_value=3)
+    mock_session.return_value = AsyncMock()
+    mock_session.return_value.__aenter__ = AsyncMock()
+    mock_session.return_value.__aexit__ = AsyncMock(return_value=None)
+
+    result = await record_metrics.ainvoke(
+        {
+            "entries": [
+                {"metric_type": "water", "value": 2000.0, "date": "2026-02-23"},
+                {"metric_type": "sleep", "value": 7.5, "date": "2026-02-23"},
+                {"metric_type": "mood", "value": 8, "notes": "dia bom"},
+            ]
+        },
+        _make_config(),
+    )
+
+    parsed = json.loads(result)
+    assert parsed["success"] is True
+    assert parsed["count"] == 3
+    assert len(parsed["entryIds"]) == 3
+    assert "água = 2000.0 ml em 2026-02-23" in parsed["message"]
+    mock_repo.create_batch.assert_awaited_once()
+    rows = mock_repo.create_batch.await_args.args[1]
+    assert [r["type"] for r in rows] == ["water", "sleep", "mood"]
+    assert rows[1]["unit"] == "hours"
+    assert rows[2]["entry_metadata"] == {"notes": "dia bom"}
+    assert [r["id"] for r in rows] == [uuid.UUID(i) for i in parsed["entryIds"]]
+
+
+@pytest.mark.asyncio
+@patch("app.tools.tracking.record_metrics.get_user_session")
+@patch("app.tools.tracking.record_metrics.TrackingRepository")
+async def test_record_metrics_rejects_whole_batch_on_invalid_entry(
+    mock_repo: MagicMock, mock_session: MagicMock
+) -> None:
+    """One invalid entry → nothing is written and every problem is reported."""
+    mock_repo.create_batch = AsyncMock()
+
+    result = await record_metrics.ainvoke(
+        {
+            "entries": [
+                {"metric_type": "water", "value": 2000.0},
+                {"metric_type": "weight", "value": 600.0},
+                {"metric_type": "sleep", "value": 7.0, "date": "23/02/2026"},
+            ]
+        },
+        _make_config(),
+    )
+
+    parsed = json.loads(result)
+    assert "#2" in parsed["error"]
+    assert "#3" in parsed["error"]
+    assert "#1" not in parsed["error"]
+    mock_repo.create_batch.assert_not_called()
+    mock_session.assert_not_called()
+
+
+@pytest.mark.asyncio
+@patch("app.tools.tracking.delete_metrics.get_user_session")
+@patch("app.tools.tracking.delete_metrics.TrackingRepository")
+async def test_delete_metrics_by_ids(mock_repo: MagicMock, mock_session: MagicMock) -> None:
+    """delete_metrics deletes the ids in one statement and reports missing ones."""
+    other_id = "dddddddd-dddd-dddd-dddd-dddddddddddd"
+    mock_repo.delete_batch = AsyncMock(return_value=1)
+    mock_session.return_value = AsyncMock()
+    mock_session.return_value.__aenter__ = AsyncMock()
+    mock_session.return_value.__aexit__ = AsyncMock(return_value=None)
+
+    result = await delete_metrics.ainvoke(
+        {"entry_ids": [TEST_ENTRY_ID, other_id, TEST_ENTRY_ID]}, _make_config()
+    )
+
+    parsed = json.loads(result)
+    assert parsed["deletedCount"] == 1
+    assert parsed["notFoundCount"] == 1
+    ids = mock_repo.delete_batch.await_args.args[1]
+    assert ids == [uuid.UUID(TEST_ENTRY_ID), uuid.UUID(other_id)]
+
+
+@pytest.mark.asyncio
+@patch("app.tools.tracking.delete_metrics.get_user_session")
+@patch("app.tools.tracking.delete_metrics.TrackingRepository")
+async def test_delete_metrics_by_range(mock_repo: MagicMock, mock_session: MagicMock) -> None:
+    """delete_metrics with a type and period issues one range delete."""
+    mock_repo.delete_by_range = AsyncMock(return_value=14)
+    mock_session.return_value = AsyncMock()
+    mock_session.return_value.__aenter__ = AsyncMock()
+    mock_session.return_value.__aexit__ = AsyncMock(return_value=None)
+
+    result = await delete_metrics.ainvoke(
+        {"metric_type": "water", "date_from": "2026-01-20", "date_to": "2026-01-26"},
+        _make_config(),
+    )
+
+    parsed = json.loads(result)
+    assert parsed["deletedCount"] == 14
+    assert "água" in parsed["message"]
+    args = mock_repo.delete_by_range.await_args.args
+    assert args[1:] == (uuid.UUID(TEST_USER_ID), "water", date(2026, 1, 20), date(2026, 1, 26))
+
+
+@pytest.mark.asyncio
+@patch("app.tools.tracking.delete_metrics.get_user_session")
+async def test_delete_metrics_validates_before_touching_db(mock_session: MagicMock) -> None:
+    """Invalid ids, types, dates or mixed modes never open a session."""
+    config = _make_config()
+    invalid_calls: list[dict[str, Any]] = [
+        {"entry_ids": [TEST_ENTRY_ID, "sleep-12345"]},
+        {"metric_type": "steps", "date_from": "2026-01-20"},
+        {"metric_type": "water", "date_from": "2026-01-26", "date_to": "2026-01-20"},
+        {"metric_type": "water", "date_from": "20/01/2026"},
+        {"metric_type": "water"},
+        {"entry_ids": [TEST_ENTRY_ID], "metric_type": "water", "date_from": "2026-01-20"},
+    ]
+    for args in invalid_calls:
+        parsed = json.loads(await delete_metrics.ainvoke(args, config))
+        assert "error" in parsed, args
+    mock_session.assert_not_called()
+
+
 @pytest.mark.asyncio
 @patch("app.tools.tracking.record_habit.get_user_session")
 @patch("app.tools.tracking.record_habit.TrackingRepository")
@@ -265,11 +515,10 @@ async def test_record_habit_fuzzy_matching(mock_repo: MagicMock, mock_session: M
             icon="💪",
         ),
     ]
-    mock_repo.get_habits = AsyncMock(return_value=habits)
-    mock_repo.get_completion_for_date = AsyncMock(return_value=None)
+    mock_repo.get_habits_with_status = AsyncMock(
+        return_value=[HabitStatus(habit=h, completed=False, recent_dates=[]) for h in habits]
+    )
     mock_repo.create_habit_completion = AsyncMock()
-    mock_repo.get_recent_completions = AsyncMock(return_value=[])
-    mock_repo.compute_streak = MagicMock(return_value=1)
     mock_session.return_value = AsyncMock()
     mock_session.return_value.__aenter__ = AsyncMock()
     mock_session.return_value.__aexit__ = AsyncMock(return_value=None)
@@ -286,9 +535,7 @@ async def test_record_habit_fuzzy_matching(mock_repo: MagicMock, mock_session: M
     assert parsed["habitName"] == "Meditação"
 
     # Reset mocks for second invocation
-    mock_repo.get_completion_for_date = AsyncMock(return_value=None)
     mock_repo.create_habit_completion = AsyncMock()
-    mock_repo.get_recent_completions = AsyncMock(return_value=[])
 
     # "exerc" should match "Exercício" via contains
     result = await record_habit.ainvoke(
@@ -308,10 +555,11 @@ async def test_record_habit_already_completed(
 ) -> None:
     """record_habit returns graceful message when habit is already completed for date."""
     habit = _make_habit()
-    existing_completion = _make_completion(completion_date=date(2026, 2, 23))
 
-    mock_repo.get_habits = AsyncMock(return_value=[habit])
-    mock_repo.get_completion_for_date = AsyncMock(return_value=existing_completion)
+    mock_repo.get_habits_with_status = AsyncMock(
+        return_value=[HabitStatus(habit=habit, completed=True, recent_dates=[date(2026, 2, 23)])]
+    )
+    mock_repo.create_habit_completion = AsyncMock()
     mock_session.return_value = AsyncMock()
     mock_session.return_value.__aenter__ = AsyncMock()
     mock_session.return_value.__aexit__ = AsyncMock(return_value=None)
@@ -326,6 +574,7 @@ async def test_record_habit_already_completed(
     assert parsed["success"] is False
     assert parsed["alreadyCompleted"] is True
     assert "já estava marcado" in parsed["message"]
+    mock_repo.create_habit_completion.assert_not_awaited()
 
 
 @pytest.mark.asyncio
@@ -336,16 +585,12 @@ async def test_get_habits_with_streaks_and_today_status(
 ) -> None:
     """get_habits returns formatted list with streaks and today status."""
     habit = _make_habit()
-    today = date.today()
-    completions = [
-        _make_completion(completion_date=today),
-        _make_completion(completion_date=today - timedelta(days=1)),
-    ]
+    today = _user_today()
+    recent = [today, today - timedelta(days=1)]
 
-    mock_repo.get_habits = AsyncMock(return_value=[habit])
-    mock_repo.get_recent_completions = AsyncMock(return_value=completions)
-    mock_repo.compute_streak = MagicMock(return_value=2)
-    mock_repo.get_completion_for_date = AsyncMock(return_value=completions[0])
+    mock_repo.get_habits_with_status = AsyncMock(
+        return_value=[HabitStatus(habit=habit, completed=True, recent_dates=recent)]
+    )
     mock_session.return_value = AsyncMock()
     mock_session.return_value.__aenter__ = AsyncMock()
     mock_session.return_value.__aexit__ = AsyncMock(return_value=None)
@@ -363,3 +608,201 @@ async def test_get_habits_with_streaks_and_today_status(
     assert h["icon"] == "🧘"
     assert h["currentStreak"] == 2
     assert h["completedToday"] is True
+
+
+@pytest.mark.asyncio
+@patch("app.tools.tracking.get_tracking_insights.load_metric_analysis")
+@patch("app.tools.tracking.get_tracking_insights.get_user_session")
+async def test_get_tracking_insights_with_goal(
+    mock_session: MagicMock, mock_analysis: AsyncMock
+) -> None:
+    """get_tracking_insights returns trend, anomalies and the goal ETA."""
+    mock_analysis.return_value = MetricAnalysis(
+        points=120,
+        span_days=119,
+        mean=82.1,
+        slope_per_day=-0.05,
+        r_squared=0.91,
+        trend="decreasing",
+        ema=80.2,
+        rolling_mean=80.3,
+        rolling_std=0.4,
+        anomalies=(Anomaly(day=date(2026, 9, 1), value=85.0, z_score=3.1),),
+        target=78.0,
+        target_eta=date(2026, 12, 1),
+    )
+    mock_session.return_value = AsyncMock()
+    mock_session.return_value.__aenter__ = AsyncMock()
+    mock_session.return_value.__aexit__ = AsyncMock(return_value=None)
+
+    result = await get_tracking_insights.ainvoke(
+        {"metric_type": "weight", "target_value": 78.0}, _make_config()
+    )
+
+    parsed = json.loads(result)
+    assert parsed["trend"]["direction"] == "decreasing"
+    assert parsed["trend"]["slopePerWeek"] == -0.35
+    assert parsed["trend"]["changeOverPeriod"] == -5.95
+    assert parsed["anomalies"] == [{"date": "2026-09-01", "value": 85.0, "zScore": 3.1}]
+    assert parsed["goal"] == {"target": 78.0, "estimatedDate": "2026-12-01", "onTrack": True}
+    assert mock_analysis.await_args.kwargs["target"] == 78.0
+
+
+@pytest.mark.asyncio
+@patch("app.tools.tracking.get_tracking_insights.load_metric_analysis")
+@patch("app.tools.tracking.get_tracking_insights.get_user_session")
+async def test_get_tracking_insights_no_data(
+    mock_session: MagicMock, mock_analysis: AsyncMock
+) -> None:
+    mock_analysis.return_value = MetricAnalysis(points=0)
+    mock_session.return_value = AsyncMock()
+    mock_session.return_value.__aenter__ = AsyncMock()
+    mock_session.return_value.__aexit__ = AsyncMock(return_value=None)
+
+    result = await get_tracking_insights.ainvoke({"metric_type": "sleep"}, _make_config())
+
+    parsed = json.loads(result)
+    assert parsed["daysWithData"] == 0
+    assert "goal" not in parsed
+
+
+@pytest.mark.asyncio
+@patch("app.tools.tracking.get_metric_correlations.get_user_session")
+@patch("app.tools.tracking.get_metric_correlations.TrackingRepository")
+async def test_get_metric_correlations_one_query(
+    mock_repo: MagicMock, mock_session: MagicMock
+) -> None:
+    """Several metrics come from one query and are correlated same-day and lagged."""
+    today = date.today()
+    sleep = [(today - timedelta(days=i), 6.0 + (i % 3)) for i in range(30)]
+    mood = [(d + timedelta(days=1), 2 * v) for d, v in sleep if d < today]
+    mock_repo.get_daily_values_by_type = AsyncMock(return_value={"sleep": sleep, "mood": mood})
+    mock_session.return_value = AsyncMock()
+    mock_session.return_value.__aenter__ = AsyncMock()
+    mock_session.return_value.__aexit__ = AsyncMock(return_value=None)
+
+    result = await get_metric_correlations.ainvoke(
+        {"metric_types": ["sleep", "mood"], "days": 30, "max_lag_days": 1}, _make_config()
+    )
+
+    parsed = json.loads(result)
+    mock_repo.get_daily_values_by_type.assert_awaited_once()
+    assert parsed["daysWithData"] == {"sleep": 30, "mood": 29}
+    assert parsed["strongest"]["metric"] == "sleep"
+    assert parsed["strongest"]["other"] == "mood"
+    assert parsed["strongest"]["lagDays"] == 1
+    assert parsed["strongest"]["spearman"] == 1.0
+    assert parsed["strongest"]["strength"] == "strong"
+    assert {(c["metric"], c["other"], c["lagDays"]) for c in parsed["correlations"]} == {
+        ("sleep", "mood", 0),
+        ("sleep", "mood", 1),
+        ("mood", "sleep", 1),
+    }
+
+
+@pytest.mark.asyncio
+async def test_get_metric_correlations_validates_metrics() -> None:
+    config = _make_config()
+    result = await get_metric_correlations.ainvoke({"metric_types": ["sleep"]}, config)
+    assert "error" in json.loads(result)
+    result = await get_metric_correlations.ainvoke({"metric_types": ["sleep", "steps"]}, config)
+    assert "steps" in json.loads(result)["error"]
+
+
+# ---------------------------------------------------------------------------
+# Habit status query count (N+1 regression)
+# ---------------------------------------------------------------------------
+
+
+def _habit_status_session(rows: list[tuple[Habit, bool, list[date]]]) -> AsyncMock:
+    """Mock session whose every execute() returns *rows* — drives the real repository."""
+    session = AsyncMock()
+    session.add = MagicMock()
+    result = MagicMock()
+    result.all.return_value = rows
+    session.execute = AsyncMock(return_value=result)
+    return session
+
+
+def _patch_session(mock_get_session: MagicMock, session: AsyncMock) -> None:
+    mock_get_session.return_value = AsyncMock()
+    mock_get_session.return_value.__aenter__ = AsyncMock(return_value=session)
+    mock_get_session.return_value.__aexit__ = AsyncMock(return_value=None)
+
+
+@pytest.mark.asyncio
+@patch("app.tools.tracking.get_habits.get_user_session")
+async def test_get_habits_uses_one_query_for_many_habits(mock_get_session: MagicMock) -> None:
+    """15 habits with streaks and today status cost a single round trip."""
+    today = _user_today()
+    rows = [
+        (
+            _make_habit(habit_id=str(uuid.uuid4()), name=f"Hábito {i}"),
+            i % 2 == 0,
+            [today - timedelta(days=d) for d in range(i % 4)],
+        )
+        for i in range(15)
+    ]
+    session = _habit_status_session(rows)
+    _patch_session(mock_get_session, session)
+
+    result = await get_habits.ainvoke(
+        {"include_streaks": True, "include_today_status": True},
+        _make_config(),
+    )
+
+    parsed = json.loads(result)
+    assert parsed["count"] == 15
+    assert session.execute.await_count == 1
+    assert [h["currentStreak"] for h in parsed["habits"]] == [i % 4 for i in range(15)]
+    assert [h["completedToday"] for h in parsed["habits"]] == [i % 2 == 0 for i in range(15)]
+
+
+@pytest.mark.asyncio
+@patch("app.tools.tracking.record_habit.get_user_session")
+async def test_record_habit_computes_streak_without_requery(mock_get_session: MagicMock) -> None:
+    """record_habit matches, checks and computes the streak from the one status query."""
+    target = date(2026, 2, 23)
+    rows = [
+        (_make_habit(habit_id=str(uuid.uuid4()), name=f"Hábito {i}"), False, []) for i in range(14)
+    ]
+    rows.append((_make_habit(), False, [target - timedelta(days=1), target - timedelta(days=2)]))
+    session = _habit_status_session(rows)
+    _patch_session(mock_get_session, session)
+
+    result = await record_habit.ainvoke(
+        {"habit_name": "Meditação", "date": target.isoformat()},
+        _make_config(),
+    )
+
+    parsed = json.loads(result)
+    assert parsed["success"] is True
+    assert parsed["currentStreak"] == 3
+    assert session.execute.await_count == 1
+    session.add.assert_called_once()
+
+
+@pytest.mark.asyncio
+@patch("app.tools.tracking.record_habit.remember_completion")
+@patch("app.tools.tracking.record_habit.get_user_session")
+async def test_record_habit_caches_completion_only_after_commit(
+    mock_get_session: MagicMock, mock_remember: MagicMock
+) -> None:
+    """A completion rolled back at commit never reaches the habit calendar cache."""
+    target = date(2026, 2, 23)
+    session = _habit_status_session([(_make_habit(), False, [])])
+    _patch_session(mock_get_session, session)
+    mock_get_session.return_value.__aexit__ = AsyncMock(side_effect=RuntimeError("commit failed"))
+
+    with pytest.raises(RuntimeError, match="commit failed"):
+        await record_habit.ainvoke(
+            {"habit_name": "Meditação", "date": target.isoformat()}, _make_config()
+        )
+    mock_remember.assert_not_called()
+
+    mock_get_session.return_value.__aexit__ = AsyncMock(return_value=None)
+    await record_habit.ainvoke(
+        {"habit_name": "Meditação", "date": target.isoformat()}, _make_config()
+    )
+    mock_remember.assert_called_once()
+    assert mock_remember.call_args[0][2] == target
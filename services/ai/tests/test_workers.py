@@ -2,8 +2,10 @@
 
 from __future__ import annotations
 
+import uuid
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
+from typing import Any
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -45,8 +47,10 @@ async def test_scheduler_registers_jobs_per_timezone() -> None:
     mock_get_service_session, mock_session = _mock_service_session()
 
     mock_settings = MagicMock()
+    mock_settings.CONSOLIDATION_ENABLED = True
     mock_settings.CONSOLIDATION_CRON_HOUR = 3
     mock_settings.CONSOLIDATION_CRON_MINUTE = 0
+    mock_settings.FINANCE_ROLLUP_RECONCILE_ENABLED = False
 
     timezones = ["America/Sao_Paulo", "Europe/London"]
 
@@ -85,6 +89,68 @@ async def test_scheduler_registers_jobs_per_timezone() -> None:
         assert result is scheduler_instance
 
 
+async def test_scheduler_registers_finance_rollup_reconcile() -> None:
+    mock_get_service_session, _ = _mock_service_session()
+
+    mock_settings = MagicMock()
+    mock_settings.CONSOLIDATION_ENABLED = True
+    mock_settings.FINANCE_ROLLUP_RECONCILE_ENABLED = True
+    mock_settings.FINANCE_ROLLUP_RECONCILE_CRON_HOUR = 4
+    mock_settings.FINANCE_ROLLUP_RECONCILE_CRON_MINUTE = 30
+
+    with (
+        patch(
+            "app.workers.scheduler.get_service_session",
+            side_effect=mock_get_service_session.side_effect,
+        ),
+        patch(
+            "app.workers.scheduler.UserRepository.get_distinct_timezones",
+            return_value=[],
+        ),
+        patch("app.workers.scheduler.get_settings", return_value=mock_settings),
+        patch("app.workers.scheduler.AsyncIOScheduler") as MockScheduler,
+        patch("app.workers.scheduler.CronTrigger") as MockCronTrigger,
+    ):
+        from app.workers.scheduler import setup_scheduler
+
+        await setup_scheduler(MagicMock())
+
+        # Registered even when no user timezone has consolidation jobs yet
+        scheduler_instance = MockScheduler.return_value
+        scheduler_instance.add_job.assert_called_once()
+        call = scheduler_instance.add_job.call_args
+        assert call.args[0] == "app.workers.finance_rollups:enqueue_finance_rollup_reconcile"
+        assert call.kwargs["id"] == "finance_rollup_reconcile"
+        MockCronTrigger.assert_called_once_with(hour=4, minute=30, timezone="UTC")
+
+
+async def test_scheduler_registers_finance_rollup_reconcile_without_consolidation() -> None:
+    mock_settings = MagicMock()
+    mock_settings.CONSOLIDATION_ENABLED = False
+    mock_settings.FINANCE_ROLLUP_RECONCILE_ENABLED = True
+    mock_settings.FINANCE_ROLLUP_RECONCILE_CRON_HOUR = 4
+    mock_settings.FINANCE_ROLLUP_RECONCILE_CRON_MINUTE = 30
+
+    with (
+        patch(
+            "app.workers.scheduler.UserRepository.get_distinct_timezones",
+            new_callable=AsyncMock,
+        ) as mock_timezones,
+        patch("app.workers.scheduler.get_settings", return_value=mock_settings),
+        patch("app.workers.scheduler.AsyncIOScheduler") as MockScheduler,
+        patch("app.workers.scheduler.CronTrigger"),
+    ):
+        from app.workers.scheduler import setup_scheduler
+
+        await setup_scheduler(MagicMock())
+
+        scheduler_instance = MockScheduler.return_value
+        scheduler_instance.add_job.assert_called_once()
+        assert scheduler_instance.add_job.call_args.kwargs["id"] == "finance_rollup_reconcile"
+        scheduler_instance.start.assert_called_once()
+        mock_timezones.assert_not_awaited()
+
+
 # ---------------------------------------------------------------------------
 # 8 — refresh_schedules only adds new timezones
 # ---------------------------------------------------------------------------
@@ -94,6 +160,7 @@ async def test_refresh_schedules_only_adds_new_timezones() -> None:
     mock_get_service_session, _ = _mock_service_session()
 
     mock_settings = MagicMock()
+    mock_settings.CONSOLIDATION_ENABLED = True
     mock_settings.CONSOLIDATION_CRON_HOUR = 3
     mock_settings.CONSOLIDATION_CRON_MINUTE = 0
 
@@ -184,6 +251,7 @@ def workers_app() -> FastAPI:
     test_app = FastAPI()
     test_app.add_middleware(ServiceAuthMiddleware, service_secret=TEST_SERVICE_SECRET)
     test_app.include_router(workers_router)
+    test_app.state.session_factory = MagicMock()
     return test_app
 
 
@@ -197,19 +265,13 @@ async def workers_client(workers_app: FastAPI) -> AsyncIterator[AsyncClient]:
 _AUTH = {"Authorization": f"Bearer {TEST_SERVICE_SECRET}"}
 
 
-async def test_trigger_endpoint_with_user_id(workers_client: AsyncClient) -> None:
-    from app.workers.consolidation import ConsolidationResult
+_JOB_ID = uuid.UUID("cccccccc-cccc-cccc-cccc-cccccccccccc")
+_W = "app.api.routes.workers"
 
-    result = ConsolidationResult(
-        users_processed=1,
-        users_consolidated=1,
-        completed_at="2026-01-01T00:00:00",
-    )
 
+async def test_trigger_endpoint_with_user_id(workers_client: AsyncClient) -> None:
     with patch(
-        "app.api.routes.workers.run_consolidation_for_user",
-        new_callable=AsyncMock,
-        return_value=result,
+        f"{_W}.enqueue_consolidation_batch", new_callable=AsyncMock, return_value=_JOB_ID
     ) as mock_fn:
         resp = await workers_client.post(
             "/workers/consolidation/trigger",
@@ -217,24 +279,29 @@ async def test_trigger_endpoint_with_user_id(workers_client: AsyncClient) -> Non
             headers=_AUTH,
         )
 
-    assert resp.status_code == 200
-    mock_fn.assert_called_once_with("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")
+    # Returns right away with a job id instead of running inside the request
+    assert resp.status_code == 202
+    assert resp.json() == {"job_id": str(_JOB_ID), "status": "pending"}
+    mock_fn.assert_called_once_with(user_ids=[uuid.UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa")])
 
 
-async def test_trigger_endpoint_with_timezone(workers_client: AsyncClient) -> None:
-    from app.workers.consolidation import ConsolidationResult
+async def test_trigger_endpoint_with_user_ids_batch(workers_client: AsyncClient) -> None:
+    ids = [str(uuid.uuid4()) for _ in range(3)]
 
-    result = ConsolidationResult(
-        users_processed=3,
-        users_consolidated=2,
-        users_skipped=1,
-        completed_at="2026-01-01T00:00:00",
-    )
+    with patch(
+        f"{_W}.enqueue_consolidation_batch", new_callable=AsyncMock, return_value=_JOB_ID
+    ) as mock_fn:
+        resp = await workers_client.post(
+            "/workers/consolidation/trigger", json={"user_ids": ids}, headers=_AUTH
+        )
 
+    assert resp.status_code == 202
+    assert mock_fn.call_args.kwargs["user_ids"] == [uuid.UUID(u) for u in ids]
+
+
+async def test_trigger_endpoint_with_timezone(workers_client: AsyncClient) -> None:
     with patch(
-        "app.api.routes.workers.run_consolidation",
-        new_callable=AsyncMock,
-        return_value=result,
+        f"{_W}.enqueue_consolidation_batch", new_callable=AsyncMock, return_value=_JOB_ID
     ) as mock_fn:
         resp = await workers_client.post(
             "/workers/consolidation/trigger",
@@ -242,8 +309,8 @@ async def test_trigger_endpoint_with_timezone(workers_client: AsyncClient) -> No
             headers=_AUTH,
         )
 
-    assert resp.status_code == 200
-    mock_fn.assert_called_once_with("America/Sao_Paulo")
+    assert resp.status_code == 202
+    mock_fn.assert_called_once_with(timezone="America/Sao_Paulo")
 
 
 async def test_trigger_endpoint_with_neither(workers_client: AsyncClient) -> None:
@@ -253,6 +320,127 @@ async def test_trigger_endpoint_with_neither(workers_client: AsyncClient) -> Non
         headers=_AUTH,
     )
 
+    assert resp.status_code == 422
+
+
+async def test_trigger_endpoint_rejects_invalid_user_id(workers_client: AsyncClient) -> None:
+    with patch(f"{_W}.enqueue_consolidation_batch", new_callable=AsyncMock) as mock_fn:
+        resp = await workers_client.post(
+            "/workers/consolidation/trigger", json={"user_ids": ["nope"]}, headers=_AUTH
+        )
+
+    assert resp.status_code == 422
+    mock_fn.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# 14 — job status, progress stream and cancellation
+# ---------------------------------------------------------------------------
+
+
+def _mock_job(status: str = "completed") -> MagicMock:
+    from app.db.models.enums import JobStatus
+
+    job = MagicMock()
+    job.id = _JOB_ID
+    job.queue = "consolidation_batch"
+    job.status = JobStatus(status)
+    job.attempts = 1
+    job.max_attempts = 3
+    job.last_error = None
+    job.result = {"users_enqueued": 3}
+    job.created_at = None
+    job.started_at = None
+    job.finished_at = None
+    return job
+
+
+def _patch_job_reads(
+    job: MagicMock | None, *by_status: dict[str, int], counters: dict[str, float] | None = None
+) -> tuple[Any, ...]:
+    """Patch the repository reads behind the status endpoints.
+
+    Each ``by_status`` dict is returned by one successive status read.
+    """
+    from app.db.models.enums import JobStatus
+
+    mock_get_service_session, _ = _mock_service_session()
+    return (
+        patch(f"{_W}.get_service_session", side_effect=mock_get_service_session.side_effect),
+        patch(f"{_W}.JobRepository.get_by_id", new_callable=AsyncMock, return_value=job),
+        patch(
+            f"{_W}.JobRepository.count_children_by_status",
+            new_callable=AsyncMock,
+            side_effect=[{JobStatus(k): v for k, v in d.items()} for d in by_status],
+        ),
+        patch(
+            f"{_W}.JobRepository.sum_children_results",
+            new_callable=AsyncMock,
+            return_value=counters or {},
+        ),
+    )
+
+
+async def test_get_job_aggregates_children(workers_client: AsyncClient) -> None:
+    p_session, p_get, p_counts, p_sums = _patch_job_reads(
+        _mock_job("completed"),
+        {"completed": 2, "running": 1},
+        counters={"users_consolidated": 2.0, "users_skipped": 0.0},
+    )
+    with p_session, p_get, p_counts, p_sums:
+        resp = await workers_client.get(f"/workers/jobs/{_JOB_ID}", headers=_AUTH)
+
     assert resp.status_code == 200
     data = resp.json()
-    assert data["errors"] == 1
+    assert data["status"] == "completed"
+    assert data["progress"]["total"] == 3
+    assert data["progress"]["running"] == 1
+    assert data["counters"]["users_consolidated"] == 2.0
+    # Fan-out finished but a child is still running
+    assert data["done"] is False
+
+
+async def test_get_job_not_found(workers_client: AsyncClient) -> None:
+    p_session, p_get, p_counts, p_sums = _patch_job_reads(None)
+    with p_session, p_get, p_counts, p_sums:
+        resp = await workers_client.get(f"/workers/jobs/{_JOB_ID}", headers=_AUTH)
+
+    assert resp.status_code == 404
+
+
+async def test_job_events_stream_until_done(workers_client: AsyncClient) -> None:
+    p_session, p_get, p_counts, p_sums = _patch_job_reads(
+        _mock_job("completed"),
+        {"pending": 2},
+        {"pending": 2},  # unchanged → no duplicate event
+        {"completed": 1, "running": 1},
+        {"completed": 2},
+    )
+    settings = MagicMock(JOB_PROGRESS_POLL_SECONDS=0)
+    with p_session, p_get, p_counts, p_sums, patch(f"{_W}.get_settings", return_value=settings):
+        resp = await workers_client.get(f"/workers/jobs/{_JOB_ID}/events", headers=_AUTH)
+
+    events = [
+        line.split(":", 1)[1].strip()
+        for line in resp.text.splitlines()
+        if line.startswith("event:")
+    ]
+    assert events == ["progress", "progress", "done"]
+
+
+async def test_cancel_job(workers_client: AsyncClient) -> None:
+    mock_get_service_session, _ = _mock_service_session()
+    with (
+        patch(f"{_W}.get_service_session", side_effect=mock_get_service_session.side_effect),
+        patch(
+            f"{_W}.JobRepository.get_by_id",
+            new_callable=AsyncMock,
+            return_value=_mock_job("running"),
+        ),
+        patch(f"{_W}.JobRepository.cancel", new_callable=AsyncMock, return_value=4) as mock_cancel,
+    ):
+        resp = await workers_client.post(f"/workers/jobs/{_JOB_ID}/cancel", headers=_AUTH)
+
+    assert resp.status_code == 200
+    assert resp.json() == {"job_id": str(_JOB_ID), "cancelled": 4}
+    mock_cancel.assert_awaited_once()